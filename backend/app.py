@@ -18,10 +18,22 @@ from models import (users,user_company_companylocation ,
                     permissions, user_company, payments, 
                     subscriptions, dashboards, user_dashboard_permissions, 
                     uploaded_files, file_permissions, companies, master_file, 
-                    logs, storeorders, mails
+                    logs, storeorders, mails, upload_jobs, calendar_dim,
+                    storeorder_lines, email_outbox, scheduler_state,
+                    scheduler_leases, sent_log, master_file_items,
+                    price_change_events, delete_jobs, ingestion_batches
                     )
 from database import get_db
 from tasks.email_scheduler import start_scheduler, stop_scheduler, get_scheduler_status
+from utils.dashboard_executor import shutdown_dashboard_pool
+from utils.request_executor import shutdown_request_executor
+from utils.password_hashing import shutdown_password_hashing
+from utils.pagination import NEXT_CURSOR_HEADER
+from migrations.runner import check_schema_version
+from tasks.upload_jobs import start_upload_workers, stop_upload_workers
+from tasks.delete_jobs import start_delete_worker, stop_delete_worker
+from tasks.partition_maintenance import start_partition_maintenance, stop_partition_maintenance
+from tasks.email_outbox import start_email_outbox_workers, stop_email_outbox_workers, get_outbox_stats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,24 +42,9 @@ logger = logging.getLogger(__name__)
 # Initialize FastAPI app
 app = FastAPI()
 
-# Create all tables
-logger.info("Creating database tables...")
-users.Base.metadata.create_all(bind=engine)
-user_company_companylocation.Base.metadata.create_all(bind=engine)
-user_dashboard_permissions.Base.metadata.create_all(bind=engine)
-uploaded_files.Base.metadata.create_all(bind=engine)
-subscriptions.Base.metadata.create_all(bind=engine)
-locations.Base.metadata.create_all(bind=engine)
-payments.Base.metadata.create_all(bind=engine)
-file_permissions.Base.metadata.create_all(bind=engine)
-companies.Base.metadata.create_all(bind=engine)
-user_company.Base.metadata.create_all(bind=engine)
-permissions.Base.metadata.create_all(bind=engine)
-company_locations.Base.metadata.create_all(bind=engine)
-master_file.Base.metadata.create_all(bind=engine)
-logs.Base.metadata.create_all(bind=engine)
-storeorders.Base.metadata.create_all(bind=engine)
-mails.Base.metadata.create_all(bind=engine)
+# The schema is created and upgraded by `python -m migrations upgrade`, not here:
+# workers only check that the database is at the code's schema revision
+check_schema_version(engine)
 
 db_dependency = Annotated[Session, Depends(get_db)]
 
@@ -58,6 +55,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Directory to save uploaded files
@@ -73,6 +71,11 @@ async def root():
 async def scheduler_status():
     return get_scheduler_status()
 
+@app.get("/email/outbox/status")
+def email_outbox_status():
+    """Email outbox throughput, queue depth and SMTP pool usage"""
+    return get_outbox_stats()
+
 @app.post("/scheduler/restart")
 async def restart_scheduler():
     """Restart the email scheduler"""
@@ -101,7 +104,8 @@ from routers import (users, company_locations, companies,
                      uploaded_files, permissions, user_company,   
                      file_permissions, company_overview, logs, 
                      storeorders, mails, sales_pmix,
-                     budget, financials_company_wide
+                     budget, financials_company_wide, upload_jobs,
+                     delete_jobs
                      )
 
 app.include_router(users.router)
@@ -124,6 +128,8 @@ app.include_router(mails.router)
 app.include_router(sales_pmix.router)
 app.include_router(financials_company_wide.router)
 app.include_router(budget.router)
+app.include_router(upload_jobs.router)
+app.include_router(delete_jobs.router)
 
 from dependencies.init_superuser import create_default_superusers
 from routers import auth
@@ -143,7 +149,9 @@ async def startup_event():
         logger.error(f"Error creating superusers: {e}")
     finally:
         db.close()
-    
+
+    # Data backfills run as schema revisions (python -m migrations upgrade)
+
     # Start email scheduler
     try:
         start_scheduler()
@@ -151,6 +159,30 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to start email scheduler: {e}")
 
+    # Start background upload job workers
+    try:
+        start_upload_workers()
+    except Exception as e:
+        logger.error(f"Failed to start upload job workers: {e}")
+
+    # Start the background bulk delete worker
+    try:
+        start_delete_worker()
+    except Exception as e:
+        logger.error(f"Failed to start delete job worker: {e}")
+
+    # Start sales_pmix partition maintenance (idle unless the table is partitioned)
+    try:
+        start_partition_maintenance()
+    except Exception as e:
+        logger.error(f"Failed to start partition maintenance: {e}")
+
+    # Start email outbox delivery workers
+    try:
+        start_email_outbox_workers()
+    except Exception as e:
+        logger.error(f"Failed to start email outbox workers: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Handle shutdown events"""
@@ -161,6 +193,14 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error stopping scheduler: {e}")
 
+    stop_upload_workers()
+    stop_delete_worker()
+    stop_partition_maintenance()
+    stop_email_outbox_workers()
+    shutdown_request_executor()
+    shutdown_dashboard_pool()
+    shutdown_password_hashing()
+
 # Register shutdown handler for graceful termination
 atexit.register(stop_scheduler)
 
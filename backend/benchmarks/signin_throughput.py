@@ -0,0 +1,111 @@
+"""
+Sign-in throughput under concurrent load.
+
+Two modes:
+
+    # bcrypt verification through utils.password_hashing only (no server)
+    python benchmarks/signin_throughput.py hashing --concurrency 50 --requests 200
+
+    # full /auth/signin requests against a running server
+    python benchmarks/signin_throughput.py http --url http://localhost:8000 \
+        --email someone@example.com --password secret --concurrency 50 --requests 200
+
+Both report throughput and latency percentiles. Run the hashing mode with
+different PASSWORD_HASH_WORKERS / BCRYPT_ROUNDS values to size the pool.
+The sign-in rate limits apply in http mode (SIGNIN_IP_LIMIT per client IP),
+so raise them on the server being measured.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _report(name, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    print(f"{name}: {len(latencies)} ok, {errors} errors in {elapsed:.2f}s "
+          f"-> {len(latencies) / elapsed:.1f} sign-ins/s")
+    if latencies:
+        def pct(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+        print(f"  latency ms: p50 {pct(0.50):.0f}  p95 {pct(0.95):.0f}  p99 {pct(0.99):.0f}  "
+              f"mean {statistics.mean(latencies) * 1000:.0f}")
+
+
+def _run(task, concurrency, requests):
+    latencies, errors = [], 0
+
+    def timed(_):
+        started = time.perf_counter()
+        ok = task()
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ok, latency in pool.map(timed, range(requests)):
+            if ok:
+                latencies.append(latency)
+            else:
+                errors += 1
+    return latencies, time.perf_counter() - started, errors
+
+
+def bench_hashing(args):
+    from utils.password_hashing import hash_password, verify_password, pool_stats, shutdown_password_hashing
+
+    stored = hash_password("benchmark-password")
+    latencies, elapsed, errors = _run(
+        lambda: verify_password("benchmark-password", stored)[0], args.concurrency, args.requests
+    )
+    shutdown_password_hashing()
+    _report(f"hashing {pool_stats()}, concurrency {args.concurrency}", latencies, elapsed, errors)
+
+
+def bench_http(args):
+    body = json.dumps({"email": args.email, "password": args.password}).encode()
+
+    def signin():
+        request = urllib.request.Request(
+            args.url.rstrip("/") + "/auth/signin", data=body,
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=args.timeout) as response:
+                response.read()
+                return response.status == 200
+        except (urllib.error.URLError, OSError):
+            return False
+
+    latencies, elapsed, errors = _run(signin, args.concurrency, args.requests)
+    _report(f"http {args.url}, concurrency {args.concurrency}", latencies, elapsed, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["hashing", "http"])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    if args.mode == "http":
+        if not args.email or not args.password:
+            parser.error("http mode needs --email and --password")
+        bench_http(args)
+    else:
+        bench_hashing(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -227,10 +227,12 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from models.budget import Budget
+from crud.calendar_dim import record_calendar_dates
 from schemas.budget import BudgetCreate
 from typing import List, Tuple, Optional, Dict, Any
 from utils.parse_datetime import parse_datetime_from_filename, extract_clean_filename
 from models.companies import Company
+from crud.ingestion_batches import get_or_create_batch, refresh_batch_stats, delete_fact_rows, list_uploaded_files
 
 
 
@@ -501,8 +503,8 @@ def check_and_filter_duplicates_budget(
         if min_date and max_date:
             existing_records_query = existing_records_query.filter(
                 and_(
-                    Budget.Date >= min_date.date() if hasattr(min_date, 'date') else min_date,
-                    Budget.Date <= max_date.date() if hasattr(max_date, 'date') else max_date
+                    Budget.Calendar_Date >= min_date.date() if hasattr(min_date, 'date') else min_date,
+                    Budget.Calendar_Date <= max_date.date() if hasattr(max_date, 'date') else max_date
                 )
             )
         
@@ -628,7 +630,10 @@ def insert_budget_with_duplicate_check(
     df: pd.DataFrame, 
     company_id: int,
     file_name: str = None,
-    dashboard: int = None
+    dashboard: int = None,
+    checksum: str = None,
+    uploaded_by: int = None,
+    progress=None
 ) -> dict:
     """
     Insert budget data with comprehensive duplicate checking.
@@ -655,9 +660,14 @@ def insert_budget_with_duplicate_check(
                 df_clean[col] = df_clean[col].astype(str).replace('nan', None).replace('NaT', None)
         
         # Check for duplicates
+        if progress:
+            progress("deduping")
         df_filtered, new_records_count, duplicates_count = check_and_filter_duplicates_budget(
             db, df_clean, company_id
         )
+
+        if progress:
+            progress("inserting", rows_duplicate=duplicates_count, rows_processed=duplicates_count)
         
         if len(df_filtered) == 0:
             print("No new budget records to insert after duplicate check.")
@@ -668,6 +678,13 @@ def insert_budget_with_duplicate_check(
                 'status': 'success'
             }
         
+        # Register the upload's days in the calendar dimension
+        if 'Date' in df_filtered.columns:
+            record_calendar_dates(df_filtered['Date'])
+
+        # The upload's ingestion batch (see crud.ingestion_batches)
+        batch = get_or_create_batch(db, "budget", company_id, file_name, dashboard, checksum, uploaded_by)
+
         # Insert records in batches for better performance
         batch_size = 1000
         inserted_count = 0
@@ -684,6 +701,8 @@ def insert_budget_with_duplicate_check(
                 # Add file_name and dashboard to each record
                 if file_name:
                     record_dict['file_name'] = file_name
+                if batch is not None:
+                    record_dict['batch_id'] = batch.id
                 if dashboard is not None:
                     record_dict['dashboard'] = dashboard
                 
@@ -696,14 +715,21 @@ def insert_budget_with_duplicate_check(
                         if hasattr(value, 'date'):
                             record_dict[key] = value.date()
                 
+                record_dict['Calendar_Date'] = record_dict.get('Date')
+
                 records_to_insert.append(record_dict)
             
             # Bulk insert using SQLAlchemy
             db.bulk_insert_mappings(Budget, records_to_insert)
             inserted_count += len(records_to_insert)
+            if progress:
+                progress(rows_inserted=len(records_to_insert), rows_processed=len(records_to_insert))
             
             print(f"Inserted budget batch {i//batch_size + 1}: {len(records_to_insert)} records")
         
+        if batch is not None:
+            refresh_batch_stats(db, [batch.id])
+
         # Commit the transaction
         db.commit()
         print(f"Successfully inserted {inserted_count} new budget records into budget table")
@@ -750,6 +776,18 @@ def get_budget_records(
     year: Optional[int] = None
 ):
     """Get budget records with optional filtering"""
+    query = budget_records_query(db, company_id, store, file_name, dashboard, year)
+    return query.offset(skip).limit(limit).all()
+
+def budget_records_query(
+    db: Session,
+    company_id: Optional[int] = None,
+    store: Optional[str] = None,
+    file_name: Optional[str] = None,
+    dashboard: Optional[int] = None,
+    year: Optional[int] = None
+):
+    """Unordered query of the budget records matching the filters (see utils.pagination)"""
     query = db.query(Budget)
     
     # Apply filters
@@ -764,7 +802,7 @@ def get_budget_records(
     if year is not None:
         query = query.filter(Budget.Year == year)
     
-    return query.offset(skip).limit(limit).all()
+    return query
 
 def update_budget_record(db: Session, record_id: int, obj_in: BudgetCreate):
     """Update a specific budget record"""
@@ -773,6 +811,9 @@ def update_budget_record(db: Session, record_id: int, obj_in: BudgetCreate):
         update_data = obj_in.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        if db_obj.batch_id is not None:
+            db.flush()
+            refresh_batch_stats(db, [db_obj.batch_id])
         db.commit()
         db.refresh(db_obj)
     return db_obj
@@ -781,7 +822,11 @@ def delete_budget_record(db: Session, record_id: int):
     """Delete a specific budget record"""
     db_obj = db.query(Budget).filter(Budget.id == record_id).first()
     if db_obj:
+        batch_id = db_obj.batch_id
         db.delete(db_obj)
+        if batch_id is not None:
+            db.flush()
+            refresh_batch_stats(db, [batch_id])
         db.commit()
         return True
     return False
@@ -791,56 +836,20 @@ def delete_budget_record(db: Session, record_id: int):
 # ============================================================================
 
 def delete_all_budget_records(db: Session, company_id: Optional[int] = None):
-    """Delete all budget records (optionally filtered by company)"""
-    query = db.query(Budget)
-    
-    if company_id:
-        query = query.filter(Budget.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all budget records (optionally filtered by company), in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "budget", {"company_id": company_id or None})
 
 def delete_budget_by_dashboard(db: Session, dashboard: int, company_id: Optional[int] = None):
-    """Delete all budget records for a specific dashboard"""
-    query = db.query(Budget).filter(Budget.dashboard == dashboard)
-    
-    if company_id:
-        query = query.filter(Budget.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all budget records for a specific dashboard, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "budget", {"dashboard": dashboard, "company_id": company_id or None})
 
 def delete_budget_by_filename(db: Session, file_name: str, company_id: Optional[int] = None):
-    """Delete all budget records for a specific file name"""
-    query = db.query(Budget).filter(Budget.file_name == file_name)
-    
-    if company_id:
-        query = query.filter(Budget.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all budget records for a specific file name, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "budget", {"file_name": file_name, "company_id": company_id or None})
 
 def delete_budget_by_store(db: Session, store: str, company_id: Optional[int] = None):
-    """Delete all budget records for a specific store"""
-    query = db.query(Budget).filter(Budget.Store == store)
-    
-    if company_id:
-        query = query.filter(Budget.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all budget records for a specific store, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "budget", {"Store": store, "company_id": company_id or None})
 
 # ============================================================================
 # ANALYTICS AND SUMMARY OPERATIONS
@@ -980,16 +989,7 @@ def delete_budget_by_store_and_company(db: Session, store: str, company_name: st
     company_id = company.id
     
     # Delete records matching both store and company_id
-    query = db.query(Budget).filter(
-        and_(
-            Budget.Store == store,
-            Budget.company_id == company_id
-        )
-    )
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
+    deleted_count = delete_fact_rows(db, "budget", {"Store": store, "company_id": company_id})
     
     return {
         "deleted_count": deleted_count,
@@ -999,112 +999,8 @@ def delete_budget_by_store_and_company(db: Session, store: str, company_name: st
 
 # Updated file list function with store breakdown
 def get_budget_uploaded_files_list(db: Session, company_id: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Get list of all uploaded budget files with record counts broken down by store and company name"""
-    
-    # # Get detailed breakdown by file, store, and company
-    # query = db.query(
-    #     Budget.file_name,
-    #     Budget.Store,
-    #     Company.name.label('company_name'),
-    #     func.count(Budget.id).label('store_record_count'),
-    #     func.sum(Budget.Net_Sales).label('store_total_sales'),
-    #     func.min(Budget.Year).label('store_earliest_year'),
-    #     func.max(Budget.Year).label('store_latest_year')
-    # ).join(Company, Budget.company_id == Company.id) \
-    #  .filter(Budget.file_name.isnot(None))
-
-    query = db.query(
-        Budget.file_name,
-        Budget.Store,
-        Company.name.label('company_name'),
-        func.count(Budget.id).label('store_record_count'),
-        func.sum(Budget.Net_Sales).label('store_total_sales'),
-        func.min(Budget.Year).label('store_earliest_year'),
-        func.max(Budget.Year).label('store_latest_year')
-    ).join(Company, Budget.company_id == Company.id) \
-    .filter(Budget.file_name.isnot(None)) \
-    .filter(Budget.Store.isnot(None)) \
-    .filter(Budget.Store != "")  # Adding condition to exclude empty store names
-
-
-
-    if company_id:
-        query = query.filter(Budget.company_id == company_id)
-
-    query = query.group_by(
-        Budget.file_name, 
-        Budget.Store, 
-        Company.name
-    ).order_by(Budget.file_name, Budget.Store)
-
-
-    
-    # Fetch the query result
-    result1 = query.all()
-
-    # Print the earliest year after group_by
-    for row in result1:
-        print(f"File budget.py_: {row.file_name}, Store: {row.Store}, Earliest Year: {row.store_earliest_year}")
-        
-    
-    # Group results by file
-    files_dict = {}
-    for row in query.all():
-        file_key = row.file_name
-        
-        if file_key not in files_dict:
-            file_timestamp = parse_datetime_from_filename(row.file_name)
-            # clean_file_name = extract_clean_filename(row.file_name)
-            clean_file_name = row.file_name
-            files_dict[file_key] = {
-                "file_name": clean_file_name,
-                "file_timestamp": file_timestamp,
-                "company_name": row.company_name,
-                "record_count": 0,
-                "total_sales": 0.0,
-                "earliest_year": None,
-                "latest_year": None,
-                "stores": []
-            }
-        
-        # Update file totals
-        files_dict[file_key]["record_count"] += row.store_record_count
-        files_dict[file_key]["total_sales"] += float(row.store_total_sales or 0)
-        
-        # # Before comparing, ensure both are ints
-        # store_earliest_year = int(row.store_earliest_year) if row.store_earliest_year is not None else None
-        # store_latest_year = int(row.store_latest_year) if row.store_latest_year is not None else None
-
-
-        # if files_dict[file_key]["earliest_year"] is None or (store_earliest_year is not None and store_earliest_year < files_dict[file_key]["earliest_year"]):
-        #     files_dict[file_key]["earliest_year"] = store_earliest_year
-        # if files_dict[file_key]["latest_year"] is None or (store_latest_year is not None and store_latest_year > files_dict[file_key]["latest_year"]):
-        #     files_dict[file_key]["latest_year"] = store_latest_year
-
-        # Update year ranges
-        if files_dict[file_key]["earliest_year"] is None or (row.store_earliest_year and row.store_earliest_year < files_dict[file_key]["earliest_year"]):
-            files_dict[file_key]["earliest_year"] = row.store_earliest_year
-        if files_dict[file_key]["latest_year"] is None or (row.store_latest_year and row.store_latest_year > files_dict[file_key]["latest_year"]):
-            files_dict[file_key]["latest_year"] = row.store_latest_year
-        
-        # Add store details
-        files_dict[file_key]["stores"].append({
-            "store": row.Store or "Unknown Store",
-            "record_count": row.store_record_count,
-            "total_sales": float(row.store_total_sales or 0),
-            "earliest_year": row.store_earliest_year,
-            "latest_year": row.store_latest_year,
-        })
-
-    # Convert to list and sort stores
-    results = []
-    for file_data in files_dict.values():
-        # Sort stores by record count (descending)
-        file_data["stores"].sort(key=lambda x: x["record_count"], reverse=True)
-        
-        results.append(file_data)
-
-    return results
+    """Get list of all uploaded budget files with record counts broken down by store and company name (from the ingestion batches)"""
+    return list_uploaded_files(db, "budget", company_id)
 
 
 
@@ -1173,6 +1069,7 @@ def insert_budget_df(db: Session, df: pd.DataFrame, company_id: int, file_name:
         file_name: Optional filename to store with each record
         dashboard: Optional dashboard integer to store with each record
     """
+    batch = get_or_create_batch(db, "budget", company_id, file_name, dashboard)
     for _, row in df.iterrows():
         data = row.to_dict()
         data["company_id"] = company_id
@@ -1182,9 +1079,14 @@ def insert_budget_df(db: Session, df: pd.DataFrame, company_id: int, file_name:
             data["file_name"] = file_name
         if dashboard is not None:
             data["dashboard"] = dashboard
+        if batch is not None:
+            data["batch_id"] = batch.id
             
         db_obj = Budget(**data)
         db.add(db_obj)
+    if batch is not None:
+        db.flush()
+        refresh_batch_stats(db, [batch.id])
     db.commit()
 
 def insert_budget_df_with_metadata(db: Session, df: pd.DataFrame, company_id: int, metadata: dict):
@@ -1197,13 +1099,19 @@ def insert_budget_df_with_metadata(db: Session, df: pd.DataFrame, company_id: in
         company_id: Company ID to associate with the data
         metadata: Dictionary containing metadata fields like file_name, dashboard, etc.
     """
+    batch = get_or_create_batch(db, "budget", company_id, metadata.get("file_name"), metadata.get("dashboard"))
     for _, row in df.iterrows():
         data = row.to_dict()
         data["company_id"] = company_id
         
         # Apply metadata to each record
         data.update(metadata)
+        if batch is not None:
+            data["batch_id"] = batch.id
             
         db_obj = Budget(**data)
         db.add(db_obj)
-    db.commit()
\ No newline at end of file
+    if batch is not None:
+        db.flush()
+        refresh_batch_stats(db, [batch.id])
+    db.commit()
@@ -0,0 +1,98 @@
+# crud/calendar_dim.py
+from typing import Iterable
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal
+from models.calendar_dim import CalendarDim
+from models.financials_company_wide import FinancialsCompanyWide
+from models.budget import Budget
+from utils.calendar_dim import calendar_attributes, to_date
+
+
+def ensure_calendar_dates(db: Session, dates: Iterable) -> int:
+    """
+    Make sure calendar_dim has a row for each of `dates` and commit them.
+    Uploads call this with a session of its own so the upload's transaction
+    is not committed early. Returns the number of rows added.
+    """
+    days = {d for d in (to_date(value) for value in dates) if d is not None}
+    if not days:
+        return 0
+
+    existing = {
+        row.date for row in db.query(CalendarDim.date).filter(
+            CalendarDim.date >= min(days),
+            CalendarDim.date <= max(days)
+        )
+    }
+
+    missing = [calendar_attributes(day) for day in sorted(days - existing)]
+    if not missing:
+        return 0
+
+    try:
+        db.bulk_insert_mappings(CalendarDim, missing)
+        db.commit()
+    except IntegrityError:
+        # Another upload added some of the same days in the meantime
+        db.rollback()
+        existing = {
+            row.date for row in db.query(CalendarDim.date).filter(
+                CalendarDim.date >= min(days),
+                CalendarDim.date <= max(days)
+            )
+        }
+        missing = [calendar_attributes(day) for day in sorted(days - existing)]
+        if missing:
+            db.bulk_insert_mappings(CalendarDim, missing)
+            db.commit()
+    return len(missing)
+
+
+def get_calendar_range(db: Session, start_date, end_date):
+    """Calendar rows between two dates (inclusive)"""
+    return db.query(CalendarDim).filter(
+        CalendarDim.date >= to_date(start_date),
+        CalendarDim.date <= to_date(end_date)
+    ).order_by(CalendarDim.date).all()
+
+
+def backfill_calendar_dates(db: Session, batch_size: int = 1000) -> int:
+    """
+    Fill Calendar_Date for financials / budget rows stored before the column
+    existed, parsing their `Date` strings once. Returns the number of rows updated.
+    """
+    updated = 0
+    for model in (FinancialsCompanyWide, Budget):
+        last_id = 0
+        while True:
+            rows = db.query(model.id, model.Date).filter(
+                model.id > last_id,
+                model.Calendar_Date.is_(None),
+                model.Date.isnot(None)
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            # Rows whose Date cannot be parsed keep a NULL Calendar_Date
+            mappings = [
+                {"id": row.id, "Calendar_Date": to_date(row.Date)}
+                for row in rows if to_date(row.Date) is not None
+            ]
+            if mappings:
+                ensure_calendar_dates(db, [m["Calendar_Date"] for m in mappings])
+                db.bulk_update_mappings(model, mappings)
+                db.commit()
+                updated += len(mappings)
+
+    return updated
+
+
+def record_calendar_dates(dates: Iterable) -> int:
+    """ensure_calendar_dates on a session of its own (used during uploads)"""
+    db = SessionLocal()
+    try:
+        return ensure_calendar_dates(db, dates)
+    finally:
+        db.close()
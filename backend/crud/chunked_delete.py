@@ -0,0 +1,96 @@
+# crud/chunked_delete.py
+"""
+Bulk deletes of the uploaded fact tables in bounded batches.
+
+A single DELETE of a whole file (or company) can touch millions of rows in one
+transaction: it holds its locks until the end and the WAL grows with every row,
+while the dashboards reading the table time out. chunked_delete walks the
+matching rows in primary-key order instead and deletes them one id range at a
+time, committing after each range, so every transaction is short and the
+dashboards keep being served between batches. On SQLite the WAL is
+checkpointed (PASSIVE: without waiting for readers) after each batch, so it
+does not grow with the whole delete.
+"""
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from models.sales_pmix import SalesPMix
+from models.budget import Budget
+from models.financials_company_wide import FinancialsCompanyWide
+
+BULK_DELETE_BATCH_SIZE = int(os.getenv("BULK_DELETE_BATCH_SIZE", "5000"))
+BULK_DELETE_PAUSE_SECONDS = float(os.getenv("BULK_DELETE_PAUSE_SECONDS", "0"))  # breather between batches
+
+# Tables that can be bulk deleted, by the name stored in delete jobs
+DELETABLE_TABLES = {
+    "sales_pmix": SalesPMix,
+    "budget": Budget,
+    "financials_company_wide": FinancialsCompanyWide,
+}
+
+
+def _criteria(model, filters: Dict[str, Any]):
+    """Equality criteria of `filters` (column -> value); None values are not filtered on"""
+    criteria = []
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if column not in model.__table__.columns:
+            raise ValueError(f"Unknown column {column} of {model.__tablename__}")
+        criteria.append(getattr(model, column) == value)
+    return criteria
+
+
+def count_matching_rows(db: Session, model, filters: Dict[str, Any]) -> int:
+    return db.query(func.count(model.id)).filter(*_criteria(model, filters)).scalar() or 0
+
+
+def chunked_delete(db: Session, model, filters: Dict[str, Any], batch_size: Optional[int] = None,
+                   progress: Optional[Callable[[int], None]] = None, extra_criteria: Iterable = ()) -> int:
+    """
+    Delete the rows of `model` matching `filters` (column -> value), at most
+    batch_size rows per transaction. Each batch is the id range of the next
+    batch_size matching rows; it is deleted with the filters re-applied and
+    committed before the next range is read.
+
+    Args:
+        progress: Called with the running number of deleted rows after each batch.
+        extra_criteria: Further SQL criteria (e.g. a date range), applied like the filters.
+
+    Returns:
+        The number of rows deleted.
+    """
+    batch_size = batch_size or BULK_DELETE_BATCH_SIZE
+    criteria = _criteria(model, filters) + list(extra_criteria)
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    deleted = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(model.id)
+            .filter(*criteria, model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+            .subquery()
+        )
+        low, high = db.query(func.min(batch.c.id), func.max(batch.c.id)).one()
+        if high is None:
+            break
+
+        deleted += (
+            db.query(model)
+            .filter(*criteria, model.id >= low, model.id <= high)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        if sqlite:
+            db.execute(text("PRAGMA wal_checkpoint(PASSIVE)"))
+        last_id = high
+
+        if progress:
+            progress(deleted)
+        if BULK_DELETE_PAUSE_SECONDS:
+            time.sleep(BULK_DELETE_PAUSE_SECONDS)
+    return deleted
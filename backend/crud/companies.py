@@ -16,6 +16,9 @@ def create_company(db: Session, company: CompanyCreate) -> Company:
 def get_companies(db: Session):
     return db.query(Company).all()
 
+def get_company_by_name(db: Session, name: str):
+    return db.query(Company).filter(Company.name == name).first()
+
 def get_company(db: Session, company_id):
     return db.query(Company).filter(Company.id == company_id).first()
 
@@ -0,0 +1,74 @@
+# crud/delete_jobs.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from models.delete_jobs import DeleteJob
+
+
+def create_delete_job(db: Session, table_name: str, filters: Dict[str, Any]) -> DeleteJob:
+    db_job = DeleteJob(table_name=table_name, filters=filters, status="queued")
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def get_delete_job(db: Session, job_id: int) -> Optional[DeleteJob]:
+    return db.query(DeleteJob).filter(DeleteJob.id == job_id).first()
+
+
+def get_delete_jobs(db: Session, limit: int = 50):
+    return db.query(DeleteJob).order_by(DeleteJob.id.desc()).limit(limit).all()
+
+
+def claim_next_delete_job(db: Session) -> Optional[DeleteJob]:
+    """Atomically move the oldest queued job to "deleting" and return it (see claim_next_upload_job)"""
+    candidates = (
+        db.query(DeleteJob.id)
+        .filter(DeleteJob.status == "queued")
+        .order_by(DeleteJob.id)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = (
+            db.query(DeleteJob)
+            .filter(DeleteJob.id == job_id, DeleteJob.status == "queued")
+            .update(
+                {"status": "deleting", "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed:
+            return get_delete_job(db, job_id)
+    return None
+
+
+def update_delete_job(db: Session, job_id: int, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow()
+    db.query(DeleteJob).filter(DeleteJob.id == job_id).update(fields, synchronize_session=False)
+    db.commit()
+
+
+def finish_delete_job(db: Session, job_id: int, rows_deleted: int) -> None:
+    update_delete_job(db, job_id, status="done", rows_deleted=rows_deleted, finished_at=datetime.utcnow())
+
+
+def fail_delete_job(db: Session, job_id: int, error: str) -> None:
+    update_delete_job(db, job_id, status="failed", error=error, finished_at=datetime.utcnow())
+
+
+def requeue_stale_delete_jobs(db: Session, stale_after: timedelta) -> int:
+    """
+    Put jobs that stopped reporting progress (e.g. the process died) back in the
+    queue. Deleted batches are committed, so a requeued job resumes with what is left.
+    """
+    cutoff = datetime.utcnow() - stale_after
+    count = (
+        db.query(DeleteJob)
+        .filter(DeleteJob.status == "deleting", DeleteJob.updated_at < cutoff)
+        .update({"status": "queued", "updated_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return count
@@ -0,0 +1,150 @@
+# crud/email_outbox.py
+import os
+import shutil
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from models.email_outbox import EmailOutbox
+
+OUTBOX_DIR = os.path.join("uploads", "outbox")
+PENDING_STATUSES = ["queued", "sending"]
+
+
+def store_attachments(attachments) -> tuple:
+    """
+    Write (filename, content bytes, mime type) attachments to disk once.
+    The directory is named after the content, so messages sharing the same
+    files (e.g. one report sent to every recipient) share one copy.
+
+    Returns:
+        (attachment_dir, [{"filename", "path", "mime_type"}]), or (None, None) without attachments.
+    """
+    if not attachments:
+        return None, None
+
+    digest = hashlib.sha256()
+    for filename, content, mime_type in attachments:
+        digest.update(filename.encode())
+        digest.update(content)
+    attachment_dir = os.path.join(OUTBOX_DIR, digest.hexdigest())
+    os.makedirs(attachment_dir, exist_ok=True)
+
+    stored = []
+    for filename, content, mime_type in attachments:
+        path = os.path.join(attachment_dir, os.path.basename(filename))
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(content)
+        stored.append({"filename": filename, "path": path, "mime_type": mime_type})
+    return attachment_dir, stored
+
+
+def load_attachments(message: EmailOutbox) -> list:
+    """Attachments of a queued message as (filename, content bytes, mime type) tuples"""
+    loaded = []
+    for attachment in message.attachments or []:
+        with open(attachment["path"], "rb") as f:
+            loaded.append((attachment["filename"], f.read(), attachment["mime_type"]))
+    return loaded
+
+
+def create_outbox_messages(db: Session, messages: List[dict], attachments=None, kind: str = None) -> List[int]:
+    """
+    Queue messages ({"recipients", "subject", "html_body"}) that all carry the same attachments.
+    Returns the ids of the new rows.
+    """
+    attachment_dir, stored = store_attachments(attachments)
+    rows = [
+        EmailOutbox(
+            kind=kind,
+            recipients=message["recipients"],
+            subject=message["subject"],
+            html_body=message["html_body"],
+            attachments=stored,
+            attachment_dir=attachment_dir,
+            status="queued",
+        )
+        for message in messages
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def get_outbox_message(db: Session, message_id: int) -> Optional[EmailOutbox]:
+    return db.query(EmailOutbox).filter(EmailOutbox.id == message_id).first()
+
+
+def claim_next_outbox_message(db: Session) -> Optional[EmailOutbox]:
+    """
+    Atomically move the oldest due message to "sending" and return it.
+    The conditional UPDATE makes this safe when several workers poll the same table.
+    """
+    now = datetime.utcnow()
+    candidates = (
+        db.query(EmailOutbox.id)
+        .filter(EmailOutbox.status == "queued", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(5)
+        .all()
+    )
+    for (message_id,) in candidates:
+        claimed = (
+            db.query(EmailOutbox)
+            .filter(EmailOutbox.id == message_id, EmailOutbox.status == "queued")
+            .update({"status": "sending", "updated_at": now}, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            return get_outbox_message(db, message_id)
+    return None
+
+
+def update_outbox_message(db: Session, message_id: int, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow()
+    db.query(EmailOutbox).filter(EmailOutbox.id == message_id).update(fields, synchronize_session=False)
+    db.commit()
+
+
+def mark_outbox_sent(db: Session, message_id: int, attempts: int) -> None:
+    update_outbox_message(db, message_id, status="sent", attempts=attempts,
+                          last_error=None, sent_at=datetime.utcnow())
+
+
+def retry_outbox_message(db: Session, message_id: int, attempts: int, error: str, delay: timedelta) -> None:
+    update_outbox_message(db, message_id, status="queued", attempts=attempts, last_error=error,
+                          next_attempt_at=datetime.utcnow() + delay)
+
+
+def fail_outbox_message(db: Session, message_id: int, attempts: int, error: str) -> None:
+    update_outbox_message(db, message_id, status="failed", attempts=attempts, last_error=error)
+
+
+def count_queued_outbox_messages(db: Session) -> int:
+    """Queue depth: messages waiting for delivery (including scheduled retries)"""
+    return db.query(EmailOutbox).filter(EmailOutbox.status.in_(PENDING_STATUSES)).count()
+
+
+def release_attachments(db: Session, attachment_dir: Optional[str]) -> None:
+    """Delete an attachment directory once no pending message uses it"""
+    if not attachment_dir:
+        return
+    still_used = db.query(EmailOutbox.id).filter(
+        EmailOutbox.attachment_dir == attachment_dir,
+        EmailOutbox.status.in_(PENDING_STATUSES)
+    ).first()
+    if still_used is None:
+        shutil.rmtree(attachment_dir, ignore_errors=True)
+
+
+def requeue_stale_outbox_messages(db: Session, stale_after: timedelta) -> int:
+    """Put messages left in "sending" (e.g. the process died mid-send) back in the queue."""
+    cutoff = datetime.utcnow() - stale_after
+    count = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status == "sending", EmailOutbox.updated_at < cutoff)
+        .update({"status": "queued", "updated_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return count
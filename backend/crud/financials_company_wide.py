@@ -233,10 +233,12 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from models.financials_company_wide import FinancialsCompanyWide
+from crud.calendar_dim import record_calendar_dates
 from schemas.financials_company_wide import FinancialsCompanyWideCreate
 from typing import List, Tuple, Optional, Dict, Any
 from utils.parse_datetime import parse_datetime_from_filename, extract_clean_filename
 from models.companies import Company
+from crud.ingestion_batches import get_or_create_batch, refresh_batch_stats, delete_fact_rows, list_uploaded_files
 
 
 # def check_and_filter_duplicates_financials(
@@ -497,6 +499,18 @@ def get_financials_records(
     year: Optional[int] = None
 ):
     """Get financials records with optional filtering"""
+    query = financials_records_query(db, company_id, store, file_name, dashboard, year)
+    return query.offset(skip).limit(limit).all()
+
+def financials_records_query(
+    db: Session,
+    company_id: Optional[int] = None,
+    store: Optional[str] = None,
+    file_name: Optional[str] = None,
+    dashboard: Optional[int] = None,
+    year: Optional[int] = None
+):
+    """Unordered query of the financials records matching the filters (see utils.pagination)"""
     query = db.query(FinancialsCompanyWide)
     
     # Apply filters
@@ -511,7 +525,7 @@ def get_financials_records(
     if year is not None:
         query = query.filter(FinancialsCompanyWide.Year == year)
     
-    return query.offset(skip).limit(limit).all()
+    return query
 
 def update_financials_record(db: Session, record_id: int, obj_in: FinancialsCompanyWideCreate):
     """Update a specific financials record"""
@@ -520,6 +534,9 @@ def update_financials_record(db: Session, record_id: int, obj_in: FinancialsComp
         update_data = obj_in.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        if db_obj.batch_id is not None:
+            db.flush()
+            refresh_batch_stats(db, [db_obj.batch_id])
         db.commit()
         db.refresh(db_obj)
     return db_obj
@@ -528,7 +545,11 @@ def delete_financials_record(db: Session, record_id: int):
     """Delete a specific financials record"""
     db_obj = db.query(FinancialsCompanyWide).filter(FinancialsCompanyWide.id == record_id).first()
     if db_obj:
+        batch_id = db_obj.batch_id
         db.delete(db_obj)
+        if batch_id is not None:
+            db.flush()
+            refresh_batch_stats(db, [batch_id])
         db.commit()
         return True
     return False
@@ -538,56 +559,20 @@ def delete_financials_record(db: Session, record_id: int):
 # ============================================================================
 
 def delete_all_financials_records(db: Session, company_id: Optional[int] = None):
-    """Delete all financials records (optionally filtered by company)"""
-    query = db.query(FinancialsCompanyWide)
-    
-    if company_id:
-        query = query.filter(FinancialsCompanyWide.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all financials records (optionally filtered by company), in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "financials_company_wide", {"company_id": company_id or None})
 
 def delete_financials_by_dashboard(db: Session, dashboard: int, company_id: Optional[int] = None):
-    """Delete all financials records for a specific dashboard"""
-    query = db.query(FinancialsCompanyWide).filter(FinancialsCompanyWide.dashboard == dashboard)
-    
-    if company_id:
-        query = query.filter(FinancialsCompanyWide.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all financials records for a specific dashboard, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "financials_company_wide", {"dashboard": dashboard, "company_id": company_id or None})
 
 def delete_financials_by_filename(db: Session, file_name: str, company_id: Optional[int] = None):
-    """Delete all financials records for a specific file name"""
-    query = db.query(FinancialsCompanyWide).filter(FinancialsCompanyWide.file_name == file_name)
-    
-    if company_id:
-        query = query.filter(FinancialsCompanyWide.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all financials records for a specific file name, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "financials_company_wide", {"file_name": file_name, "company_id": company_id or None})
 
 def delete_financials_by_store(db: Session, store: str, company_id: Optional[int] = None):
-    """Delete all financials records for a specific store"""
-    query = db.query(FinancialsCompanyWide).filter(FinancialsCompanyWide.Store == store)
-    
-    if company_id:
-        query = query.filter(FinancialsCompanyWide.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all financials records for a specific store, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "financials_company_wide", {"Store": store, "company_id": company_id or None})
 
 # ============================================================================
 # ANALYTICS AND SUMMARY OPERATIONS
@@ -755,16 +740,7 @@ def delete_financials_by_store_and_company(db: Session, store: str, company_name
     company_id = company.id
     
     # Delete records matching both store and company_id
-    query = db.query(FinancialsCompanyWide).filter(
-        and_(
-            FinancialsCompanyWide.Store == store,
-            FinancialsCompanyWide.company_id == company_id
-        )
-    )
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
+    deleted_count = delete_fact_rows(db, "financials_company_wide", {"Store": store, "company_id": company_id})
     
     return {
         "deleted_count": deleted_count,
@@ -773,77 +749,8 @@ def delete_financials_by_store_and_company(db: Session, store: str, company_name
 
 # Updated file list function with store breakdown
 def get_financials_uploaded_files_list(db: Session, company_id: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Get list of all uploaded financial files with record counts broken down by store and company name"""
-    
-    # Get detailed breakdown by file, store, and company
-    query = db.query(
-        FinancialsCompanyWide.file_name,
-        FinancialsCompanyWide.Store,
-        Company.name.label('company_name'),
-        func.count(FinancialsCompanyWide.id).label('store_record_count'),
-        func.sum(FinancialsCompanyWide.Tw_Sales).label('store_total_sales'),
-        func.min(FinancialsCompanyWide.Year).label('store_earliest_year'),
-        func.max(FinancialsCompanyWide.Year).label('store_latest_year')
-    ).join(Company, FinancialsCompanyWide.company_id == Company.id) \
-     .filter(FinancialsCompanyWide.file_name.isnot(None))
-
-    if company_id:
-        query = query.filter(FinancialsCompanyWide.company_id == company_id)
-
-    query = query.group_by(
-        FinancialsCompanyWide.file_name, 
-        FinancialsCompanyWide.Store, 
-        Company.name
-    ).order_by(FinancialsCompanyWide.file_name, FinancialsCompanyWide.Store)
-
-    # Group results by file
-    files_dict = {}
-    for row in query.all():
-        file_key = row.file_name
-        
-        if file_key not in files_dict:
-            file_timestamp = parse_datetime_from_filename(row.file_name)
-            # clean_file_name = extract_clean_filename(row.file_name)
-            clean_file_name = row.file_name
-            files_dict[file_key] = {
-                "file_name": clean_file_name,
-                "file_timestamp": file_timestamp,
-                "company_name": row.company_name,
-                "record_count": 0,
-                "total_sales": 0.0,
-                "earliest_year": None,
-                "latest_year": None,
-                "stores": []
-            }
-        
-        # Update file totals
-        files_dict[file_key]["record_count"] += row.store_record_count
-        files_dict[file_key]["total_sales"] += float(row.store_total_sales or 0)
-        
-        # Update year ranges
-        if files_dict[file_key]["earliest_year"] is None or (row.store_earliest_year and row.store_earliest_year < files_dict[file_key]["earliest_year"]):
-            files_dict[file_key]["earliest_year"] = row.store_earliest_year
-        if files_dict[file_key]["latest_year"] is None or (row.store_latest_year and row.store_latest_year > files_dict[file_key]["latest_year"]):
-            files_dict[file_key]["latest_year"] = row.store_latest_year
-        
-        # Add store details
-        files_dict[file_key]["stores"].append({
-            "store": row.Store or "Unknown Store",
-            "record_count": row.store_record_count,
-            "total_sales": float(row.store_total_sales or 0),
-            "earliest_year": row.store_earliest_year,
-            "latest_year": row.store_latest_year,
-        })
-
-    # Convert to list and sort stores
-    results = []
-    for file_data in files_dict.values():
-        # Sort stores by record count (descending)
-        file_data["stores"].sort(key=lambda x: x["record_count"], reverse=True)
-        
-        results.append(file_data)
-
-    return results
+    """Get list of all uploaded financial files with record counts broken down by store and company name (from the ingestion batches)"""
+    return list_uploaded_files(db, "financials_company_wide", company_id)
 
 
 def get_financials_stores_list(db: Session, company_id: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -909,6 +816,7 @@ def insert_financials_df(db: Session, df: pd.DataFrame, company_id: int, file_na
         file_name: Optional filename to store with each record
         dashboard: Optional dashboard integer to store with each record
     """
+    batch = get_or_create_batch(db, "financials_company_wide", company_id, file_name, dashboard)
     for _, row in df.iterrows():
         data = row.to_dict()
         data["company_id"] = company_id
@@ -918,9 +826,14 @@ def insert_financials_df(db: Session, df: pd.DataFrame, company_id: int, file_na
             data["file_name"] = file_name
         if dashboard is not None:
             data["dashboard"] = dashboard
+        if batch is not None:
+            data["batch_id"] = batch.id
             
         db_obj = FinancialsCompanyWide(**data)
         db.add(db_obj)
+    if batch is not None:
+        db.flush()
+        refresh_batch_stats(db, [batch.id])
     db.commit()
 
 def insert_financials_df_with_metadata(db: Session, df: pd.DataFrame, company_id: int, metadata: dict):
@@ -933,15 +846,21 @@ def insert_financials_df_with_metadata(db: Session, df: pd.DataFrame, company_id
         company_id: Company ID to associate with the data
         metadata: Dictionary containing metadata fields like file_name, dashboard, etc.
     """
+    batch = get_or_create_batch(db, "financials_company_wide", company_id, metadata.get("file_name"), metadata.get("dashboard"))
     for _, row in df.iterrows():
         data = row.to_dict()
         data["company_id"] = company_id
         
         # Apply metadata to each record
         data.update(metadata)
+        if batch is not None:
+            data["batch_id"] = batch.id
             
         db_obj = FinancialsCompanyWide(**data)
         db.add(db_obj)
+    if batch is not None:
+        db.flush()
+        refresh_batch_stats(db, [batch.id])
     db.commit()
     
     
@@ -989,8 +908,8 @@ def check_and_filter_duplicates_financials(
         if min_date and max_date:
             existing_records_query = existing_records_query.filter(
                 and_(
-                    FinancialsCompanyWide.Date >= min_date.date() if hasattr(min_date, 'date') else min_date,
-                    FinancialsCompanyWide.Date <= max_date.date() if hasattr(max_date, 'date') else max_date
+                    FinancialsCompanyWide.Calendar_Date >= min_date.date() if hasattr(min_date, 'date') else min_date,
+                    FinancialsCompanyWide.Calendar_Date <= max_date.date() if hasattr(max_date, 'date') else max_date
                 )
             )
         
@@ -1116,7 +1035,10 @@ def insert_financials_with_duplicate_check(
     df: pd.DataFrame, 
     company_id: int,
     file_name: str = None,
-    dashboard: int = None
+    dashboard: int = None,
+    checksum: str = None,
+    uploaded_by: int = None,
+    progress=None
 ) -> dict:
     """
     Insert financial data with comprehensive duplicate checking.
@@ -1149,9 +1071,14 @@ def insert_financials_with_duplicate_check(
                 df_clean[col] = df_clean[col].astype(str).replace('nan', None).replace('NaT', None)
         
         # Check for duplicates
+        if progress:
+            progress("deduping")
         df_filtered, new_records_count, duplicates_count = check_and_filter_duplicates_financials(
             db, df_clean, company_id
         )
+
+        if progress:
+            progress("inserting", rows_duplicate=duplicates_count, rows_processed=duplicates_count)
         
         if len(df_filtered) == 0:
             print("No new financial records to insert after duplicate check.")
@@ -1162,6 +1089,13 @@ def insert_financials_with_duplicate_check(
                 'status': 'success'
             }
         
+        # Register the upload's days in the calendar dimension
+        if 'Date' in df_filtered.columns:
+            record_calendar_dates(df_filtered['Date'])
+
+        # The upload's ingestion batch (see crud.ingestion_batches)
+        batch = get_or_create_batch(db, "financials_company_wide", company_id, file_name, dashboard, checksum, uploaded_by)
+
         # Insert records in batches for better performance
         batch_size = 1000
         inserted_count = 0
@@ -1178,6 +1112,8 @@ def insert_financials_with_duplicate_check(
                 # Add file_name and dashboard to each record
                 if file_name:
                     record_dict['file_name'] = file_name
+                if batch is not None:
+                    record_dict['batch_id'] = batch.id
                 if dashboard is not None:
                     record_dict['dashboard'] = dashboard
                 
@@ -1194,14 +1130,21 @@ def insert_financials_with_duplicate_check(
                         if not hasattr(value, 'strftime'):
                             record_dict[key] = pd.to_datetime(value, errors='coerce')
                 
+                record_dict['Calendar_Date'] = record_dict.get('Date')
+
                 records_to_insert.append(record_dict)
             
             # Bulk insert using SQLAlchemy
             db.bulk_insert_mappings(FinancialsCompanyWide, records_to_insert)
             inserted_count += len(records_to_insert)
+            if progress:
+                progress(rows_inserted=len(records_to_insert), rows_processed=len(records_to_insert))
             
             print(f"Inserted financial batch {i//batch_size + 1}: {len(records_to_insert)} records")
         
+        if batch is not None:
+            refresh_batch_stats(db, [batch.id])
+
         # Commit the transaction
         db.commit()
         print(f"Successfully inserted {inserted_count} new financial records into financials_company_wide table")
@@ -0,0 +1,281 @@
+# crud/ingestion_batches.py
+"""
+Ingestion batches: one row per uploaded file and fact table, referenced by the
+batch_id of every row the upload inserted.
+
+The file lists read the batches instead of grouping the fact tables by
+file_name, and a file's rows are found (and deleted) on the integer batch_id
+index. The stats of a batch (row count, sales, date range, per location /
+store breakdown) are computed when its rows are inserted and recomputed after
+rows are deleted; a batch left without rows is removed.
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models.companies import Company
+from models.ingestion_batches import IngestionBatch
+from models.sales_pmix import SalesPMix
+from models.budget import Budget
+from models.financials_company_wide import FinancialsCompanyWide
+from crud.chunked_delete import BULK_DELETE_BATCH_SIZE, chunked_delete
+from utils.parse_datetime import parse_datetime_from_filename
+
+# Fact tables with batches, by the name stored in ingestion_batches.table_name:
+# the column the file lists break down by, the sales and date columns of the
+# stats, and whether the breakdown reports dates or years.
+BATCH_TABLES = {
+    "sales_pmix": {
+        "model": SalesPMix, "group": "Location", "sales": "Net_Price", "date": "Sent_Date",
+        "entries": "locations", "range": "date",
+    },
+    "budget": {
+        "model": Budget, "group": "Store", "sales": "Net_Sales", "date": "Calendar_Date",
+        "entries": "stores", "range": "year", "skip_blank_group": True,
+    },
+    "financials_company_wide": {
+        "model": FinancialsCompanyWide, "group": "Store", "sales": "Tw_Sales", "date": "Calendar_Date",
+        "entries": "stores", "range": "year",
+    },
+}
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+
+def get_or_create_batch(db: Session, table_name: str, company_id: int, file_name: Optional[str],
+                        dashboard: Optional[int] = None, checksum: Optional[str] = None,
+                        uploaded_by: Optional[int] = None) -> Optional[IngestionBatch]:
+    """
+    The batch of a file's rows in `table_name`, created on the first insert.
+    A re-upload of the same file name reuses the batch and records its
+    dashboard, checksum and uploader when given. None when there is no file
+    name (rows inserted without one have no batch). Does not commit.
+    """
+    if not file_name:
+        return None
+    batch = db.query(IngestionBatch).filter(
+        IngestionBatch.table_name == table_name,
+        IngestionBatch.company_id == company_id,
+        IngestionBatch.file_name == file_name
+    ).first()
+    if batch is None:
+        batch = IngestionBatch(
+            table_name=table_name,
+            company_id=company_id,
+            file_name=file_name,
+            dashboard=dashboard,
+            checksum=checksum,
+            uploaded_by=uploaded_by,
+        )
+        db.add(batch)
+        db.flush()
+    else:
+        if dashboard is not None:
+            batch.dashboard = dashboard
+        if checksum is not None:
+            batch.checksum = checksum
+        if uploaded_by is not None:
+            batch.uploaded_by = uploaded_by
+    return batch
+
+
+def _breakdown_entry(config: dict, key, count, sales, first_date, last_date, first_year, last_year) -> dict:
+    if config["range"] == "date":
+        return {
+            "location": key or "Unknown Location",
+            "record_count": count,
+            "total_sales": float(sales or 0),
+            "earliest_date": _as_datetime(first_date).isoformat() if first_date else None,
+            "latest_date": _as_datetime(last_date).isoformat() if last_date else None,
+        }
+    return {
+        "store": key or "Unknown Store",
+        "record_count": count,
+        "total_sales": float(sales or 0),
+        "earliest_year": first_year,
+        "latest_year": last_year,
+    }
+
+
+def refresh_batch_stats(db: Session, batch_ids: Iterable[int]) -> int:
+    """
+    Recompute the stats of batches from their rows (one grouped query per batch
+    on the batch_id index) and remove the batches without rows. Does not
+    commit. Returns the number of batches removed.
+    """
+    removed = 0
+    for batch in db.query(IngestionBatch).filter(IngestionBatch.id.in_(list(batch_ids))).all():
+        config = BATCH_TABLES[batch.table_name]
+        model = config["model"]
+        group = getattr(model, config["group"])
+        date_column = getattr(model, config["date"])
+        rows = db.query(
+            group,
+            func.count(model.id),
+            func.sum(getattr(model, config["sales"])),
+            func.min(date_column),
+            func.max(date_column),
+            func.min(model.Year),
+            func.max(model.Year)
+        ).filter(model.batch_id == batch.id).group_by(group).all()
+
+        if not rows:
+            db.delete(batch)
+            removed += 1
+            continue
+
+        first_dates = [_as_datetime(row[3]) for row in rows if row[3] is not None]
+        last_dates = [_as_datetime(row[4]) for row in rows if row[4] is not None]
+        batch.row_count = sum(row[1] for row in rows)
+        batch.total_sales = float(sum(row[2] or 0 for row in rows))
+        batch.min_date = min(first_dates) if first_dates else None
+        batch.max_date = max(last_dates) if last_dates else None
+
+        entries = [
+            _breakdown_entry(config, *row) for row in rows
+            if not (config.get("skip_blank_group") and not row[0])
+        ]
+        entries.sort(key=lambda entry: entry["record_count"], reverse=True)
+        batch.breakdown = entries
+    db.flush()
+    return removed
+
+
+def _scoped_batches(db: Session, table_name: str, filters: Dict[str, Any]):
+    """Batches that can hold rows matching a bulk delete's filters"""
+    query = db.query(IngestionBatch).filter(IngestionBatch.table_name == table_name)
+    for column in ("company_id", "file_name", "dashboard"):
+        if filters.get(column) is not None:
+            query = query.filter(getattr(IngestionBatch, column) == filters[column])
+    return query.order_by(IngestionBatch.id).all()
+
+
+def delete_fact_rows(db: Session, table_name: str, filters: Dict[str, Any],
+                     progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    chunked_delete of an uploaded fact table that keeps its batches in step.
+
+    A file name filter is resolved to the file's batches, whose rows are then
+    deleted by batch_id; other filters (company, dashboard, location / store)
+    are deleted as they are. Afterwards the stats of the batches involved are
+    recomputed, which drops the batches left empty.
+
+    Returns:
+        The number of rows deleted.
+    """
+    model = BATCH_TABLES[table_name]["model"]
+    filters = {column: value for column, value in filters.items() if value is not None}
+    batch_ids = [batch.id for batch in _scoped_batches(db, table_name, filters)]
+
+    if "file_name" in filters and batch_ids:
+        other_filters = {column: value for column, value in filters.items()
+                         if column not in ("file_name", "company_id", "dashboard")}
+        deleted = 0
+        for batch_id in batch_ids:
+            done = deleted
+            deleted += chunked_delete(
+                db, model, {"batch_id": batch_id, **other_filters},
+                progress=(lambda count, done=done: progress(done + count)) if progress else None
+            )
+    else:
+        deleted = chunked_delete(db, model, filters, progress=progress)
+
+    refresh_batch_stats(db, batch_ids)
+    db.commit()
+    return deleted
+
+
+def list_uploaded_files(db: Session, table_name: str, company_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    File list of a fact table from its batches: the totals of each file with its
+    per location (sales_pmix) or per store (budget, financials) breakdown.
+    """
+    config = BATCH_TABLES[table_name]
+    query = db.query(IngestionBatch, Company.name).join(
+        Company, IngestionBatch.company_id == Company.id
+    ).filter(IngestionBatch.table_name == table_name)
+    if company_id:
+        query = query.filter(IngestionBatch.company_id == company_id)
+
+    results = []
+    for batch, company_name in query.order_by(IngestionBatch.file_name, IngestionBatch.id).all():
+        entries = batch.breakdown or []
+        if not entries:
+            continue
+        file_data = {
+            "batch_id": batch.id,
+            "file_name": batch.file_name,
+            "file_timestamp": parse_datetime_from_filename(batch.file_name),
+            "company_name": company_name,
+            "record_count": sum(entry["record_count"] for entry in entries),
+            "total_sales": sum(entry["total_sales"] for entry in entries),
+        }
+        if config["range"] == "date":
+            file_data["earliest_date"] = batch.min_date.isoformat() if batch.min_date else None
+            file_data["latest_date"] = batch.max_date.isoformat() if batch.max_date else None
+        else:
+            first_years = [entry["earliest_year"] for entry in entries if entry["earliest_year"]]
+            last_years = [entry["latest_year"] for entry in entries if entry["latest_year"]]
+            file_data["earliest_year"] = min(first_years) if first_years else None
+            file_data["latest_year"] = max(last_years) if last_years else None
+        file_data[config["entries"]] = entries
+        results.append(file_data)
+    return results
+
+
+def _assign_batch(db: Session, model, batch: IngestionBatch, batch_size: int) -> int:
+    """Set batch_id on the file's rows without one, one id range per transaction"""
+    criteria = [model.company_id == batch.company_id, model.file_name == batch.file_name, model.batch_id.is_(None)]
+    assigned = 0
+    last_id = 0
+    while True:
+        ids = (
+            db.query(model.id)
+            .filter(*criteria, model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+            .subquery()
+        )
+        low, high = db.query(func.min(ids.c.id), func.max(ids.c.id)).one()
+        if high is None:
+            break
+        assigned += (
+            db.query(model)
+            .filter(*criteria, model.id >= low, model.id <= high)
+            .update({model.batch_id: batch.id}, synchronize_session=False)
+        )
+        db.commit()
+        last_id = high
+    return assigned
+
+
+def backfill_ingestion_batches(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Create the batches of files uploaded before ingestion_batches existed and
+    point their rows at them. Returns the number of files processed.
+    """
+    batch_size = batch_size or BULK_DELETE_BATCH_SIZE
+    processed = 0
+    for table_name, config in BATCH_TABLES.items():
+        model = config["model"]
+        pending = db.query(
+            model.company_id, model.file_name, func.max(model.dashboard)
+        ).filter(
+            model.file_name.isnot(None),
+            model.batch_id.is_(None)
+        ).group_by(model.company_id, model.file_name).all()
+
+        for company_id, file_name, dashboard in pending:
+            batch = get_or_create_batch(db, table_name, company_id, file_name, dashboard)
+            db.commit()
+            _assign_batch(db, model, batch, batch_size)
+            refresh_batch_stats(db, [batch.id])
+            db.commit()
+            processed += 1
+    return processed
@@ -4,6 +4,8 @@ from models.logs import Logs
 from schemas.logs import LogsCreate
 from typing import List, Optional
 from sqlalchemy.orm.attributes import flag_modified
+from models.price_change_events import PriceChangeEvent
+from crud.price_change_events import build_price_change_event, sync_price_change_event, delete_price_change_event
 
 def create_logs(db: Session, obj_in: LogsCreate):
     """Create a new logs record"""
@@ -15,6 +17,7 @@ def create_logs(db: Session, obj_in: LogsCreate):
     
     db_obj = Logs(**obj_data)
     db.add(db_obj)
+    sync_price_change_event(db, db_obj)
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -63,6 +66,7 @@ def update_logs(db: Session, logs_id: int, file_data: dict):
             
             # Mark the object as dirty (important for JSON fields)
             flag_modified(db_obj, "file_data")
+            sync_price_change_event(db, db_obj)
             
             print(f"Updated file_data keys: {list(file_data.keys())}")
             
@@ -88,6 +92,7 @@ def delete_logs(db: Session, logs_id: int):
     """Delete a logs record"""
     db_obj = db.query(Logs).filter(Logs.id == logs_id).first()
     if db_obj:
+        delete_price_change_event(db, logs_id)
         db.delete(db_obj)
         db.commit()
         return True
@@ -104,6 +109,8 @@ def bulk_create_logs(db: Session, objects: List[LogsCreate]):
         db_objects.append(Logs(**obj_data))
     
     db.add_all(db_objects)
+    db.flush()
+    db.bulk_insert_mappings(PriceChangeEvent, [build_price_change_event(obj) for obj in db_objects])
     db.commit()
     for obj in db_objects:
         db.refresh(obj)
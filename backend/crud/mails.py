@@ -67,6 +67,11 @@ def get_mails_by_time(db: Session, receiving_time: time):
     return db.query(Mail).filter(Mail.receiving_time == receiving_time).all()
 
 
+def get_distinct_receiving_times(db: Session) -> List[time]:
+    """All distinct scheduled receiving times"""
+    return [row[0] for row in db.query(Mail.receiving_time).distinct().all() if row[0] is not None]
+
+
 def get_mails_by_time_range(db: Session, start_time: time, end_time: time):
     """Get all mails scheduled within a time range"""
     return db.query(Mail).filter(
@@ -3,11 +3,20 @@ from models.master_file import MasterFile
 from schemas.master_file import MasterFileCreate
 from typing import List, Optional
 from sqlalchemy.orm.attributes import flag_modified
+from crud.master_file_items import store_file_data, delete_masterfile_items
+
+def _new_masterfile(db: Session, obj_in: MasterFileCreate) -> MasterFile:
+    """Add a masterfile; the rows in file_data["data"] are stored in masterfile_items"""
+    values = obj_in.dict()
+    file_data = values.pop("file_data")
+    db_obj = MasterFile(**values, file_data={})
+    db.add(db_obj)
+    store_file_data(db, db_obj, file_data)
+    return db_obj
 
 def create_masterfile(db: Session, obj_in: MasterFileCreate):
     """Create a new masterfile record"""
-    db_obj = MasterFile(**obj_in.dict())
-    db.add(db_obj)
+    db_obj = _new_masterfile(db, obj_in)
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -51,12 +60,8 @@ def update_masterfile(db: Session, masterfile_id: int, file_data: dict):
             print(f"Found masterfile object with ID: {masterfile_id}")
             print(f"Current file_data keys: {list(db_obj.file_data.keys()) if db_obj.file_data else 'None'}")
             
-            # Update the file_data
-            db_obj.file_data = file_data
-            
-            # Mark the object as dirty (important for JSON fields)
-            from sqlalchemy.orm.attributes import flag_modified
-            flag_modified(db_obj, "file_data")
+            # Update the file_data (its rows are stored in masterfile_items)
+            store_file_data(db, db_obj, file_data)
             
             print(f"Updated file_data keys: {list(file_data.keys())}")
             
@@ -82,6 +87,7 @@ def delete_masterfile(db: Session, masterfile_id: int):
     """Delete a masterfile record"""
     db_obj = db.query(MasterFile).filter(MasterFile.id == masterfile_id).first()
     if db_obj:
+        delete_masterfile_items(db, [db_obj.id])
         db.delete(db_obj)
         db.commit()
         return True
@@ -89,8 +95,7 @@ def delete_masterfile(db: Session, masterfile_id: int):
 
 def bulk_create_masterfile(db: Session, objects: List[MasterFileCreate]):
     """Bulk create multiple masterfile records"""
-    db_objects = [MasterFile(**obj.dict()) for obj in objects]
-    db.add_all(db_objects)
+    db_objects = [_new_masterfile(db, obj) for obj in objects]
     db.commit()
     for obj in db_objects:
         db.refresh(obj)
@@ -163,6 +168,7 @@ def delete_masterfiles_by_location_and_company(db: Session, location_id: int, co
             print(f"  - ID: {record.id}, Location: {record.location_id}, Company: {record.company_id}, File: {record.filename}")
     
     # Perform the deletion
+    delete_masterfile_items(db, [record.id for record in records_to_delete])
     query.delete(synchronize_session=False)
     db.commit()
     
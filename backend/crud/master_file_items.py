@@ -0,0 +1,256 @@
+# crud/master_file_items.py
+import math
+import numbers
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from models.master_file import MasterFile
+from models.master_file_items import MasterFileItem
+
+# Sheet column -> (MasterFileItem attribute, stored type)
+CORE_COLUMNS = {
+    "Category": ("category", str),
+    "Products": ("item", str),
+    "Batch Size": ("unit", str),
+    "Current Price": ("price", float),
+    "Previous Price": ("previous_price", float),
+}
+
+
+def _typed(value, value_type):
+    """(True, value) when value can be stored in a column of value_type, else (False, None)"""
+    if value is None:
+        return True, None
+    if value_type is float:
+        if isinstance(value, numbers.Number) and not isinstance(value, bool):
+            value = float(value)
+            return (True, None) if math.isnan(value) else (True, value)
+        return False, None
+    return (True, value) if isinstance(value, value_type) else (False, None)
+
+
+def split_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Column mapping of MasterFileItem for one sheet row (without masterfile_id / row_index)"""
+    mapping = {attribute: None for attribute, _ in CORE_COLUMNS.values()}
+    extra = {}
+    for column, value in row.items():
+        if column in CORE_COLUMNS:
+            attribute, value_type = CORE_COLUMNS[column]
+            fits, typed_value = _typed(value, value_type)
+            if fits:
+                mapping[attribute] = typed_value
+                continue
+        extra[column] = value
+    mapping["extra"] = extra or None
+    return mapping
+
+
+def get_item_value(item: MasterFileItem, column: str):
+    extra = item.extra or {}
+    if column in extra or column not in CORE_COLUMNS:
+        return extra.get(column)
+    return getattr(item, CORE_COLUMNS[column][0])
+
+
+def set_item_value(item: MasterFileItem, column: str, value) -> None:
+    """Set one cell of a row, in its typed column when the value fits, else in `extra`"""
+    extra = dict(item.extra or {})
+    extra.pop(column, None)
+    if column in CORE_COLUMNS:
+        attribute, value_type = CORE_COLUMNS[column]
+        fits, typed_value = _typed(value, value_type)
+        setattr(item, attribute, typed_value if fits else None)
+        if not fits:
+            extra[column] = value
+    else:
+        extra[column] = value
+    item.extra = extra or None
+    flag_modified(item, "extra")
+
+
+def item_to_row(item: MasterFileItem, columns: List[str]) -> Dict[str, Any]:
+    """The sheet row of an item, with the file's columns in order"""
+    return {column: get_item_value(item, column) for column in columns}
+
+
+def file_columns(masterfile: MasterFile) -> List[str]:
+    return list((masterfile.file_data or {}).get("columns") or [])
+
+
+def replace_masterfile_items(db: Session, masterfile_id: int, rows: List[Dict[str, Any]]) -> None:
+    """Replace the rows of a master file. Does not commit."""
+    db.query(MasterFileItem).filter(MasterFileItem.masterfile_id == masterfile_id).delete(synchronize_session=False)
+    mappings = []
+    for row_index, row in enumerate(rows):
+        mapping = split_row(row)
+        mapping["masterfile_id"] = masterfile_id
+        mapping["row_index"] = row_index
+        mappings.append(mapping)
+    if mappings:
+        db.bulk_insert_mappings(MasterFileItem, mappings)
+
+
+def delete_masterfile_items(db: Session, masterfile_ids: Iterable[int]) -> None:
+    """Delete the rows of master files (SQLite does not enforce ON DELETE CASCADE). Does not commit."""
+    masterfile_ids = list(masterfile_ids)
+    if masterfile_ids:
+        db.query(MasterFileItem).filter(
+            MasterFileItem.masterfile_id.in_(masterfile_ids)
+        ).delete(synchronize_session=False)
+
+
+def get_rows_by_masterfile(db: Session, masterfiles: List[MasterFile]) -> Dict[int, List[Dict[str, Any]]]:
+    """Sheet rows of several master files, loaded with one query: masterfile id -> rows"""
+    rows = {masterfile.id: [] for masterfile in masterfiles}
+    columns = {masterfile.id: file_columns(masterfile) for masterfile in masterfiles}
+
+    # Files stored before masterfile_items existed still carry their rows
+    stored_ids = []
+    for masterfile in masterfiles:
+        if "data" in (masterfile.file_data or {}):
+            rows[masterfile.id] = masterfile.file_data["data"] or []
+        else:
+            stored_ids.append(masterfile.id)
+
+    if stored_ids:
+        items = db.query(MasterFileItem).filter(
+            MasterFileItem.masterfile_id.in_(stored_ids)
+        ).order_by(MasterFileItem.masterfile_id, MasterFileItem.row_index).all()
+        for item in items:
+            rows[item.masterfile_id].append(item_to_row(item, columns[item.masterfile_id]))
+    return rows
+
+
+def get_masterfile_rows(db: Session, masterfile: MasterFile) -> List[Dict[str, Any]]:
+    """Sheet rows of a master file, in sheet order"""
+    return get_rows_by_masterfile(db, [masterfile])[masterfile.id]
+
+
+def masterfile_with_rows(masterfile: MasterFile, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The master file as it was returned before its rows moved out of file_data"""
+    return {
+        "id": masterfile.id,
+        "company_id": masterfile.company_id,
+        "location_id": masterfile.location_id,
+        "filename": masterfile.filename,
+        "file_data": {**(masterfile.file_data or {}), "data": rows},
+    }
+
+
+def find_matching_items(db: Session, masterfile: MasterFile, match: Dict[str, Any],
+                        exclude_columns: Iterable[str] = ()) -> List[MasterFileItem]:
+    """
+    Rows of a master file whose values equal `match` on every column of the file
+    (except exclude_columns). Category / Products / Batch Size narrow the query
+    through the index; the remaining columns are compared on the loaded rows.
+    """
+    columns = set(file_columns(masterfile)) - set(exclude_columns)
+    criteria = {column: value for column, value in match.items() if column in columns}
+
+    query = db.query(MasterFileItem).filter(MasterFileItem.masterfile_id == masterfile.id)
+    for column, value in criteria.items():
+        if column in CORE_COLUMNS:
+            attribute, value_type = CORE_COLUMNS[column]
+            fits, typed_value = _typed(value, value_type)
+            if fits and typed_value is not None:
+                query = query.filter(getattr(MasterFileItem, attribute) == typed_value)
+
+    return [
+        item for item in query.order_by(MasterFileItem.row_index).all()
+        if all(
+            get_item_value(item, column) is not None and get_item_value(item, column) == value
+            for column, value in criteria.items()
+        )
+    ]
+
+
+def store_file_data(db: Session, masterfile: MasterFile, file_data: Dict[str, Any]) -> None:
+    """
+    Save file_data on a master file: its "data" rows go to masterfile_items and
+    the rest (metadata) stays in the JSON column. Does not commit.
+    """
+    file_data = dict(file_data)
+    if "data" in file_data:
+        rows = file_data.pop("data") or []
+        if not file_data.get("columns"):
+            file_data["columns"] = list(dict.fromkeys(column for row in rows for column in row))
+        file_data["total_rows"] = len(rows)
+        db.flush()  # make sure a new master file has its id
+        replace_masterfile_items(db, masterfile.id, rows)
+    masterfile.file_data = file_data
+    flag_modified(masterfile, "file_data")
+
+
+def backfill_masterfile_items(db: Session) -> int:
+    """Move the rows of master files stored before masterfile_items existed. Returns files migrated."""
+    migrated = 0
+    for (masterfile_id,) in db.query(MasterFile.id).order_by(MasterFile.id).all():
+        masterfile = db.query(MasterFile).filter(MasterFile.id == masterfile_id).first()
+        if masterfile is None or "data" not in (masterfile.file_data or {}):
+            continue
+        store_file_data(db, masterfile, masterfile.file_data)
+        db.commit()
+        db.expunge(masterfile)
+        migrated += 1
+    return migrated
+
+
+def patch_masterfile_rows(db: Session, masterfile: MasterFile, changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply cell changes ({"row": row_index, "column", "value"}) to the rows of a
+    master file. Only the rows named in `changes` are loaded (and locked where the
+    database supports it). When a row's "Current Price" changes, its "Previous Price"
+    becomes the price before this batch, unless the batch sets it explicitly.
+    Does not commit, so the caller saves the changes in one transaction.
+
+    Returns:
+        One entry per changed row: {"row", "values" (the row after the changes),
+        "diff": [{"column", "old", "new"}]}.
+
+    Raises:
+        ValueError: a column is not a column of the file.
+        LookupError: a row does not exist.
+    """
+    columns = file_columns(masterfile)
+    unknown_columns = sorted({change["column"] for change in changes} - set(columns))
+    if unknown_columns:
+        raise ValueError(f"Unknown columns: {unknown_columns}")
+
+    row_indexes = {change["row"] for change in changes}
+    items = {
+        item.row_index: item
+        for item in db.query(MasterFileItem).filter(
+            MasterFileItem.masterfile_id == masterfile.id,
+            MasterFileItem.row_index.in_(row_indexes),
+        ).with_for_update().all()
+    }
+    missing_rows = sorted(row_indexes - set(items))
+    if missing_rows:
+        raise LookupError(f"Rows not found: {missing_rows}")
+
+    original = {}  # row -> {column: value before the batch}
+    explicit = {}  # row -> columns set by the batch
+    for change in changes:
+        item = items[change["row"]]
+        row_original = original.setdefault(item.row_index, {})
+        row_original.setdefault(change["column"], get_item_value(item, change["column"]))
+        explicit.setdefault(item.row_index, set()).add(change["column"])
+        set_item_value(item, change["column"], change["value"])
+
+    results = []
+    for row_index, row_original in original.items():
+        item = items[row_index]
+        if ("Current Price" in row_original and "Previous Price" not in explicit[row_index]
+                and "Previous Price" in columns
+                and get_item_value(item, "Current Price") != row_original["Current Price"]):
+            row_original["Previous Price"] = get_item_value(item, "Previous Price")
+            set_item_value(item, "Previous Price", row_original["Current Price"])
+
+        diff = [
+            {"column": column, "old": old, "new": get_item_value(item, column)}
+            for column, old in row_original.items()
+            if get_item_value(item, column) != old
+        ]
+        if diff:
+            results.append({"row": row_index, "values": item_to_row(item, columns), "diff": diff})
+    return results
@@ -0,0 +1,168 @@
+# crud/price_change_events.py
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from models.logs import Logs
+from models.price_change_events import PriceChangeEvent
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value):
+    if value is None or value == "":
+        return None
+    return str(value)[:255]
+
+
+def _product(original_data: dict):
+    """
+    Product of a logged row: "Products", or the value of the row's second column
+    when the sheet names that column differently.
+    """
+    product = original_data.get("Products")
+    if not product:
+        keys = list(original_data.keys())
+        product = original_data.get(keys[1]) if len(keys) > 1 else None
+    return product
+
+
+def build_price_change_event(log: Logs) -> dict:
+    """PriceChangeEvent mapping of one log's file_data"""
+    file_data = log.file_data if isinstance(log.file_data, dict) else {}
+    changes = file_data.get("changes")
+    changes = changes if isinstance(changes, dict) else {}
+    original_data = file_data.get("original_data")
+    original_data = original_data if isinstance(original_data, dict) else {}
+
+    previous_price = changes.get("previous_price", original_data.get("Previous Price"))
+    new_price = changes.get("new_price", original_data.get("Current Price"))
+    return {
+        "log_id": log.id,
+        "company_id": log.company_id,
+        "location_id": log.location_id,
+        "created_at": log.created_at,
+        "product": _to_text(_product(original_data)),
+        "category": _to_text(original_data.get("Category")),
+        "previous_price": _to_float(previous_price),
+        "new_price": _to_float(new_price),
+        "change_delta": _to_float(changes.get("change_delta")) or 0.0,
+        "change_percent": _to_float(changes.get("change_percent")) or 0.0,
+        "change_p_n": _to_text(changes.get("change_p_n")) or "positive",
+    }
+
+
+def sync_price_change_event(db: Session, log: Logs):
+    """
+    Replace the event row of a log with the facts of its current file_data,
+    company and location. Does not commit; call it before the commit that
+    saves the log.
+    """
+    db.flush()  # make sure a new log has its id and created_at
+    db.query(PriceChangeEvent).filter(PriceChangeEvent.log_id == log.id).delete(synchronize_session=False)
+    db.bulk_insert_mappings(PriceChangeEvent, [build_price_change_event(log)])
+
+
+def delete_price_change_event(db: Session, log_id: int):
+    """Delete the event row of a log (SQLite does not enforce ON DELETE CASCADE)"""
+    db.query(PriceChangeEvent).filter(PriceChangeEvent.log_id == log_id).delete(synchronize_session=False)
+
+
+def backfill_price_change_events(db: Session, batch_size: int = 500) -> int:
+    """Create event rows for logs stored before price_change_events existed. Returns logs processed."""
+    processed = 0
+    last_id = 0
+    while True:
+        logs = db.query(Logs).filter(
+            Logs.id > last_id,
+            ~Logs.id.in_(db.query(PriceChangeEvent.log_id))
+        ).order_by(Logs.id).limit(batch_size).all()
+        if not logs:
+            break
+        last_id = logs[-1].id
+
+        db.bulk_insert_mappings(PriceChangeEvent, [build_price_change_event(log) for log in logs])
+        db.commit()
+        db.expunge_all()
+        processed += len(logs)
+    return processed
+
+
+# ============================================================================
+# Aggregates
+# ============================================================================
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _filtered(query, company_id: int, start_date=None, end_date=None):
+    """Company / inclusive date range on the log's created_at"""
+    query = query.filter(PriceChangeEvent.company_id == company_id)
+    if start_date:
+        query = query.filter(PriceChangeEvent.created_at >= _to_day(start_date))
+    if end_date:
+        query = query.filter(PriceChangeEvent.created_at < _to_day(end_date) + timedelta(days=1))
+    return query
+
+
+def get_price_change_totals(db: Session, company_id: int, start_date=None, end_date=None) -> dict:
+    """Totals of the logs dashboard: counts, average % increase / decrease and the summed deltas"""
+    is_positive = PriceChangeEvent.change_p_n == "positive"
+    is_negative = PriceChangeEvent.change_p_n == "negative"
+    total_items, increases, decreases, avg_increase, avg_decrease, value_impact = _filtered(
+        db.query(
+            func.count(PriceChangeEvent.id),
+            func.sum(case((is_positive, 1), else_=0)),
+            func.sum(case((is_negative, 1), else_=0)),
+            func.avg(case((is_positive, PriceChangeEvent.change_percent))),
+            func.avg(case((is_negative, PriceChangeEvent.change_percent))),
+            func.sum(PriceChangeEvent.change_delta),
+        ),
+        company_id, start_date, end_date
+    ).one()
+
+    return {
+        "total_items_tracked": total_items or 0,
+        "price_increases": int(increases or 0),
+        "price_decreases": int(decreases or 0),
+        "avg_price_increase": float(avg_increase or 0),
+        "avg_price_decrease": float(avg_decrease or 0),
+        "total_value_impact": float(value_impact or 0),
+    }
+
+
+def get_location_change_counts(db: Session, company_id: int, start_date=None, end_date=None):
+    """Rows of (location_id, total changes, increases, decreases), in order of each location's first change"""
+    query = _filtered(
+        db.query(
+            PriceChangeEvent.location_id,
+            func.count(PriceChangeEvent.id),
+            func.sum(case((PriceChangeEvent.change_p_n == "positive", 1), else_=0)),
+            func.sum(case((PriceChangeEvent.change_p_n == "negative", 1), else_=0)),
+        ),
+        company_id, start_date, end_date
+    ).group_by(PriceChangeEvent.location_id).order_by(func.min(PriceChangeEvent.log_id))
+
+    return query.all()
+
+
+def get_price_change_events(db: Session, company_id: int, start_date=None, end_date=None) -> List[tuple]:
+    """Rows of (PriceChangeEvent, filename of its log), oldest first; the log payloads are not loaded"""
+    query = _filtered(
+        db.query(PriceChangeEvent, Logs.filename).join(Logs, Logs.id == PriceChangeEvent.log_id),
+        company_id, start_date, end_date
+    ).order_by(PriceChangeEvent.log_id)
+
+    return query.all()
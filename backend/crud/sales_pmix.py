@@ -7,6 +7,7 @@ import pandas as pd
 from sqlalchemy import func, and_, or_
 from typing import Optional, List, Dict, Any
 from models.companies import Company
+from crud.ingestion_batches import get_or_create_batch, refresh_batch_stats, delete_fact_rows, list_uploaded_files
 from utils.parse_datetime import parse_datetime_from_filename, extract_clean_filename
     
     
@@ -31,6 +32,7 @@ def insert_sales_pmix_df(db: Session, df: pd.DataFrame, company_id: int, file_na
         file_name: Optional filename to store with each record
         dashboard: Optional dashboard integer to store with each record
     """
+    batch = get_or_create_batch(db, "sales_pmix", company_id, file_name, dashboard)
     for _, row in df.iterrows():
         data = row.to_dict()
         data["company_id"] = company_id
@@ -40,9 +42,14 @@ def insert_sales_pmix_df(db: Session, df: pd.DataFrame, company_id: int, file_na
             data["file_name"] = file_name
         if dashboard is not None:
             data["dashboard"] = dashboard
+        if batch is not None:
+            data["batch_id"] = batch.id
             
         db_obj = SalesPMix(**data)
         db.add(db_obj)
+    if batch is not None:
+        db.flush()
+        refresh_batch_stats(db, [batch.id])
     db.commit()
 
 def insert_sales_pmix_df_with_metadata(db: Session, df: pd.DataFrame, company_id: int, metadata: dict):
@@ -55,15 +62,21 @@ def insert_sales_pmix_df_with_metadata(db: Session, df: pd.DataFrame, company_id
         company_id: Company ID to associate with the data
         metadata: Dictionary containing metadata fields like file_name, dashboard, etc.
     """
+    batch = get_or_create_batch(db, "sales_pmix", company_id, metadata.get("file_name"), metadata.get("dashboard"))
     for _, row in df.iterrows():
         data = row.to_dict()
         data["company_id"] = company_id
         
         # Apply metadata to each record
         data.update(metadata)
+        if batch is not None:
+            data["batch_id"] = batch.id
             
         db_obj = SalesPMix(**data)
         db.add(db_obj)
+    if batch is not None:
+        db.flush()
+        refresh_batch_stats(db, [batch.id])
     db.commit()
     
     
@@ -87,6 +100,17 @@ def get_sales_pmix_records(
     dashboard: Optional[int] = None
 ):
     """Get sales pmix records with optional filtering"""
+    query = sales_pmix_records_query(db, company_id, location, file_name, dashboard)
+    return query.offset(skip).limit(limit).all()
+
+def sales_pmix_records_query(
+    db: Session,
+    company_id: Optional[int] = None,
+    location: Optional[str] = None,
+    file_name: Optional[str] = None,
+    dashboard: Optional[int] = None
+):
+    """Unordered query of the sales pmix records matching the filters (see utils.pagination)"""
     query = db.query(SalesPMix)
     
     # Apply filters
@@ -99,7 +123,7 @@ def get_sales_pmix_records(
     if dashboard is not None:
         query = query.filter(SalesPMix.dashboard == dashboard)
     
-    return query.offset(skip).limit(limit).all()
+    return query
 
 def update_sales_pmix_record(db: Session, record_id: int, obj_in: SalesPMixCreate):
     """Update a specific sales pmix record"""
@@ -108,6 +132,9 @@ def update_sales_pmix_record(db: Session, record_id: int, obj_in: SalesPMixCreat
         update_data = obj_in.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        if db_obj.batch_id is not None:
+            db.flush()
+            refresh_batch_stats(db, [db_obj.batch_id])
         db.commit()
         db.refresh(db_obj)
     return db_obj
@@ -116,7 +143,11 @@ def delete_sales_pmix_record(db: Session, record_id: int):
     """Delete a specific sales pmix record"""
     db_obj = db.query(SalesPMix).filter(SalesPMix.id == record_id).first()
     if db_obj:
+        batch_id = db_obj.batch_id
         db.delete(db_obj)
+        if batch_id is not None:
+            db.flush()
+            refresh_batch_stats(db, [batch_id])
         db.commit()
         return True
     return False
@@ -126,56 +157,20 @@ def delete_sales_pmix_record(db: Session, record_id: int):
 # ============================================================================
 
 def delete_all_sales_pmix_records(db: Session, company_id: Optional[int] = None):
-    """Delete all sales pmix records (optionally filtered by company)"""
-    query = db.query(SalesPMix)
-    
-    if company_id:
-        query = query.filter(SalesPMix.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all sales pmix records (optionally filtered by company), in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "sales_pmix", {"company_id": company_id or None})
 
 def delete_sales_pmix_by_dashboard(db: Session, dashboard: int, company_id: Optional[int] = None):
-    """Delete all sales pmix records for a specific dashboard"""
-    query = db.query(SalesPMix).filter(SalesPMix.dashboard == dashboard)
-    
-    if company_id:
-        query = query.filter(SalesPMix.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all sales pmix records for a specific dashboard, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "sales_pmix", {"dashboard": dashboard, "company_id": company_id or None})
 
 def delete_sales_pmix_by_filename(db: Session, file_name: str, company_id: Optional[int] = None):
-    """Delete all sales pmix records for a specific file name"""
-    query = db.query(SalesPMix).filter(SalesPMix.file_name == file_name)
-    
-    if company_id:
-        query = query.filter(SalesPMix.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all sales pmix records for a specific file name, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "sales_pmix", {"file_name": file_name, "company_id": company_id or None})
 
 def delete_sales_pmix_by_location(db: Session, location: str, company_id: Optional[int] = None):
-    """Delete all sales pmix records for a specific location"""
-    query = db.query(SalesPMix).filter(SalesPMix.Location == location)
-    
-    if company_id:
-        query = query.filter(SalesPMix.company_id == company_id)
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
-    
-    return deleted_count
+    """Delete all sales pmix records for a specific location, in batches (see crud.ingestion_batches.delete_fact_rows)"""
+    return delete_fact_rows(db, "sales_pmix", {"Location": location, "company_id": company_id or None})
 
 
 def delete_sales_pmix_by_location_and_company(db: Session, location: str, company_name: str) -> Dict[str, Any]:
@@ -193,16 +188,7 @@ def delete_sales_pmix_by_location_and_company(db: Session, location: str, compan
     company_id = company.id
     
     # Delete records matching both location and company_id
-    query = db.query(SalesPMix).filter(
-        and_(
-            SalesPMix.Location == location,
-            SalesPMix.company_id == company_id
-        )
-    )
-    
-    deleted_count = query.count()
-    query.delete(synchronize_session=False)
-    db.commit()
+    deleted_count = delete_fact_rows(db, "sales_pmix", {"Location": location, "company_id": company_id})
     
     return {
         "deleted_count": deleted_count,
@@ -266,80 +252,8 @@ def get_sales_pmix_summary(
 
 # Updated CRUD function with location breakdown
 def get_uploaded_files_list(db: Session, company_id: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Get list of all uploaded files with record counts broken down by location and company name"""
-    
-    # Get detailed breakdown by file, location, and company
-    query = db.query(
-        SalesPMix.file_name,
-        SalesPMix.Location,  # Replace with your actual location field
-        Company.name.label('company_name'),
-        func.count(SalesPMix.id).label('location_record_count'),
-        func.sum(SalesPMix.Net_Price).label('location_total_sales'),
-        func.min(SalesPMix.Sent_Date).label('location_earliest_date'),
-        func.max(SalesPMix.Sent_Date).label('location_latest_date')
-    ).join(Company, SalesPMix.company_id == Company.id) \
-     .filter(SalesPMix.file_name.isnot(None))
-
-    if company_id:
-        query = query.filter(SalesPMix.company_id == company_id)
-
-    query = query.group_by(
-        SalesPMix.file_name, 
-        SalesPMix.Location, 
-        Company.name
-    ).order_by(SalesPMix.file_name, SalesPMix.Location)
-
-    # Group results by file
-    files_dict = {}
-    for row in query.all():
-        file_key = row.file_name
-        
-        if file_key not in files_dict:
-            file_timestamp = parse_datetime_from_filename(row.file_name)
-            # clean_file_name = extract_clean_filename(row.file_name)
-            clean_file_name = row.file_name
-            files_dict[file_key] = {
-                "file_name": clean_file_name,
-                "file_timestamp": file_timestamp,
-                "company_name": row.company_name,
-                "record_count": 0,
-                "total_sales": 0.0,
-                "earliest_date": None,
-                "latest_date": None,
-                "locations": []
-            }
-        
-        # Update file totals
-        files_dict[file_key]["record_count"] += row.location_record_count
-        files_dict[file_key]["total_sales"] += float(row.location_total_sales or 0)
-        
-        # Update date ranges
-        if files_dict[file_key]["earliest_date"] is None or (row.location_earliest_date and row.location_earliest_date < files_dict[file_key]["earliest_date"]):
-            files_dict[file_key]["earliest_date"] = row.location_earliest_date
-        if files_dict[file_key]["latest_date"] is None or (row.location_latest_date and row.location_latest_date > files_dict[file_key]["latest_date"]):
-            files_dict[file_key]["latest_date"] = row.location_latest_date
-        
-        # Add location details
-        files_dict[file_key]["locations"].append({
-            "location": row.Location or "Unknown Location",
-            "record_count": row.location_record_count,
-            "total_sales": float(row.location_total_sales or 0),
-            "earliest_date": row.location_earliest_date.isoformat() if row.location_earliest_date else None,
-            "latest_date": row.location_latest_date.isoformat() if row.location_latest_date else None,
-        })
-
-    # Convert to list and format dates
-    results = []
-    for file_data in files_dict.values():
-        file_data["earliest_date"] = file_data["earliest_date"].isoformat() if file_data["earliest_date"] else None
-        file_data["latest_date"] = file_data["latest_date"].isoformat() if file_data["latest_date"] else None
-        
-        # Sort locations by record count (descending)
-        file_data["locations"].sort(key=lambda x: x["record_count"], reverse=True)
-        
-        results.append(file_data)
-
-    return results
+    """Get list of all uploaded files with record counts broken down by location and company name (from the ingestion batches)"""
+    return list_uploaded_files(db, "sales_pmix", company_id)
 
 
 
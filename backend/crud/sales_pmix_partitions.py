@@ -0,0 +1,165 @@
+# crud/sales_pmix_partitions.py
+"""
+Monthly partitions of sales_pmix on PostgreSQL.
+
+With migrations/sales_pmix_partitioning.sql applied, sales_pmix is partitioned
+by range of Sent_Date, one partition per month (sales_pmix_y2026m01, ...) plus
+sales_pmix_default for NULL dates and months without a partition yet. Queries
+filtering on Sent_Date only read the partitions of their months, and a whole
+month is deleted by dropping its partition.
+
+The partitions are created ahead of time by tasks.partition_maintenance; rows
+that landed in the default partition (historical uploads) are moved into the
+partition of their month when it is created.
+
+On SQLite, or on a PostgreSQL database without the migration, sales_pmix is
+one table: is_partitioned() is False, maintenance does nothing and
+delete_sales_pmix_month falls back to a batched range delete.
+"""
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from models.sales_pmix import SalesPMix
+from models.ingestion_batches import IngestionBatch
+from crud.chunked_delete import chunked_delete
+from crud.ingestion_batches import refresh_batch_stats
+
+DEFAULT_PARTITION = "sales_pmix_default"
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """sales_pmix_y2026m01 (the naming of migrations/sales_pmix_partitioning.sql)"""
+    return f"sales_pmix_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(db: Session) -> bool:
+    """True when sales_pmix is a partitioned PostgreSQL table"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'sales_pmix' AND pg_table_is_visible(c.oid))"
+    )).scalar()
+
+
+def list_month_partitions(db: Session) -> List[date]:
+    """First days of the months that have a partition, oldest first"""
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'sales_pmix' AND pg_table_is_visible(p.oid)"
+    )).scalars().all()
+
+    months = []
+    for name in names:
+        if name == DEFAULT_PARTITION:
+            continue
+        try:
+            months.append(datetime.strptime(name, "sales_pmix_y%Ym%m").date())
+        except ValueError:
+            continue  # a partition not created by this module
+    return sorted(months)
+
+
+def create_month_partition(db: Session, month: date) -> bool:
+    """
+    Create the partition of `month` unless it exists, moving the month's rows
+    out of the default partition. The table is filled and then attached, so
+    the attach does not have to wait for a scan of the new partition, and it
+    all happens in one transaction. The default partition is locked against
+    writes for that transaction, and the rows are moved by one DELETE ...
+    RETURNING, so a row inserted meanwhile is neither lost nor left behind to
+    fail the attach. Returns True when the partition was created.
+    """
+    month = month_start(month)
+    if month in list_month_partitions(db):
+        return False
+
+    name = partition_name(month)
+    bounds = {"low": datetime.combine(month, datetime.min.time()),
+              "high": datetime.combine(next_month(month), datetime.min.time())}
+    in_month = '"Sent_Date" >= :low AND "Sent_Date" < :high'
+    db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+    db.execute(text(f'CREATE TABLE "{name}" (LIKE sales_pmix INCLUDING DEFAULTS)'))
+    db.execute(text(
+        f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), bounds)
+    db.execute(text(
+        f"ALTER TABLE sales_pmix ATTACH PARTITION \"{name}\" "
+        f"FOR VALUES FROM ('{bounds['low'].isoformat()}') TO ('{bounds['high'].isoformat()}')"
+    ))
+    db.commit()
+    return True
+
+
+def months_in_default_partition(db: Session) -> List[date]:
+    """Months with rows waiting in the default partition"""
+    rows = db.execute(text(
+        f'SELECT DISTINCT date_trunc(\'month\', "Sent_Date") FROM {DEFAULT_PARTITION} '
+        f'WHERE "Sent_Date" IS NOT NULL'
+    )).scalars().all()
+    return sorted(month_start(value) for value in rows)
+
+
+def _refresh_month_batches(db: Session, month: date, company_id: Optional[int] = None):
+    """Recompute the ingestion batches with rows in `month` (see crud.ingestion_batches)"""
+    low = datetime.combine(month, datetime.min.time())
+    high = datetime.combine(next_month(month), datetime.min.time())
+    query = db.query(IngestionBatch.id).filter(
+        IngestionBatch.table_name == "sales_pmix",
+        IngestionBatch.min_date < high,
+        IngestionBatch.max_date >= low
+    )
+    if company_id:
+        query = query.filter(IngestionBatch.company_id == company_id)
+    refresh_batch_stats(db, [batch_id for batch_id, in query.all()])
+    db.commit()
+
+
+def delete_sales_pmix_month(db: Session, month: date, company_id: Optional[int] = None) -> dict:
+    """
+    Delete the sales pmix rows whose Sent_Date falls in `month` (optionally of
+    one company only).
+
+    The whole month of a partitioned table is dropped with its partition, which
+    takes the same time however many rows it holds. Otherwise (one company, or
+    a single table) the rows are deleted in id-range batches with
+    crud.chunked_delete; partition pruning still limits each batch to the
+    month's partition.
+    """
+    month = month_start(month)
+    low = datetime.combine(month, datetime.min.time())
+    high = datetime.combine(next_month(month), datetime.min.time())
+
+    if not company_id and is_partitioned(db) and month in list_month_partitions(db):
+        name = partition_name(month)
+        deleted = db.execute(text(f'SELECT COUNT(*) FROM "{name}"')).scalar() or 0
+        db.execute(text(f'ALTER TABLE sales_pmix DETACH PARTITION "{name}"'))
+        db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+        dropped_partition = True
+    else:
+        deleted = chunked_delete(
+            db, SalesPMix, {"company_id": company_id or None},
+            extra_criteria=[SalesPMix.Sent_Date >= low, SalesPMix.Sent_Date < high]
+        )
+        dropped_partition = False
+
+    _refresh_month_batches(db, month, company_id)
+    return {
+        "deleted_count": deleted,
+        "month": month.isoformat(),
+        "dropped_partition": dropped_partition,
+    }
@@ -0,0 +1,53 @@
+# crud/scheduler_leases.py
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models.scheduler_leases import SchedulerLease
+
+
+def acquire_lease(db: Session, name: str, owner: str, ttl: timedelta) -> bool:
+    """
+    Take or renew the lease `name` for `owner`. Succeeds when the lease is
+    free, already held by `owner`, or expired (its holder stopped heartbeating).
+    The conditional UPDATE / unique INSERT make this safe across processes.
+    """
+    now = datetime.utcnow()
+    values = {"owner": owner, "expires_at": now + ttl, "heartbeat_at": now}
+    updated = (
+        db.query(SchedulerLease)
+        .filter(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.owner == owner, SchedulerLease.expires_at < now),
+        )
+        .update(values, synchronize_session=False)
+    )
+    if updated:
+        db.commit()
+        return True
+
+    if db.query(SchedulerLease.name).filter(SchedulerLease.name == name).first() is not None:
+        db.rollback()
+        return False
+
+    db.add(SchedulerLease(name=name, **values))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        # Another process created the lease first
+        db.rollback()
+        return False
+
+
+def release_lease(db: Session, name: str, owner: str) -> None:
+    """Expire the lease now if `owner` holds it, so another process can take over immediately"""
+    db.query(SchedulerLease).filter(
+        SchedulerLease.name == name, SchedulerLease.owner == owner
+    ).update({"expires_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def get_lease(db: Session, name: str) -> Optional[SchedulerLease]:
+    return db.query(SchedulerLease).filter(SchedulerLease.name == name).first()
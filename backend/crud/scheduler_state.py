@@ -0,0 +1,29 @@
+# crud/scheduler_state.py
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models.scheduler_state import SchedulerState
+
+
+def get_last_fired_at(db: Session, name: str) -> Optional[datetime]:
+    state = db.query(SchedulerState).filter(SchedulerState.name == name).first()
+    return state.last_fired_at if state else None
+
+
+def set_last_fired_at(db: Session, name: str, fired_at: datetime) -> None:
+    """Record the fire time (naive UTC) of the last processed window"""
+    updated = db.query(SchedulerState).filter(SchedulerState.name == name).update(
+        {"last_fired_at": fired_at, "updated_at": datetime.utcnow()}, synchronize_session=False
+    )
+    if not updated:
+        db.add(SchedulerState(name=name, last_fired_at=fired_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Created concurrently; update the existing row instead
+        db.rollback()
+        db.query(SchedulerState).filter(SchedulerState.name == name).update(
+            {"last_fired_at": fired_at, "updated_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
@@ -0,0 +1,55 @@
+# crud/sent_log.py
+from datetime import date, datetime, timedelta
+from typing import List, Set
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models.sent_log import SentLog
+
+
+def claim_sends(db: Session, mails, send_date: date, owner: str = None) -> Set[int]:
+    """
+    Record that each mail is being sent on send_date. Returns the ids of the
+    mails claimed by this call; mails already in the log for that day (sent
+    by another worker, or before a restart) are left out.
+    """
+    mail_ids = [mail.id for mail in mails]
+    if not mail_ids:
+        return set()
+
+    already_sent = {
+        mail_id for (mail_id,) in db.query(SentLog.mail_id).filter(
+            SentLog.mail_id.in_(mail_ids), SentLog.send_date == send_date
+        ).all()
+    }
+
+    claimed = set()
+    for mail in mails:
+        if mail.id in already_sent:
+            continue
+        db.add(SentLog(mail_id=mail.id, send_date=send_date,
+                       receiver_email=mail.receiver_email, owner=owner))
+        try:
+            db.commit()
+            claimed.add(mail.id)
+        except IntegrityError:
+            # Claimed concurrently by another worker
+            db.rollback()
+    return claimed
+
+
+def release_sends(db: Session, mail_ids: List[int], send_date: date) -> None:
+    """Drop claims whose emails could not be queued, so a later run may send them"""
+    if not mail_ids:
+        return
+    db.query(SentLog).filter(
+        SentLog.mail_id.in_(mail_ids), SentLog.send_date == send_date
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def prune_sent_log(db: Session, keep_days: int) -> int:
+    """Delete log rows older than keep_days"""
+    cutoff = (datetime.utcnow() - timedelta(days=keep_days)).date()
+    count = db.query(SentLog).filter(SentLog.send_date < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return count
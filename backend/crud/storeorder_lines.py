@@ -0,0 +1,197 @@
+# crud/storeorder_lines.py
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models.storeorders import StoreOrders
+from models.storeorder_lines import StoreOrderLine
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def build_storeorder_lines(order: StoreOrders) -> List[dict]:
+    """Line mappings for one order's items_ordered JSON"""
+    items = (order.items_ordered or {}).get("items") or []
+    order_date = order.updated_at or order.created_at or datetime.utcnow()
+
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        item_id = item.get("item_id", item.get("id"))
+        lines.append({
+            "order_id": order.id,
+            "company_id": order.company_id,
+            "location_id": order.location_id,
+            "item_id": str(item_id) if item_id is not None else None,
+            "item_name": item.get("name") or item.get("product") or item.get("item_name"),
+            "category": item.get("category"),
+            "unit": item.get("unit"),
+            "quantity": _to_float(item.get("quantity")),
+            "unit_price": _to_float(item.get("unit_price", item.get("price"))),
+            "total_price": _to_float(item.get("total_price")) or 0.0,
+            "order_date": order_date,
+        })
+    return lines
+
+
+def sync_storeorder_lines(db: Session, order: StoreOrders):
+    """
+    Replace the line rows of an order with its current items_ordered and
+    refresh its effective_date. Does not commit; call it before the commit
+    that saves the order.
+    """
+    db.flush()  # make sure a new order has its id
+    order.effective_date = order.updated_at or order.created_at
+    db.query(StoreOrderLine).filter(StoreOrderLine.order_id == order.id).delete(synchronize_session=False)
+    lines = build_storeorder_lines(order)
+    if lines:
+        db.bulk_insert_mappings(StoreOrderLine, lines)
+
+
+def delete_storeorder_lines(db: Session, order_id: int):
+    """Delete the line rows of an order (SQLite does not enforce ON DELETE CASCADE)"""
+    db.query(StoreOrderLine).filter(StoreOrderLine.order_id == order_id).delete(synchronize_session=False)
+
+
+def backfill_storeorder_lines(db: Session, batch_size: int = 500) -> int:
+    """Create line rows for orders stored before storeorder_lines existed. Returns orders processed."""
+    processed = 0
+    last_id = 0
+    while True:
+        orders = db.query(StoreOrders).filter(
+            StoreOrders.id > last_id,
+            ~StoreOrders.id.in_(db.query(StoreOrderLine.order_id))
+        ).order_by(StoreOrders.id).limit(batch_size).all()
+        if not orders:
+            break
+        last_id = orders[-1].id
+
+        lines = [line for order in orders for line in build_storeorder_lines(order)]
+        if lines:
+            db.bulk_insert_mappings(StoreOrderLine, lines)
+        db.commit()
+        processed += len(orders)
+    return processed
+
+
+# ============================================================================
+# Aggregates
+# ============================================================================
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _filtered(query, company_id: int, location_ids: Optional[List[int]] = None,
+              start_date=None, end_date=None):
+    """Company / locations / inclusive date range on the order's effective date"""
+    query = query.filter(StoreOrderLine.company_id == company_id)
+    if location_ids is not None:
+        query = query.filter(StoreOrderLine.location_id.in_(location_ids))
+    if start_date:
+        query = query.filter(StoreOrderLine.order_date >= _to_day(start_date))
+    if end_date:
+        query = query.filter(StoreOrderLine.order_date < _to_day(end_date) + timedelta(days=1))
+    return query
+
+
+def get_order_totals(db: Session, company_id: int, location_ids: Optional[List[int]] = None,
+                     start_date=None, end_date=None) -> dict:
+    """order_id -> {"total_amount", "total_quantity", "line_count"}"""
+    query = _filtered(
+        db.query(
+            StoreOrderLine.order_id,
+            func.sum(StoreOrderLine.total_price),
+            func.sum(func.coalesce(StoreOrderLine.quantity, 0)),
+            func.count(StoreOrderLine.id),
+        ),
+        company_id, location_ids, start_date, end_date
+    ).group_by(StoreOrderLine.order_id)
+
+    return {
+        order_id: {
+            "total_amount": float(total_amount or 0.0),
+            "total_quantity": float(total_quantity or 0.0),
+            "line_count": line_count,
+        }
+        for order_id, total_amount, total_quantity, line_count in query
+    }
+
+
+def get_item_quantities(db: Session, company_id: int, location_ids: Optional[List[int]] = None,
+                        start_date=None, end_date=None, missing_quantity: float = 0) -> dict:
+    """item_name -> total quantity ordered; items without a quantity count as `missing_quantity`"""
+    query = _filtered(
+        db.query(
+            func.coalesce(StoreOrderLine.item_name, "Unknown"),
+            func.sum(func.coalesce(StoreOrderLine.quantity, missing_quantity)),
+        ),
+        company_id, location_ids, start_date, end_date
+    ).group_by(func.coalesce(StoreOrderLine.item_name, "Unknown"))
+
+    return {name: quantity for name, quantity in query}
+
+
+def get_item_location_quantities(db: Session, company_id: int, location_ids: Optional[List[int]] = None,
+                                 start_date=None, end_date=None):
+    """Rows of (item_name, location_id, total quantity, unit) for the consolidated production table"""
+    query = _filtered(
+        db.query(
+            StoreOrderLine.item_name,
+            StoreOrderLine.location_id,
+            func.sum(func.coalesce(StoreOrderLine.quantity, 0)),
+            func.max(StoreOrderLine.unit),
+        ),
+        company_id, location_ids, start_date, end_date
+    ).group_by(StoreOrderLine.item_name, StoreOrderLine.location_id)
+
+    return query.all()
+
+
+def get_category_costs(db: Session, company_id: int, location_ids: Optional[List[int]] = None,
+                       start_date=None, end_date=None) -> dict:
+    """category -> total cost of the items ordered"""
+    category = func.coalesce(StoreOrderLine.category, "Uncategorized")
+    query = _filtered(
+        db.query(category, func.sum(StoreOrderLine.total_price)),
+        company_id, location_ids, start_date, end_date
+    ).group_by(category)
+
+    return {name: float(cost or 0.0) for name, cost in query}
+
+
+
+def get_location_versions(db: Session, company_id: int, location_ids: Optional[List[int]] = None,
+                          start_date=None, end_date=None) -> dict:
+    """
+    location_id -> fingerprint of its orders in a range: (order count, latest write).
+    Every create or edit sets the order's updated_at / created_at, and a deleted or
+    moved order lowers the count, so the fingerprint changes with any write,
+    including edits that keep the line count and total quantity.
+    """
+    query = db.query(
+        StoreOrders.location_id,
+        func.count(StoreOrders.id),
+        func.max(func.coalesce(StoreOrders.updated_at, StoreOrders.created_at)),
+    ).filter(StoreOrders.company_id == company_id)
+    if location_ids is not None:
+        query = query.filter(StoreOrders.location_id.in_(location_ids))
+    if start_date:
+        query = query.filter(StoreOrders.effective_date >= _to_day(start_date))
+    if end_date:
+        query = query.filter(StoreOrders.effective_date < _to_day(end_date) + timedelta(days=1))
+
+    return {
+        location_id: (order_count, last_write)
+        for location_id, order_count, last_write in query.group_by(StoreOrders.location_id)
+    }
@@ -1,11 +1,12 @@
 # crud/storeorders.py
-from sqlalchemy import desc, func, or_, and_
+from sqlalchemy import desc, func
 from sqlalchemy.orm import Session
 from models.storeorders import StoreOrders
+from crud.storeorder_lines import sync_storeorder_lines, delete_storeorder_lines, _to_day
 from schemas.storeorders import StoreOrdersCreate, StoreOrdersUpdate
 from typing import List, Optional, Union
 from sqlalchemy.orm.attributes import flag_modified
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 def create_storeorders(db: Session, obj_in: StoreOrdersCreate):
@@ -18,6 +19,7 @@ def create_storeorders(db: Session, obj_in: StoreOrdersCreate):
     
     db_obj = StoreOrders(**obj_data)
     db.add(db_obj)
+    sync_storeorder_lines(db, db_obj)
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -41,17 +43,37 @@ def get_storeorders_by_company(db: Session, company_id: int, skip: int = 0, limi
 def get_storeorders_by_company_current_date(db: Session, company_id: int):
     """Get all store orders for company from current date (prioritizing updated_at over created_at)"""
     current_date = datetime.today().date()
-    return db.query(StoreOrders).filter(
-        StoreOrders.company_id == company_id,
-        or_(
-            # If updated_at exists, use it for filtering
-            and_(StoreOrders.updated_at.isnot(None), func.date(StoreOrders.updated_at) == current_date),
-            # Otherwise, use created_at for filtering
-            and_(StoreOrders.updated_at.is_(None), func.date(StoreOrders.created_at) == current_date)
-        )
-    ).all()
+    return get_storeorders_filtered(db, company_id, None, current_date, current_date)
     
     
+def get_storeorders_filtered(db: Session, company_id: int, location_ids: Optional[List[int]] = None,
+                             start_date=None, end_date=None):
+    """
+    All store orders of a company, optionally restricted to some locations and to an
+    inclusive date range on effective_date (updated_at or created_at), newest first.
+    One query served by ix_storeorders_company_location_effective; no row cap.
+    Raises ValueError for dates that are not YYYY-MM-DD.
+    """
+    query = db.query(StoreOrders).filter(StoreOrders.company_id == company_id)
+    if location_ids is not None:
+        query = query.filter(StoreOrders.location_id.in_(location_ids))
+    if start_date:
+        query = query.filter(StoreOrders.effective_date >= _to_day(start_date))
+    if end_date:
+        query = query.filter(StoreOrders.effective_date < _to_day(end_date) + timedelta(days=1))
+    return query.order_by(StoreOrders.effective_date.desc()).all()
+
+
+def backfill_effective_dates(db: Session) -> int:
+    """Set effective_date on orders stored before the column existed. Returns rows updated."""
+    updated = db.query(StoreOrders).filter(StoreOrders.effective_date.is_(None)).update(
+        {StoreOrders.effective_date: func.coalesce(StoreOrders.updated_at, StoreOrders.created_at)},
+        synchronize_session=False
+    )
+    db.commit()
+    return updated
+
+
 def get_storeorders_by_location(db: Session, location_id: int, skip: int = 0, limit: int = 100):
     """Get store orders records by location ID with pagination"""
     return db.query(StoreOrders).filter(StoreOrders.location_id == location_id).offset(skip).limit(limit).all()
@@ -120,6 +142,7 @@ def update_storeorders(db: Session, storeorders_id: int, obj_in: StoreOrdersUpda
             # Mark the objects as dirty (important for JSON fields)
             flag_modified(db_obj, "items_ordered")
             flag_modified(db_obj, "prev_items_ordered")
+            sync_storeorder_lines(db, db_obj)
             
             print(f"Updated items_ordered keys: {list(obj_in.items_ordered.keys())}")
             print(f"Previous items_ordered moved to prev_items_ordered")
@@ -168,6 +191,7 @@ def update_storeorders_by_location(db: Session, company_id: int, location_id: in
             # Mark the objects as dirty (important for JSON fields)
             flag_modified(db_obj, "items_ordered")
             flag_modified(db_obj, "prev_items_ordered")
+            sync_storeorder_lines(db, db_obj)
             
             print(f"Updated items_ordered keys: {list(obj_in.items_ordered.keys())}")
             print(f"Previous items_ordered moved to prev_items_ordered")
@@ -194,6 +218,7 @@ def delete_storeorders(db: Session, storeorders_id: int):
     """Delete a store orders record"""
     db_obj = db.query(StoreOrders).filter(StoreOrders.id == storeorders_id).first()
     if db_obj:
+        delete_storeorder_lines(db, db_obj.id)
         db.delete(db_obj)
         db.commit()
         return True
@@ -210,6 +235,8 @@ def bulk_create_storeorders(db: Session, objects: List[StoreOrdersCreate]):
         db_objects.append(StoreOrders(**obj_data))
     
     db.add_all(db_objects)
+    for obj in db_objects:
+        sync_storeorder_lines(db, obj)
     db.commit()
     for obj in db_objects:
         db.refresh(obj)
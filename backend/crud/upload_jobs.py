@@ -0,0 +1,104 @@
+# crud/upload_jobs.py
+import os
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from models.upload_jobs import UploadJob
+
+JOB_PAYLOAD_DIR = os.path.join("uploads", "jobs")
+ACTIVE_STATUSES = ["parsing", "computing", "deduping", "inserting"]
+
+
+def create_upload_job(db: Session, kind: str, request, user_id: int) -> UploadJob:
+    """Queue an upload request. The request body (with the base64 file) is kept on disk until processed."""
+    os.makedirs(JOB_PAYLOAD_DIR, exist_ok=True)
+    payload_path = os.path.join(JOB_PAYLOAD_DIR, f"{uuid.uuid4().hex}.json")
+    with open(payload_path, "w") as f:
+        json.dump(request.model_dump(), f)
+
+    db_job = UploadJob(
+        company_id=request.company_id,
+        user_id=user_id,
+        kind=kind,
+        file_name=request.fileName,
+        dashboard=request.dashboard,
+        status="queued",
+        payload_path=payload_path,
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def get_upload_job(db: Session, job_id: int) -> Optional[UploadJob]:
+    return db.query(UploadJob).filter(UploadJob.id == job_id).first()
+
+
+def get_upload_jobs_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 50):
+    return (
+        db.query(UploadJob)
+        .filter(UploadJob.user_id == user_id)
+        .order_by(UploadJob.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def claim_next_upload_job(db: Session) -> Optional[UploadJob]:
+    """
+    Atomically move the oldest queued job to "parsing" and return it.
+    The conditional UPDATE makes this safe when several workers poll the same table.
+    """
+    candidates = (
+        db.query(UploadJob.id)
+        .filter(UploadJob.status == "queued")
+        .order_by(UploadJob.id)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = (
+            db.query(UploadJob)
+            .filter(UploadJob.id == job_id, UploadJob.status == "queued")
+            .update(
+                {"status": "parsing", "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed:
+            return get_upload_job(db, job_id)
+    return None
+
+
+def update_upload_job(db: Session, job_id: int, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow()
+    db.query(UploadJob).filter(UploadJob.id == job_id).update(fields, synchronize_session=False)
+    db.commit()
+
+
+def finish_upload_job(db: Session, job_id: int, result) -> None:
+    update_upload_job(db, job_id, status="done", result=result, finished_at=datetime.utcnow())
+
+
+def fail_upload_job(db: Session, job_id: int, error: str) -> None:
+    update_upload_job(db, job_id, status="failed", error=error, finished_at=datetime.utcnow())
+
+
+def requeue_stale_upload_jobs(db: Session, stale_after: timedelta) -> int:
+    """Put jobs that stopped reporting progress (e.g. the process died) back in the queue."""
+    cutoff = datetime.utcnow() - stale_after
+    count = (
+        db.query(UploadJob)
+        .filter(UploadJob.status.in_(ACTIVE_STATUSES), UploadJob.updated_at < cutoff)
+        .update(
+            {"status": "queued", "rows_processed": 0, "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
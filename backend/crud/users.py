@@ -2,7 +2,7 @@ import random
 import string
 from sqlalchemy.orm import Session
 from datetime import datetime
-from passlib.hash import bcrypt
+from utils.password_hashing import hash_password
 from fastapi import HTTPException
 
 from models.permissions import Permission
@@ -18,6 +18,7 @@ from crud.permissions import (create_permission,
                               delete_user_permission_mappings
 )
 from utils.email import send_account_email
+from utils.principal_cache import invalidate_principal
 
 from crud.user_company_companylocation import (
     create_user_location_mapping,
@@ -42,7 +43,7 @@ def create_user(db: Session, user: user_schema.UserCreate, background_tasks=None
 
     # ✅ Generate password if not provided
     raw_password = user.password if user.password else generate_password()
-    hashed_password = bcrypt.hash(raw_password)
+    hashed_password = hash_password(raw_password)
 
     db_user = user_model.User(
         first_name=user.first_name,
@@ -184,7 +185,7 @@ def update_user(db: Session, user_id: int, user: user_schema.UserCreate):
     
     # ✅ Only hash password if it's provided and not empty
     if user.password and user.password.strip():
-        db_user.password_hash = bcrypt.hash(user.password)
+        db_user.password_hash = hash_password(user.password)
     
     if user.phone_number is not None:
         db_user.phone_number = user.phone_number
@@ -215,6 +216,7 @@ def update_user(db: Session, user_id: int, user: user_schema.UserCreate):
 
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(db_user.id)
 
     # ✅ Update location mappings if provided
     if user.assigned_location is not None:
@@ -289,6 +291,7 @@ def delete_user(db: Session, user_id: int):
 
     db.delete(db_user)
     db.commit()
+    invalidate_principal(user_id)
     return True
 
 
@@ -303,6 +306,7 @@ def deactivate_user(db: Session, user_id: int):
     db_user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return True
 
 
@@ -316,6 +320,7 @@ def activate_user(db: Session, user_id: int):
     db_user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return True
 
 
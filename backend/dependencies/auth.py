@@ -5,7 +5,9 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from models.users import User
+from models.permissions import Permission
 from database import get_db
+from utils.principal_cache import Principal, get_principal, put_principal
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "secret")
@@ -26,23 +28,37 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         # ✅ CHANGED: From minutes to hours (7 days instead of ~30 minutes)
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     
-    to_encode.update({"exp": expire})
+    # iat identifies the sign-in, which keys the principal cache
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+        # Tokens issued before iat was added are keyed by their expiry
+        cache_key = (email, payload.get("iat", payload.get("exp")))
+        principal = get_principal(cache_key)
+        if principal is not None:
+            return principal
+
         user = db.query(User).filter(User.email == email).first()
         if user is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        return user
+        permission = db.query(Permission).filter(
+            Permission.user_id == user.id, Permission.company_id == user.company_id
+        ).first()
+
+        principal = Principal(user, permission)
+        put_principal(cache_key, principal)
+        return principal
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     return current_user
\ No newline at end of file
@@ -158,7 +158,7 @@
 
 from sqlalchemy.orm import Session
 from models.users import User, RoleEnum
-from passlib.hash import bcrypt
+from utils.password_hashing import hash_password
 
 
 def create_default_superusers(db: Session):
@@ -193,7 +193,7 @@ def create_default_superusers(db: Session):
             # Create new superuser
             user = User(
                 email=user_data["email"],
-                password_hash=bcrypt.hash(user_data["password"]),
+                password_hash=hash_password(user_data["password"]),
                 first_name=user_data["first_name"],
                 last_name=user_data["last_name"],
                 phone_number=user_data.get("phone_number"),
@@ -14,6 +14,7 @@ from financials_dashboard.financials_utils import (financials_filters,
                                                    financials_food_cost_modified,
                                                    financials_labour_cost_modified
                                                    )
+from utils.dashboard_executor import run_dashboard_builders
 
 
 def process_financials_file(df1, df2, year="All", week_range="All", location="All", start_date=None, end_date=None):
@@ -54,10 +55,23 @@ def process_financials_file(df1, df2, year="All", week_range="All", location="Al
     stores = df["Store"].unique().tolist()  # Display unique values in the 'stores' column
 
     financials_weeks, financials_years, financials_stores = financials_filters(df)
-    financials_sales_table, financials_orders_table, financials_avg_ticket_table = day_of_the_week_tables(df, store=location, start_date=start_date, end_date=end_date) 
+
+    # The table builders below only read df/df_budget, so they are dispatched
+    # together to the dashboard pool instead of running one after another.
+    date_kwargs = dict(store=location, start_date=start_date, end_date=end_date)
+    tables = run_dashboard_builders({
+        "day_of_the_week": (day_of_the_week_tables, (df,), date_kwargs),
+        "tw_lw_bdg": (calculate_tw_lw_bdg_comparison, (df, df_budget), dict(date_kwargs, year=year, week_range=week_range)),
+        "kpi_vs_budget": (kpi_vs_budget, (df, df_budget), date_kwargs),
+        "financial_sales": (financial_sales_df, (df, df_budget), date_kwargs),
+        "food_cost": (financials_food_cost_modified, (df, df_budget), date_kwargs),
+        "labour_cost": (financials_labour_cost_modified, (df, df_budget), date_kwargs),
+    })
+
+    financials_sales_table, financials_orders_table, financials_avg_ticket_table = tables["day_of_the_week"]
     
     # print("i am here 2 in the financials_processor.py printing the financial_sales_table_ and printing the stores",stores, financials_sales_table)
-    financials_tw_lw_bdg_table =  calculate_tw_lw_bdg_comparison(df,df_budget, store=location, year=year, week_range=week_range, start_date=start_date, end_date=end_date)
+    financials_tw_lw_bdg_table = tables["tw_lw_bdg"]
     
 
     # weekly_sales_trends = weekly_sales_trend(df, df_budget=df_budget, store=location, start_date=start_date, end_date=end_date)
@@ -69,15 +83,15 @@ def process_financials_file(df1, df2, year="All", week_range="All", location="Al
     # print("i am here in the financials processor printing the avg_ticket_by_day_df", avg_ticket_by_day_df)
     
     
-    kpi_vs_budget_df = kpi_vs_budget(df, df_budget, store=location, start_date=start_date, end_date=end_date)
+    kpi_vs_budget_df = tables["kpi_vs_budget"]
     
     
-    financial_sales_table_df = financial_sales_df(df, df_budget, store=location, start_date=start_date, end_date=end_date)
+    financial_sales_table_df = tables["financial_sales"]
 
-    financials_food_cost_modified_df = financials_food_cost_modified(df, df_budget, store=location, start_date=start_date, end_date=end_date)
+    financials_food_cost_modified_df = tables["food_cost"]
 
 
-    financials_labour_cost_modified_df = financials_labour_cost_modified(df, df_budget, store=location, start_date=start_date, end_date=end_date)
+    financials_labour_cost_modified_df = tables["labour_cost"]
     
     print("printing the columns of the df", df.columns)
     print("printing the columns of the df_budget", df_budget.columns)
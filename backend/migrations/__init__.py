@@ -0,0 +1,3 @@
+# Schema migrations: versioned revisions in migrations/versions, applied with
+# `python -m migrations upgrade` (see migrations.runner). The .sql files in this
+# directory are the earlier hand-applied migrations, kept for reference.
@@ -0,0 +1,48 @@
+"""
+Schema migration commands (run from the backend directory):
+
+    python -m migrations upgrade [--to N]   apply the pending revisions
+    python -m migrations current            recorded and newest revision
+    python -m migrations history            the revisions of the code
+    python -m migrations stamp N            record revisions up to N as applied
+"""
+
+import argparse
+import logging
+import sys
+
+from database import engine
+from migrations.runner import current_revision, head_revision, load_revisions, stamp, upgrade
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="Apply the pending revisions")
+    upgrade_parser.add_argument("--to", type=int, help="Stop at this revision")
+    commands.add_parser("current", help="Show the recorded and the newest revision")
+    commands.add_parser("history", help="List the revisions")
+    stamp_parser = commands.add_parser("stamp", help="Record revisions up to N as applied without running them")
+    stamp_parser.add_argument("revision", type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.to)
+        print(f"Applied revisions {applied}" if applied else "Schema already up to date")
+    elif args.command == "current":
+        with engine.connect() as connection:
+            current = current_revision(connection)
+        print(f"Database revision: {current or 0}, code revision: {head_revision()}")
+    elif args.command == "history":
+        for module in load_revisions():
+            print(f"{module.revision:4d}  {module.description}")
+    elif args.command == "stamp":
+        stamp(engine, args.revision)
+        print(f"Stamped revision {args.revision}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+-- Database migration to add the calendar dimension and real DATE columns
+-- SQLite version (the calendar_dim table itself is created by create_all on startup)
+
+-- Real DATE column next to the string Date column
+ALTER TABLE financials_company_wide ADD COLUMN Calendar_Date DATE;
+ALTER TABLE budget ADD COLUMN Calendar_Date DATE;
+
+-- Add indexes for date range filters
+CREATE INDEX ix_financials_company_wide_Calendar_Date ON financials_company_wide (Calendar_Date);
+CREATE INDEX ix_budget_Calendar_Date ON budget (Calendar_Date);
+
+-- Existing rows are backfilled from the Date strings on application startup
+-- (crud.calendar_dim.backfill_calendar_dates). To do it in SQL instead:
+-- UPDATE financials_company_wide SET Calendar_Date = DATE(Date) WHERE Calendar_Date IS NULL AND Date IS NOT NULL;
+-- UPDATE budget SET Calendar_Date = DATE(Date) WHERE Calendar_Date IS NULL AND Date IS NOT NULL;
+
+-- -- PostgreSQL version
+-- ALTER TABLE financials_company_wide ADD COLUMN "Calendar_Date" DATE;
+-- ALTER TABLE budget ADD COLUMN "Calendar_Date" DATE;
+-- CREATE INDEX "ix_financials_company_wide_Calendar_Date" ON financials_company_wide ("Calendar_Date");
+-- CREATE INDEX "ix_budget_Calendar_Date" ON budget ("Calendar_Date");
+
+-- -- Optional: Create a composite index for company + date range queries
+-- CREATE INDEX idx_financials_company_calendar_date ON financials_company_wide (company_id, Calendar_Date);
+
+-- -- Verify the columns were added successfully
+-- -- PRAGMA table_info(financials_company_wide);
@@ -0,0 +1,34 @@
+-- Database migration for the composite indexes of the filter routers' predicates
+-- (company_id + date range / year, then the location or store IN list).
+-- The same indexes are declared on the models, so new databases get them from
+-- create_all. Check the plans afterwards with: python -m utils.query_plans
+-- SQLite version
+
+CREATE INDEX IF NOT EXISTS ix_sales_pmix_company_sent_location
+    ON sales_pmix (company_id, "Sent_Date", "Location");
+
+CREATE INDEX IF NOT EXISTS ix_financials_company_calendar_store
+    ON financials_company_wide (company_id, "Calendar_Date", "Store");
+
+CREATE INDEX IF NOT EXISTS ix_budget_company_year_store
+    ON budget (company_id, "Year", "Store");
+
+ANALYZE;
+
+-- -- PostgreSQL version
+-- -- CONCURRENTLY keeps the tables writable while the indexes build (it cannot
+-- -- run inside a transaction block). A partitioned sales_pmix (see
+-- -- sales_pmix_partitioning.sql) does not support CONCURRENTLY: drop the
+-- -- keyword for that statement, the index is then built on every partition.
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sales_pmix_company_sent_location
+--     ON sales_pmix (company_id, "Sent_Date", "Location");
+--
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_financials_company_calendar_store
+--     ON financials_company_wide (company_id, "Calendar_Date", "Store");
+--
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_budget_company_year_store
+--     ON budget (company_id, "Year", "Store");
+--
+-- ANALYZE sales_pmix;
+-- ANALYZE financials_company_wide;
+-- ANALYZE budget;
@@ -0,0 +1,64 @@
+-- Database migration for the ingestion_batches table (one row per uploaded file
+-- and fact table) and the batch_id column of sales_pmix, budget and
+-- financials_company_wide
+-- SQLite version (the table is also created by create_all on startup, and the
+-- application creates the batches of earlier uploads on startup, see
+-- crud.ingestion_batches.backfill_ingestion_batches)
+
+CREATE TABLE IF NOT EXISTS ingestion_batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id INTEGER NOT NULL REFERENCES companies(id),
+    table_name VARCHAR(50) NOT NULL,
+    file_name VARCHAR(255) NOT NULL,
+    dashboard INTEGER,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    total_sales FLOAT NOT NULL DEFAULT 0,
+    min_date DATETIME,
+    max_date DATETIME,
+    breakdown JSON,
+    checksum VARCHAR(64),
+    uploaded_by INTEGER REFERENCES users(id),
+    created_at DATETIME,
+    CONSTRAINT uq_ingestion_batches_table_company_file UNIQUE (table_name, company_id, file_name)
+);
+
+CREATE INDEX IF NOT EXISTS ix_ingestion_batches_id ON ingestion_batches (id);
+CREATE INDEX IF NOT EXISTS ix_ingestion_batches_table_file ON ingestion_batches (table_name, file_name);
+
+ALTER TABLE sales_pmix ADD COLUMN batch_id INTEGER REFERENCES ingestion_batches(id);
+ALTER TABLE budget ADD COLUMN batch_id INTEGER REFERENCES ingestion_batches(id);
+ALTER TABLE financials_company_wide ADD COLUMN batch_id INTEGER REFERENCES ingestion_batches(id);
+
+CREATE INDEX IF NOT EXISTS ix_sales_pmix_batch_id ON sales_pmix (batch_id);
+CREATE INDEX IF NOT EXISTS ix_budget_batch_id ON budget (batch_id);
+CREATE INDEX IF NOT EXISTS ix_financials_company_wide_batch_id ON financials_company_wide (batch_id);
+
+-- -- PostgreSQL version
+-- CREATE TABLE IF NOT EXISTS ingestion_batches (
+--     id SERIAL PRIMARY KEY,
+--     company_id INTEGER NOT NULL REFERENCES companies(id),
+--     table_name VARCHAR(50) NOT NULL,
+--     file_name VARCHAR(255) NOT NULL,
+--     dashboard INTEGER,
+--     row_count INTEGER NOT NULL DEFAULT 0,
+--     total_sales DOUBLE PRECISION NOT NULL DEFAULT 0,
+--     min_date TIMESTAMP,
+--     max_date TIMESTAMP,
+--     breakdown JSON,
+--     checksum VARCHAR(64),
+--     uploaded_by INTEGER REFERENCES users(id),
+--     created_at TIMESTAMP,
+--     CONSTRAINT uq_ingestion_batches_table_company_file UNIQUE (table_name, company_id, file_name)
+-- );
+-- CREATE INDEX IF NOT EXISTS ix_ingestion_batches_table_file ON ingestion_batches (table_name, file_name);
+--
+-- ALTER TABLE sales_pmix ADD COLUMN IF NOT EXISTS batch_id INTEGER REFERENCES ingestion_batches(id);
+-- ALTER TABLE budget ADD COLUMN IF NOT EXISTS batch_id INTEGER REFERENCES ingestion_batches(id);
+-- ALTER TABLE financials_company_wide ADD COLUMN IF NOT EXISTS batch_id INTEGER REFERENCES ingestion_batches(id);
+--
+-- CREATE INDEX IF NOT EXISTS ix_sales_pmix_batch_id ON sales_pmix (batch_id);
+-- CREATE INDEX IF NOT EXISTS ix_budget_batch_id ON budget (batch_id);
+-- CREATE INDEX IF NOT EXISTS ix_financials_company_wide_batch_id ON financials_company_wide (batch_id);
+
+-- -- Verify: every row with a file name has a batch
+-- -- SELECT COUNT(*) FROM sales_pmix WHERE file_name IS NOT NULL AND batch_id IS NULL;
@@ -0,0 +1,43 @@
+-- Database migration for the price_change_events table (price change facts of logs)
+-- SQLite version (the table is also created by create_all on startup, and the
+-- application backfills logs without an event on startup, see
+-- crud.price_change_events.backfill_price_change_events)
+
+CREATE TABLE IF NOT EXISTS price_change_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    log_id INTEGER NOT NULL UNIQUE REFERENCES logs(id) ON DELETE CASCADE,
+    company_id INTEGER NOT NULL REFERENCES companies(id),
+    location_id INTEGER NOT NULL REFERENCES locations(id),
+    created_at DATETIME,
+    product VARCHAR(255),
+    category VARCHAR(255),
+    previous_price FLOAT,
+    new_price FLOAT,
+    change_delta FLOAT NOT NULL DEFAULT 0,
+    change_percent FLOAT NOT NULL DEFAULT 0,
+    change_p_n VARCHAR(20) NOT NULL DEFAULT 'positive'
+);
+
+CREATE INDEX IF NOT EXISTS ix_price_change_events_company_created
+    ON price_change_events (company_id, created_at);
+
+-- -- PostgreSQL version
+-- CREATE TABLE IF NOT EXISTS price_change_events (
+--     id SERIAL PRIMARY KEY,
+--     log_id INTEGER NOT NULL UNIQUE REFERENCES logs(id) ON DELETE CASCADE,
+--     company_id INTEGER NOT NULL REFERENCES companies(id),
+--     location_id INTEGER NOT NULL REFERENCES locations(id),
+--     created_at TIMESTAMP,
+--     product VARCHAR(255),
+--     category VARCHAR(255),
+--     previous_price DOUBLE PRECISION,
+--     new_price DOUBLE PRECISION,
+--     change_delta DOUBLE PRECISION NOT NULL DEFAULT 0,
+--     change_percent DOUBLE PRECISION NOT NULL DEFAULT 0,
+--     change_p_n VARCHAR(20) NOT NULL DEFAULT 'positive'
+-- );
+-- CREATE INDEX IF NOT EXISTS ix_price_change_events_company_created
+--     ON price_change_events (company_id, created_at);
+
+-- -- Verify: every log has one event
+-- -- SELECT COUNT(*) FROM logs WHERE id NOT IN (SELECT log_id FROM price_change_events);
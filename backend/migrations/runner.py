@@ -0,0 +1,198 @@
+"""
+Versioned schema revisions.
+
+Each module of migrations/versions defines `revision` (1, 2, ...),
+`description` and `upgrade(connection)`. `python -m migrations upgrade` applies
+the revisions newer than the one recorded in the schema_migrations table, each
+in its own transaction, and records them there.
+
+The application does not run DDL when it starts: check_schema_version only
+reads the recorded revision (one query) and compares it with the newest
+revision of the code.
+
+Revisions use the helpers below (create_missing_tables, add_missing_column,
+create_missing_indexes), which skip what already exists. A database whose
+schema was created or patched by hand (create_all, the .sql files next to
+this module) can therefore be brought under the revisions by upgrading it
+like an empty one.
+
+Data backfills are revisions too: they run the crud backfill functions on a
+data_session over the revision's connection.
+"""
+
+import importlib
+import logging
+import os
+import pkgutil
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, func, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+import models
+from database import Base
+from migrations import versions
+
+logger = logging.getLogger(__name__)
+
+# strict: refuse to start on an outdated schema; warn: log it; off: skip the check
+SCHEMA_VERSION_CHECK = os.getenv("SCHEMA_VERSION_CHECK", "strict")
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("revision", Integer, primary_key=True),
+    Column("description", String(255)),
+    Column("applied_at", DateTime),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is older than the code"""
+
+
+def load_models():
+    """Import every module of the models package, so Base.metadata has all tables"""
+    for module in pkgutil.iter_modules(models.__path__):
+        if " " not in module.name:  # skip stray copies ("users copy.py")
+            importlib.import_module(f"models.{module.name}")
+
+
+def load_revisions() -> list:
+    """Revision modules in order; their numbers must run 1, 2, 3, ..."""
+    revisions = [importlib.import_module(f"migrations.versions.{module.name}")
+                 for module in pkgutil.iter_modules(versions.__path__)]
+    revisions.sort(key=lambda module: module.revision)
+    for expected, module in enumerate(revisions, start=1):
+        if module.revision != expected:
+            raise RuntimeError(f"Missing schema revision {expected} (found {module.__name__})")
+    return revisions
+
+
+def head_revision() -> int:
+    return len(load_revisions())
+
+
+def current_revision(connection) -> Optional[int]:
+    """Newest applied revision; None when the database has no revisions table yet"""
+    if not inspect(connection).has_table(schema_migrations.name):
+        return None
+    return connection.execute(select(func.max(schema_migrations.c.revision))).scalar()
+
+
+def upgrade(engine, target: Optional[int] = None) -> List[int]:
+    """Apply the revisions after the current one, up to `target` (default: all). Returns those applied."""
+    load_models()
+    revisions = load_revisions()
+    target = target or len(revisions)
+
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        current = current_revision(connection) or 0
+
+    applied = []
+    for module in revisions[current:target]:
+        logger.info(f"Applying schema revision {module.revision}: {module.description}")
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                revision=module.revision, description=module.description[:255], applied_at=datetime.utcnow()
+            ))
+        applied.append(module.revision)
+    return applied
+
+
+def stamp(engine, revision: int):
+    """Record `revision` as applied without running anything (a schema brought up to date by hand)"""
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        current = current_revision(connection) or 0
+        connection.execute(schema_migrations.insert(), [
+            {"revision": number, "description": "stamped", "applied_at": datetime.utcnow()}
+            for number in range(current + 1, revision + 1)
+        ])
+
+
+def check_schema_version(engine):
+    """
+    Startup check: compare the recorded revision with the code's newest one.
+    Only reads schema_migrations; never changes the schema.
+    """
+    if SCHEMA_VERSION_CHECK == "off":
+        return
+    head = head_revision()
+    try:
+        with engine.connect() as connection:
+            current = connection.execute(select(func.max(schema_migrations.c.revision))).scalar()
+    except SQLAlchemyError:
+        current = None  # no schema_migrations table yet
+
+    if current is not None and current >= head:
+        if current > head:
+            logger.warning(f"Database schema revision {current} is newer than the code's ({head})")
+        return
+
+    message = (f"Database schema is at revision {current or 0}, the code needs {head}; "
+               f"run `python -m migrations upgrade`")
+    if SCHEMA_VERSION_CHECK == "strict":
+        raise SchemaVersionError(message)
+    logger.warning(message)
+
+
+# ============================================================================
+# Helpers for revisions (each skips what already exists)
+# ============================================================================
+
+def create_missing_tables(connection, *tables):
+    """CREATE TABLE for the given model tables (default: every model) that do not exist"""
+    Base.metadata.create_all(bind=connection, tables=list(tables) or None, checkfirst=True)
+
+
+def add_missing_column(connection, column, ddl_suffix: str = "") -> bool:
+    """
+    ALTER TABLE ... ADD COLUMN for a model column the table lacks. The column is
+    added nullable unless `ddl_suffix` says otherwise (e.g. "DEFAULT TRUE NOT NULL").
+    """
+    table = column.table.name
+    if column.name in {existing["name"] for existing in inspect(connection).get_columns(table)}:
+        return False
+
+    quote = connection.dialect.identifier_preparer.quote
+    ddl = f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=connection.dialect)}"
+    for foreign_key in column.foreign_keys:
+        ddl += f" REFERENCES {quote(foreign_key.column.table.name)} ({quote(foreign_key.column.name)})"
+    if ddl_suffix:
+        ddl += f" {ddl_suffix}"
+    connection.execute(text(ddl))
+    return True
+
+
+def create_missing_indexes(connection, table, names: Optional[List[str]] = None) -> List[str]:
+    """
+    CREATE INDEX for the indexes of a model table (or only `names`) that do not
+    exist, by name or as an index on the same columns (the .sql files used
+    idx_* names)
+    """
+    existing = inspect(connection).get_indexes(table.name)
+    existing_names = {index["name"] for index in existing}
+    existing_columns = {tuple(index["column_names"]) for index in existing}
+    created = []
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if names is not None and index.name not in names:
+            continue
+        if index.name in existing_names or tuple(column.name for column in index.columns) in existing_columns:
+            continue
+        connection.execute(CreateIndex(index, if_not_exists=True))
+        created.append(index.name)
+    return created
+
+
+def data_session(connection) -> Session:
+    """
+    ORM session on a revision's connection, for the crud backfill functions.
+    Their commits only flush: the revision's transaction commits once the
+    revision has run, so a failed backfill leaves nothing half done.
+    """
+    return Session(bind=connection, join_transaction_mode="rollback_only")
@@ -0,0 +1,63 @@
+-- Database migration to partition sales_pmix by month of Sent_Date (optional)
+-- SQLite version: none. On SQLite sales_pmix stays a single table, and the
+-- application detects that (crud.sales_pmix_partitions.is_partitioned)
+--
+-- Run after ingestion_batches.sql. The table is rebuilt as a partitioned table
+-- with one partition per month holding rows (sales_pmix_y2026m01, ...) and a
+-- default partition for NULL Sent_Date. tasks.partition_maintenance then
+-- creates the coming months' partitions ahead of time.
+--
+-- A primary key of a partitioned table has to include the partition key, and
+-- Sent_Date can be NULL, so the rebuilt table indexes id without a primary key
+-- constraint; ids still come from the same sequence.
+-- The rows are copied, so run it during a maintenance window.
+
+-- -- PostgreSQL version
+-- BEGIN;
+--
+-- ALTER TABLE sales_pmix RENAME TO sales_pmix_unpartitioned;
+--
+-- CREATE TABLE sales_pmix (LIKE sales_pmix_unpartitioned INCLUDING DEFAULTS)
+--     PARTITION BY RANGE ("Sent_Date");
+-- ALTER SEQUENCE sales_pmix_id_seq OWNED BY sales_pmix.id;
+-- ALTER TABLE sales_pmix ADD FOREIGN KEY (company_id) REFERENCES companies(id);
+-- ALTER TABLE sales_pmix ADD FOREIGN KEY (batch_id) REFERENCES ingestion_batches(id);
+--
+-- CREATE TABLE sales_pmix_default PARTITION OF sales_pmix DEFAULT;
+--
+-- DO $$
+-- DECLARE month date;
+-- BEGIN
+--     FOR month IN
+--         SELECT DISTINCT date_trunc('month', "Sent_Date")::date
+--         FROM sales_pmix_unpartitioned WHERE "Sent_Date" IS NOT NULL
+--     LOOP
+--         EXECUTE format('CREATE TABLE %I PARTITION OF sales_pmix FOR VALUES FROM (%L) TO (%L)',
+--                        'sales_pmix_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+--                        month, (month + interval '1 month')::date);
+--     END LOOP;
+-- END $$;
+--
+-- INSERT INTO sales_pmix SELECT * FROM sales_pmix_unpartitioned;
+-- DROP TABLE sales_pmix_unpartitioned;
+--
+-- -- Indexes of the model, created on every partition
+-- CREATE INDEX ix_sales_pmix_id ON sales_pmix (id);
+-- CREATE INDEX ix_sales_pmix_company_id ON sales_pmix (company_id);
+-- CREATE INDEX ix_sales_pmix_file_name ON sales_pmix (file_name);
+-- CREATE INDEX ix_sales_pmix_batch_id ON sales_pmix (batch_id);
+-- CREATE INDEX "ix_sales_pmix_Location" ON sales_pmix ("Location");
+-- CREATE INDEX "ix_sales_pmix_Order_Id" ON sales_pmix ("Order_Id");
+-- CREATE INDEX "ix_sales_pmix_Sent_Date" ON sales_pmix ("Sent_Date");
+-- -- Uploads insert a company's rows together, so within a month partition the
+-- -- rows of a company sit in neighbouring blocks: a BRIN index narrows a
+-- -- company's scan to those blocks for a fraction of a btree's size
+-- CREATE INDEX ix_sales_pmix_company_sent_brin ON sales_pmix USING brin (company_id, "Sent_Date");
+--
+-- COMMIT;
+-- ANALYZE sales_pmix;
+
+-- -- Verify: the partitions and their row counts
+-- -- SELECT c.relname, c.reltuples::bigint FROM pg_inherits i
+-- --     JOIN pg_class c ON c.oid = i.inhrelid
+-- --     WHERE i.inhparent = 'sales_pmix'::regclass ORDER BY c.relname;
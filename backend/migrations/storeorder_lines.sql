@@ -0,0 +1,42 @@
+-- Database migration to backfill the storeorder_lines table from storeorders.items_ordered
+-- SQLite version (the table itself is created by create_all on startup; the
+-- application also backfills orders without lines on startup, see
+-- crud.storeorder_lines.backfill_storeorder_lines)
+
+INSERT INTO storeorder_lines (order_id, company_id, location_id, item_id, item_name, category, unit,
+                              quantity, unit_price, total_price, order_date)
+SELECT o.id,
+       o.company_id,
+       o.location_id,
+       CAST(COALESCE(json_extract(i.value, '$.item_id'), json_extract(i.value, '$.id')) AS TEXT),
+       COALESCE(NULLIF(json_extract(i.value, '$.name'), ''),
+                NULLIF(json_extract(i.value, '$.product'), ''),
+                json_extract(i.value, '$.item_name')),
+       json_extract(i.value, '$.category'),
+       json_extract(i.value, '$.unit'),
+       CAST(json_extract(i.value, '$.quantity') AS REAL),
+       CAST(COALESCE(json_extract(i.value, '$.unit_price'), json_extract(i.value, '$.price')) AS REAL),
+       COALESCE(CAST(json_extract(i.value, '$.total_price') AS REAL), 0.0),
+       COALESCE(o.updated_at, o.created_at)
+FROM storeorders o, json_each(o.items_ordered, '$.items') i
+WHERE json_type(i.value) = 'object'
+  AND o.id NOT IN (SELECT order_id FROM storeorder_lines);
+
+-- -- PostgreSQL version
+-- INSERT INTO storeorder_lines (order_id, company_id, location_id, item_id, item_name, category, unit,
+--                               quantity, unit_price, total_price, order_date)
+-- SELECT o.id, o.company_id, o.location_id,
+--        COALESCE(i.value->>'item_id', i.value->>'id'),
+--        COALESCE(NULLIF(i.value->>'name', ''), NULLIF(i.value->>'product', ''), i.value->>'item_name'),
+--        i.value->>'category',
+--        i.value->>'unit',
+--        (i.value->>'quantity')::double precision,
+--        COALESCE(i.value->>'unit_price', i.value->>'price')::double precision,
+--        COALESCE((i.value->>'total_price')::double precision, 0.0),
+--        COALESCE(o.updated_at, o.created_at)
+-- FROM storeorders o, json_array_elements(o.items_ordered->'items') i
+-- WHERE json_typeof(i.value) = 'object'
+--   AND o.id NOT IN (SELECT order_id FROM storeorder_lines);
+
+-- -- Verify the backfill
+-- -- SELECT COUNT(*) FROM storeorder_lines;
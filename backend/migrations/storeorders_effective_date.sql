@@ -0,0 +1,23 @@
+-- Database migration to add storeorders.effective_date (updated_at or created_at)
+-- and the composite index used by the store-order filters
+-- SQLite version (the application also fills missing effective_date values on
+-- startup, see crud.storeorders.backfill_effective_dates)
+
+ALTER TABLE storeorders ADD COLUMN effective_date DATETIME;
+
+UPDATE storeorders
+SET effective_date = COALESCE(updated_at, created_at)
+WHERE effective_date IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_storeorders_company_location_effective
+    ON storeorders (company_id, location_id, effective_date);
+
+-- -- PostgreSQL version
+-- ALTER TABLE storeorders ADD COLUMN IF NOT EXISTS effective_date TIMESTAMP;
+--
+-- UPDATE storeorders
+-- SET effective_date = COALESCE(updated_at, created_at)
+-- WHERE effective_date IS NULL;
+--
+-- CREATE INDEX IF NOT EXISTS ix_storeorders_company_location_effective
+--     ON storeorders (company_id, location_id, effective_date);
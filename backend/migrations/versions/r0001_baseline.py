@@ -0,0 +1,9 @@
+"""Baseline: the tables of every model, as create_all used to make them on startup"""
+from migrations.runner import create_missing_tables
+
+revision = 1
+description = "Create the tables of every model"
+
+
+def upgrade(connection):
+    create_missing_tables(connection)
@@ -0,0 +1,34 @@
+"""
+Columns added to existing tables after they were first created (the ALTER
+TABLE statements of the .sql files), and their indexes. Databases created by
+revision 1, or patched by hand, already have some or all of them.
+"""
+from migrations.runner import add_missing_column, create_missing_indexes
+from models.users import User
+from models.storeorders import StoreOrders
+from models.sales_pmix import SalesPMix
+from models.budget import Budget
+from models.financials_company_wide import FinancialsCompanyWide
+
+revision = 2
+description = "Add file_name, dashboard, batch_id, Calendar_Date, effective_date and users.isActive columns"
+
+
+def upgrade(connection):
+    add_missing_column(connection, User.__table__.c.isActive, "DEFAULT TRUE NOT NULL")
+
+    for model in (SalesPMix, Budget, FinancialsCompanyWide):
+        add_missing_column(connection, model.__table__.c.file_name)
+        add_missing_column(connection, model.__table__.c.dashboard)
+        add_missing_column(connection, model.__table__.c.batch_id)
+        create_missing_indexes(connection, model.__table__, [
+            f"ix_{model.__tablename__}_file_name",
+            f"ix_{model.__tablename__}_batch_id",
+        ])
+
+    for model in (Budget, FinancialsCompanyWide):
+        add_missing_column(connection, model.__table__.c.Calendar_Date)
+        create_missing_indexes(connection, model.__table__, [f"ix_{model.__tablename__}_Calendar_Date"])
+
+    add_missing_column(connection, StoreOrders.__table__.c.effective_date)
+    create_missing_indexes(connection, StoreOrders.__table__, ["ix_storeorders_company_location_effective"])
@@ -0,0 +1,14 @@
+"""Composite indexes of the filter routers' predicates (see utils.query_plans)"""
+from migrations.runner import create_missing_indexes
+from models.sales_pmix import SalesPMix
+from models.budget import Budget
+from models.financials_company_wide import FinancialsCompanyWide
+
+revision = 3
+description = "Composite (company_id, date, location / store) indexes of the filter routers"
+
+
+def upgrade(connection):
+    create_missing_indexes(connection, SalesPMix.__table__, ["ix_sales_pmix_company_sent_location"])
+    create_missing_indexes(connection, FinancialsCompanyWide.__table__, ["ix_financials_company_calendar_store"])
+    create_missing_indexes(connection, Budget.__table__, ["ix_budget_company_year_store"])
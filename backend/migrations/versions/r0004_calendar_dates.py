@@ -0,0 +1,17 @@
+"""Fill Calendar_Date for rows stored before the calendar dimension existed (data revision)"""
+import logging
+
+from migrations.runner import data_session
+from crud.calendar_dim import backfill_calendar_dates
+
+logger = logging.getLogger(__name__)
+
+revision = 4
+description = "Fill Calendar_Date of financials / budget rows from their Date strings"
+
+
+def upgrade(connection):
+    with data_session(connection) as db:
+        count = backfill_calendar_dates(db)
+    if count:
+        logger.info(f"Backfilled Calendar_Date on {count} rows")
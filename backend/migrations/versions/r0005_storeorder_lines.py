@@ -0,0 +1,17 @@
+"""Build order lines for store orders saved before storeorder_lines existed (data revision)"""
+import logging
+
+from migrations.runner import data_session
+from crud.storeorder_lines import backfill_storeorder_lines
+
+logger = logging.getLogger(__name__)
+
+revision = 5
+description = "Build storeorder_lines of existing store orders"
+
+
+def upgrade(connection):
+    with data_session(connection) as db:
+        count = backfill_storeorder_lines(db)
+    if count:
+        logger.info(f"Backfilled order lines for {count} store orders")
@@ -0,0 +1,17 @@
+"""Move master file rows stored in file_data["data"] to masterfile_items (data revision)"""
+import logging
+
+from migrations.runner import data_session
+from crud.master_file_items import backfill_masterfile_items
+
+logger = logging.getLogger(__name__)
+
+revision = 6
+description = "Move master file rows to masterfile_items"
+
+
+def upgrade(connection):
+    with data_session(connection) as db:
+        count = backfill_masterfile_items(db)
+    if count:
+        logger.info(f"Moved the rows of {count} master files to masterfile_items")
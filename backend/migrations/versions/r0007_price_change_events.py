@@ -0,0 +1,17 @@
+"""Extract the price change facts of logs stored before price_change_events existed (data revision)"""
+import logging
+
+from migrations.runner import data_session
+from crud.price_change_events import backfill_price_change_events
+
+logger = logging.getLogger(__name__)
+
+revision = 7
+description = "Extract price_change_events of existing logs"
+
+
+def upgrade(connection):
+    with data_session(connection) as db:
+        count = backfill_price_change_events(db)
+    if count:
+        logger.info(f"Backfilled price change events for {count} logs")
@@ -0,0 +1,17 @@
+"""Give files uploaded before ingestion_batches existed their batch (data revision)"""
+import logging
+
+from migrations.runner import data_session
+from crud.ingestion_batches import backfill_ingestion_batches
+
+logger = logging.getLogger(__name__)
+
+revision = 8
+description = "Create ingestion_batches of existing uploaded files"
+
+
+def upgrade(connection):
+    with data_session(connection) as db:
+        count = backfill_ingestion_batches(db)
+    if count:
+        logger.info(f"Backfilled ingestion batches for {count} uploaded files")
@@ -0,0 +1,17 @@
+"""Set effective_date on store orders saved before the column existed (data revision)"""
+import logging
+
+from migrations.runner import data_session
+from crud.storeorders import backfill_effective_dates
+
+logger = logging.getLogger(__name__)
+
+revision = 9
+description = "Set effective_date of existing store orders"
+
+
+def upgrade(connection):
+    with data_session(connection) as db:
+        count = backfill_effective_dates(db)
+    if count:
+        logger.info(f"Backfilled effective_date on {count} store orders")
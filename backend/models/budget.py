@@ -1,6 +1,7 @@
 # models/budget.py
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from sqlalchemy import Date as SADate  # the model has a "Date" string column
 from database import Base
 
 class Budget(Base):
@@ -12,11 +13,13 @@ class Budget(Base):
     # New columns
     file_name = Column(String(255), nullable=True, index=True)  # For storing filename
     dashboard = Column(Integer, nullable=True)  # Dashboard integer field
+    batch_id = Column(Integer, ForeignKey("ingestion_batches.id"), nullable=True, index=True)  # Upload the row came from
     
     
     # Basic information fields
     Store = Column(String(100), index=True, nullable=True)
     Date = Column(String(50), nullable=True)
+    Calendar_Date = Column(SADate, index=True, nullable=True)  # Real DATE parsed from Date at ingest (calendar_dim key)
     Week = Column(Integer, nullable=True)
     Month = Column(String(20), nullable=True)
     Quarter = Column(Integer, nullable=True)
@@ -62,4 +65,10 @@ class Budget(Base):
     # Financial summary
     TTL_Expense = Column(Float, nullable=True)  # Total Expense
     Net_Income = Column(Float, nullable=True)
-    Net_Pct_Income = Column(Float, nullable=True)
\ No newline at end of file
+    Net_Pct_Income = Column(Float, nullable=True)
+
+    # Composite indexes of the filter routers' predicates (see utils.query_plans)
+    __table_args__ = (
+        # financials_filter: company, Year, then Store
+        Index("ix_budget_company_year_store", "company_id", "Year", "Store"),
+    )
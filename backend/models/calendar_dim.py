@@ -0,0 +1,25 @@
+# models/calendar_dim.py
+from sqlalchemy import Column, Integer, String, Date
+from database import Base
+
+
+class CalendarDim(Base):
+    """One row per calendar day; weeks run Monday to Sunday (ISO weeks)."""
+    __tablename__ = "calendar_dim"
+
+    date = Column(Date, primary_key=True)
+    day_name = Column(String(20), nullable=False)
+    week = Column(Integer, nullable=False, index=True)  # ISO / fiscal week number
+    week_year = Column(Integer, nullable=False)  # ISO year the week belongs to
+    week_start = Column(Date, nullable=False, index=True)  # Monday
+    week_end = Column(Date, nullable=False)  # Sunday
+    month = Column(Integer, nullable=False)
+    month_name = Column(String(20), nullable=False)
+    quarter = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False, index=True)
+    ly_date = Column(Date, nullable=False)  # Same weekday 52 weeks earlier
+
+    # Period labels shown on the dashboards
+    week_label = Column(String(20), nullable=False)  # "Week 12 2024"
+    month_label = Column(String(20), nullable=False)  # "March 2024"
+    quarter_label = Column(String(20), nullable=False)  # "Q1 2024"
@@ -0,0 +1,24 @@
+# models/delete_jobs.py
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime
+from datetime import datetime
+from database import Base
+
+
+class DeleteJob(Base):
+    """A bulk delete of a fact table run in the background by tasks.delete_jobs"""
+    __tablename__ = "delete_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(50), nullable=False)  # key of crud.chunked_delete.DELETABLE_TABLES
+    filters = Column(JSON, nullable=False)  # column -> value
+
+    # queued -> deleting -> done / failed
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    rows_total = Column(Integer, nullable=False, default=0)  # matching rows when the job started
+    rows_deleted = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
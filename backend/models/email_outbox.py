@@ -0,0 +1,27 @@
+# models/email_outbox.py
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime
+from datetime import datetime
+from database import Base
+
+
+class EmailOutbox(Base):
+    """Outgoing email waiting for (or done with) delivery by tasks.email_outbox"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=True)  # "production_report", "account", "order_confirmation", ...
+    recipients = Column(JSON, nullable=False)  # list of addresses
+    subject = Column(String(500), nullable=False)
+    html_body = Column(Text, nullable=False)
+    attachments = Column(JSON, nullable=True)  # [{"filename", "path", "mime_type"}]
+    attachment_dir = Column(String(500), nullable=True, index=True)  # shared by messages with the same files
+
+    # queued -> sending -> sent / failed (queued again with a later next_attempt_at on retry)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,6 +1,7 @@
 # models/financials_company_wide.py
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy import Date as SADate  # the model has a "Date" string column
 from database import Base
 
 class FinancialsCompanyWide(Base):
@@ -12,12 +13,14 @@ class FinancialsCompanyWide(Base):
         # New columns
     file_name = Column(String(255), nullable=True, index=True)  # For storing filename
     dashboard = Column(Integer, nullable=True)  # Dashboard integer field
+    batch_id = Column(Integer, ForeignKey("ingestion_batches.id"), nullable=True, index=True)  # Upload the row came from
     
     
     # Basic information fields
     Store = Column(String(100), index=True, nullable=True)
     Ly_Date = Column(DateTime, index=True, nullable=True)  # Last Year Date
     Date = Column(String(50), nullable=True)  # Date as string
+    Calendar_Date = Column(SADate, index=True, nullable=True)  # Real DATE parsed from Date at ingest (calendar_dim key)
     Day = Column(String(20), nullable=True)
     Week = Column(Integer, nullable=True)
     Month = Column(String(20), nullable=True)
@@ -79,4 +82,10 @@ class FinancialsCompanyWide(Base):
     LW_Metro = Column(Float, nullable=True)
     LW_Victory = Column(Float, nullable=True)
     LW_Central_Kitchen = Column(Float, nullable=True)
-    LW_Other = Column(Float, nullable=True)
\ No newline at end of file
+    LW_Other = Column(Float, nullable=True)
+
+    # Composite indexes of the filter routers' predicates (see utils.query_plans)
+    __table_args__ = (
+        # financials_filter / companywide_filter: company, Calendar_Date range, then Store
+        Index("ix_financials_company_calendar_store", "company_id", "Calendar_Date", "Store"),
+    )
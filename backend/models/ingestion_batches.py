@@ -0,0 +1,32 @@
+# models/ingestion_batches.py
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Index, UniqueConstraint
+from database import Base
+
+
+class IngestionBatch(Base):
+    """
+    One uploaded file's rows in a fact table (sales_pmix, budget or
+    financials_company_wide). The rows reference it by batch_id; its stats are
+    kept up to date by crud.ingestion_batches and serve the file lists.
+    """
+    __tablename__ = "ingestion_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    table_name = Column(String(50), nullable=False)  # fact table the rows went to
+    file_name = Column(String(255), nullable=False)
+    dashboard = Column(Integer, nullable=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    min_date = Column(DateTime, nullable=True)
+    max_date = Column(DateTime, nullable=True)
+    breakdown = Column(JSON, nullable=True)  # per location / store counts, sales and date range
+    checksum = Column(String(64), nullable=True)  # sha256 of the uploaded file
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("table_name", "company_id", "file_name", name="uq_ingestion_batches_table_company_file"),
+        Index("ix_ingestion_batches_table_file", "table_name", "file_name"),
+    )
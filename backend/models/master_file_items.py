@@ -0,0 +1,27 @@
+# models/master_file_items.py
+from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, Index
+from database import Base
+
+
+class MasterFileItem(Base):
+    """
+    One row of an uploaded master file (catalog). The common columns are typed;
+    every other column of the sheet is kept in `extra`. MasterFile.file_data
+    only holds the file metadata (upload date, column order, ...).
+    """
+    __tablename__ = "masterfile_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    masterfile_id = Column(Integer, ForeignKey("masterfile.id", ondelete="CASCADE"), nullable=False)
+    row_index = Column(Integer, nullable=False)  # position of the row in the sheet
+    category = Column(String(255), nullable=True)  # "Category"
+    item = Column(String(255), nullable=True)  # "Products"
+    unit = Column(String(100), nullable=True)  # "Batch Size"
+    price = Column(Float, nullable=True)  # "Current Price"
+    previous_price = Column(Float, nullable=True)  # "Previous Price"
+    extra = Column(JSON, nullable=True)  # other columns, and core values that are not of the column's type
+
+    __table_args__ = (
+        Index("ux_masterfile_items_file_row", "masterfile_id", "row_index", unique=True),
+        Index("ix_masterfile_items_file_category_item", "masterfile_id", "category", "item"),
+    )
@@ -0,0 +1,25 @@
+# models/price_change_events.py
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
+from database import Base
+
+
+class PriceChangeEvent(Base):
+    """The price change facts of one Logs row (file_data["changes"]), kept in sync by crud.logs"""
+    __tablename__ = "price_change_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    log_id = Column(Integer, ForeignKey("logs.id", ondelete="CASCADE"), nullable=False, unique=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    created_at = Column(DateTime, nullable=True)  # created_at of the log
+    product = Column(String(255), nullable=True)
+    category = Column(String(255), nullable=True)
+    previous_price = Column(Float, nullable=True)
+    new_price = Column(Float, nullable=True)
+    change_delta = Column(Float, nullable=False, default=0.0)
+    change_percent = Column(Float, nullable=False, default=0.0)
+    change_p_n = Column(String(20), nullable=False, default="positive")  # positive / negative / no_change
+
+    __table_args__ = (
+        Index("ix_price_change_events_company_created", "company_id", "created_at"),
+    )
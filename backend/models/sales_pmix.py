@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, ForeignKey, UniqueConstraint, Index
 from database import Base
 
 class SalesPMix(Base):
@@ -10,6 +10,7 @@ class SalesPMix(Base):
     # New columns
     file_name = Column(String(255), nullable=True, index=True)  # For storing filename
     dashboard = Column(Integer, nullable=True)  # Dashboard integer field
+    batch_id = Column(Integer, ForeignKey("ingestion_batches.id"), nullable=True, index=True)  # Upload the row came from
 
     # String fields with appropriate length constraints
     Location = Column(String(100), index=True, nullable=True)
@@ -59,4 +60,9 @@ class SalesPMix(Base):
     Quarter = Column(Integer, nullable=True)
     Year = Column(Integer, nullable=True)
     Category = Column(String(100), nullable=True)
-    
\ No newline at end of file
+
+    # Composite indexes of the filter routers' predicates (see utils.query_plans)
+    __table_args__ = (
+        # sales_split_filter / pmix_filter: company, Sent_Date range, then Location
+        Index("ix_sales_pmix_company_sent_location", "company_id", "Sent_Date", "Location"),
+    )
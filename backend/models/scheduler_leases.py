@@ -0,0 +1,16 @@
+# models/scheduler_leases.py
+from sqlalchemy import Column, String, DateTime
+from database import Base
+
+
+class SchedulerLease(Base):
+    """
+    Leadership lease of a background scheduler: only the process named in
+    `owner` runs it, for as long as it keeps renewing the lease before `expires_at`.
+    """
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(255), nullable=False)  # "<hostname>:<pid>:<random>"
+    expires_at = Column(DateTime, nullable=False)  # UTC
+    heartbeat_at = Column(DateTime, nullable=False)  # UTC time of the last renewal
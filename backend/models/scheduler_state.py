@@ -0,0 +1,13 @@
+# models/scheduler_state.py
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from database import Base
+
+
+class SchedulerState(Base):
+    """Persistent state of a background scheduler (one row per scheduler)"""
+    __tablename__ = "scheduler_state"
+
+    name = Column(String(100), primary_key=True)
+    last_fired_at = Column(DateTime, nullable=True)  # UTC fire time of the last processed send window
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,19 @@
+# models/sent_log.py
+from sqlalchemy import Column, Integer, String, Date, DateTime, UniqueConstraint
+from datetime import datetime
+from database import Base
+
+
+class SentLog(Base):
+    """One row per scheduled mail delivered on a given day (makes scheduled sends idempotent)"""
+    __tablename__ = "sent_log"
+    __table_args__ = (
+        UniqueConstraint("mail_id", "send_date", name="uq_sent_log_mail_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    mail_id = Column(Integer, nullable=False)  # mails.id; no foreign key so deleting a schedule keeps its history
+    send_date = Column(Date, nullable=False, index=True)  # day of the send window, app timezone
+    receiver_email = Column(String(255), nullable=True)
+    owner = Column(String(255), nullable=True)  # scheduler process that sent it
+    created_at = Column(DateTime, default=datetime.utcnow)
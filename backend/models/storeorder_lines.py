@@ -0,0 +1,25 @@
+# models/storeorder_lines.py
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
+from database import Base
+
+
+class StoreOrderLine(Base):
+    """One row per item of StoreOrders.items_ordered["items"], kept in sync by crud.storeorders"""
+    __tablename__ = "storeorder_lines"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("storeorders.id", ondelete="CASCADE"), nullable=False, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    item_id = Column(String(100), nullable=True)
+    item_name = Column(String(255), nullable=True, index=True)
+    category = Column(String(255), nullable=True)
+    unit = Column(String(50), nullable=True)
+    quantity = Column(Float, nullable=True)  # NULL when the item had no quantity
+    unit_price = Column(Float, nullable=True)
+    total_price = Column(Float, nullable=False, default=0.0)
+    order_date = Column(DateTime, nullable=False)  # updated_at or created_at of the order
+
+    __table_args__ = (
+        Index("ix_storeorder_lines_company_location_date", "company_id", "location_id", "order_date"),
+    )
@@ -1,5 +1,5 @@
 # models/storeorders.py
-from sqlalchemy import Column, Integer, JSON, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, JSON, ForeignKey, DateTime, Index
 from database import Base
 from datetime import datetime
 
@@ -12,4 +12,9 @@ class StoreOrders(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow)
     items_ordered = Column(JSON, nullable=False)
-    prev_items_ordered = Column(JSON, nullable=True)
\ No newline at end of file
+    prev_items_ordered = Column(JSON, nullable=True)
+    effective_date = Column(DateTime, nullable=True)  # updated_at or created_at, kept in sync by crud.storeorders
+
+    __table_args__ = (
+        Index("ix_storeorders_company_location_effective", "company_id", "location_id", "effective_date"),
+    )
@@ -0,0 +1,31 @@
+# models/upload_jobs.py
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, DateTime
+from datetime import datetime
+from database import Base
+
+
+class UploadJob(Base):
+    __tablename__ = "upload_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # "excel" or "master"
+    file_name = Column(String(255), nullable=False)
+    dashboard = Column(String(100), nullable=True)
+
+    # queued -> parsing -> computing -> deduping -> inserting -> done / failed
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    rows_total = Column(Integer, nullable=False, default=0)
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    rows_duplicate = Column(Integer, nullable=False, default=0)
+
+    payload_path = Column(String(500), nullable=True)  # request body waiting to be processed
+    result = Column(JSON, nullable=True)  # finished DashboardResponse list / master upload response
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -7,6 +7,22 @@ from pmix_dashboard.pmix_utils import (overview_tables,
                                        create_sales_by_category_tables, 
                                        create_top_vs_bottom_comparison,
                                        category_comparison_function)
+from utils.dashboard_executor import run_dashboard_builders
+
+
+def pmix_dashboard_builders(df, start_date=None, end_date=None, location_filter='All', server_filter='All', category_filter='All'):
+    """
+    Table builders of the PMIX dashboard, for run_dashboard_builders /
+    iter_dashboard_builders. "overview" comes first: it holds the headline KPIs.
+    """
+    common_filters = dict(location_filter=location_filter, start_date=start_date, end_date=end_date, category_filter=category_filter)
+    return {
+        "overview": (overview_tables, (df,), dict(common_filters, server_filter=server_filter)),
+        "detailed_analysis": (detailed_analysis_tables, (df,), common_filters),
+        "sales_by_category": (create_sales_by_category_tables, (df,), dict(common_filters, server_filter=server_filter)),
+        "category_comparison": (category_comparison_function, (df,), dict(common_filters, server_filter=server_filter)),
+        "top_vs_bottom": (create_top_vs_bottom_comparison, (df,), dict(common_filters, server_filter=server_filter)),
+    }
 
 
 def process_pmix_file(file_data: Union[io.BytesIO, str],start_date=None, end_date=None , location_filter='All', server_filter='All', category_filter='All',  menu_item_filter='All'):
@@ -44,7 +60,13 @@ def process_pmix_file(file_data: Union[io.BytesIO, str],start_date=None, end_dat
     print("i am here in pmix_processor.py printing request", df.head(), location_filter, server_filter, category_filter, start_date, end_date)   
     # sales_df, order_df, avg_ticket_df, cogs_df, reg_pay_df, lb_hrs_df, spmh_df = companywide_tables(df, store_filter=store_filter, year_filter=year_filter, quarter_filter=quarter_filter, helper4_filter=helper4_filter)
  
-    p1 = overview_tables(df, location_filter=location_filter, server_filter=server_filter, category_filter=category_filter,  start_date=start_date, end_date=end_date)
+    # The table builders only read df, so they are dispatched together to the
+    # dashboard pool instead of running one after another.
+    tables = run_dashboard_builders(pmix_dashboard_builders(
+        df, start_date=start_date, end_date=end_date, location_filter=location_filter,
+        server_filter=server_filter, category_filter=category_filter))
+
+    p1 = tables["overview"]
     
     net_sales = p1['net_sales'] #value
     orders = p1['orders'] #value
@@ -60,7 +82,7 @@ def process_pmix_file(file_data: Union[io.BytesIO, str],start_date=None, end_dat
     avg_orders_value_change_correct = p1['avg_orders_value_change_correct'] #value
     
     # p2 = detailed_analysis_tables(df, location_filter=location_filter, menu_item_filter=menu_item_filter)
-    p2 = detailed_analysis_tables(df, location_filter=location_filter ,category_filter=category_filter, start_date=start_date, end_date=end_date)
+    p2 = tables["detailed_analysis"]
     
     
     #    # Return all tables and metrics in a dictionary
@@ -88,19 +110,19 @@ def process_pmix_file(file_data: Union[io.BytesIO, str],start_date=None, end_dat
     unique_orders_change = p2['unique_orders_change'] #value
     total_quantity_change = p2['total_quantity_change'] #value
      
-    p3 = create_sales_by_category_tables(df, location_filter=location_filter, start_date=start_date, end_date=end_date, category_filter=category_filter , server_filter=server_filter)
+    p3 = tables["sales_by_category"]
     
     sales_by_category_tables_df = p3['sales_by_category_table']
     sales_by_category_by_day_table_df = p3['sales_by_category_by_day_table']
 
-    p4 = category_comparison_function(df, location_filter=location_filter, start_date=start_date, end_date=end_date, category_filter=category_filter , server_filter=server_filter)
+    p4 = tables["category_comparison"]
 
     # category_comparison_table_df = p4['category_comparison_table']
     category_comparison_table_df = p4["category_comparison_table"]
 
 
     
-    top_vs_bottom_comparison_df  = create_top_vs_bottom_comparison(df, location_filter=location_filter, start_date=start_date, end_date=end_date, category_filter=category_filter , server_filter=server_filter)
+    top_vs_bottom_comparison_df  = tables["top_vs_bottom"]
 
 
     print("---------------------------------------------------")
@@ -1,7 +1,6 @@
 import base64
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from passlib.hash import bcrypt
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 
@@ -15,7 +14,10 @@ from models.email_config import fm
 from fastapi_mail import MessageSchema, MessageType
 
 from starlette.background import BackgroundTasks
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
+from starlette.concurrency import run_in_threadpool
+from utils.password_hashing import hash_password, hash_password_async, verify_password_async
+from utils.rate_limit import RateLimiter
 
 
 from models.uploaded_files import UploadedFile
@@ -30,6 +32,15 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 2000
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
+# Sign-in throttling: attempts per client IP, failed attempts per account
+SIGNIN_IP_LIMIT = int(os.getenv("SIGNIN_IP_LIMIT", "30"))
+SIGNIN_IP_WINDOW_SECONDS = int(os.getenv("SIGNIN_IP_WINDOW_SECONDS", "60"))
+SIGNIN_ACCOUNT_FAILURE_LIMIT = int(os.getenv("SIGNIN_ACCOUNT_FAILURE_LIMIT", "10"))
+SIGNIN_ACCOUNT_WINDOW_SECONDS = int(os.getenv("SIGNIN_ACCOUNT_WINDOW_SECONDS", "900"))
+
+signin_ip_limiter = RateLimiter(SIGNIN_IP_LIMIT, SIGNIN_IP_WINDOW_SECONDS)
+signin_account_limiter = RateLimiter(SIGNIN_ACCOUNT_FAILURE_LIMIT, SIGNIN_ACCOUNT_WINDOW_SECONDS)
+
 
 # # ---------------------- SCHEMAS ----------------------
 # class Token(BaseModel):
@@ -152,15 +163,25 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 # ---------------------- ROUTES ----------------------
 
+def _get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+# signup and signin await the password hashing pool; their database work runs
+# in the threadpool, so the event loop is never blocked
 @router.post("/signup", response_model=Token)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     print("Received data:", user_data)
     
-    existing = db.query(User).filter(User.email == user_data.email).first()
+    existing = await run_in_threadpool(_get_user_by_email, db, user_data.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_pw = bcrypt.hash(user_data.password)
+    hashed_pw = await hash_password_async(user_data.password)
+    return await run_in_threadpool(_create_user, db, user_data, hashed_pw)
+
+
+def _create_user(db: Session, user_data: UserCreate, hashed_pw: str):
     new_user = User(
         email=user_data.email,
         first_name=user_data.first_name,
@@ -292,11 +313,44 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 # Then update your signin endpoint
+def _check_signin_limits(client_ip: str, account: str):
+    """Raise 429 when the client IP or the account is over its sign-in limit"""
+    retry_after = max(
+        signin_ip_limiter.retry_after(client_ip) or 0,
+        signin_account_limiter.retry_after(account) or 0,
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many sign-in attempts. Please try again later.",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+
+
 @router.post("/signin", response_model=SignInResponse)  # Change this line
-def signin(credentials: SignInInput, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not bcrypt.verify(credentials.password, user.password_hash):
+async def signin(credentials: SignInInput, request: Request, db: Session = Depends(get_db)):
+    client_ip = request.client.host if request.client else "unknown"
+    account = credentials.email.lower()
+    _check_signin_limits(client_ip, account)
+    signin_ip_limiter.hit(client_ip)
+
+    user = await run_in_threadpool(_get_user_by_email, db, credentials.email)
+    valid, new_hash = await verify_password_async(credentials.password, user.password_hash) if user else (False, None)
+    if not valid:
+        signin_account_limiter.hit(account)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    signin_account_limiter.reset(account)
+
+    return await run_in_threadpool(_complete_signin, db, user, new_hash)
+
+
+def _complete_signin(db: Session, user: User, new_hash=None):
+    """Token and dashboard data of a signed-in user (blocking: database and file reads)"""
+    # The stored hash used another cost factor: replace it
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+        db.refresh(user)
 
     # Print user role when they sign in
     print(f"User {user.email} signed in with role: {user.role}")
@@ -471,7 +525,7 @@ def reset_password(data: ResetPasswordInput, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid token")
 
     user = db.query(User).filter(User.email == email).first()
-    user.password_hash = bcrypt.hash(data.new_password)
+    user.password_hash = hash_password(data.new_password)
     db.commit()
     del reset_tokens[data.token]
     return {"message": "Password updated successfully"}
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from crud import budget as budget_crud
 from schemas import budget as budget_schema
 from database import get_db
+from utils.pagination import paginate
+from crud.companies import get_company_by_name
+from tasks.delete_jobs import queue_bulk_delete
 # from dependencies.auth import get_current_active_user
 # from models.users import User
 
@@ -21,10 +24,16 @@ router = APIRouter(
 #     """Create a new budget record"""
 #     return budget_crud.create_budget_record(db, budget)
 
+BUDGET_SORT_KEYS = ("id", "Calendar_Date")
+
 @router.get("/", response_model=List[budget_schema.Budget])
 def get_budget_records(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    response: Response,
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    sort: str = Query("id", description="id or Calendar_Date"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Columns to return, e.g. id,Store,Calendar_Date,Net_Sales"),
     company_id: Optional[int] = Query(None, description="Filter by company ID"),
     store: Optional[str] = Query(None, description="Filter by store"),
     file_name: Optional[str] = Query(None, description="Filter by file name"),
@@ -33,17 +42,16 @@ def get_budget_records(
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
-    """Get budget records with optional filtering"""
-    return budget_crud.get_budget_records(
+    """Get budget records with optional filtering, one keyset page at a time (next page: ?cursor=<X-Next-Cursor>)"""
+    query = budget_crud.budget_records_query(
         db=db, 
-        skip=skip, 
-        limit=limit, 
         company_id=company_id,
         store=store,
         file_name=file_name,
         dashboard=dashboard,
         year=year
     )
+    return paginate(response, query, sort, cursor, limit, order, fields, BUDGET_SORT_KEYS)
 
 @router.get("/{record_id}", response_model=budget_schema.Budget)
 def get_budget_record(
@@ -88,8 +96,10 @@ def delete_budget_record(
 
 @router.delete("/bulk/all")
 def delete_all_budget_records(
+    response: Response,
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -100,6 +110,9 @@ def delete_all_budget_records(
             detail="You must set confirm=true to delete all records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "budget", {"company_id": company_id or None})
+
     deleted_count = budget_crud.delete_all_budget_records(db, company_id)
     
     if company_id:
@@ -116,9 +129,11 @@ def delete_all_budget_records(
 
 @router.delete("/bulk/by-dashboard")
 def delete_budget_by_dashboard(
+    response: Response,
     dashboard: int = Query(..., description="Dashboard ID to delete records for"),
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -129,6 +144,9 @@ def delete_budget_by_dashboard(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "budget", {"dashboard": dashboard, "company_id": company_id or None})
+
     deleted_count = budget_crud.delete_budget_by_dashboard(db, dashboard, company_id)
     
     return {
@@ -141,9 +159,11 @@ def delete_budget_by_dashboard(
 
 @router.delete("/bulk/by-filename")
 def delete_budget_by_filename(
+    response: Response,
     file_name: str = Query(..., description="File name to delete records for"),
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -154,6 +174,9 @@ def delete_budget_by_filename(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "budget", {"file_name": file_name, "company_id": company_id or None})
+
     deleted_count = budget_crud.delete_budget_by_filename(db, file_name, company_id)
     
     return {
@@ -166,9 +189,11 @@ def delete_budget_by_filename(
 
 @router.delete("/bulk/by-store")
 def delete_budget_by_store(
+    response: Response,
     store: str = Query(..., description="Store to delete records for"),
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -179,6 +204,9 @@ def delete_budget_by_store(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "budget", {"Store": store, "company_id": company_id or None})
+
     deleted_count = budget_crud.delete_budget_by_store(db, store, company_id)
     
     return {
@@ -239,9 +267,11 @@ def get_uploaded_files_list(
 # Add this new delete endpoint for store and company
 @router.delete("/bulk/by-store-and-company")
 def delete_budget_by_store_and_company(
+    response: Response,
     store: str = Query(..., description="Store name to delete records for"),
     company_name: str = Query(..., description="Company name to delete records for"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -252,6 +282,12 @@ def delete_budget_by_store_and_company(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        company = get_company_by_name(db, company_name)
+        if not company:
+            raise HTTPException(status_code=404, detail=f"Company '{company_name}' not found")
+        return queue_bulk_delete(db, response, "budget", {"Store": store, "company_id": company.id})
+
     result = budget_crud.delete_budget_by_store_and_company(db, store, company_name)
     
     if result["company_id"] is None:
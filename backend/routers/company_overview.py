@@ -128,6 +128,7 @@
 
 
 
+from collections import defaultdict
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
@@ -140,6 +141,7 @@ from datetime import datetime
 from models.user_company_companylocation import UserCompanyCompanyLocation
 from models.company_locations import CompanyLocation
 from dependencies.auth import get_current_active_user
+from utils.overview_cache import get_overview, put_overview, current_generation
 
 
 router = APIRouter(
@@ -147,134 +149,114 @@ router = APIRouter(
     tags=["Company Overview"]
 )
 
-@router.get("/")
-def get_company_overview(db: Session = Depends(get_db),
-                         current_user: User = Depends(get_current_active_user)
-                         ):
-    print("Current User_id:", current_user.id)
-    print("Current User Role:", current_user.role.name if current_user.role else "No Role")
-    
-    # Get user role name
-    user_role = current_user.role.name.lower() if current_user.role else None
-    
-    # Determine which companies the user can access
-    accessible_companies = []
-    
+# Permission column -> name shown in the overview
+PERMISSION_NAMES = [
+    ("upload_excel", "excel_upload"),
+    ("d1", "sales_split"),
+    ("d2", "product_mix"),
+    ("d3", "finance"),
+    ("d4", "sales_wide"),
+    ("d5", "user_management"),
+    ("d6", "location_management"),
+    ("d7", "reporting"),
+]
+
+
+def _accessible_companies(db: Session, current_user: User, user_role: str):
+    """Companies the user can access"""
     if user_role == "superuser":
         # Superuser can see all companies
-        accessible_companies = db.query(Company).all()
         print("Superuser access: All companies")
-        
-    elif user_role == "admin":
+        return db.query(Company).all()
+
+    if user_role == "admin":
         # Admin can see companies they are associated with
-        user_companies = db.query(UserCompany).filter(UserCompany.user_id == current_user.id).all()
-        company_ids = [uc.company_id for uc in user_companies]
-        
-        if company_ids:
-            accessible_companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
-        
-        print(f"Admin access: Companies {company_ids}")
-        
-    elif user_role in ["manager", "user"]:
+        company_ids = db.query(UserCompany.company_id).filter(UserCompany.user_id == current_user.id)
+        print(f"Admin access: Companies of user {current_user.id}")
+        return db.query(Company).filter(Company.id.in_(company_ids)).all()
+
+    if user_role in ["manager", "user"]:
         # Manager/User can only see their own company
-        if current_user.company_id:
-            accessible_companies = db.query(Company).filter(Company.id == current_user.company_id).all()
-        
         print(f"Manager/User access: Company {current_user.company_id}")
-        
-    else:
-        # Unknown role or no role - deny access
-        raise HTTPException(status_code=403, detail="Access denied: Invalid user role")
-    
-    if not accessible_companies:
+        if not current_user.company_id:
+            return []
+        return db.query(Company).filter(Company.id == current_user.company_id).all()
+
+    # Unknown role or no role - deny access
+    raise HTTPException(status_code=403, detail="Access denied: Invalid user role")
+
+
+def _build_company_overview(db: Session, current_user: User, user_role: str):
+    """
+    Companies with their locations and users, loaded with a fixed number of
+    queries (companies, users, locations, permissions, location assignments)
+    and grouped in memory, whatever the number of companies and users.
+    """
+    companies = _accessible_companies(db, current_user, user_role)
+    if not companies:
         return []
-    
-    response = []
-    
-    for company in accessible_companies:
-        # Get users for this company
-        company_users_query = db.query(User).filter(User.company_id == company.id)
-        
-        # Filter users based on current user's role
-        if user_role == "superuser":
-            # Superuser sees all users
-            company_users = company_users_query.all()
-        elif user_role == "admin":
-            # Admin sees all users in their accessible companies
-            company_users = company_users_query.all()
-        elif user_role == "manager":
-            # Manager sees users in their company, but might have additional restrictions
-            company_users = company_users_query.all()
-        elif user_role == "user":
-            # Regular user only sees themselves
-            company_users = company_users_query.filter(User.id == current_user.id).all()
-        
-        # Get locations for this company
-        company_locations_query = db.query(Store).filter(Store.company_id == company.id)
-        
-        # Filter locations based on current user's role and assigned locations
-        if user_role == "superuser":
-            # Superuser sees all locations
-            company_locations = company_locations_query.all()
-        elif user_role == "admin":
-            # Admin sees all locations in their accessible companies
-            company_locations = company_locations_query.all()
-        elif user_role in ["manager", "user"]:
-            # Manager/User sees only their assigned locations
-            user_assigned_locations = db.query(Store.id).join(
-                CompanyLocation, Store.id == CompanyLocation.location_id
-            ).join(
-                UserCompanyCompanyLocation, CompanyLocation.id == UserCompanyCompanyLocation.company_location_id
-            ).filter(
-                UserCompanyCompanyLocation.user_id == current_user.id,
-                Store.company_id == company.id
-            ).all()
-            
-            assigned_location_ids = [loc_id[0] for loc_id in user_assigned_locations]
-            
-            if assigned_location_ids:
-                company_locations = company_locations_query.filter(Store.id.in_(assigned_location_ids)).all()
-            else:
-                company_locations = []
-        
-        # Get permissions map for users in this company
-        permissions_map = {
-            p.user_id: p for p in db.query(Permission).filter(Permission.company_id == company.id).all()
-        }
+    company_ids = [company.id for company in companies]
+
+    # Users of all companies; a regular user only sees themselves
+    users_query = db.query(User).filter(User.company_id.in_(company_ids))
+    if user_role == "user":
+        users_query = users_query.filter(User.id == current_user.id)
+    users_by_company = defaultdict(list)
+    for user in users_query.order_by(User.id).all():
+        users_by_company[user.company_id].append(user)
+
+    # Locations of all companies; managers/users only see their assigned locations
+    locations_query = db.query(Store).filter(Store.company_id.in_(company_ids))
+    if user_role in ["manager", "user"]:
+        assigned_location_ids = db.query(Store.id).join(
+            CompanyLocation, Store.id == CompanyLocation.location_id
+        ).join(
+            UserCompanyCompanyLocation, CompanyLocation.id == UserCompanyCompanyLocation.company_location_id
+        ).filter(
+            UserCompanyCompanyLocation.user_id == current_user.id
+        )
+        locations_query = locations_query.filter(Store.id.in_(assigned_location_ids))
+    locations_by_company = defaultdict(list)
+    for loc in locations_query.order_by(Store.id).all():
+        locations_by_company[loc.company_id].append(loc)
+
+    # Permissions of every user, per company
+    permissions_map = {
+        (p.company_id, p.user_id): p
+        for p in db.query(Permission).filter(Permission.company_id.in_(company_ids)).all()
+    }
+
+    # Assigned locations of every listed user
+    user_ids = [user.id for users in users_by_company.values() for user in users]
+    assigned_by_user = defaultdict(list)
+    if user_ids:
+        user_location_entries = db.query(
+            UserCompanyCompanyLocation.user_id, Store.id, Store.company_id, Store.name
+        ).join(
+            CompanyLocation, CompanyLocation.id == UserCompanyCompanyLocation.company_location_id
+        ).join(
+            Store, Store.id == CompanyLocation.location_id
+        ).filter(
+            UserCompanyCompanyLocation.user_id.in_(user_ids)
+        ).order_by(UserCompanyCompanyLocation.id).all()
+
+        for user_id, loc_id, comp_id, loc_name in user_location_entries:
+            assigned_by_user[user_id].append({
+                "location_id": loc_id,
+                "company_id": comp_id,
+                "location_name": loc_name
+            })
 
+    response = []
+    for company in companies:
         users_payload = []
-        for user in company_users:
-            user_permission = permissions_map.get(user.id)
-
-            # Get assigned locations for the user
-            user_location_entries = db.query(Store.id, Store.company_id, Store.name).join(
-                CompanyLocation, Store.id == CompanyLocation.location_id
-            ).join(
-                UserCompanyCompanyLocation, CompanyLocation.id == UserCompanyCompanyLocation.company_location_id
-            ).filter(
-                UserCompanyCompanyLocation.user_id == user.id
-            ).all()
-
-            assigned_locations = [
-                {
-                    "location_id": loc_id,
-                    "company_id": comp_id,
-                    "location_name": loc_name
-                }
-                for loc_id, comp_id, loc_name in user_location_entries
+        for user in users_by_company[company.id]:
+            user_permission = permissions_map.get((company.id, user.id))
+            permissions_list = [
+                name for column, name in PERMISSION_NAMES
+                if user_permission and getattr(user_permission, column, False)
             ]
 
-            permissions_list = []
-            if user_permission:
-                if getattr(user_permission, "upload_excel", False): permissions_list.append("excel_upload")
-                if getattr(user_permission, "d1", False): permissions_list.append("sales_split")
-                if getattr(user_permission, "d2", False): permissions_list.append("product_mix")
-                if getattr(user_permission, "d3", False): permissions_list.append("finance")
-                if getattr(user_permission, "d4", False): permissions_list.append("sales_wide")
-                if getattr(user_permission, "d5", False): permissions_list.append("user_management")
-                if getattr(user_permission, "d6", False): permissions_list.append("location_management")
-                if getattr(user_permission, "d7", False): permissions_list.append("reporting")
-
             users_payload.append({
                 "id": user.id,
                 "name": f"{user.first_name} {user.last_name}".strip(),
@@ -282,15 +264,14 @@ def get_company_overview(db: Session = Depends(get_db),
                 "phone_number": user.phone_number or "",
                 "role": user.role.name.capitalize() if user.role else "Unknown",
                 "permissions": permissions_list,
-                "assignedLocations": assigned_locations,
-                "isActive": user.is_active if hasattr(user, "is_active") else True,
+                "assignedLocations": assigned_by_user[user.id],
+                "isActive": user.isActive if hasattr(user, "isActive") else True,
                 "companyId": user.company_id,
                 "createdAt": user.created_at or None,
-                "isActive": user.isActive if hasattr(user, "isActive") else True
             })
 
         locations_payload = []
-        for loc in company_locations:
+        for loc in locations_by_company[company.id]:
             locations_payload.append({
                 "id": loc.id,
                 "name": loc.name,
@@ -320,7 +301,6 @@ def get_company_overview(db: Session = Depends(get_db),
             "industry": getattr(company, "industry", "Unknown"),
             "isActive": True,
             "createdAt": company.created_at or None,
-            "updatedAt": datetime.utcnow(),
             "locations": locations_payload,
             "users": users_payload
         })
@@ -328,6 +308,31 @@ def get_company_overview(db: Session = Depends(get_db),
     return response
 
 
+def _with_timestamp(companies):
+    now = datetime.utcnow()
+    return [{**company, "updatedAt": now} for company in companies]
+
+
+@router.get("/")
+def get_company_overview(db: Session = Depends(get_db),
+                         current_user: User = Depends(get_current_active_user)
+                         ):
+    print("Current User_id:", current_user.id)
+    print("Current User Role:", current_user.role.name if current_user.role else "No Role")
+    
+    # Get user role name
+    user_role = current_user.role.name.lower() if current_user.role else None
+
+    cache_key = (current_user.id, user_role, current_user.company_id)
+    companies = get_overview(cache_key)
+    if companies is None:
+        generation = current_generation()
+        companies = _build_company_overview(db, current_user, user_role)
+        put_overview(cache_key, companies, generation)
+
+    return _with_timestamp(companies)
+
+
 @router.get("/dummy")
 def get_company_overview(db: Session = Depends(get_db),
                         #  current_user: User = Depends(get_current_active_user)
@@ -341,177 +346,5 @@ def get_company_overview(db: Session = Depends(get_db),
     
     # Determine which companies the user can access
     user_role = "superuser"  # For testing purposes, set to superuser
-    
-    accessible_companies = []
-    
-    
-    if user_role == "superuser":
-        # Superuser can see all companies
-        accessible_companies = db.query(Company).all()
-        print("Superuser access: All companies")
-        
-    elif user_role == "admin":
-        # Admin can see companies they are associated with
-        user_companies = db.query(UserCompany).filter(UserCompany.user_id == current_user.id).all()
-        company_ids = [uc.company_id for uc in user_companies]
-        
-        if company_ids:
-            accessible_companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
-        
-        print(f"Admin access: Companies {company_ids}")
-        
-    elif user_role in ["manager", "user"]:
-        # Manager/User can only see their own company
-        if current_user.company_id:
-            accessible_companies = db.query(Company).filter(Company.id == current_user.company_id).all()
-        
-        print(f"Manager/User access: Company {current_user.company_id}")
-        
-    else:
-        # Unknown role or no role - deny access
-        raise HTTPException(status_code=403, detail="Access denied: Invalid user role")
-    
-    if not accessible_companies:
-        return []
-    
-    response = []
-    
-    for company in accessible_companies:
-        # Get users for this company
-        company_users_query = db.query(User).filter(User.company_id == company.id)
-        
-        # Filter users based on current user's role
-        if user_role == "superuser":
-            # Superuser sees all users
-            company_users = company_users_query.all()
-        elif user_role == "admin":
-            # Admin sees all users in their accessible companies
-            company_users = company_users_query.all()
-        elif user_role == "manager":
-            # Manager sees users in their company, but might have additional restrictions
-            company_users = company_users_query.all()
-        elif user_role == "user":
-            # Regular user only sees themselves
-            company_users = company_users_query.filter(User.id == current_user.id).all()
-        
-        # Get locations for this company
-        company_locations_query = db.query(Store).filter(Store.company_id == company.id)
-        
-        # Filter locations based on current user's role and assigned locations
-        if user_role == "superuser":
-            # Superuser sees all locations
-            company_locations = company_locations_query.all()
-        elif user_role == "admin":
-            # Admin sees all locations in their accessible companies
-            company_locations = company_locations_query.all()
-        elif user_role in ["manager", "user"]:
-            # Manager/User sees only their assigned locations
-            user_assigned_locations = db.query(Store.id).join(
-                CompanyLocation, Store.id == CompanyLocation.location_id
-            ).join(
-                UserCompanyCompanyLocation, CompanyLocation.id == UserCompanyCompanyLocation.company_location_id
-            ).filter(
-                UserCompanyCompanyLocation.user_id == current_user.id,
-                Store.company_id == company.id
-            ).all()
-            
-            assigned_location_ids = [loc_id[0] for loc_id in user_assigned_locations]
-            
-            if assigned_location_ids:
-                company_locations = company_locations_query.filter(Store.id.in_(assigned_location_ids)).all()
-            else:
-                company_locations = []
-        
-        # Get permissions map for users in this company
-        permissions_map = {
-            p.user_id: p for p in db.query(Permission).filter(Permission.company_id == company.id).all()
-        }
-
-        users_payload = []
-        for user in company_users:
-            user_permission = permissions_map.get(user.id)
-
-            # Get assigned locations for the user
-            user_location_entries = db.query(Store.id, Store.company_id, Store.name).join(
-                CompanyLocation, Store.id == CompanyLocation.location_id
-            ).join(
-                UserCompanyCompanyLocation, CompanyLocation.id == UserCompanyCompanyLocation.company_location_id
-            ).filter(
-                UserCompanyCompanyLocation.user_id == user.id
-            ).all()
-
-            assigned_locations = [
-                {
-                    "location_id": loc_id,
-                    "company_id": comp_id,
-                    "location_name": loc_name
-                }
-                for loc_id, comp_id, loc_name in user_location_entries
-            ]
-
-            permissions_list = []
-            if user_permission:
-                if getattr(user_permission, "upload_excel", False): permissions_list.append("excel_upload")
-                if getattr(user_permission, "d1", False): permissions_list.append("sales_split")
-                if getattr(user_permission, "d2", False): permissions_list.append("product_mix")
-                if getattr(user_permission, "d3", False): permissions_list.append("finance")
-                if getattr(user_permission, "d4", False): permissions_list.append("sales_wide")
-                if getattr(user_permission, "d5", False): permissions_list.append("user_management")
-                if getattr(user_permission, "d6", False): permissions_list.append("location_management")
-                if getattr(user_permission, "d7", False): permissions_list.append("reporting")
-
-            users_payload.append({
-                "id": user.id,
-                "name": f"{user.first_name} {user.last_name}".strip(),
-                "email": user.email,
-                "phone_number": user.phone_number or "",
-                "role": user.role.name.capitalize() if user.role else "Unknown",
-                "permissions": permissions_list,
-                "assignedLocations": assigned_locations,
-                "isActive": user.is_active if hasattr(user, "is_active") else True,
-                "companyId": user.company_id,
-                "createdAt": user.created_at or None,
-                "isActive": user.isActive if hasattr(user, "isActive") else True
-            })
-
-        locations_payload = []
-        for loc in company_locations:
-            locations_payload.append({
-                "id": loc.id,
-                "name": loc.name,
-                "city": loc.city or "",
-                "state": loc.state or "",
-                "postcode": loc.postcode or "",
-                "address": loc.address or "",
-                "phone": loc.phone or "",
-                "email": loc.email or "",
-                "companyId": loc.company_id,
-                "isActive": True,
-                "createdAt": loc.created_at or None,
-                "updatedAt": loc.updated_at or None,
-                "manager": None  # Optional enhancement: lookup from another model
-            })
-
-        response.append({
-            "id": company.id,
-            "name": company.name,
-            "city": getattr(company, "city", company.state),
-            "state": company.state,
-            "postcode": company.postcode,
-            "address": company.address,
-            "phone": company.phone,
-            "email": company.email,
-            "website": company.website,
-            "industry": getattr(company, "industry", "Unknown"),
-            "isActive": True,
-            "createdAt": company.created_at or None,
-            "updatedAt": datetime.utcnow(),
-            "locations": locations_payload,
-            "users": users_payload
-        })
-
-    return response
-
-
-
 
+    return _with_timestamp(_build_company_overview(db, current_user, user_role))
@@ -26,6 +26,7 @@ from companywide_dashboard.companywide_processor import process_companywide_file
 from models.financials_company_wide import FinancialsCompanyWide
 from models.budget import Budget
 from database import get_db
+from utils.request_executor import run_blocking
 
 router = APIRouter(
     prefix="/api",
@@ -70,6 +71,10 @@ async def filter_companywide_data(
     Endpoint to filter previously processed company wide data by date range and location from database.
     Similar to financials_filter but for company wide dashboard data.
     """
+    return await run_blocking(request.company_id, _filter_companywide_data, request, db)
+
+
+def _filter_companywide_data(request, db):
     print(f"Received company wide filter request: {request}")
     try:
         print(f"Processing company wide filter request...")
@@ -124,13 +129,13 @@ async def filter_companywide_data(
         # if year_filter and year_filter != "All":
         #     financials_query = financials_query.filter(FinancialsCompanyWide.Year == year_filter)
         
-        # Apply date filters using Ly_Date if available
+        # Apply date filters on the indexed Calendar_Date column
         if start_date_pd is not None:
-            financials_query = financials_query.filter(FinancialsCompanyWide.Date >= start_date_pd)
+            financials_query = financials_query.filter(FinancialsCompanyWide.Calendar_Date >= start_date_pd)
             
         if end_date_pd is not None:
             end_datetime = end_date_pd + timedelta(days=1)  # Include end date
-            financials_query = financials_query.filter(FinancialsCompanyWide.Date < end_datetime)
+            financials_query = financials_query.filter(FinancialsCompanyWide.Calendar_Date < end_datetime)
         
         # Apply location filter
         if location_filter != "All" and location_filter:
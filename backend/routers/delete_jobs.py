@@ -0,0 +1,30 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from schemas.delete_jobs import DeleteJob
+from crud import delete_jobs as delete_jobs_crud
+
+router = APIRouter(
+    prefix="/api",
+    tags=["delete_jobs"],
+)
+
+
+@router.get("/delete/jobs", response_model=List[DeleteJob])
+def list_delete_jobs(
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Bulk delete jobs, newest first"""
+    return delete_jobs_crud.get_delete_jobs(db, limit=limit)
+
+
+@router.get("/delete/jobs/{job_id}", response_model=DeleteJob)
+def get_delete_job_status(job_id: int, db: Session = Depends(get_db)):
+    """State and progress (rows_deleted of rows_total) of a bulk delete job"""
+    job = delete_jobs_crud.get_delete_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Delete job not found")
+    return job
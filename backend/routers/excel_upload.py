@@ -3,6 +3,8 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 from models.sales_pmix import SalesPMix
+from crud.calendar_dim import record_calendar_dates
+from crud.ingestion_batches import get_or_create_batch, refresh_batch_stats
 from typing import List, Tuple
 
 
@@ -344,7 +346,10 @@ def insert_sales_pmix_with_duplicate_check(
     df: pd.DataFrame, 
     company_id: int,
     file_name: str = None,  # ADD THIS PARAMETER
-    dashboard: int = None   # ADD THIS PARAMETER
+    dashboard: int = None,   # ADD THIS PARAMETER
+    checksum: str = None,
+    uploaded_by: int = None,
+    progress=None
 ) -> dict:
     """
     Insert sales data with comprehensive duplicate checking.
@@ -355,6 +360,9 @@ def insert_sales_pmix_with_duplicate_check(
         company_id: Company ID
         file_name: Optional filename to store with each record
         dashboard: Optional dashboard integer to store with each record
+        checksum: Optional sha256 of the uploaded file, kept on the ingestion batch
+        uploaded_by: Optional id of the uploading user, kept on the ingestion batch
+        progress: Optional callback reporting stage/row counters (upload jobs)
     
     Returns:
         Dictionary with insertion results
@@ -398,9 +406,14 @@ def insert_sales_pmix_with_duplicate_check(
                 df_clean[col] = df_clean[col].astype(str).replace('nan', None).replace('NaT', None)
         
         # Check for duplicates
+        if progress:
+            progress("deduping")
         df_filtered, new_records_count, duplicates_count = check_and_filter_duplicates_sales_pmix(
             db, df_clean, company_id
         )
+
+        if progress:
+            progress("inserting", rows_duplicate=duplicates_count, rows_processed=duplicates_count)
         
         if len(df_filtered) == 0:
             print("No new records to insert after duplicate check.")
@@ -411,6 +424,13 @@ def insert_sales_pmix_with_duplicate_check(
                 'status': 'success'
             }
         
+        # Register the upload's days in the calendar dimension
+        if 'Sent_Date' in df_filtered.columns:
+            record_calendar_dates(df_filtered['Sent_Date'])
+
+        # The upload's ingestion batch (see crud.ingestion_batches)
+        batch = get_or_create_batch(db, "sales_pmix", company_id, file_name, dashboard, checksum, uploaded_by)
+
         # Insert records in batches for better performance
         batch_size = 1000
         inserted_count = 0
@@ -427,6 +447,8 @@ def insert_sales_pmix_with_duplicate_check(
                 # ADD FILE_NAME AND DASHBOARD TO EACH RECORD
                 if file_name:
                     record_dict['file_name'] = file_name
+                if batch is not None:
+                    record_dict['batch_id'] = batch.id
                 if dashboard is not None:
                     record_dict['dashboard'] = dashboard
                 
@@ -440,9 +462,14 @@ def insert_sales_pmix_with_duplicate_check(
             # Bulk insert using SQLAlchemy
             db.bulk_insert_mappings(SalesPMix, records_to_insert)
             inserted_count += len(records_to_insert)
+            if progress:
+                progress(rows_inserted=len(records_to_insert), rows_processed=len(records_to_insert))
             
             print(f"Inserted batch {i//batch_size + 1}: {len(records_to_insert)} records")
         
+        if batch is not None:
+            refresh_batch_stats(db, [batch.id])
+
         # Commit the transaction
         db.commit()
         print(f"Successfully inserted {inserted_count} new records into sales_pmix table")
@@ -466,6 +493,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
 import base64
+import hashlib
 import io
 import pandas as pd
 import numpy as np
@@ -496,6 +524,7 @@ from crud.sales_pmix import insert_sales_pmix_df
 from crud.financials_company_wide import insert_financials_with_duplicate_check
 from crud.budget import insert_budget_with_duplicate_check
 from utils.utils import get_file_type
+from utils.request_executor import run_blocking
 # Import the return processor
 from .excel_upload_return import process_dashboard_data
 
@@ -514,8 +543,14 @@ async def upload_excel(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    return await run_blocking(request.company_id, _upload_excel, request, db, current_user)
+
+
+def _upload_excel(request, db, current_user, progress=None):
     file_path = None  # Initialize in outer scope for access in except block
     try:
+        if progress:
+            progress("parsing")
         print(f"Received file upload: {request.fileName}")
         
         file_type = get_file_type(request.fileName)
@@ -523,6 +558,7 @@ async def upload_excel(
         print("printing the file_type", file_type)
         # Decode base64 file content
         file_content = base64.b64decode(request.fileContent)
+        file_checksum = hashlib.sha256(file_content).hexdigest()
         print("Type of file_content:", type(file_content))
         
         # # Create BytesIO object for pandas
@@ -907,6 +943,8 @@ async def upload_excel(
             print(f"Columns: {list(df.columns)}")
             print(f"Shape: {df.shape}")
             
+            if progress:
+                progress("computing", rows_total=len(df))
             result = process_dashboard_data(request, df1=df, df2=None, file_name=file_name, company_id=request.company_id)
 
 
@@ -1250,6 +1288,8 @@ async def upload_excel(
 
             print("i am here in excel upload printing the df_budget columns of the dataframe", df_budget.columns, "\n", df_budget.dtypes , "\n", df_budget.head())
 
+            if progress:
+                progress("computing", rows_total=len(df) + len(df_budget))
             result = process_dashboard_data(request = request, df1 = df, df2 = df_budget, file_name=file_name, company_id = request.company_id)
 
         # Save file record to database *after* successful processing
@@ -1280,7 +1320,10 @@ async def upload_excel(
                     file_name=file_name,  # EDIT: Pass the file_name here
                     dashboard=1 if request.dashboard == "Sales Split and Product Mix" else 
                             2  if request.dashboard == "Sales Split" else
-                            3 if request.dashboard == "Product Mix" else None
+                            3 if request.dashboard == "Product Mix" else None,
+                    checksum=file_checksum,
+                    uploaded_by=current_user.id,
+                    progress=progress
                     )
                 
                 print(f"Sales Split Insertion completed:")
@@ -1353,7 +1396,10 @@ async def upload_excel(
                     df=df,
                     company_id=request.company_id,
                     file_name=file_name,  # ADD THIS PARAMETER
-                    dashboard=dashboard_id  # ADD THIS PARAMETER
+                    dashboard=dashboard_id,  # ADD THIS PARAMETER
+                    checksum=file_checksum,
+                    uploaded_by=current_user.id,
+                    progress=progress
                 )
                 
                 print(f"Financials insertion completed:")
@@ -1380,7 +1426,10 @@ async def upload_excel(
                         df=df_budget,
                         company_id=request.company_id,
                         file_name=file_name,  # ADD THIS PARAMETER
-                        dashboard=dashboard_id  # ADD THIS PARAMETER
+                        dashboard=dashboard_id,  # ADD THIS PARAMETER
+                        checksum=file_checksum,
+                        uploaded_by=current_user.id,
+                        progress=progress
                     )
                     print(f"Budget insertion completed:")
                     print(f"  - New budget records inserted: {budget_insertion_result['inserted_count']}")
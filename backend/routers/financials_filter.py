@@ -13,6 +13,7 @@ from constants import *
 from models.financials_company_wide import FinancialsCompanyWide
 from models.budget import Budget
 from database import get_db
+from utils.request_executor import run_blocking
 
 router = APIRouter(
     prefix="/api",
@@ -32,6 +33,10 @@ async def filter_financials_data(
     Endpoint to filter previously processed financials data by date range and location from database.
     Similar to sales_split_filter but for financials data.
     """
+    return await run_blocking(request.company_id, _filter_financials_data, request, db)
+
+
+def _filter_financials_data(request, db):
     print(f"Received financials filter request: {request}")
     try:
         print(f"Processing financials filter request...")
@@ -92,13 +97,13 @@ async def filter_financials_data(
         # if year_filter and year_filter != "All":
         #     financials_query = financials_query.filter(FinancialsCompanyWide.Year == year_filter)
         
-        # Apply date filters using Ly_Date if available
+        # Apply date filters on the indexed Calendar_Date column
         if start_date_pd is not None:
-            financials_query = financials_query.filter(FinancialsCompanyWide.Date >= start_date_pd)
+            financials_query = financials_query.filter(FinancialsCompanyWide.Calendar_Date >= start_date_pd)
             
         if end_date_pd is not None:
             end_datetime = end_date_pd + timedelta(days=1)  # Include end date
-            financials_query = financials_query.filter(FinancialsCompanyWide.Date < end_datetime)
+            financials_query = financials_query.filter(FinancialsCompanyWide.Calendar_Date < end_datetime)
         
         # Apply location filter
         if location_filter != "All" and location_filter:
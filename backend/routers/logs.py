@@ -6,13 +6,16 @@ from sqlalchemy.orm import Session
 from models.locations import Store
 from models.companies import Company
 from crud import logs as logs_crud
+from crud import price_change_events as price_change_crud
 from schemas import logs as logs_schema
 from database import get_db
 import pandas as pd
 from crud.locations import get_store
 from pydantic import BaseModel
-from fastapi import Query
-from typing import Dict, Any
+from fastapi import Query, Response
+from typing import Dict, Any, Optional
+from models.logs import Logs
+from utils.pagination import paginate
 
 router = APIRouter(
     prefix="/api/logs",
@@ -69,160 +72,113 @@ def get_logs_details_alt(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error fetching logs details: {str(e)}")
 
 
+def _change_summary(event):
+    """
+    The fields of a log's file_data shown in the logs dashboard list. The full
+    file_data of a log is fetched on drill-down, from GET /api/logs/{logs_id}/items.
+    """
+    return {
+        "original_data": {
+            "Category": event.category,
+            "Products": event.product,
+            "Previous Price": event.previous_price,
+            "Current Price": event.new_price,
+        },
+        "changes": {
+            "previous_price": event.previous_price,
+            "new_price": event.new_price,
+            "change_percent": event.change_percent,
+            "change_delta": event.change_delta,
+            "change_p_n": event.change_p_n,
+        },
+    }
+
+
 @router.get("/details/{company_id}")
 def get_logs_details_by_company(company_id: int,
                                 startDate: str = Query(None),
                                 endDate: str = Query(None),
                                 db: Session = Depends(get_db)
                                 ):
-    """Get details of all logs for a specific company"""
+    """
+    Price change logs of a company with the dashboard totals, per-store counts and
+    trend rows. Everything is read from price_change_events (indexed on company and
+    date) and aggregated in SQL; each log's file_data only holds a summary of the
+    change, the full payload is served by GET /api/logs/{logs_id}/items.
+    """
     print("Fetching logs details for company:", company_id, "between dates:", startDate, endDate)
     try:
-        logs = logs_crud.get_logs_by_company(db, company_id)
-
+        start = end = None
         if startDate and endDate:
             try:
                 start = datetime.datetime.strptime(startDate, "%Y-%m-%d").date()
                 end = datetime.datetime.strptime(endDate, "%Y-%m-%d").date()
-                print("Filtering store orders between dates:", start, end)
-                logs = [
-                    log for log in logs
-                    if log.created_at and start <= log.created_at.date() <= end
-                ]
+                print("Filtering price change logs between dates:", start, end)
             except ValueError:
                 return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
 
-        
-        if not logs:
+        events = price_change_crud.get_price_change_events(db, company_id, start, end)
+        if not events:
             return {"message": "No logs found for this company", "data": []}
-        
-        # Get all unique company and location IDs
-        company_ids = list(set(log.company_id for log in logs if log.company_id))
-        location_ids = list(set(log.location_id for log in logs if log.location_id))
-        
-        # Fetch companies and locations in batch
-        companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
-        locations = db.query(Store).filter(Store.id.in_(location_ids)).all()
 
-        # Create lookup dictionaries
-        company_lookup = {comp.id: comp.name for comp in companies}
-        location_lookup = {loc.id: loc.name for loc in locations}
-        
-        # Initialize the totals
-        total_items = 0
-        total_positive_changes = 0
-        total_negative_changes = 0
-        total_value_impact = 0
-        total_positive_percent = 0
-        total_negative_percent = 0
-        
+        totals = price_change_crud.get_price_change_totals(db, company_id, start, end)
+        location_counts = price_change_crud.get_location_change_counts(db, company_id, start, end)
+
+        # Fetch the company and location names in batch
+        company = db.query(Company.name).filter(Company.id == company_id).first()
+        company_name = company.name if company else "Unknown"
+        location_ids = [location_id for location_id, _, _, _ in location_counts]
+        location_lookup = {
+            loc_id: name
+            for loc_id, name in db.query(Store.id, Store.name).filter(Store.id.in_(location_ids))
+        }
+
         details = []
-        # Aggregation dictionary for store-wise changes
-        store_aggregates = {}
-        
         trend_analysis = []
-        
-        for log in logs:
-            # Format datetime for display
-            readable_date = log.created_at.strftime('%Y-%m-%d %H:%M:%S') if log.created_at else "Unknown"
-            
-            # Parse file_data (assuming it's a JSON string)
-            file_data = log.file_data
-            try:
-                changes = file_data.get('changes', {})
-                change_delta = changes.get('change_delta', 0)
-                change_percent = changes.get('change_percent', 0)
-                change_p_n = changes.get('change_p_n', 'positive')
-                
-                # Calculate totals
-                total_items += 1
-                if change_p_n == "positive":
-                    total_positive_changes += 1
-                    total_positive_percent += change_percent  # Add to total positive percentage
-                elif change_p_n == "negative":
-                    total_negative_changes += 1
-                    total_negative_percent += change_percent  # Add to total negative percentage
-                total_value_impact += change_delta
-                
-                # Aggregate store-wise changes
-                location_id = log.location_id
-                location_name = location_lookup.get(location_id, "Unknown")
-                if location_name not in store_aggregates:
-                    store_aggregates[location_name] = {
-                        "total_changes": 0,
-                        "increases": 0,
-                        "decreases": 0
-                    }
-                store_aggregates[location_name]["total_changes"] += 1
-                if change_p_n == "positive":
-                    store_aggregates[location_name]["increases"] += 1
-                elif change_p_n == "negative":
-                    store_aggregates[location_name]["decreases"] += 1
-                
-            except (AttributeError, KeyError) as e:
-                # Handle case where 'changes' or 'change_delta' doesn't exist
-                pass
-            
-            # Add log details to response
+        for event, filename in events:
+            location_name = location_lookup.get(event.location_id, "Unknown")
+            created_at = event.created_at.isoformat() if event.created_at else None
             details.append({
-                "id": log.id,
-                "company_id": log.company_id,
-                "company_name": company_lookup.get(log.company_id, "Unknown"),
-                "filename": log.filename,
-                "location_id": log.location_id,
-                "location_name": location_lookup.get(log.location_id, "Unknown"),
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-                "created_at_readable": readable_date,
-                "file_data": log.file_data,
+                "id": event.log_id,
+                "company_id": event.company_id,
+                "company_name": company_name,
+                "filename": filename,
+                "location_id": event.location_id,
+                "location_name": location_name,
+                "created_at": created_at,
+                "created_at_readable": event.created_at.strftime('%Y-%m-%d %H:%M:%S') if event.created_at else "Unknown",
+                "file_data": _change_summary(event),
             })
-            product_value = log.file_data.get("original_data", {}).get('Products', [])
-            
-            data_2nd = log.file_data.get("original_data", {})
-            data_2nd = list(data_2nd.keys())[1]
-
-            data_product_value = log.file_data.get("original_data", {}).get(data_2nd, [])
-            
-            # print("i am here in logs printing the product_value", product_value, data_product_value)
-            
-            product_value = product_value if product_value[0] else data_product_value
-            # print("i am here in logs printing the product_value 2nd time ", product_value, data_2nd)
-
             trend_analysis.append({
-                "location_id": log.location_id,
-                "location_name": location_lookup.get(log.location_id, "Unknown"),
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-               "products": product_value,
-               "change_percent": log.file_data.get('changes', {}).get('change_percent', 0),
-               "change_p_n": log.file_data.get('changes', {}).get('change_p_n', 0),
-            })
-        
-        # Calculate average percentage change for positive and negative
-        avg_percent_increase = (total_positive_percent / total_positive_changes) if total_positive_changes > 0 else 0
-        avg_percent_decrease = (total_negative_percent / total_negative_changes) if total_negative_changes > 0 else 0
-        
-        # Convert store aggregates to list
-        store_by_store = []
-        for location_name, aggregates in store_aggregates.items():
-            store_by_store.append({
+                "location_id": event.location_id,
                 "location_name": location_name,
-                "total_changes": aggregates["total_changes"],
-                "increases": aggregates["increases"],
-                "decreases": aggregates["decreases"]
+                "created_at": created_at,
+                "products": event.product,
+                "change_percent": event.change_percent,
+                "change_p_n": event.change_p_n,
             })
-        
-        # Add totals to the response
+
+        # Stores are reported by name, stores sharing a name are counted together
+        store_aggregates = {}
+        for location_id, total_changes, increases, decreases in location_counts:
+            aggregates = store_aggregates.setdefault(
+                location_lookup.get(location_id, "Unknown"),
+                {"total_changes": 0, "increases": 0, "decreases": 0}
+            )
+            aggregates["total_changes"] += total_changes
+            aggregates["increases"] += int(increases or 0)
+            aggregates["decreases"] += int(decreases or 0)
+
+        store_by_store = [
+            {"location_name": location_name, **aggregates}
+            for location_name, aggregates in store_aggregates.items()
+        ]
+
         return {
             "message": "Logs details fetched successfully",
             "data": details,
             "trend_analysis": trend_analysis,
-            "totals": {
-                "total_items_tracked": total_items,
-                "price_increases": total_positive_changes,
-                "price_decreases": total_negative_changes,
-                "avg_price_increase": avg_percent_increase,
-                "avg_price_decrease": avg_percent_decrease,
-                "total_value_impact": total_value_impact,
-            },
+            "totals": totals,
             "store_by_store": store_by_store
         }
 
@@ -300,6 +256,7 @@ def update_logs_location(
     
     # Update the location_id to the new value
     logs.location_id = new_location_id
+    price_change_crud.sync_price_change_event(db, logs)
     db.commit()
     db.refresh(logs)
     return logs
@@ -407,21 +364,20 @@ def create_logs(logs: logs_schema.LogsCreate, db: Session = Depends(get_db)):
     """Create a new logs record"""
     return logs_crud.create_logs(db, logs)
 
+LOGS_SORT_KEYS = ("id", "created_at")
+
 @router.get("/", response_model=list[logs_schema.Logs])
-def get_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all logs with pagination"""
-    logs = logs_crud.get_all_logs(db, skip, limit)
-    print("i am here in logs printing the logs db " , logs)
-    
-    # Print the actual data
-    for log in logs:
-        print(f"ID: {log.id}")
-        print(f"Company ID: {log.company_id}")
-        print(f"Filename: {log.filename}")
-        df_construction = pd.DataFrame(log.file_data['data'])
-        print(f"DataFrame Construction: {df_construction}")
-        print("---")
-    return logs
+def get_logs(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    sort: str = Query("id", description="id or created_at"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Columns to return, e.g. id,location_id,filename,created_at"),
+    db: Session = Depends(get_db)
+):
+    """Get all logs, one keyset page at a time (next page: ?cursor=<X-Next-Cursor>)"""
+    return paginate(response, db.query(Logs), sort, cursor, limit, order, fields, LOGS_SORT_KEYS)
 
 @router.get("/{logs_id}", response_model=logs_schema.Logs)
 def get_logs_by_id(logs_id: int, db: Session = Depends(get_db)):
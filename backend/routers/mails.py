@@ -15,6 +15,7 @@ from schemas.mails import MailUpdate
 # Import the permission function
 from datetime import datetime
 from dependencies.permissions import can_set_global_time
+from tasks.email_scheduler import reschedule_emails
 
 # Schema for set_global_time request
 class SetGlobalTimeRequest(BaseModel):
@@ -71,7 +72,9 @@ def create_mails_with_company(
     
     print("Creating mails with company:", mails)
     """Create multiple mail records with scheduled receiving time"""
-    return mail_crud.create_multiple_mail_records(db, mails)
+    created = mail_crud.create_multiple_mail_records(db, mails)
+    reschedule_emails()
+    return created
 
 
 
@@ -83,7 +86,9 @@ def delete_mails_by_email(
     # current_user: User = Depends(get_current_user)
 ):
     """Delete all mail entries for a given email"""
-    return mail_crud.delete_mails_by_email(db, email)
+    result = mail_crud.delete_mails_by_email(db, email)
+    reschedule_emails()
+    return result
 
 
 @router.get("/mailslist/{company_id}", response_model=List[str])
@@ -118,7 +123,9 @@ def update_mail_entry(
     db: Session = Depends(get_db)
 ):
     """Update receiver_email or receiving_time for a mail"""
-    return mail_crud.update_mail(db, mail_id, update_data)
+    updated = mail_crud.update_mail(db, mail_id, update_data)
+    reschedule_emails()
+    return updated
 
 
 
@@ -226,6 +233,7 @@ def set_global_time(
         company_id=request.company_id,  # Use company_id to find all related mails
         receiving_time=receiving_time  # Use the time object instead of the string
     )
+    reschedule_emails()
     
     global_time_response = request.global_time  # Use the provided global time
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.orm import Session
 from schemas.master_file import MasterFileCreate
 from crud import master_file as masterfile_crud
+from crud.master_file_items import get_masterfile_rows
 from database import get_db
 from dependencies.auth import get_current_active_user
 from models.users import User
@@ -12,6 +13,7 @@ import io
 import pandas as pd
 import datetime
 import traceback
+from utils.request_executor import run_blocking
 
 router = APIRouter(
     prefix="/api",
@@ -163,7 +165,13 @@ async def master_upload(
     """
     Upload and process master file data, saving it to the database
     """
+    return await run_blocking(request.company_id, _master_upload, request, db, current_user)
+
+
+def _master_upload(request, db, current_user, progress=None):
     try:
+        if progress:
+            progress("parsing")
         print(f"Received file upload: {request.fileName}", "request", request)
         
         # Validate required fields
@@ -235,6 +243,9 @@ async def master_upload(
             print(traceback.format_exc())
             raise HTTPException(status_code=400, detail=f"Error processing Excel file: {str(e)}")
         
+        if progress:
+            progress("inserting", rows_total=len(df))
+
         # Check if file with same name already exists for this company and location
         existing_file = masterfile_crud.get_masterfile_by_filename_and_location(
             db, request.company_id, request.location_id, request.fileName
@@ -259,6 +270,8 @@ async def master_upload(
             saved_file = masterfile_crud.create_masterfile(db, masterfile_create)
         
         print(f"Successfully saved file to database with ID: {saved_file.id}")
+        if progress:
+            progress(rows_inserted=len(df), rows_processed=len(df))
         
         # Prepare response data
         column_names = df.columns.tolist()
@@ -354,7 +367,7 @@ async def get_master_file_data(
                 "total_rows": file.file_data.get("total_rows", 0),
                 "columns": file.file_data.get("columns", [])
             },
-            "data": file.file_data.get("data", [])
+            "data": get_masterfile_rows(db, file)
         }
         
     except HTTPException:
@@ -5,6 +5,10 @@ from sqlalchemy.orm import Session
 from models.locations import Store
 from models.companies import Company
 from crud import master_file as masterfile_crud
+from crud.master_file_items import (get_masterfile_rows, get_rows_by_masterfile, masterfile_with_rows,
+                                    find_matching_items, file_columns, get_item_value, set_item_value,
+                                    patch_masterfile_rows)
+from sqlalchemy.orm.attributes import flag_modified
 from schemas import master_file as masterfile_schema
 from database import get_db
 import pandas as pd
@@ -12,6 +16,10 @@ from crud.locations import get_store  # Add this import at the top with your oth
 
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
+from fastapi import Response
+from models.master_file import MasterFile
+from utils.pagination import (NEXT_CURSOR_HEADER, PaginationError, keyset_page, parse_fields,
+                              projected_response)
 class UpdateMasterFileRequest(BaseModel):
     company_id: int
     location_id: int
@@ -19,6 +27,19 @@ class UpdateMasterFileRequest(BaseModel):
     
     row_data: Dict[str, Any]
 
+
+class MasterFileRowChange(BaseModel):
+    row: int  # position of the row in the file (as listed by /details)
+    column: str
+    value: Any = None
+
+
+class PatchMasterFileRequest(BaseModel):
+    company_id: int
+    location_id: int
+    filename: str
+    changes: List[MasterFileRowChange]
+
 router = APIRouter(
     prefix="/api/masterfile",
     tags=["Master Files"]
@@ -79,12 +100,13 @@ def get_masterfile_details(
     if not masterfile:
         return {"message": "Masterfile not found", "data": []}
     
-    # Check if file_data exists and has data
-    if not masterfile.file_data or 'data' not in masterfile.file_data or not masterfile.file_data['data']:
+    # Check if the masterfile has rows
+    rows = get_masterfile_rows(db, masterfile)
+    if not rows:
         return {"message": "No data found in this masterfile", "data": []}
     
-    # Convert file_data to DataFrame
-    df = pd.DataFrame(masterfile.file_data['data'])
+    # Convert the rows to DataFrame
+    df = pd.DataFrame(rows)
     
     # print("i am here in masterfile printing the dataframe","\n" ,df.head())
     # df.columns = df.columns.str.strip()  # Strip whitespace from column names
@@ -137,7 +159,7 @@ def update_masterfile(
     masterfile.location_id = new_location_id
     db.commit()
     db.refresh(masterfile)
-    return masterfile
+    return masterfile_with_rows(masterfile, get_masterfile_rows(db, masterfile))
 
 
 
@@ -159,29 +181,15 @@ def update_masterfile(
 
         print("Found masterfile, processing update...")
         
-        # Convert stored data back to DataFrame
-        df = pd.DataFrame(masterfile.file_data['data'])
-        print("Current DataFrame shape:", df.shape)
-        print("DataFrame columns:", df.columns.tolist())
-        
         # Get row data from the request
         row_data = request.row_data  # This is the data you're already getting
         print("Row data to match:", row_data)
         
-        
-        
-        # Create boolean mask for matching rows using all columns except price-related ones
-        mask = pd.Series([True] * len(df))
+        # Find the rows matching all columns except price-related ones
         exclude_columns = ["Current Price","Previous Price"]
+        matching_rows = find_matching_items(db, masterfile, row_data, exclude_columns)
         
-        for col in row_data.keys():
-            if col not in exclude_columns and col in df.columns:
-                mask = mask & (df[col] == row_data[col])
-        
-        # Find matching rows
-        matching_rows = df[mask]
-        
-        if matching_rows.empty:
+        if not matching_rows:
             print("No matching rows found")
             return {"status": "error", "message": "No matching rows found"}
         
@@ -189,45 +197,26 @@ def update_masterfile(
         
         # Update the matching rows
         # Set Previous Price to the current Current Price before updating
-        if 'Current Price' in df.columns:
-            df.loc[mask, 'Previous Price'] = df.loc[mask, 'Current Price']
-            # Update Current Price to the new value
-            df.loc[mask, 'Current Price'] = row_data['Current Price']
+        if 'Current Price' in file_columns(masterfile):
+            for item in matching_rows:
+                set_item_value(item, 'Previous Price', get_item_value(item, 'Current Price'))
+                # Update Current Price to the new value
+                set_item_value(item, 'Current Price', row_data['Current Price'])
         
-        
-        print("Updated rows:")
-        print(df[mask][['Category', 'Products', 'Current Price', 'Previous Price']])
-
-        print("df after the update...", df.head())
-        # Convert DataFrame back to JSON format for database storage
-        df_json = df.to_dict('records')
-        
-        # Handle any datetime/timestamp conversions and NaN values
-        for record in df_json:
-            for key, value in record.items():
-                if pd.isna(value):
-                    record[key] = None
-                elif isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
-                    record[key] = value.isoformat() if value else None
-                elif isinstance(value, (int, float)) and pd.isna(value):
-                    record[key] = None
-        
-        # Update the file_data structure
-        updated_file_data = {
-            "upload_date": masterfile.file_data.get('upload_date'),  # Keep original upload date
-            "updated_at": datetime.datetime.now().isoformat(),  # Add last updated timestamp
-            "user_id": masterfile.file_data.get('user_id'),
-            "location_id": masterfile.file_data.get('location_id'),
-            "location_name": masterfile.file_data.get('location_name'),
-            "total_rows": len(df),
-            "columns": df.columns.tolist(),
-            "data": df_json
-        }
+        # Only the metadata of the file is rewritten, not its rows
+        updated_file_data = dict(masterfile.file_data)
+        updated_file_data["updated_at"] = datetime.datetime.now().isoformat()  # Add last updated timestamp
+        masterfile.file_data = updated_file_data
+        flag_modified(masterfile, "file_data")
         
         # Update the database record
-        updated_masterfile = masterfile_crud.update_masterfile(
-            db, masterfile.id, updated_file_data
-        )
+        try:
+            db.commit()
+            db.refresh(masterfile)
+            updated_masterfile = masterfile
+        except Exception:
+            db.rollback()
+            raise
         
         if updated_masterfile:
             print("Successfully updated masterfile in database")
@@ -289,6 +278,103 @@ def update_masterfile(
         raise HTTPException(status_code=500, detail=f"Error updating masterfile: {str(e)}")
 
 
+def _row_change_log(masterfile, row_change, timestamp):
+    """Log entry of one patched row: its diff, in the format of the price change logs"""
+    diff = {entry["column"]: entry for entry in row_change["diff"]}
+    log_data = {
+        "action": "patch_row",
+        "timestamp": timestamp,
+        "user_id": masterfile.file_data.get('user_id'),
+        "masterfile_id": masterfile.id,
+        "row": row_change["row"],
+        "original_data": row_change["values"],
+        "diff": row_change["diff"],
+        "changes": {"change_delta": 0, "change_percent": 0, "change_p_n": "no_change"},
+    }
+
+    price_change = diff.get("Current Price")
+    if price_change and all(isinstance(price_change[key], (int, float)) for key in ("old", "new")):
+        previous_price, new_price = price_change["old"], price_change["new"]
+        change_delta = new_price - previous_price
+        log_data["action"] = "update_price"
+        log_data["changes"] = {
+            "previous_price": previous_price,
+            "new_price": new_price,
+            "change_percent": (change_delta / previous_price * 100) if previous_price != 0 else 0,
+            "change_delta": change_delta,
+            "change_p_n": "positive" if change_delta > 0 else "negative" if change_delta < 0 else "no_change"
+        }
+    return log_data
+
+
+@router.patch("/rows")
+def patch_masterfile_rows_endpoint(
+    request: PatchMasterFileRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Apply a batch of cell changes (row, column, new value) to a masterfile.
+    Only the edited rows are read and written; a changed Current Price moves the
+    old price to Previous Price in the same transaction. One log entry is
+    written per changed row, holding only its diff.
+    """
+    print(f"Received {len(request.changes)} changes for masterfile {request.filename}")
+    masterfile = masterfile_crud.get_masterfile_by_filename_and_location(
+        db, request.company_id, request.location_id, request.filename
+    )
+    if not masterfile:
+        raise HTTPException(status_code=404, detail="Masterfile not found")
+    if not request.changes:
+        return {"status": "success", "message": "No changes", "updated_rows": 0, "changes": []}
+
+    try:
+        row_changes = patch_masterfile_rows(db, masterfile, [change.dict() for change in request.changes])
+
+        updated_at = datetime.datetime.now().isoformat()
+        if row_changes:
+            updated_file_data = dict(masterfile.file_data)
+            updated_file_data["updated_at"] = updated_at
+            masterfile.file_data = updated_file_data
+            flag_modified(masterfile, "file_data")
+        db.commit()
+
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        print(f"Error in patch_masterfile_rows: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error updating masterfile: {str(e)}")
+
+    # Save the diffs to logs table
+    try:
+        from crud import logs as logs_crud
+        from schemas.logs import LogsCreate
+
+        for row_change in row_changes:
+            logs_crud.create_logs(db, LogsCreate(
+                company_id=request.company_id,
+                location_id=request.location_id,
+                filename=request.filename,
+                file_data=_row_change_log(masterfile, row_change, updated_at)
+            ))
+    except Exception as log_error:
+        print(f"Error creating log entry: {str(log_error)}")
+        # Don't fail the main operation if logging fails
+
+    return {
+        "status": "success",
+        "message": f"Updated {len(row_changes)} row(s)",
+        "updated_rows": len(row_changes),
+        "changes": row_changes,
+        "updated_at": updated_at,
+    }
+
+
 @router.get("/availableitems/{company_id}/{location_id}")
 def get_masterfile_details(
     company_id: int, 
@@ -315,13 +401,14 @@ def get_masterfile_details(
     # Process and merge data from all files
     merged_data = []
     seen_products = {}  # Track products by Category + Products combination
+    rows_by_file = get_rows_by_masterfile(db, masterfile)
     
     for file_entry in masterfile:
         # Access attributes directly from SQLAlchemy model
-        if not hasattr(file_entry, 'file_data') or not file_entry.file_data or 'data' not in file_entry.file_data:
+        if not file_entry.file_data or not rows_by_file.get(file_entry.id):
             continue
             
-        file_data = file_entry.file_data['data']
+        file_data = rows_by_file[file_entry.id]
         upload_date = file_entry.file_data.get('upload_date', '')
         updated_at = file_entry.file_data.get('updated_at', upload_date)
         filename = getattr(file_entry, 'filename', 'unknown')
@@ -393,26 +480,45 @@ def get_masterfile_details(
 @router.post("/", response_model=masterfile_schema.MasterFile)
 def create_masterfile(masterfile: masterfile_schema.MasterFileCreate, db: Session = Depends(get_db)):
     """Create a new masterfile record"""
-    return masterfile_crud.create_masterfile(db, masterfile)
+    created = masterfile_crud.create_masterfile(db, masterfile)
+    return masterfile_with_rows(created, get_masterfile_rows(db, created))
+
+MASTERFILE_SORT_KEYS = ("id", "filename")
 
 @router.get("/", response_model=list[masterfile_schema.MasterFile])
-def get_masterfiles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all masterfiles with pagination"""
-    master_file = masterfile_crud.get_all_masterfiles(db, skip, limit)
-    print("i am here in masterfile printing the master db " , master_file)
-        # Print the actual data
-    for mf in master_file:
-        # columns = mf.file_data['columns']
-        print(f"ID: {mf.id}")
-        print(f"Company ID: {mf.company_id}")
-        print(f"Filename: {mf.filename}")
-        # print(f"File Data: {mf.file_data}")
-        # print(f"File Data Columns:  {mf.file_data['columns']}")
-        # print(f"File Data data: {mf.file_data['data']}")
-        df_construction = pd.DataFrame(mf.file_data['data'])
-        print(f"DataFrame Construction: {df_construction}")
-        print("---")
-    return master_file
+def get_masterfiles(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    sort: str = Query("id", description="id or filename"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Columns to return, e.g. id,location_id,filename"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get all masterfiles, one keyset page at a time (next page: ?cursor=<X-Next-Cursor>).
+    The sheet rows are only loaded when file_data is returned.
+    """
+    try:
+        columns = parse_fields(MasterFile, fields)
+        master_file, next_cursor = keyset_page(
+            db.query(MasterFile), sort, cursor, limit, order == "desc", columns, MASTERFILE_SORT_KEYS
+        )
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Rows of all listed files in one query
+    rows_by_file = get_rows_by_masterfile(db, master_file) if columns is None or "file_data" in columns else {}
+    if columns is None:
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [masterfile_with_rows(mf, rows_by_file[mf.id]) for mf in master_file]
+
+    projected = [dict(mf._mapping) for mf in master_file]
+    for mf in projected:
+        if mf["id"] in rows_by_file:
+            mf["file_data"] = {**(mf["file_data"] or {}), "data": rows_by_file[mf["id"]]}
+    return projected_response(projected, next_cursor)
 
 @router.get("/{masterfile_id}", response_model=masterfile_schema.MasterFile)
 def get_masterfile(masterfile_id: int, db: Session = Depends(get_db)):
@@ -421,7 +527,7 @@ def get_masterfile(masterfile_id: int, db: Session = Depends(get_db)):
     print("i am here in masterfile printing the master file" , masterfile)
     if not masterfile:
         raise HTTPException(status_code=404, detail="Masterfile not found")
-    return masterfile
+    return masterfile_with_rows(masterfile, get_masterfile_rows(db, masterfile))
 
 @router.get("/{masterfile_id}/items")
 def get_masterfile_items(masterfile_id: int, db: Session = Depends(get_db)):
@@ -429,7 +535,7 @@ def get_masterfile_items(masterfile_id: int, db: Session = Depends(get_db)):
     masterfile = masterfile_crud.get_masterfile(db, masterfile_id)
     if not masterfile:
         raise HTTPException(status_code=404, detail="Masterfile not found")
-    return masterfile.file_data
+    return {**masterfile.file_data, "data": get_masterfile_rows(db, masterfile)}
 
 @router.get("/company/{company_id}", response_model=list[masterfile_schema.MasterFile])
 def get_company_masterfiles(
@@ -439,7 +545,9 @@ def get_company_masterfiles(
     db: Session = Depends(get_db)
 ):
     """Get all masterfiles for a company"""
-    return masterfile_crud.get_masterfile_by_company(db, company_id, skip, limit)
+    masterfiles = masterfile_crud.get_masterfile_by_company(db, company_id, skip, limit)
+    rows_by_file = get_rows_by_masterfile(db, masterfiles)
+    return [masterfile_with_rows(mf, rows_by_file[mf.id]) for mf in masterfiles]
 
 @router.get("/company/{company_id}/filename/{filename}", response_model=masterfile_schema.MasterFile)
 def get_masterfile_by_filename(
@@ -451,7 +559,7 @@ def get_masterfile_by_filename(
     masterfile = masterfile_crud.get_masterfile_by_filename(db, company_id, filename)
     if not masterfile:
         raise HTTPException(status_code=404, detail="Masterfile not found")
-    return masterfile
+    return masterfile_with_rows(masterfile, get_masterfile_rows(db, masterfile))
 
 @router.put("/{masterfile_id}", response_model=masterfile_schema.MasterFile)
 def update_masterfile(masterfile_id: int, file_data: dict, db: Session = Depends(get_db)):
@@ -459,7 +567,7 @@ def update_masterfile(masterfile_id: int, file_data: dict, db: Session = Depends
     updated = masterfile_crud.update_masterfile(db, masterfile_id, file_data)
     if not updated:
         raise HTTPException(status_code=404, detail="Masterfile not found")
-    return updated
+    return masterfile_with_rows(updated, get_masterfile_rows(db, updated))
 
 @router.delete("/{masterfile_id}")
 def delete_masterfile(masterfile_id: int, db: Session = Depends(get_db)):
@@ -472,7 +580,9 @@ def delete_masterfile(masterfile_id: int, db: Session = Depends(get_db)):
 @router.post("/bulk", response_model=list[masterfile_schema.MasterFile])
 def bulk_create_masterfiles(masterfiles: list[masterfile_schema.MasterFileCreate], db: Session = Depends(get_db)):
     """Bulk create multiple masterfile records"""
-    return masterfile_crud.bulk_create_masterfile(db, masterfiles)
+    created = masterfile_crud.bulk_create_masterfile(db, masterfiles)
+    rows_by_file = get_rows_by_masterfile(db, created)
+    return [masterfile_with_rows(mf, rows_by_file[mf.id]) for mf in created]
 
 @router.get("/dataframe")
 def get_masterfiles_as_dataframe(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
@@ -484,11 +594,11 @@ def get_masterfiles_as_dataframe(skip: int = 0, limit: int = 100, db: Session =
     
     # Combine all masterfile data into a single DataFrame
     all_data = []
+    rows_by_file = get_rows_by_masterfile(db, masterfiles)
     for masterfile in masterfiles:
-        file_data = masterfile.file_data
-        if 'data' in file_data and file_data['data']:
+        if rows_by_file[masterfile.id]:
             # Add metadata columns to each row
-            for row in file_data['data']:
+            for row in rows_by_file[masterfile.id]:
                 row_with_metadata = row.copy()
                 row_with_metadata['masterfile_id'] = masterfile.id
                 row_with_metadata['filename'] = masterfile.filename
@@ -529,11 +639,12 @@ def get_single_masterfile_as_dataframe(masterfile_id: int, db: Session = Depends
         raise HTTPException(status_code=404, detail="Masterfile not found")
     
     file_data = masterfile.file_data
-    if 'data' not in file_data or not file_data['data']:
+    rows = get_masterfile_rows(db, masterfile)
+    if not rows:
         return {"message": "No data found in this masterfile", "data": []}
     
     # Create DataFrame from the data
-    df = pd.DataFrame(file_data['data'])
+    df = pd.DataFrame(rows)
     
     # Print DataFrame info
     print(f"Masterfile {masterfile_id} DataFrame Shape:", df.shape)
@@ -568,11 +679,12 @@ def get_specific_masterfile_dataframe(db: Session = Depends(get_db)):
     # Extract file_data
     file_data = masterfile.file_data
     
-    if 'data' not in file_data or not file_data['data']:
+    rows = get_masterfile_rows(db, masterfile)
+    if not rows:
         return {"message": "No data found in this masterfile", "data": []}
     
     # Create DataFrame from the data array
-    df = pd.DataFrame(file_data['data'])
+    df = pd.DataFrame(rows)
     
     # Print comprehensive DataFrame info to console
     print("=" * 60)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
 import base64
 import io
 import os
@@ -11,9 +13,12 @@ from sqlalchemy.orm import Session
 
 # Import from local modules
 from models_pydantic import DashboardResponse, SalesSplitPmixUploadRequest
-from pmix_dashboard.pmix_processor import process_pmix_file
+from pmix_dashboard.pmix_processor import process_pmix_file, pmix_dashboard_builders
 from models.sales_pmix import SalesPMix  # Import the SQLAlchemy model
 from database import get_db
+from utils.request_executor import run_blocking
+from utils.dashboard_executor import iter_dashboard_builders
+from utils.calendar_dim import trailing_week_window
 
 router = APIRouter(
     prefix="/api",
@@ -34,160 +39,278 @@ async def filter_pmix_data(
     Endpoint to filter previously processed PMIX data by date range and location from database.
     No authentication required.
     """
-    print("Received request for PMIX filter with data:", request)
-    try:
-        print(f"Processing PMIX filter request...")
-        
-        # Extract filter parameters
-        if hasattr(request, 'location') and request.location == "Multiple Locations":
-            location_filter = "All"
-        else:
-            raw_locations = request.locations
-            if raw_locations in [None, '', []] or not raw_locations:
-                location_filter = 'All'
-            elif isinstance(raw_locations, list):
-                # If it's already a list, use it directly (filter out empty strings)
-                location_filter = [loc.strip() for loc in raw_locations if loc and loc.strip()]
-                if not location_filter:  # If list becomes empty after filtering
-                    location_filter = 'All'
-            else:
-                # If it's a string, split by comma
-                location_filter = [loc.strip() for loc in raw_locations.split(',') if loc.strip()]
-                if not location_filter:  # If list becomes empty after filtering
-                    location_filter = 'All'
-        
-        
-                   # Convert all locations to lowercase if it's a list
-        if isinstance(location_filter, list):
-            location_filter = [loc.lower() for loc in location_filter]
-        elif isinstance(location_filter, str) and location_filter != 'All':
-            location_filter = location_filter.lower()
-            
-            
-        # FIXED: Convert dates to pandas datetime objects immediately
-        start_date_original = request.startDate if request.startDate else None
-        end_date_original = request.endDate if request.endDate else None
-        
-        # Convert to pandas datetime for consistent handling
-        start_date_pd = None
-        end_date_pd = None
-        
-        if start_date_original:
-            start_date_pd = pd.to_datetime(start_date_original)
-            print(f"Converted start_date to pandas datetime: {start_date_pd}")
-        
-        if end_date_original:
-            end_date_pd = pd.to_datetime(end_date_original)
-            print(f"Converted end_date to pandas datetime: {end_date_pd}")
-        
-        
-            # Add one day
-            # start_date_plus_one = start_date_pd + timedelta(days=1)
-            end_date_plus_one = end_date_pd + timedelta(days=1) if end_date_pd else None
-            print(f"End date plus one day: {end_date_plus_one}")
-            end_date_pd = end_date_plus_one if end_date_plus_one else None
-
-            days_to_add = 6 - end_date_pd.weekday()
-            end_date_pd = end_date_pd + pd.Timedelta(days=days_to_add)
-            print(f"end date end of the week: {end_date_pd}")
-            
-            # monday_this_week = end_date_pd - pd.Timedelta(days=end_date_pd.weekday())
+    return await run_blocking(request.company_id, _filter_pmix_data, request, db)
 
-            # start_date_pd = monday_this_week - pd.Timedelta(weeks=1)
-            
-                    
-            # Get the most recent after the end_date
-            # last_sunday = sunday_of_week - pd.Timedelta(days=(end_date_pd.weekday() + 1))
-
-            # Monday of that week
-            start_date_pd = end_date_pd - pd.Timedelta(days=91)
 
-            print(f"Start date pd: {start_date_pd} (Day: {start_date_pd.day}, Month: {start_date_pd.month})")
-            
-            
-        # Process server filter
-        raw_servers = request.servers
-        if raw_servers in [None, '', []] or not raw_servers:
-            server_filter = 'All'
-        elif isinstance(raw_servers, list):
-            # If it's already a list, use it directly (filter out empty strings)
-            server_filter = [srv.strip() for srv in raw_servers if srv and srv.strip()]
-            if not server_filter:  # If list becomes empty after filtering
-                server_filter = 'All'
-        else:
-            # If it's a string, split by comma
-            server_filter = [srv.strip() for srv in raw_servers.split(',') if srv.strip()]
-            if not server_filter:  # If list becomes empty after filtering
-                server_filter = 'All'
-        
-        # Process categories filter
-        raw_categories = request.categories
-        if raw_categories in [None, '', []] or not raw_categories:
-            category_filter = 'All'
-        elif isinstance(raw_categories, list):
+def _load_pmix_frame(request, db):
+    """
+    Parse the filters of a PMIX filter request and load the matching sales_pmix
+    rows into a DataFrame ready for the dashboard builders.
+    Returns (df, filters); df is None when no rows match.
+    """
+    # Extract filter parameters
+    if hasattr(request, 'location') and request.location == "Multiple Locations":
+        location_filter = "All"
+    else:
+        raw_locations = request.locations
+        if raw_locations in [None, '', []] or not raw_locations:
+            location_filter = 'All'
+        elif isinstance(raw_locations, list):
             # If it's already a list, use it directly (filter out empty strings)
-            category_filter = [cat.strip() for cat in raw_categories if cat and cat.strip()]
-            if not category_filter:  # If list becomes empty after filtering
-                category_filter = 'All'
+            location_filter = [loc.strip() for loc in raw_locations if loc and loc.strip()]
+            if not location_filter:  # If list becomes empty after filtering
+                location_filter = 'All'
         else:
             # If it's a string, split by comma
-            category_filter = [cat.strip() for cat in raw_categories.split(',') if cat.strip()]
-            if not category_filter:  # If list becomes empty after filtering
-                category_filter = 'All'
-        
-        print(f"Filters applied - Location: {location_filter} (type: {type(location_filter)}), Start: {start_date_pd}, End: {end_date_pd}, Server: {server_filter} (type: {type(server_filter)}), Categories: {category_filter} (type: {type(category_filter)})")
-        
-        # ===== QUERY DATABASE INSTEAD OF FILE =====
-        print("Querying database for PMIX data...")
-        
-        # Handle company_id
-        if not hasattr(request, 'company_id') or not request.company_id:
-            company_id = 1  # Default fallback
-            print(f"Warning: No company_id provided, using default: {company_id}")
-        else:
-            company_id = request.company_id
-        
-        print(f"Using company_id: {company_id}")
-        
-        # Build the base query
-        query = db.query(SalesPMix).filter(SalesPMix.company_id == company_id)
-        
-        # Apply date filters using pandas datetime objects
-        if start_date_pd is not None:
-            query = query.filter(SalesPMix.Sent_Date >= start_date_pd)
-            
-        if end_date_pd is not None:
-            end_datetime = end_date_pd + timedelta(days=1)  # Include end date
-            query = query.filter(SalesPMix.Sent_Date < end_datetime)
+            location_filter = [loc.strip() for loc in raw_locations.split(',') if loc.strip()]
+            if not location_filter:  # If list becomes empty after filtering
+                location_filter = 'All'
+    
+    
+               # Convert all locations to lowercase if it's a list
+    if isinstance(location_filter, list):
+        location_filter = [loc.lower() for loc in location_filter]
+    elif isinstance(location_filter, str) and location_filter != 'All':
+        location_filter = location_filter.lower()
         
-        print("Checking date filters - start_date_pd:", start_date_pd, "end_date_pd:", end_date_pd)
         
-        # Apply location filter
-        if location_filter != "All" and location_filter:
-            if isinstance(location_filter, list):
-                query = query.filter(SalesPMix.Location.in_(location_filter))
-            else:
-                query = query.filter(SalesPMix.Location == location_filter)
+    # FIXED: Convert dates to pandas datetime objects immediately
+    start_date_original = request.startDate if request.startDate else None
+    end_date_original = request.endDate if request.endDate else None
+    
+    # Convert to pandas datetime for consistent handling
+    start_date_pd = None
+    end_date_pd = None
+    
+    if start_date_original:
+        start_date_pd = pd.to_datetime(start_date_original)
+        print(f"Converted start_date to pandas datetime: {start_date_pd}")
+    
+    if end_date_original:
+        end_date_pd = pd.to_datetime(end_date_original)
+        print(f"Converted end_date to pandas datetime: {end_date_pd}")
+    
+    
+        # 13-week window ending on the Sunday after end_date (calendar dimension)
+        start_date_pd, end_date_pd = trailing_week_window(end_date_pd)
+        print(f"end date end of the week: {end_date_pd}")
+
+        print(f"Start date pd: {start_date_pd} (Day: {start_date_pd.day}, Month: {start_date_pd.month})")
         
-        # Apply server filter
-        if server_filter != "All" and server_filter:
-            if isinstance(server_filter, list):
-                query = query.filter(SalesPMix.Server.in_(server_filter))
-            else:
-                query = query.filter(SalesPMix.Server == server_filter)
         
-        # Apply category filter
-        if category_filter != "All" and category_filter:
-            if isinstance(category_filter, list):
-                query = query.filter(SalesPMix.Category.in_(category_filter))
-            else:
-                query = query.filter(SalesPMix.Category == category_filter)
+    # Process server filter
+    raw_servers = request.servers
+    if raw_servers in [None, '', []] or not raw_servers:
+        server_filter = 'All'
+    elif isinstance(raw_servers, list):
+        # If it's already a list, use it directly (filter out empty strings)
+        server_filter = [srv.strip() for srv in raw_servers if srv and srv.strip()]
+        if not server_filter:  # If list becomes empty after filtering
+            server_filter = 'All'
+    else:
+        # If it's a string, split by comma
+        server_filter = [srv.strip() for srv in raw_servers.split(',') if srv.strip()]
+        if not server_filter:  # If list becomes empty after filtering
+            server_filter = 'All'
+    
+    # Process categories filter
+    raw_categories = request.categories
+    if raw_categories in [None, '', []] or not raw_categories:
+        category_filter = 'All'
+    elif isinstance(raw_categories, list):
+        # If it's already a list, use it directly (filter out empty strings)
+        category_filter = [cat.strip() for cat in raw_categories if cat and cat.strip()]
+        if not category_filter:  # If list becomes empty after filtering
+            category_filter = 'All'
+    else:
+        # If it's a string, split by comma
+        category_filter = [cat.strip() for cat in raw_categories.split(',') if cat.strip()]
+        if not category_filter:  # If list becomes empty after filtering
+            category_filter = 'All'
+    
+    print(f"Filters applied - Location: {location_filter} (type: {type(location_filter)}), Start: {start_date_pd}, End: {end_date_pd}, Server: {server_filter} (type: {type(server_filter)}), Categories: {category_filter} (type: {type(category_filter)})")
+    
+    # ===== QUERY DATABASE INSTEAD OF FILE =====
+    print("Querying database for PMIX data...")
+    
+    # Handle company_id
+    if not hasattr(request, 'company_id') or not request.company_id:
+        company_id = 1  # Default fallback
+        print(f"Warning: No company_id provided, using default: {company_id}")
+    else:
+        company_id = request.company_id
+    
+    print(f"Using company_id: {company_id}")
+    
+    # Build the base query
+    query = db.query(SalesPMix).filter(SalesPMix.company_id == company_id)
+    
+    # Apply date filters using pandas datetime objects
+    if start_date_pd is not None:
+        query = query.filter(SalesPMix.Sent_Date >= start_date_pd)
         
-        # Execute query and get results
-        records = query.all()
-        print(f"Retrieved {len(records)} records from database")
+    if end_date_pd is not None:
+        end_datetime = end_date_pd + timedelta(days=1)  # Include end date
+        query = query.filter(SalesPMix.Sent_Date < end_datetime)
+    
+    print("Checking date filters - start_date_pd:", start_date_pd, "end_date_pd:", end_date_pd)
+    
+    # Apply location filter
+    if location_filter != "All" and location_filter:
+        if isinstance(location_filter, list):
+            query = query.filter(SalesPMix.Location.in_(location_filter))
+        else:
+            query = query.filter(SalesPMix.Location == location_filter)
+    
+    # Apply server filter
+    if server_filter != "All" and server_filter:
+        if isinstance(server_filter, list):
+            query = query.filter(SalesPMix.Server.in_(server_filter))
+        else:
+            query = query.filter(SalesPMix.Server == server_filter)
+    
+    # Apply category filter
+    if category_filter != "All" and category_filter:
+        if isinstance(category_filter, list):
+            query = query.filter(SalesPMix.Category.in_(category_filter))
+        else:
+            query = query.filter(SalesPMix.Category == category_filter)
+    
+    # Execute query and get results
+    records = query.all()
+    print(f"Retrieved {len(records)} records from database")
+    
+    if not records:
+        return None, None
+
+    # ===== CONVERT TO DATAFRAME =====
+    print("Converting database records to DataFrame...")
+    
+    # Convert SQLAlchemy objects to DataFrame
+    df_data = []
+    for record in records:
+        # Convert each record to dictionary
+        record_dict = {
+            'Location': record.Location,
+            'Order_Id': record.Order_Id,
+            'Order_number': record.Order_number,
+            'Sent_Date': record.Sent_Date,  # Keep as datetime
+            'Order_Date': record.Order_Date,
+            'Check_Id': record.Check_Id,
+            'Server': record.Server,
+            'Table': record.Table,
+            'Dining_Area': record.Dining_Area,
+            'Service': record.Service,
+            'Dining_Option': record.Dining_Option,
+            'Item_Selection_Id': record.Item_Selection_Id,
+            'Item_Id': record.Item_Id,
+            'Master_Id': record.Master_Id,
+            'SKU': record.SKU,
+            'PLU': record.PLU,
+            'Menu_Item': record.Menu_Item,
+            'Menu_Subgroups': record.Menu_Subgroups,
+            'Menu_Group': record.Menu_Group,
+            'Menu': record.Menu,
+            'Sales_Category': record.Sales_Category,
+            'Gross_Price': record.Gross_Price,
+            'Discount': record.Discount,
+            'Net_Price': record.Net_Price,
+            'Qty': record.Qty,
+            'Avg_Price': record.Avg_Price,
+            'Tax': record.Tax,
+            'Void': record.Void,
+            'Deferred': record.Deferred,
+            'Tax_Exempt': record.Tax_Exempt,
+            'Tax_Inclusion_Option': record.Tax_Inclusion_Option,
+            'Dining_Option_Tax': record.Dining_Option_Tax,
+            'Tab_Name': record.Tab_Name,
+            'Date': record.Date,
+            'Time': record.Time,
+            'Day': record.Day,
+            'Week': record.Week,
+            'Month': record.Month,
+            'Quarter': record.Quarter,
+            'Year': record.Year,
+            'Category': record.Category
+        }
+        df_data.append(record_dict)
+    
+    # Create DataFrame
+    df = pd.DataFrame(df_data)
+    print(f"Created DataFrame with shape: {df.shape}")
+    
+    # ===== FIX DATA TYPES - ENSURE ALL DATE COLUMNS ARE datetime64[ns] =====
+    print("Converting data types...")
+    
+    # Convert all date columns to datetime64[ns] consistently
+    date_columns = ['Sent_Date', 'Order_Date', 'Date']
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+            print(f"Converted {col} to datetime64[ns]: {df[col].dtype}")
+    
+    # CRITICAL FIX: Re-derive date/time columns from Sent_Date
+    if 'Sent_Date' in df.columns and not df['Sent_Date'].isna().all():
+        print("Re-deriving date/time columns from Sent_Date...")
+        
+        # Keep Date as datetime64[ns] (DO NOT convert to .dt.date)
+        df['Date'] = df['Sent_Date'].dt.normalize()  # This keeps it as datetime64[ns] but sets time to 00:00:00
+        
+        # Convert Time to string to avoid any datetime comparison issues
+        df['Time'] = df['Sent_Date'].dt.strftime('%H:%M:%S')
+        
+        # Re-derive other time components
+        df['Day'] = df['Sent_Date'].dt.day_name()
+        df['Week'] = df['Sent_Date'].dt.isocalendar().week
+        df['Month'] = df['Sent_Date'].dt.month_name()
+        df['Quarter'] = df['Sent_Date'].dt.quarter
+        df['Year'] = df['Sent_Date'].dt.year
+    
+    # Convert numeric columns to proper types
+    numeric_columns = ['Gross_Price', 'Net_Price', 'Qty', 'Avg_Price', 'Tax', 'Discount']
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    
+    # Convert boolean columns
+    boolean_columns = ['Void', 'Deferred', 'Tax_Exempt']
+    for col in boolean_columns:
+        if col in df.columns:
+            df[col] = df[col].astype(bool)
+    
+    # Convert integer columns
+    integer_columns = ['Order_Id', 'Order_number', 'Check_Id', 'Item_Selection_Id', 
+                      'Item_Id', 'Master_Id', 'Week', 'Quarter', 'Year']
+    for col in integer_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('Int64')
+    
+    print("Data type conversion completed")
+    print(f"DataFrame dtypes verified:")
+    for col in ['Sent_Date', 'Date', 'Order_Date']:
+        if col in df.columns:
+            print(f"  {col}: {df[col].dtype}")
+    
+    filters = {
+        "company_id": company_id,
+        "location_filter": location_filter,
+        "server_filter": server_filter,
+        "category_filter": category_filter,
+        "start_date": start_date_original,
+        "end_date": end_date_original,
+        "record_count": len(records),
+    }
+    return df, filters
+
+
+def _filter_pmix_data(request, db):
+    print("Received request for PMIX filter with data:", request)
+    try:
+        print(f"Processing PMIX filter request...")
         
-        if not records:
+        df, filters = _load_pmix_frame(request, db)
+
+        if df is None:
             print("No records found with applied filters")
             # Return empty dashboard structure
             empty_dashboard = {
@@ -213,115 +336,15 @@ async def filter_pmix_data(
                 "data": "No data found with the applied filters."
             }
             return empty_dashboard
-        
-        # ===== CONVERT TO DATAFRAME =====
-        print("Converting database records to DataFrame...")
-        
-        # Convert SQLAlchemy objects to DataFrame
-        df_data = []
-        for record in records:
-            # Convert each record to dictionary
-            record_dict = {
-                'Location': record.Location,
-                'Order_Id': record.Order_Id,
-                'Order_number': record.Order_number,
-                'Sent_Date': record.Sent_Date,  # Keep as datetime
-                'Order_Date': record.Order_Date,
-                'Check_Id': record.Check_Id,
-                'Server': record.Server,
-                'Table': record.Table,
-                'Dining_Area': record.Dining_Area,
-                'Service': record.Service,
-                'Dining_Option': record.Dining_Option,
-                'Item_Selection_Id': record.Item_Selection_Id,
-                'Item_Id': record.Item_Id,
-                'Master_Id': record.Master_Id,
-                'SKU': record.SKU,
-                'PLU': record.PLU,
-                'Menu_Item': record.Menu_Item,
-                'Menu_Subgroups': record.Menu_Subgroups,
-                'Menu_Group': record.Menu_Group,
-                'Menu': record.Menu,
-                'Sales_Category': record.Sales_Category,
-                'Gross_Price': record.Gross_Price,
-                'Discount': record.Discount,
-                'Net_Price': record.Net_Price,
-                'Qty': record.Qty,
-                'Avg_Price': record.Avg_Price,
-                'Tax': record.Tax,
-                'Void': record.Void,
-                'Deferred': record.Deferred,
-                'Tax_Exempt': record.Tax_Exempt,
-                'Tax_Inclusion_Option': record.Tax_Inclusion_Option,
-                'Dining_Option_Tax': record.Dining_Option_Tax,
-                'Tab_Name': record.Tab_Name,
-                'Date': record.Date,
-                'Time': record.Time,
-                'Day': record.Day,
-                'Week': record.Week,
-                'Month': record.Month,
-                'Quarter': record.Quarter,
-                'Year': record.Year,
-                'Category': record.Category
-            }
-            df_data.append(record_dict)
-        
-        # Create DataFrame
-        df = pd.DataFrame(df_data)
-        print(f"Created DataFrame with shape: {df.shape}")
-        
-        # ===== FIX DATA TYPES - ENSURE ALL DATE COLUMNS ARE datetime64[ns] =====
-        print("Converting data types...")
-        
-        # Convert all date columns to datetime64[ns] consistently
-        date_columns = ['Sent_Date', 'Order_Date', 'Date']
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                print(f"Converted {col} to datetime64[ns]: {df[col].dtype}")
-        
-        # CRITICAL FIX: Re-derive date/time columns from Sent_Date
-        if 'Sent_Date' in df.columns and not df['Sent_Date'].isna().all():
-            print("Re-deriving date/time columns from Sent_Date...")
-            
-            # Keep Date as datetime64[ns] (DO NOT convert to .dt.date)
-            df['Date'] = df['Sent_Date'].dt.normalize()  # This keeps it as datetime64[ns] but sets time to 00:00:00
-            
-            # Convert Time to string to avoid any datetime comparison issues
-            df['Time'] = df['Sent_Date'].dt.strftime('%H:%M:%S')
-            
-            # Re-derive other time components
-            df['Day'] = df['Sent_Date'].dt.day_name()
-            df['Week'] = df['Sent_Date'].dt.isocalendar().week
-            df['Month'] = df['Sent_Date'].dt.month_name()
-            df['Quarter'] = df['Sent_Date'].dt.quarter
-            df['Year'] = df['Sent_Date'].dt.year
-        
-        # Convert numeric columns to proper types
-        numeric_columns = ['Gross_Price', 'Net_Price', 'Qty', 'Avg_Price', 'Tax', 'Discount']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
-        # Convert boolean columns
-        boolean_columns = ['Void', 'Deferred', 'Tax_Exempt']
-        for col in boolean_columns:
-            if col in df.columns:
-                df[col] = df[col].astype(bool)
-        
-        # Convert integer columns
-        integer_columns = ['Order_Id', 'Order_number', 'Check_Id', 'Item_Selection_Id', 
-                          'Item_Id', 'Master_Id', 'Week', 'Quarter', 'Year']
-        for col in integer_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('Int64')
-        
-        print("Data type conversion completed")
-        print(f"DataFrame dtypes verified:")
-        for col in ['Sent_Date', 'Date', 'Order_Date']:
-            if col in df.columns:
-                print(f"  {col}: {df[col].dtype}")
-        
+
+        company_id = filters["company_id"]
+        location_filter = filters["location_filter"]
+        server_filter = filters["server_filter"]
+        category_filter = filters["category_filter"]
+        start_date_original = filters["start_date"]
+        end_date_original = filters["end_date"]
+        record_count = filters["record_count"]
+
         # ===== PROCESS THE DATA =====
         print("Processing data for PMIX dashboard...")
         print(f"DataFrame columns: {list(df.columns)}")
@@ -438,10 +461,10 @@ async def filter_pmix_data(
             "dateRanges": [],
             "fileName": "Database Query",  # Changed from request.fileName
             "dashboardName": "Product Mix",
-            "data": f"Product Mix Dashboard processed from database with {len(records)} records."
+            "data": f"Product Mix Dashboard processed from database with {record_count} records."
         }
         
-        print(f"Successfully processed PMIX Dashboard with {len(records)} records")
+        print(f"Successfully processed PMIX Dashboard with {record_count} records")
         return pmix_dashboard
     
     except Exception as e:
@@ -461,4 +484,164 @@ async def filter_pmix_data(
             error_message = f"Data structure error. Please check if the database contains properly formatted PMIX data."
         
         # Raise HTTP exception
-        raise HTTPException(status_code=500, detail=f"Error processing PMIX filter: {error_message}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing PMIX filter: {error_message}")
+
+# Streaming endpoint
+@router.post("/pmix/filter/stream")
+async def stream_pmix_data(
+    request: SalesSplitPmixUploadRequest = Body(...),
+    format: str = "ndjson",
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming variant of /pmix/filter. Every table is sent as soon as its builder
+    finishes, as NDJSON lines (format=ndjson) or Server-Sent Events (format=sse).
+
+    Events, each {"event": ..., "data": {...}}:
+    - kpis: headline values (net_sales, orders, qty_sold, average_order_value, ...)
+    - meta: locations, servers, categories, fileName, dashboardName, data
+    - tables: one or more DashboardResponse tables, e.g. {"table2": [...]}
+    - done / error
+    Merging the "meta" and "tables" data gives the /pmix/filter response.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    try:
+        df, filters = await run_blocking(request.company_id, _load_pmix_frame, request, db)
+    except Exception as e:
+        print(f"Error loading PMIX data for stream: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error processing PMIX filter: {str(e)}")
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(_encode_events(_iter_pmix_events(df, filters), format), media_type=media_type)
+
+
+def _encode_events(events, format):
+    for event, data in events:
+        if format == "sse":
+            yield b"event: " + event.encode() + b"\ndata: " + to_json(data) + b"\n\n"
+        else:
+            yield to_json({"event": event, "data": data}) + b"\n"
+
+
+def _iter_pmix_events(df, filters):
+    """Run the PMIX builders and yield (event, data) pairs, headline KPIs first."""
+    if df is None:
+        yield "meta", {
+            "locations": [],
+            "servers": [],
+            "categories": [],
+            "dateRanges": [],
+            "fileName": "Database Query",
+            "dashboardName": "Product Mix",
+            "data": "No data found with the applied filters."
+        }
+        yield "done", {"records": 0}
+        return
+
+    try:
+        # Date becomes python date objects
+        df['Date'] = df['Sent_Date'].dt.date
+        builders = pmix_dashboard_builders(
+            df,
+            location_filter=filters["location_filter"],
+            start_date=filters["start_date"],
+            end_date=filters["end_date"],
+            server_filter=filters["server_filter"],
+            category_filter=filters["category_filter"]
+        )
+
+        results = {}
+        waiting = []
+        for name, result in iter_dashboard_builders(builders):
+            results[name] = result
+            if "overview" not in results:
+                # Hold tables back until the headline values have been sent
+                waiting.append(name)
+                continue
+
+            if name == "overview":
+                p1 = result
+                yield "kpis", {
+                    "net_sales": float(p1['net_sales']),
+                    "orders": int(p1['orders']),
+                    "qty_sold": int(p1['qty_sold']),
+                    "average_order_value": float(p1['avg_orders_value_correct']),
+                    "net_sales_change": float(p1['net_sales_change']),
+                    "orders_change": int(p1['orders_change']),
+                    "qty_sold_change": int(p1['qty_sold_change']),
+                    "average_order_value_change": float(p1['avg_orders_value_change_correct']),
+                }
+                yield "meta", {
+                    "locations": df["Location"].unique().tolist(),
+                    "servers": df["Server"].unique().tolist(),
+                    "categories": df["Category"].unique().tolist(),
+                    "dateRanges": [],
+                    "fileName": "Database Query",
+                    "dashboardName": "Product Mix",
+                    "data": f"Product Mix Dashboard processed from database with {filters['record_count']} records."
+                }
+
+            for ready in [name] + waiting:
+                yield "tables", _pmix_tables(ready, results)
+            waiting = []
+
+        yield "done", {"records": filters["record_count"]}
+
+    except Exception as e:
+        print(f"Error streaming PMIX dashboard: {str(e)}")
+        print(traceback.format_exc())
+        yield "error", {"detail": f"Error processing PMIX dashboard data: {str(e)}"}
+
+
+def _pmix_tables(name, results):
+    """DashboardResponse tables that can be built once builder `name` is done."""
+    result = results[name]
+    if name == "overview":
+        tables = {
+            "table2": result['sales_by_category'].to_dict(orient='records'),
+            "table3": result['sales_by_menu_group'].to_dict(orient='records'),
+            "table4": result['sales_by_server'].to_dict(orient='records'),
+            "table5": result['top_selling_items'].to_dict(orient='records'),
+        }
+    elif name == "detailed_analysis":
+        tables = {
+            "table6": result['sales_by_location'].to_dict(orient='records'),
+            "table7": result['average_price_by_item'].to_dict(orient='records'),
+            "table8": result['price_changes'].to_dict(orient='records'),
+            "table9": result['top_items'].to_dict(orient='records'),
+        }
+    elif name == "sales_by_category":
+        tables = {
+            "table10": result['sales_by_category_table'].to_dict(orient='records'),
+            "table13": result['sales_by_category_by_day_table'].to_dict(orient='records'),
+        }
+    elif name == "category_comparison":
+        tables = {"table11": result['category_comparison_table'].to_dict(orient='records')}
+    else:
+        tables = {"table12": result.to_dict(orient='records')}
+
+    # table1 mixes overview and detailed analysis values
+    if name in ("overview", "detailed_analysis") and "overview" in results and "detailed_analysis" in results:
+        p1 = results["overview"]
+        p2 = results["detailed_analysis"]
+        tables["table1"] = [{
+            "net_sales": [float(p1['net_sales'])],
+            "orders": [int(p1['orders'])],
+            "qty_sold": [int(p1['qty_sold'])],
+            "average_order_value": [float(p1['avg_orders_value_correct'])],
+            "average_items_per_order": [float(p2['average_items_per_order'])],
+            "unique_orders": [int(p2['unique_orders'])],
+            "total_quantity": [int(p2['total_quantity'])],
+
+            "net_sales_change": [float(p1['net_sales_change'])],
+            "orders_change": [int(p1['orders_change'])],
+            "qty_sold_change": [int(p1['qty_sold_change'])],
+            "average_order_value_change": [float(p1['avg_orders_value_change_correct'])],
+            "average_items_per_order_change": [float(p2['average_items_per_order_change'])],
+            "unique_orders_change": [int(p2['unique_orders_change'])],
+            "total_quantity_change": [int(p2['total_quantity_change'])]
+        }]
+    return tables
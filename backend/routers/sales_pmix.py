@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from crud import sales_pmix as sales_pmix_crud
@@ -6,6 +6,11 @@ from schemas import sales_pmix as sales_pmix_schema
 from database import get_db
 from dependencies.auth import get_current_active_user
 from models.users import User
+from utils.pagination import paginate
+from crud.companies import get_company_by_name
+from tasks.delete_jobs import queue_bulk_delete
+from crud.sales_pmix_partitions import delete_sales_pmix_month
+from datetime import date
 
 router = APIRouter(
     prefix="/salespmix",
@@ -22,10 +27,16 @@ router = APIRouter(
 #     """Create a new sales pmix record"""
 #     return sales_pmix_crud.create_sales_pmix(db, sales_pmix)
 
+SALES_PMIX_SORT_KEYS = ("id", "Sent_Date")
+
 @router.get("/", response_model=List[sales_pmix_schema.SalesPMix])
 def get_sales_pmix_records(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    response: Response,
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    sort: str = Query("id", description="id or Sent_Date"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Columns to return, e.g. id,Location,Sent_Date,Menu_Item,Qty,Net_Price"),
     company_id: Optional[int] = Query(None, description="Filter by company ID"),
     location: Optional[str] = Query(None, description="Filter by location"),
     file_name: Optional[str] = Query(None, description="Filter by file name"),
@@ -33,16 +44,15 @@ def get_sales_pmix_records(
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
-    """Get sales pmix records with optional filtering"""
-    return sales_pmix_crud.get_sales_pmix_records(
+    """Get sales pmix records with optional filtering, one keyset page at a time (next page: ?cursor=<X-Next-Cursor>)"""
+    query = sales_pmix_crud.sales_pmix_records_query(
         db=db, 
-        skip=skip, 
-        limit=limit, 
         company_id=company_id,
         location=location,
         file_name=file_name,
         dashboard=dashboard
     )
+    return paginate(response, query, sort, cursor, limit, order, fields, SALES_PMIX_SORT_KEYS)
 
 @router.get("/{record_id}", response_model=sales_pmix_schema.SalesPMix)
 def get_sales_pmix_record(
@@ -87,8 +97,10 @@ def delete_sales_pmix_record(
 
 @router.delete("/bulk/all")
 def delete_all_sales_pmix_records(
+    response: Response,
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -99,6 +111,9 @@ def delete_all_sales_pmix_records(
             detail="You must set confirm=true to delete all records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "sales_pmix", {"company_id": company_id or None})
+
     deleted_count = sales_pmix_crud.delete_all_sales_pmix_records(db, company_id)
     
     if company_id:
@@ -115,9 +130,11 @@ def delete_all_sales_pmix_records(
 
 @router.delete("/bulk/by-dashboard")
 def delete_sales_pmix_by_dashboard(
+    response: Response,
     dashboard: int = Query(..., description="Dashboard ID to delete records for"),
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -128,6 +145,9 @@ def delete_sales_pmix_by_dashboard(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "sales_pmix", {"dashboard": dashboard, "company_id": company_id or None})
+
     deleted_count = sales_pmix_crud.delete_sales_pmix_by_dashboard(db, dashboard, company_id)
     
     return {
@@ -138,11 +158,40 @@ def delete_sales_pmix_by_dashboard(
         "company_id": company_id
     }
 
+@router.delete("/bulk/by-month")
+def delete_sales_pmix_by_month(
+    year: int = Query(..., ge=2000, le=2100, description="Year of the month to delete"),
+    month: int = Query(..., ge=1, le=12, description="Month to delete (1-12), by Sent_Date"),
+    company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
+    confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    db: Session = Depends(get_db),
+    # current_user: User = Depends(get_current_active_user)
+):
+    """Delete all sales pmix records of one month (drops the month's partition on a partitioned table)"""
+    if not confirm:
+        raise HTTPException(
+            status_code=400, 
+            detail="You must set confirm=true to delete records. This action cannot be undone."
+        )
+
+    result = delete_sales_pmix_month(db, date(year, month, 1), company_id)
+
+    return {
+        "detail": f"Successfully deleted {result['deleted_count']} Sales PMix records for {year}-{month:02d}" + 
+                 (f" and company {company_id}" if company_id else ""),
+        "deleted_count": result["deleted_count"],
+        "month": result["month"],
+        "dropped_partition": result["dropped_partition"],
+        "company_id": company_id
+    }
+
 @router.delete("/bulk/by-filename")
 def delete_sales_pmix_by_filename(
+    response: Response,
     file_name: str = Query(..., description="File name to delete records for"),
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -153,6 +202,9 @@ def delete_sales_pmix_by_filename(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "sales_pmix", {"file_name": file_name, "company_id": company_id or None})
+
     deleted_count = sales_pmix_crud.delete_sales_pmix_by_filename(db, file_name, company_id)
     
     return {
@@ -165,9 +217,11 @@ def delete_sales_pmix_by_filename(
 
 @router.delete("/bulk/by-location")
 def delete_sales_pmix_by_location(
+    response: Response,
     location: str = Query(..., description="Location to delete records for"),
     company_id: Optional[int] = Query(None, description="If provided, delete only records for this company"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -178,6 +232,9 @@ def delete_sales_pmix_by_location(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        return queue_bulk_delete(db, response, "sales_pmix", {"Location": location, "company_id": company_id or None})
+
     deleted_count = sales_pmix_crud.delete_sales_pmix_by_location(db, location, company_id)
     
     return {
@@ -192,9 +249,11 @@ def delete_sales_pmix_by_location(
 # Add this new delete endpoint:
 @router.delete("/bulk/by-location-and-company")
 def delete_sales_pmix_by_location_and_company(
+    response: Response,
     location: str = Query(..., description="Location name to delete records for"),
     company_name: str = Query(..., description="Company name to delete records for"),
     confirm: bool = Query(False, description="Must be set to true to confirm deletion"),
+    background: bool = Query(False, description="Delete in a background job and return its id (poll /api/delete/jobs/{job_id})"),
     db: Session = Depends(get_db),
     # current_user: User = Depends(get_current_active_user)
 ):
@@ -205,6 +264,12 @@ def delete_sales_pmix_by_location_and_company(
             detail="You must set confirm=true to delete records. This action cannot be undone."
         )
     
+    if background:
+        company = get_company_by_name(db, company_name)
+        if not company:
+            raise HTTPException(status_code=404, detail=f"Company '{company_name}' not found")
+        return queue_bulk_delete(db, response, "sales_pmix", {"Location": location, "company_id": company.id})
+
     result = sales_pmix_crud.delete_sales_pmix_by_location_and_company(db, location, company_name)
     
     if result["company_id"] is None:
@@ -17,6 +17,7 @@ from financials_dashboard.financials_processor import process_financials_file
 from sales_split_dashboard.sales_split_prcoessor import process_sales_split_file as process_sales_split_data  # Changed to process_sales_split_data
 from models.sales_pmix import SalesPMix  # Import the SQLAlchemy model
 from database import get_db
+from utils.request_executor import run_blocking
 from schemas import users as user_schema
 from dependencies.auth import get_current_user
 
@@ -42,6 +43,10 @@ async def filter_excel_data(
     Endpoint to filter previously processed Excel data by date range and location from database.
     No authentication required.
     """
+    return await run_blocking(request.company_id, _filter_excel_data, request, db, current_user)
+
+
+def _filter_excel_data(request, db, current_user):
     print(f"Received filter request: {request}")
     try:
         print(f"Processing filter request...")
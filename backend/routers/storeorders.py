@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from models.locations import Store
 from models.companies import Company
 from crud import storeorders as storeorders_crud
+from crud import storeorder_lines as storeorder_lines_crud
 from schemas import storeorders as storeorders_schema
 from database import get_db
 from crud.locations import get_store
@@ -18,11 +19,15 @@ from models.users import User
 from dependencies.auth import get_current_active_user
 from fastapi import BackgroundTasks
 from utils.email import send_order_confirmation_email, send_production
+from utils.production_cache import get_production_matrix, record_order_write
 from crud.users import get_user 
 from fastapi import Query
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from models.mails import Mail  # Add this import for the Mail model
+from models.storeorders import StoreOrders
+from fastapi import Response
+from utils.pagination import paginate
 from typing import Optional, List, Dict, Any
 
 
@@ -264,6 +269,7 @@ def update_storeorders_location(
     # Update the location_id to the new value
     storeorders.location_id = new_location_id
     storeorders.updated_at = datetime.utcnow()
+    storeorder_lines_crud.sync_storeorder_lines(db, storeorders)
     db.commit()
     db.refresh(storeorders)
     return storeorders
@@ -301,25 +307,26 @@ def update_storeorders_items(
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Error updating store orders: {str(e)}")
 
+STOREORDERS_SORT_KEYS = ("id", "created_at", "updated_at", "effective_date")
+
 @router.post("/", response_model=storeorders_schema.StoreOrders)
 def create_storeorders(storeorders: storeorders_schema.StoreOrdersCreate, db: Session = Depends(get_db)):
     """Create a new store orders record"""
     return storeorders_crud.create_storeorders(db, storeorders)
 
 @router.get("/", response_model=list[storeorders_schema.StoreOrders])
-def get_storeorders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all store orders with pagination"""
-    storeorders = storeorders_crud.get_all_storeorders(db, skip, limit)
-    print("Store orders fetched:", len(storeorders))
-    
-    # Print the actual data
-    for order in storeorders:
-        print(f"ID: {order.id}")
-        print(f"Company ID: {order.company_id}")
-        print(f"Location ID: {order.location_id}")
-        print(f"Items Ordered: {order.items_ordered}")
-        print("---")
-    return storeorders
+def get_storeorders(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    sort: str = Query("id", description="id, created_at, updated_at or effective_date"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Columns to return, e.g. id,location_id,created_at"),
+    db: Session = Depends(get_db)
+):
+    """Get all store orders, one keyset page at a time (next page: ?cursor=<X-Next-Cursor>)"""
+    return paginate(response, db.query(StoreOrders), sort, cursor, limit, order, fields,
+                    STOREORDERS_SORT_KEYS)
 
 @router.get("/{storeorders_id}", response_model=storeorders_schema.StoreOrders)
 def get_storeorders_by_id(storeorders_id: int, db: Session = Depends(get_db)):
@@ -504,6 +511,7 @@ def create_new_order_items(
 
         print(f"Creating new store items ordered with data: {items_ordered_data}")
         new_order = storeorders_crud.create_storeorders(db, create_obj)
+        record_order_write(db, new_order)
 
         # Modified: Send production requirements email instead of order confirmation
         if request.email_order:
@@ -844,10 +852,12 @@ def update_storeorders_by_id(
         else:
             updated_at_date = datetime.utcnow()
         # Update by order ID (this will automatically move current to prev and set new items)
+        previous_date = existing_order.effective_date
         updated_storeorders = storeorders_crud.update_storeorders(db, request.order_id, update_obj, updated_at_date=updated_at_date)
 
         if not updated_storeorders:
             raise HTTPException(status_code=500, detail="Failed to update store order")
+        record_order_write(db, updated_storeorders, previous_date)
             
         print("Successfully updated store order in database")
         print(f"New items_ordered: {updated_storeorders.items_ordered}")
@@ -944,26 +954,15 @@ def get_avg_daily_orders(
     
     
     try:
-        # FIXED: Use get_storeorders_by_location() to get ALL orders, not just the latest one
-        storeorders = storeorders_crud.get_storeorders_by_location(db, location_id)
-        
-        # Filter by company_id since get_storeorders_by_location doesn't filter by company
-        storeorders = [order for order in storeorders if order.company_id == company_id]
-        
-                
-        # Apply date filtering if start_date and end_date are provided
-        if start_date and end_date:
-            try:
-                start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                print("Filtering store orders between dates:", start, end)
-                storeorders = [
-                    order for order in storeorders
-                    if (order.updated_at or order.created_at)
-                    and start <= (order.updated_at or order.created_at).date() <= end
-                ]
-            except ValueError:
-                return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
+        # All orders of the location in the date range (if given), in one query
+        try:
+            storeorders = storeorders_crud.get_storeorders_filtered(
+                db, company_id, [location_id],
+                start_date if start_date and end_date else None,
+                end_date if start_date and end_date else None
+            )
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
         
         if not storeorders:
             return {
@@ -1001,20 +1000,13 @@ def get_avg_daily_orders(
             avg_daily_orders = 0
             date_range = None
         
-        # Aggregate items ordered
-        item_counts = {}
-        for order in storeorders:
-            if order.items_ordered and 'items' in order.items_ordered:
-                items_ordered = order.items_ordered.get('items', [])
-                for item in items_ordered:
-                    # Handle different possible item structure
-                    item_name = item.get('name') or item.get('product') or item.get('item_name', 'Unknown')
-                    item_quantity = item.get('quantity', 1)
-                    
-                    if item_name in item_counts:
-                        item_counts[item_name] += item_quantity
-                    else:
-                        item_counts[item_name] = item_quantity
+        # Aggregate items ordered (items without a quantity count once)
+        item_counts = storeorder_lines_crud.get_item_quantities(
+            db, company_id, [location_id],
+            start_date if start_date and end_date else None,
+            end_date if start_date and end_date else None,
+            missing_quantity=1
+        )
         
         # Get top 2 items ordered
         top_items = sorted(item_counts.items(), key=lambda x: x[1], reverse=True)[:2]
@@ -1062,25 +1054,15 @@ def get_analytics_dashboard(
     print(f"Fetching analytics dashboard for company {company_id} and locations {location_id_list} with date range {start_date} to {end_date}")
 
     try:
-        # 1. Get all storeorders for all location_ids
-        storeorders = []
-        for loc_id in location_id_list:
-            orders = storeorders_crud.get_all_storeorders_by_company_and_location(db, company_id, loc_id)
-            storeorders.extend(orders or [])
-
-        # 2. Date filtering
-        if start_date and end_date:
-            try:
-                start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                print("Filtering store orders between dates:", start, end)
-                storeorders = [
-                    order for order in storeorders
-                    if (order.updated_at or order.created_at)
-                    and start <= (order.updated_at or order.created_at).date() <= end
-                ]
-            except ValueError:
-                return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
+        # 1. Get the storeorders of all location_ids in the date range (if given)
+        try:
+            storeorders = storeorders_crud.get_storeorders_filtered(
+                db, company_id, location_id_list,
+                start_date if start_date and end_date else None,
+                end_date if start_date and end_date else None
+            )
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
 
         if not storeorders:
             return {
@@ -1098,14 +1080,16 @@ def get_analytics_dashboard(
         total_orders = len(storeorders)
         total_sales = 0.0
 
+        order_totals = storeorder_lines_crud.get_order_totals(
+            db, company_id, location_id_list,
+            start_date if start_date and end_date else None,
+            end_date if start_date and end_date else None
+        )
+
         rows = []
         for order in storeorders:
             created_date = order.created_at.date()
-            order_sales = 0.0
-            if order.items_ordered and "items" in order.items_ordered:
-                for item in order.items_ordered["items"]:
-                    total_price = item.get("total_price", 0)
-                    order_sales += float(total_price)
+            order_sales = order_totals.get(order.id, {}).get("total_amount", 0.0)
             total_sales += order_sales
             rows.append({"created_at": created_date, "order_sales": order_sales})
 
@@ -1211,46 +1195,36 @@ def get_analytics_dashboard(
                 "total": 0
                 }
 
-        # Get orders for all locations
-        storeorders = []
-        for loc_id in location_id_list:
-            orders = storeorders_crud.get_recent_storeorders_by_company_and_location(db, company_id, loc_id, limit="all")
-            if isinstance(orders, list):
-                storeorders.extend(orders)
-            elif orders:
-                storeorders.append(orders)
-
-        if startDate and endDate:
-            try:
-                start = datetime.strptime(startDate, "%Y-%m-%d").date()
-                end = datetime.strptime(endDate, "%Y-%m-%d").date()
-                storeorders = [
-                    order for order in storeorders
-                    if (order.updated_at or order.created_at)
-                    and start <= (order.updated_at or order.created_at).date() <= end
-                ]
-            except ValueError:
-                return {"message": "Invalid date format. Use YYYY-MM-DD", 
-                        "data": fallback_row,
-                        "total": 0
-                        }
+        # Get orders for all locations, newest first
+        try:
+            storeorders = storeorders_crud.get_storeorders_filtered(
+                db, company_id, location_id_list,
+                startDate if startDate and endDate else None,
+                endDate if startDate and endDate else None
+            )
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD", 
+                    "data": fallback_row,
+                    "total": 0
+                    }
+
+        order_totals = storeorder_lines_crud.get_order_totals(
+            db, company_id, location_id_list,
+            startDate if startDate and endDate else None,
+            endDate if startDate and endDate else None
+        )
 
         total_sales = 0.0
         rows = []
         for order in storeorders:
             the_date = order.updated_at if order.updated_at else order.created_at
             created_date = the_date
-            total_amount = 0.0
-            total_quantity = 0.0
+            totals = order_totals.get(order.id, {})
+            total_amount = totals.get("total_amount", 0.0)
+            total_quantity = totals.get("total_quantity", 0.0)
 
             if order.items_ordered:
-                items = order.items_ordered.get("items", [])
-                for item in items:
-                    total_price = item.get("total_price", 0) or 0
-                    quantity = item.get("quantity", 0) or 0
-                    total_amount += float(total_price)
-                    total_quantity += float(quantity)
-                items_count = order.items_ordered.get("total_items", len(items))
+                items_count = order.items_ordered.get("total_items", totals.get("line_count", 0))
             else:
                 items_count = 0
 
@@ -1285,29 +1259,33 @@ def get_consolidated_production(company_id: int,
                                 endDate: str = Query(None),
                                 db: Session = Depends(get_db)):
     try:
-        storeorders = storeorders_crud.get_storeorders_by_company(db, company_id)
-        
-        
-        if not storeorders:
-            return {"message": "No store orders found for this company", "data": []}
-
         # Apply date filtering if startDate and endDate are provided
+        start = end = None
         if startDate and endDate:
             try:
                 start = datetime.strptime(startDate, "%Y-%m-%d").date()
                 end = datetime.strptime(endDate, "%Y-%m-%d").date()
                 print("Filtering store orders between dates:", start, end)
-                storeorders = [
-                    order for order in storeorders
-                    if (order.updated_at or order.created_at)
-                    and start <= (order.updated_at or order.created_at).date() <= end
-                ]
             except ValueError:
                 return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
-        
-        
+
+        # A single day is served from the shared production cache
+        if start and start == end:
+            production = get_production_matrix(db, company_id, start)
+            if not production["data"]:
+                return {"message": "No store orders found for this company", "data": []}
+            return {
+                "message": "Consolidated production table generated successfully",
+                "columns": production["columns"],
+                "data": production["data"]
+            }
+
+        item_rows = storeorder_lines_crud.get_item_location_quantities(db, company_id, None, start, end)
+        if not item_rows:
+            return {"message": "No store orders found for this company", "data": []}
+
         # Get all unique locations
-        location_ids = list(set(order.location_id for order in storeorders if order.location_id))
+        location_ids = list(set(row[1] for row in item_rows if row[1]))
         locations = db.query(Store).filter(Store.id.in_(location_ids)).all()
         location_lookup = {loc.id: loc.name for loc in locations}
 
@@ -1315,17 +1293,10 @@ def get_consolidated_production(company_id: int,
         item_data = defaultdict(lambda: defaultdict(int))  # item_data[item_name][location_name] = quantity
         item_units = {}  # item_data[item_name] = unit
 
-        for order in storeorders:
-            location_name = location_lookup.get(order.location_id, f"Location {order.location_id}")
-            if not order.items_ordered or "items" not in order.items_ordered:
-                continue
-
-            for item in order.items_ordered["items"]:
-                name = item.get("name")
-                quantity = item.get("quantity", 0)
-                unit = item.get("unit", "")
-                item_data[name][location_name] += quantity
-                item_units[name] = unit
+        for name, location_id, quantity, unit in item_rows:
+            location_name = location_lookup.get(location_id, f"Location {location_id}")
+            item_data[name][location_name] += quantity
+            item_units[name] = unit or ""
 
         # Format final table rows
         all_location_names = sorted(location_lookup.values())
@@ -1364,25 +1335,15 @@ def get_financial_summary(
         # Step 1: Convert comma-separated location_ids to a list of ints
         location_id_list = [int(loc.strip()) for loc in location_ids.split(",") if loc.strip().isdigit()]
 
-        all_storeorders = []
-
-        for location_id in location_id_list:
-            orders = storeorders_crud.get_all_storeorders_by_company_and_location(db, company_id, location_id)
-            if orders:
-                all_storeorders.extend(orders)
-
-        # Step 2: Filter by date range
-        if start_date and end_date:
-            try:
-                start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                all_storeorders = [
-                    order for order in all_storeorders
-                    if (order.updated_at or order.created_at)
-                    and start <= (order.updated_at or order.created_at).date() <= end
-                ]
-            except ValueError:
-                return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
+        # Step 2: Orders of those locations in the date range (if given)
+        try:
+            all_storeorders = storeorders_crud.get_storeorders_filtered(
+                db, company_id, location_id_list,
+                start_date if start_date and end_date else None,
+                end_date if start_date and end_date else None
+            )
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
 
         if not all_storeorders:
             return {
@@ -1398,13 +1359,16 @@ def get_financial_summary(
         total_sales = 0.0
         rows = []
 
+        line_filters = dict(
+            location_ids=location_id_list,
+            start_date=start_date if start_date and end_date else None,
+            end_date=end_date if start_date and end_date else None
+        )
+        order_totals = storeorder_lines_crud.get_order_totals(db, company_id, **line_filters)
+
         for order in all_storeorders:
             created_date = order.created_at.date()
-            order_sales = 0.0
-            if order.items_ordered and "items" in order.items_ordered:
-                for item in order.items_ordered["items"]:
-                    total_price = item.get("total_price", 0) or 0.0
-                    order_sales += float(total_price)
+            order_sales = order_totals.get(order.id, {}).get("total_amount", 0.0)
             total_sales += order_sales
             rows.append({"created_at": created_date, "order_sales": order_sales})
 
@@ -1424,13 +1388,7 @@ def get_financial_summary(
         daily_sales["moving_avg"] = daily_sales["avg_order_value"].rolling(window=5, min_periods=1).mean().round(2)
 
         # Category breakdown
-        category_costs = {}
-        for order in all_storeorders:
-            if order.items_ordered and "items" in order.items_ordered:
-                for item in order.items_ordered["items"]:
-                    category = item.get("category", "Uncategorized")
-                    cost = float(item.get("total_price", 0.0) or 0.0)
-                    category_costs[category] = category_costs.get(category, 0.0) + cost
+        category_costs = storeorder_lines_crud.get_category_costs(db, company_id, **line_filters)
 
         category_rows = [{"category": k, "cost": v} for k, v in category_costs.items()]
         cost_breakdown_by_category_df = pd.DataFrame(category_rows)
@@ -1472,22 +1430,15 @@ def get_company_summary(
 ):
     """Get cost breakdown by store and cost summary table (date vs store matrix)"""
     try:
-        storeorders = storeorders_crud.get_storeorders_by_company(db, company_id)
-
-
-        # Apply date filtering if start_date and end_date are provided
-        if start_date and end_date:
-            try:
-                start = datetime.strptime(start_date, "%Y-%m-%d").date()
-                end = datetime.strptime(end_date, "%Y-%m-%d").date()
-                print("Filtering store orders between dates:", start, end)
-                storeorders = [
-                    order for order in storeorders
-                    if (order.updated_at or order.created_at)
-                    and start <= (order.updated_at or order.created_at).date() <= end
-                ]
-            except ValueError:
-                return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
+        # All orders of the company in the date range (if given)
+        try:
+            storeorders = storeorders_crud.get_storeorders_filtered(
+                db, company_id, None,
+                start_date if start_date and end_date else None,
+                end_date if start_date and end_date else None
+            )
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD", "data": []}
         
         
         if not storeorders:
@@ -1507,6 +1458,12 @@ def get_company_summary(
         locations = db.query(Store).filter(Store.id.in_(location_ids)).all()
         location_lookup = {loc.id: loc.name for loc in locations}
 
+        order_totals = storeorder_lines_crud.get_order_totals(
+            db, company_id, None,
+            start_date if start_date and end_date else None,
+            end_date if start_date and end_date else None
+        )
+
         # Initialize cost summary table
         cost_matrix = {}
 
@@ -1523,12 +1480,7 @@ def get_company_summary(
             if store_name not in cost_matrix[date]:
                 cost_matrix[date][store_name] = 0.0
 
-            if order.items_ordered and "items" in order.items_ordered:
-                for item in order.items_ordered["items"]:
-                    matrix = item.get("total_price", 0.0)
-                    if matrix is None:
-                        matrix = 0.0
-                    cost_matrix[date][store_name] += float(matrix)
+            cost_matrix[date][store_name] += order_totals.get(order.id, {}).get("total_amount", 0.0)
 
         # Normalize data: Get all unique store names
         all_stores = sorted({store for store_data in cost_matrix.values() for store in store_data})
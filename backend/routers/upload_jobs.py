@@ -0,0 +1,132 @@
+import json
+import asyncio
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database import get_db, SessionLocal
+from dependencies.auth import get_current_active_user
+from models.users import User
+from models_pydantic import ExcelUploadRequest
+from schemas.upload_jobs import UploadJob
+from crud import upload_jobs as upload_jobs_crud
+from tasks.upload_jobs import notify_upload_job_queued
+
+router = APIRouter(
+    prefix="/api",
+    tags=["upload_jobs"],
+)
+
+FINISHED_STATUSES = ("done", "failed")
+
+
+def _get_job_for_user(db: Session, job_id: int, current_user: User):
+    job = upload_jobs_crud.get_upload_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    if job.user_id != current_user.id and current_user.role != "superuser":
+        raise HTTPException(status_code=403, detail="Not allowed to access this upload job")
+    return job
+
+
+def _enqueue(db: Session, kind: str, request: ExcelUploadRequest, current_user: User):
+    if not request.fileContent:
+        raise HTTPException(status_code=400, detail="File content is required")
+    job = upload_jobs_crud.create_upload_job(db, kind, request, current_user.id)
+    notify_upload_job_queued()
+    return job
+
+
+@router.post("/excel/upload/jobs", response_model=UploadJob, status_code=202)
+def enqueue_excel_upload(
+    request: ExcelUploadRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Queue an /excel/upload request for background processing.
+    Poll /api/upload/jobs/{job_id} (or stream /events) and fetch /result when done.
+    """
+    return _enqueue(db, "excel", request, current_user)
+
+
+@router.post("/master/upload/jobs", response_model=UploadJob, status_code=202)
+def enqueue_master_upload(
+    request: ExcelUploadRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Queue a /master/upload request for background processing."""
+    if not request.company_id or not request.location_id:
+        raise HTTPException(status_code=400, detail="Company ID and Location ID are required")
+    return _enqueue(db, "master", request, current_user)
+
+
+@router.get("/upload/jobs", response_model=List[UploadJob])
+def list_upload_jobs(
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """List the current user's upload jobs, newest first"""
+    return upload_jobs_crud.get_upload_jobs_by_user(db, current_user.id, skip=skip, limit=limit)
+
+
+@router.get("/upload/jobs/{job_id}", response_model=UploadJob)
+def get_upload_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Current state and row counters of an upload job"""
+    return _get_job_for_user(db, job_id, current_user)
+
+
+@router.get("/upload/jobs/{job_id}/result")
+def get_upload_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """The stored dashboard response of a finished upload job"""
+    job = _get_job_for_user(db, job_id, current_user)
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=job.error or "Upload job failed")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Upload job is still {job.status}")
+    return job.result
+
+
+@router.get("/upload/jobs/{job_id}/events")
+async def stream_upload_job_events(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Server-Sent Events stream with one event per job status/counter change"""
+    _get_job_for_user(db, job_id, current_user)
+
+    def _load_status():
+        session = SessionLocal()
+        try:
+            job = upload_jobs_crud.get_upload_job(session, job_id)
+            return UploadJob.model_validate(job).model_dump(mode="json")
+        finally:
+            session.close()
+
+    async def event_stream():
+        last_event = None
+        while True:
+            status = await run_in_threadpool(_load_status)
+            event = {key: value for key, value in status.items() if key != "updated_at"}
+            if event != last_event:
+                yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+                last_event = event
+            if status["status"] in FINISHED_STATUSES:
+                break
+            await asyncio.sleep(1)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -11,6 +11,7 @@ from sales_split_dashboard.sales_split_utils import (create_sales_pivot_tables,
                                                      category_comparison_func, 
                                                      sales_by_category_func)
 import numpy as np
+from utils.dashboard_executor import run_dashboard_builders
 
 def process_sales_split_file(file_data: Union[io.BytesIO, str, pd.DataFrame],location='All', start_date=None, end_date=None, category_filter='All'):
     """
@@ -49,7 +50,18 @@ def process_sales_split_file(file_data: Union[io.BytesIO, str, pd.DataFrame],loc
  
     # p1 = overview_tables(df, location_filter=location_filter, order_date_filter=order_date_filter, server_filter=server_filter, dining_option_filter=dining_option_filter)
     
-    pivot = create_sales_pivot_tables(df, location_filter=location, start_date=start_date, end_date=end_date, categories_filter=category_filter)
+    # The table builders only read df, so they are dispatched together to the
+    # dashboard pool instead of running one after another.
+    tables = run_dashboard_builders({
+        "pivot": (create_sales_pivot_tables, (df,), dict(location_filter=location, start_date=start_date, end_date=end_date, categories_filter=category_filter)),
+        "analysis": (sales_analysis_tables, (df,), dict(location_filter=location, start_date=start_date, end_date=end_date, categories_filter=category_filter)),
+        "sales_by_day": (create_sales_by_day_table, (df,), dict(location_filter=location, end_date=end_date, categories_filter=category_filter)),
+        "sales_by_category": (sales_by_category_func, (df,), dict(location_filter='All', start_date=start_date, end_date=end_date)),
+        "category_comparison": (category_comparison_func, (df,), dict(location_filter='All', start_date=start_date, end_date=end_date)),
+        "thirteen_week_category": (thirteen_week_category, (df,), dict(location_filter=location, end_date=end_date, category_filter=category_filter)),
+    })
+
+    pivot = tables["pivot"]
     
     
     # print("i am here in sales split processor pivot", "\n", pivot)
@@ -81,7 +93,7 @@ def process_sales_split_file(file_data: Union[io.BytesIO, str, pd.DataFrame],loc
     
     # sales_overview_analysis = create_sales_overview_tables(df, location_filter='All', start_date=start_date, end_date=end_date)
 
-    analysis = sales_analysis_tables(df, location_filter=location, start_date=start_date, end_date=end_date, categories_filter=category_filter)
+    analysis = tables["analysis"]
 
     #    # Return all tables and metrics in a dictionary
     # return {
@@ -95,12 +107,12 @@ def process_sales_split_file(file_data: Union[io.BytesIO, str, pd.DataFrame],loc
     #     'total_quantity': total_quantity
     # }
 
-    sales_by_day = create_sales_by_day_table(df, location_filter=location, end_date=end_date, categories_filter=category_filter)
+    sales_by_day = tables["sales_by_day"]
     sales_by_day_table = sales_by_day['sales_by_day_table']
 
     # print("sales_by_day_table i am here in sales split processor", "\n", sales_by_day_table.head())
-    sales_by_category_table = sales_by_category_func(df, location_filter='All', start_date=start_date, end_date=end_date)
-    category_comparison_table = category_comparison_func(df, location_filter='All', start_date=start_date, end_date=end_date)
+    sales_by_category_table = tables["sales_by_category"]
+    category_comparison_table = tables["category_comparison"]
 
     # print("i am here in the sales split processor printing sales_by_category_table", sales_by_category_table)
 
@@ -116,7 +128,7 @@ def process_sales_split_file(file_data: Union[io.BytesIO, str, pd.DataFrame],loc
     
     # print("i am here in sales split processor printing sales by category", "\n", )
     
-    thirteen_week_category_df = thirteen_week_category(df, location_filter=location, end_date=end_date, category_filter=category_filter)
+    thirteen_week_category_df = tables["thirteen_week_category"]
     thirteen_week_category_table = thirteen_week_category_df['thirteen_week_category_table']
     
     # thirteen_week_category_table = sales_overview_analysis['category_comparison_table']
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from utils.utils import _to_date, days_between, _format_percent_change
+from utils.calendar_dim import calendar_attributes
 pd.set_option('future.no_silent_downcasting', True)
 
 
@@ -929,7 +930,10 @@ def thirteen_week_category(df, location_filter='All', end_date=None, category_fi
         thirteen_week_df['Date'] = pd.to_datetime(thirteen_week_df['Date'])
     
     # Create week number and week label for 13-week data
-    thirteen_week_df['Week_Number'] = thirteen_week_df['Date'].dt.isocalendar().week
+    # Week numbers come from the calendar dimension, looked up once per distinct day
+    days = thirteen_week_df['Date'].dt.normalize()
+    week_numbers = {day: calendar_attributes(day.date())['week'] for day in pd.DatetimeIndex(days.unique())}
+    thirteen_week_df['Week_Number'] = days.map(week_numbers)
     thirteen_week_df['Week_Label'] = 'Week ' + thirteen_week_df['Week_Number'].astype(str)
     
     # Group by week and calculate metrics
@@ -0,0 +1,20 @@
+# schemas/delete_jobs.py
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+
+class DeleteJob(BaseModel):
+    id: int
+    table_name: str
+    filters: Dict[str, Any]
+    status: str
+    rows_total: int
+    rows_deleted: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,25 @@
+# schemas/upload_jobs.py
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+
+class UploadJob(BaseModel):
+    id: int
+    company_id: Optional[int] = None
+    user_id: int
+    kind: str
+    file_name: str
+    dashboard: Optional[str] = None
+    status: str
+    rows_total: int
+    rows_processed: int
+    rows_inserted: int
+    rows_duplicate: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,116 @@
+import os
+import logging
+import threading
+import traceback
+from datetime import timedelta
+from fastapi import Response
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from crud.chunked_delete import DELETABLE_TABLES, count_matching_rows
+from crud.ingestion_batches import delete_fact_rows
+from crud.delete_jobs import (create_delete_job, claim_next_delete_job, update_delete_job,
+                              finish_delete_job, fail_delete_job, requeue_stale_delete_jobs)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One worker: concurrent bulk deletes would only compete for the same table
+DELETE_JOB_POLL_SECONDS = int(os.getenv("DELETE_JOB_POLL_SECONDS", "5"))
+DELETE_JOB_STALE_MINUTES = int(os.getenv("DELETE_JOB_STALE_MINUTES", "10"))
+
+_worker = None
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+
+
+def queue_bulk_delete(db: Session, response: Response, table_name: str, filters: dict) -> dict:
+    """Queue a bulk delete for the background worker; the route answers 202 with the job to poll"""
+    job = create_delete_job(db, table_name, filters)
+    _wake_event.set()
+    response.status_code = 202
+    return {
+        "detail": f"Delete of {table_name} rows queued as job {job.id}",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/delete/jobs/{job.id}",
+        "filters": filters,
+    }
+
+
+def _run_job(job):
+    db = SessionLocal()
+    try:
+        model = DELETABLE_TABLES.get(job.table_name)
+        if model is None:
+            raise ValueError(f"Unknown table {job.table_name}")
+
+        # A requeued job continues from the rows its previous run left
+        already_deleted = job.rows_deleted or 0
+        rows_total = already_deleted + count_matching_rows(db, model, job.filters)
+        update_delete_job(db, job.id, rows_total=rows_total)
+        logger.info(f"Delete job {job.id}: {rows_total - already_deleted} {job.table_name} rows matching {job.filters}")
+
+        def progress(deleted):
+            update_delete_job(db, job.id, rows_deleted=already_deleted + deleted)
+
+        deleted = delete_fact_rows(db, job.table_name, job.filters, progress=progress)
+        finish_delete_job(db, job.id, already_deleted + deleted)
+        logger.info(f"Delete job {job.id} done: {deleted} rows deleted")
+
+    except Exception as e:
+        logger.error(f"Delete job {job.id} failed: {e}")
+        print(traceback.format_exc())
+        db.rollback()
+        fail_delete_job(db, job.id, str(e))
+    finally:
+        db.close()
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_next_delete_job(db)
+        except Exception as e:
+            logger.error(f"Error claiming delete job: {e}")
+            job = None
+        finally:
+            db.close()
+
+        if job is None:
+            _wake_event.wait(DELETE_JOB_POLL_SECONDS)
+            _wake_event.clear()
+            continue
+
+        _run_job(job)
+
+
+def start_delete_worker():
+    """Requeue jobs abandoned by a previous process and start the worker thread"""
+    global _worker
+    if _worker is not None:
+        logger.warning("Delete job worker already running")
+        return
+
+    db = SessionLocal()
+    try:
+        requeued = requeue_stale_delete_jobs(db, timedelta(minutes=DELETE_JOB_STALE_MINUTES))
+        if requeued:
+            logger.info(f"Requeued {requeued} stale delete jobs")
+    finally:
+        db.close()
+
+    _stop_event.clear()
+    _worker = threading.Thread(target=_worker_loop, name="delete-job-worker", daemon=True)
+    _worker.start()
+    logger.info("Started delete job worker")
+
+
+def stop_delete_worker():
+    """Stop the worker thread after its current job; a job cut short by the process exiting is requeued on the next start"""
+    global _worker
+    _stop_event.set()
+    _wake_event.set()
+    _worker = None
+    logger.info("Delete job worker stopped")
@@ -0,0 +1,213 @@
+import os
+import logging
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from database import SessionLocal
+from crud.email_outbox import (create_outbox_messages, claim_next_outbox_message,
+                               load_attachments, mark_outbox_sent, retry_outbox_message,
+                               fail_outbox_message, count_queued_outbox_messages,
+                               release_attachments, requeue_stale_outbox_messages)
+from utils.smtp import SmtpPool, transport_from_config, build_message
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Workers = concurrent deliveries = pooled SMTP connections
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "4"))
+EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+EMAIL_OUTBOX_STALE_MINUTES = int(os.getenv("EMAIL_OUTBOX_STALE_MINUTES", "10"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = int(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+
+# Window used for the messages-per-second figure
+THROUGHPUT_WINDOW_SECONDS = 60
+
+_workers = []
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+_pool = None
+_transport = None
+
+_stats_lock = threading.Lock()
+_sent_times = deque()
+_totals = {"sent": 0, "retried": 0, "failed": 0}
+
+
+def set_transport(transport):
+    """
+    Replace the SMTP transport (anything with a connect() returning an smtplib-like
+    connection), e.g. a local debugging server in tests. Applies to new connections.
+    """
+    global _transport, _pool
+    _transport = transport
+    if _pool is not None:
+        old_pool = _pool
+        _pool = SmtpPool(transport, EMAIL_OUTBOX_WORKERS)
+        old_pool.close()
+
+
+def notify_outbox():
+    """Wake the workers right away instead of waiting for the next poll."""
+    _wake_event.set()
+
+
+def queue_email(subject: str, recipients, html_body: str, attachments=None, kind: str = None) -> int:
+    """Queue one message for delivery. Returns its outbox id."""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    return queue_emails(
+        [{"recipients": list(recipients), "subject": subject, "html_body": html_body}],
+        attachments=attachments,
+        kind=kind,
+    )[0]
+
+
+def queue_emails(messages, attachments=None, kind: str = None):
+    """
+    Queue messages ({"recipients", "subject", "html_body"}) sharing the same
+    (filename, content bytes, mime type) attachments. Returns their outbox ids.
+    """
+    db = SessionLocal()
+    try:
+        ids = create_outbox_messages(db, messages, attachments=attachments, kind=kind)
+    finally:
+        db.close()
+    notify_outbox()
+    return ids
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS))
+
+
+def _record(outcome: str):
+    now = time.monotonic()
+    with _stats_lock:
+        _totals[outcome] += 1
+        if outcome == "sent":
+            _sent_times.append(now)
+        while _sent_times and now - _sent_times[0] > THROUGHPUT_WINDOW_SECONDS:
+            _sent_times.popleft()
+
+
+def _deliver(message):
+    attempts = message.attempts + 1
+    pool = _pool  # set_transport may swap the pool meanwhile
+    server = None
+    db = SessionLocal()
+    try:
+        email = build_message(message.subject, message.recipients, message.html_body, load_attachments(message))
+        server = pool.acquire()
+        server.send_message(email)
+        pool.release(server)
+        server = None
+
+        mark_outbox_sent(db, message.id, attempts)
+        _record("sent")
+        logger.info(f"Email {message.id} ({message.kind}) sent to {message.recipients}")
+
+    except Exception as e:
+        if server is not None:
+            pool.release(server, broken=True)
+
+        if attempts >= EMAIL_MAX_ATTEMPTS or isinstance(e, (FileNotFoundError, ValueError)):
+            fail_outbox_message(db, message.id, attempts, str(e))
+            _record("failed")
+            logger.error(f"Email {message.id} to {message.recipients} failed after {attempts} attempts: {e}")
+        else:
+            delay = _retry_delay(attempts)
+            retry_outbox_message(db, message.id, attempts, str(e), delay)
+            _record("retried")
+            logger.warning(f"Email {message.id} to {message.recipients} failed (attempt {attempts}), retrying in {delay}: {e}")
+    finally:
+        try:
+            release_attachments(db, message.attachment_dir)
+        except Exception as e:
+            logger.error(f"Failed to clean up attachments of email {message.id}: {e}")
+        db.close()
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        db = SessionLocal()
+        try:
+            message = claim_next_outbox_message(db)
+        except Exception as e:
+            logger.error(f"Error claiming outbox email: {e}")
+            message = None
+        finally:
+            db.close()
+
+        if message is None:
+            _wake_event.wait(EMAIL_OUTBOX_POLL_SECONDS)
+            _wake_event.clear()
+            continue
+
+        _deliver(message)
+
+
+def start_email_outbox_workers():
+    """Requeue messages abandoned by a previous process and start the delivery threads"""
+    global _pool, _transport
+    if _workers:
+        logger.warning("Email outbox workers already running")
+        return
+
+    db = SessionLocal()
+    try:
+        requeued = requeue_stale_outbox_messages(db, timedelta(minutes=EMAIL_OUTBOX_STALE_MINUTES))
+        if requeued:
+            logger.info(f"Requeued {requeued} stale outbox emails")
+    finally:
+        db.close()
+
+    if _transport is None:
+        _transport = transport_from_config()
+    _pool = SmtpPool(_transport, EMAIL_OUTBOX_WORKERS)
+
+    _stop_event.clear()
+    for i in range(EMAIL_OUTBOX_WORKERS):
+        worker = threading.Thread(target=_worker_loop, name=f"email-outbox-worker-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+    logger.info(f"Started {EMAIL_OUTBOX_WORKERS} email outbox workers ({_transport})")
+
+
+def stop_email_outbox_workers():
+    """Stop the delivery threads and close idle SMTP connections; queued emails stay in the outbox"""
+    _stop_event.set()
+    _wake_event.set()
+    _workers.clear()
+    if _pool is not None:
+        _pool.close()
+    logger.info("Email outbox workers stopped")
+
+
+def get_outbox_stats() -> dict:
+    """Throughput over the last minute, totals since startup, queue depth and pool usage"""
+    now = time.monotonic()
+    with _stats_lock:
+        while _sent_times and now - _sent_times[0] > THROUGHPUT_WINDOW_SECONDS:
+            _sent_times.popleft()
+        recent = len(_sent_times)
+        totals = dict(_totals)
+
+    db = SessionLocal()
+    try:
+        queue_depth = count_queued_outbox_messages(db)
+    finally:
+        db.close()
+
+    return {
+        "running": bool(_workers),
+        "workers": len(_workers),
+        "queue_depth": queue_depth,
+        "messages_per_second": round(recent / THROUGHPUT_WINDOW_SECONDS, 3),
+        "sent_last_minute": recent,
+        "totals": totals,
+        "pool": _pool.stats() if _pool is not None else None,
+    }
@@ -108,15 +108,23 @@
 #     }
 
 
-from apscheduler.schedulers.background import BackgroundScheduler
+import os
+import heapq
+import socket
+import threading
+import uuid
 from sqlalchemy.orm import Session
-from datetime import datetime, time
+from datetime import datetime, date, time, timedelta
 import atexit
 import logging
 import pytz
 from database import SessionLocal
-from crud.mails import get_mails_by_time
-from utils.email import send_actual_email
+from crud.mails import get_mails_by_time, get_distinct_receiving_times
+from crud.scheduler_state import get_last_fired_at, set_last_fired_at
+from crud.scheduler_leases import acquire_lease, release_lease, get_lease
+from crud.sent_log import claim_sends, release_sends, prune_sent_log
+from utils.email import send_production_reports
+from collections import defaultdict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -128,47 +136,111 @@ APP_TIMEZONE = pytz.timezone('America/New_York')  # EST/EDT
 # APP_TIMEZONE = pytz.timezone('US/Eastern')
 # APP_TIMEZONE = pytz.timezone('America/Detroit')
 
-# Global scheduler instance
-scheduler = None
+SCHEDULER_NAME = "email_scheduler"
 
-def check_and_send_scheduled_emails():
-    """Check for scheduled emails and send them - in EST timezone"""
+# Schedules changed by another process are picked up within this interval;
+# changes made through this process's /mails routes apply immediately
+EMAIL_SCHEDULER_REFRESH_MINUTES = int(os.getenv("EMAIL_SCHEDULER_REFRESH_MINUTES", "5"))
+# After a restart, send windows missed within this many hours are still sent
+EMAIL_SCHEDULER_CATCHUP_HOURS = int(os.getenv("EMAIL_SCHEDULER_CATCHUP_HOURS", "12"))
+# Every worker process runs this module, but only the holder of the lease sends;
+# if it stops renewing, another worker takes over once the lease expires
+EMAIL_SCHEDULER_LEASE_SECONDS = int(os.getenv("EMAIL_SCHEDULER_LEASE_SECONDS", "60"))
+HEARTBEAT_SECONDS = max(EMAIL_SCHEDULER_LEASE_SECONDS / 3, 1)
+SENT_LOG_KEEP_DAYS = int(os.getenv("SENT_LOG_KEEP_DAYS", "30"))
+
+# Identifies this process in the lease and the sent log
+SCHEDULER_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Global scheduler state
+scheduler = None  # the scheduler thread
+_heartbeat = None  # the lease renewal thread
+_is_leader = False
+_stop_event = threading.Event()
+_reschedule_event = threading.Event()
+_heap = []  # (next fire time in UTC, receiving_time), one entry per distinct receiving_time
+_heap_lock = threading.Lock()
+
+
+def _fire_time(day, receiving_time: time) -> datetime:
+    """UTC instant of receiving_time on `day` in the app timezone"""
+    return APP_TIMEZONE.localize(datetime.combine(day, receiving_time)).astimezone(pytz.utc)
+
+
+def _next_fire_time(receiving_time: time, after: datetime) -> datetime:
+    """First occurrence of receiving_time strictly after `after`"""
+    day = after.astimezone(APP_TIMEZONE).date()
+    fire_at = _fire_time(day, receiving_time)
+    while fire_at <= after:
+        day += timedelta(days=1)
+        fire_at = _fire_time(day, receiving_time)
+    return fire_at
+
+
+def _rebuild_heap(after: datetime):
+    """Load all receiving times and queue the next occurrence of each after `after`"""
     db: Session = SessionLocal()
     try:
-        # Get current time in EST timezone
-        est_timezone = pytz.timezone('America/New_York')
-        now_est = datetime.now(est_timezone)
-        now_time = now_est.time().replace(second=0, microsecond=0)
-        
-        logger.info(f"Checking for scheduled emails at {now_time} EST")
-        
-        scheduled_mails = get_mails_by_time(db, receiving_time=now_time)
+        receiving_times = get_distinct_receiving_times(db)
+    finally:
+        db.close()
+
+    heap = [(_next_fire_time(receiving_time, after), receiving_time) for receiving_time in receiving_times]
+    heapq.heapify(heap)
+    with _heap_lock:
+        _heap[:] = heap
+    logger.info(f"Email schedule loaded: {len(heap)} send times, next at "
+                f"{heap[0][0].astimezone(APP_TIMEZONE).strftime('%Y-%m-%d %H:%M %Z') if heap else 'never'}")
+
+
+def _clear_heap():
+    with _heap_lock:
+        _heap.clear()
+
+
+def check_and_send_scheduled_emails(receiving_time: time, send_date: date = None):
+    """
+    Send the emails scheduled at receiving_time - in EST timezone - for send_date
+    (default: today). Each mail is sent at most once per day: mails already in
+    the sent log for that day are skipped.
+    """
+    send_date = send_date or datetime.now(APP_TIMEZONE).date()
+    db: Session = SessionLocal()
+    try:
+        scheduled_mails = get_mails_by_time(db, receiving_time=receiving_time)
         
         if not scheduled_mails:
-            logger.info(f"No scheduled emails found for {now_time} EST")
+            logger.info(f"No scheduled emails found for {receiving_time} EST")
             return
             
-        logger.info(f"Found {len(scheduled_mails)} scheduled emails for {now_time} EST")
+        claimed = claim_sends(db, scheduled_mails, send_date, owner=SCHEDULER_OWNER)
+        skipped = len(scheduled_mails) - len(claimed)
+        logger.info(f"Found {len(scheduled_mails)} scheduled emails for {receiving_time} EST on {send_date}"
+                    + (f", {skipped} already sent" if skipped else ""))
         
+        # Group the due mails by company: each company's report is rendered once
+        # and queued for all of its recipients (delivered by the email outbox)
+        mails_by_company = defaultdict(list)
         for mail in scheduled_mails:
+            if mail.id in claimed:
+                mails_by_company[mail.company_id].append(mail)
+        
+        for company_id, mails in mails_by_company.items():
+            recipients = [(mail.receiver_email, mail.receiver_name) for mail in mails]
             try:
-                send_actual_email(
-                    to=mail.receiver_email,
-                    name=mail.receiver_name,
-                    company_id=mail.company_id
+                stats = send_production_reports(company_id, recipients)
+                logger.info(
+                    f"Company {company_id}: queued {stats['queued']}/{stats['recipients']} scheduled emails at {receiving_time} EST "
+                    f"(render {stats['render_seconds']}s, queue {stats['queue_seconds']}s)"
                 )
-                logger.info(f"Successfully sent scheduled email to {mail.receiver_email} at {now_time} EST")
-                
-                # Optional: Mark email as sent in database
-                # mail.status = "sent"
-                # mail.sent_at = datetime.now(APP_TIMEZONE)
-                # db.commit()
+                if stats["failed"]:
+                    logger.error(f"Company {company_id}: {stats['failed']} scheduled emails failed")
+                    if not stats["queued"]:
+                        release_sends(db, [mail.id for mail in mails], send_date)
                 
             except Exception as email_error:
-                logger.error(f"Failed to send email to {mail.receiver_email}: {email_error}")
-                # Optional: Mark email as failed
-                # mail.status = "failed"
-                # db.commit()
+                logger.error(f"Failed to send scheduled emails for company {company_id}: {email_error}")
+                release_sends(db, [mail.id for mail in mails], send_date)
 
     except Exception as e:
         logger.error(f"Error in scheduled email sender: {e}")
@@ -177,39 +249,183 @@ def check_and_send_scheduled_emails():
         db.close()
 
 
+def _record_fired(fire_at: datetime):
+    db: Session = SessionLocal()
+    try:
+        set_last_fired_at(db, SCHEDULER_NAME, fire_at.astimezone(pytz.utc).replace(tzinfo=None))
+    except Exception as e:
+        logger.error(f"Failed to record email scheduler progress: {e}")
+    finally:
+        db.close()
+
+
+def _start_after() -> datetime:
+    """Where a new leader resumes: the last processed window, at most the catch-up limit back"""
+    now = datetime.now(pytz.utc)
+    earliest = now - timedelta(hours=EMAIL_SCHEDULER_CATCHUP_HOURS)
+    db: Session = SessionLocal()
+    try:
+        last_fired_at = get_last_fired_at(db, SCHEDULER_NAME)
+    finally:
+        db.close()
+
+    if last_fired_at is None:
+        return now
+    last_fired_at = pytz.utc.localize(last_fired_at)
+    if last_fired_at < earliest:
+        logger.warning(f"Email scheduler last ran at {last_fired_at.isoformat()}; "
+                       f"only windows after {earliest.isoformat()} are caught up")
+        return earliest
+    return last_fired_at
+
+
+def _renew_lease() -> bool:
+    """Take or renew the scheduler lease; a database error counts as losing it"""
+    global _is_leader
+    db: Session = SessionLocal()
+    try:
+        leader = acquire_lease(db, SCHEDULER_NAME, SCHEDULER_OWNER,
+                               timedelta(seconds=EMAIL_SCHEDULER_LEASE_SECONDS))
+    except Exception as e:
+        logger.error(f"Failed to renew the email scheduler lease: {e}")
+        leader = False
+    finally:
+        db.close()
+
+    if leader != _is_leader:
+        _is_leader = leader
+        logger.info(f"{SCHEDULER_OWNER} {'is now' if leader else 'is no longer'} the active email scheduler")
+        _reschedule_event.set()  # let the scheduler thread start or stop sending
+    return leader
+
+
+def _heartbeat_loop():
+    while not _stop_event.is_set():
+        _renew_lease()
+        _stop_event.wait(HEARTBEAT_SECONDS)
+
+    if _is_leader:
+        db: Session = SessionLocal()
+        try:
+            release_lease(db, SCHEDULER_NAME, SCHEDULER_OWNER)
+        except Exception as e:
+            logger.error(f"Failed to release the email scheduler lease: {e}")
+        finally:
+            db.close()
+
+
+def _run_due():
+    """Fire every window whose time has come (late ticks included) and queue its next occurrence"""
+    while not _stop_event.is_set() and _is_leader:
+        now = datetime.now(pytz.utc)
+        with _heap_lock:
+            if not _heap or _heap[0][0] > now:
+                return
+            fire_at, receiving_time = heapq.heappop(_heap)
+
+        if now - fire_at > timedelta(minutes=1):
+            logger.info(f"Catching up send window {fire_at.astimezone(APP_TIMEZONE).strftime('%Y-%m-%d %H:%M %Z')}")
+        check_and_send_scheduled_emails(receiving_time, fire_at.astimezone(APP_TIMEZONE).date())
+        _record_fired(fire_at)
+
+        with _heap_lock:
+            heapq.heappush(_heap, (_next_fire_time(receiving_time, fire_at), receiving_time))
+
+
+def _become_leader():
+    """Resume from the last processed window, catching up what the previous leader missed"""
+    db: Session = SessionLocal()
+    try:
+        pruned = prune_sent_log(db, SENT_LOG_KEEP_DAYS)
+        if pruned:
+            logger.info(f"Pruned {pruned} sent log entries older than {SENT_LOG_KEEP_DAYS} days")
+    except Exception as e:
+        logger.error(f"Failed to prune the sent log: {e}")
+    finally:
+        db.close()
+
+    _rebuild_heap(_start_after())
+
+
+def _scheduler_loop():
+    refresh_every = timedelta(minutes=EMAIL_SCHEDULER_REFRESH_MINUTES)
+    leading = False
+    next_refresh = datetime.now(pytz.utc)
+
+    while not _stop_event.is_set():
+        now = datetime.now(pytz.utc)
+        if _is_leader and not leading:
+            _reschedule_event.clear()
+            try:
+                _become_leader()
+                leading = True
+                next_refresh = now + refresh_every
+            except Exception as e:
+                logger.error(f"Failed to load the email schedule: {e}")
+        elif not _is_leader and leading:
+            _clear_heap()
+            leading = False
+
+        if leading:
+            try:
+                _run_due()
+            except Exception as e:
+                logger.error(f"Error in scheduled email sender: {e}")
+
+        # Sleep until the next window, a refresh, a schedule change or a leadership change
+        now = datetime.now(pytz.utc)
+        wake_at = now + timedelta(seconds=HEARTBEAT_SECONDS)
+        if leading:
+            with _heap_lock:
+                wake_at = min(_heap[0][0], next_refresh) if _heap else next_refresh
+        _reschedule_event.wait(max((wake_at - now).total_seconds(), 0))
+        if _stop_event.is_set():
+            break
+
+        now = datetime.now(pytz.utc)
+        if not (leading and _is_leader):
+            # Followers ignore schedule changes; the leader loads them on its next refresh
+            _reschedule_event.clear()
+            continue
+
+        if _reschedule_event.is_set() or now >= next_refresh:
+            _reschedule_event.clear()
+            next_refresh = now + refresh_every
+            try:
+                # Fire what is due under the current schedule first, then reload
+                # from the recorded progress: a window added or moved to a time
+                # since the last processed one is still sent, and the sent log
+                # skips mails already sent that day
+                _run_due()
+                _rebuild_heap(_start_after())
+            except Exception as e:
+                logger.error(f"Failed to reload the email schedule: {e}")
+
+
+def reschedule_emails():
+    """Reload the schedule now (called after mails or their receiving times change)"""
+    _reschedule_event.set()
+
+
 def start_scheduler():
-    """Start the email scheduler in EST timezone"""
-    global scheduler
+    """Start the email scheduler in EST timezone (it sends only while this process holds the lease)"""
+    global scheduler, _heartbeat
     
-    if scheduler is not None:
+    if scheduler is not None and scheduler.is_alive():
         logger.warning("Scheduler already exists. Shutting down existing scheduler.")
-        scheduler.shutdown()
+        stop_scheduler()
     
     try:
-        # Configure scheduler to run in EST timezone
-        est_timezone = pytz.timezone('America/New_York')
-        scheduler = BackgroundScheduler(timezone=est_timezone)
-        
-        # Add job to run every minute in EST timezone
-        scheduler.add_job(
-            check_and_send_scheduled_emails, 
-            'cron', 
-            minute='*',
-            id='email_scheduler_job',
-            replace_existing=True
-        )
-        
+        _stop_event.clear()
+        _reschedule_event.clear()
+        _heartbeat = threading.Thread(target=_heartbeat_loop, name="email-scheduler-lease", daemon=True)
+        _heartbeat.start()
+        scheduler = threading.Thread(target=_scheduler_loop, name="email-scheduler", daemon=True)
         scheduler.start()
-        logger.info("Email scheduler started successfully in EST timezone")
-        
-        # Log the next few scheduled runs for verification
-        job = scheduler.get_job('email_scheduler_job')
-        if job:
-            next_run = job.next_run_time
-            logger.info(f"Next run scheduled for: {next_run.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+        logger.info(f"Email scheduler started successfully in EST timezone ({SCHEDULER_OWNER})")
         
         # Register shutdown handler
-        atexit.register(lambda: scheduler.shutdown())
+        atexit.register(stop_scheduler)
         
     except Exception as e:
         logger.error(f"Failed to start scheduler: {e}")
@@ -217,11 +433,18 @@ def start_scheduler():
 
 
 def stop_scheduler():
-    """Stop the email scheduler"""
-    global scheduler
+    """Stop the email scheduler and hand the lease over to another worker"""
+    global scheduler, _heartbeat, _is_leader
     if scheduler is not None:
-        scheduler.shutdown()
+        _stop_event.set()
+        _reschedule_event.set()
+        scheduler.join(timeout=10)
+        if _heartbeat is not None:
+            _heartbeat.join(timeout=10)
         scheduler = None
+        _heartbeat = None
+        _is_leader = False
+        _clear_heap()
         logger.info("Email scheduler stopped")
 
 
@@ -231,19 +454,38 @@ def get_scheduler_status():
     if scheduler is None:
         return {"status": "not_started", "running": False}
     
+    running = scheduler.is_alive()
+    with _heap_lock:
+        upcoming = sorted(_heap)[:5]
+        send_times = len(_heap)
+
     status = {
-        "status": "running" if scheduler.running else "stopped",
-        "running": scheduler.running,
-        "jobs": len(scheduler.get_jobs()),
+        "status": "running" if running else "stopped",
+        "running": running,
+        "role": "leader" if _is_leader else "standby",
+        "owner": SCHEDULER_OWNER,
+        "jobs": len(upcoming),
+        "send_times": send_times,
         "timezone": str(APP_TIMEZONE),
         "current_time_utc": datetime.utcnow().isoformat(),
         "current_time_local": datetime.now(APP_TIMEZONE).isoformat()
     }
+
+    db: Session = SessionLocal()
+    try:
+        lease = get_lease(db, SCHEDULER_NAME)
+        if lease is not None:
+            status["leader"] = lease.owner
+            status["lease_expires_at"] = lease.expires_at.isoformat()
+    except Exception as e:
+        logger.error(f"Failed to read the email scheduler lease: {e}")
+    finally:
+        db.close()
     
-    # Add next run time if job exists
-    job = scheduler.get_job('email_scheduler_job')
-    if job and job.next_run_time:
-        status["next_run"] = job.next_run_time.isoformat()
+    # Add next run time if any send time is scheduled
+    if upcoming:
+        status["next_run"] = upcoming[0][0].astimezone(APP_TIMEZONE).isoformat()
+        status["upcoming"] = [fire_at.astimezone(APP_TIMEZONE).isoformat() for fire_at, _ in upcoming]
     
     return status
 
@@ -0,0 +1,109 @@
+import os
+import socket
+import uuid
+import logging
+import threading
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from crud.scheduler_leases import acquire_lease, release_lease
+from crud.sales_pmix_partitions import (is_partitioned, list_month_partitions, create_month_partition,
+                                        months_in_default_partition, delete_sales_pmix_month,
+                                        month_start, next_month)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keeps the monthly partitions of sales_pmix (see crud.sales_pmix_partitions):
+# creates the coming months' partitions, moves rows out of the default
+# partition and, with a retention set, drops the months that fell out of it.
+# Does nothing while sales_pmix is a single table (SQLite, or no migration).
+PARTITION_MAINTENANCE_HOURS = float(os.getenv("PARTITION_MAINTENANCE_HOURS", "6"))
+SALES_PMIX_PARTITION_MONTHS_AHEAD = int(os.getenv("SALES_PMIX_PARTITION_MONTHS_AHEAD", "3"))
+SALES_PMIX_RETENTION_MONTHS = int(os.getenv("SALES_PMIX_RETENTION_MONTHS", "0"))  # 0 keeps every month
+
+# Only one worker process changes the partitions at a time
+MAINTENANCE_LEASE_NAME = "sales_pmix_partitions"
+MAINTENANCE_LEASE = timedelta(minutes=30)
+MAINTENANCE_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_worker = None
+_stop_event = threading.Event()
+
+
+def maintain_sales_pmix_partitions(db: Session, today: date = None) -> dict:
+    """One maintenance pass; returns what it did"""
+    if not is_partitioned(db):
+        return {"partitioned": False, "created": [], "dropped": []}
+
+    today = today or date.today()
+    wanted = []
+    month = month_start(today)
+    for _ in range(SALES_PMIX_PARTITION_MONTHS_AHEAD + 1):
+        wanted.append(month)
+        month = next_month(month)
+    wanted += months_in_default_partition(db)
+
+    created = []
+    for month in sorted(set(wanted)):
+        if create_month_partition(db, month):
+            created.append(month.isoformat())
+
+    dropped = []
+    if SALES_PMIX_RETENTION_MONTHS > 0:
+        cutoff = month_start(today)
+        for _ in range(SALES_PMIX_RETENTION_MONTHS):
+            cutoff = month_start(cutoff - timedelta(days=1))
+        for month in list_month_partitions(db):
+            if month < cutoff:
+                delete_sales_pmix_month(db, month)
+                dropped.append(month.isoformat())
+
+    return {"partitioned": True, "created": created, "dropped": dropped}
+
+
+def run_partition_maintenance():
+    """A maintenance pass under the lease, so concurrent workers do not race on the DDL"""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(db, MAINTENANCE_LEASE_NAME, MAINTENANCE_OWNER, MAINTENANCE_LEASE):
+            return
+        try:
+            result = maintain_sales_pmix_partitions(db)
+            if result["created"] or result["dropped"]:
+                logger.info(f"sales_pmix partitions created: {result['created']}, dropped: {result['dropped']}")
+        except Exception as e:
+            logger.error(f"sales_pmix partition maintenance failed: {e}")
+            db.rollback()
+        release_lease(db, MAINTENANCE_LEASE_NAME, MAINTENANCE_OWNER)
+    except Exception as e:
+        logger.error(f"Failed to take the partition maintenance lease: {e}")
+    finally:
+        db.close()
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        run_partition_maintenance()
+        _stop_event.wait(PARTITION_MAINTENANCE_HOURS * 3600)
+
+
+def start_partition_maintenance():
+    """Start the maintenance thread (a pass now, then every PARTITION_MAINTENANCE_HOURS)"""
+    global _worker
+    if _worker is not None:
+        logger.warning("Partition maintenance already running")
+        return
+
+    _stop_event.clear()
+    _worker = threading.Thread(target=_worker_loop, name="partition-maintenance", daemon=True)
+    _worker.start()
+    logger.info("Started sales_pmix partition maintenance")
+
+
+def stop_partition_maintenance():
+    global _worker
+    _stop_event.set()
+    _worker = None
+    logger.info("Partition maintenance stopped")
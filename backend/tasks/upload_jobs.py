@@ -0,0 +1,148 @@
+import os
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from database import SessionLocal
+from models.users import User
+from models_pydantic import ExcelUploadRequest, DualDashboardResponse
+from crud.upload_jobs import (claim_next_upload_job, update_upload_job,
+                              finish_upload_job, fail_upload_job,
+                              requeue_stale_upload_jobs)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_POLL_SECONDS = int(os.getenv("UPLOAD_JOB_POLL_SECONDS", "5"))
+UPLOAD_JOB_STALE_MINUTES = int(os.getenv("UPLOAD_JOB_STALE_MINUTES", "30"))
+
+_workers = []
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+
+
+class UploadJobProgress:
+    """
+    Progress callback passed into the upload code. Row counters are increments;
+    every call writes the running totals to the job row using its own session
+    so progress commits never touch the upload's transaction.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.counters = {"rows_total": 0, "rows_processed": 0, "rows_inserted": 0, "rows_duplicate": 0}
+
+    def __call__(self, status=None, **increments):
+        for key, value in increments.items():
+            self.counters[key] += int(value)
+
+        fields = dict(self.counters)
+        if status:
+            fields["status"] = status
+
+        db = SessionLocal()
+        try:
+            update_upload_job(db, self.job_id, **fields)
+        except Exception as e:
+            logger.error(f"Failed to record progress for upload job {self.job_id}: {e}")
+        finally:
+            db.close()
+
+
+def notify_upload_job_queued():
+    """Wake the workers right away instead of waiting for the next poll."""
+    _wake_event.set()
+
+
+def _run_job(job):
+    # Imported here: the routers import this module to notify the workers
+    from routers.excel_upload import _upload_excel
+    from routers.master_upload import _master_upload
+
+    progress = UploadJobProgress(job.id)
+    db = SessionLocal()
+    try:
+        with open(job.payload_path) as f:
+            request = ExcelUploadRequest(**json.load(f))
+
+        current_user = db.query(User).filter(User.id == job.user_id).first()
+        if current_user is None:
+            raise ValueError(f"User {job.user_id} no longer exists")
+
+        logger.info(f"Processing upload job {job.id} ({job.kind}): {job.file_name}")
+        if job.kind == "master":
+            result = jsonable_encoder(_master_upload(request, db, current_user, progress=progress))
+        else:
+            result = _upload_excel(request, db, current_user, progress=progress)
+            result = DualDashboardResponse.model_validate(result).model_dump(mode="json")
+
+        finish_upload_job(db, job.id, result)
+        logger.info(f"Upload job {job.id} done")
+
+    except HTTPException as e:
+        logger.error(f"Upload job {job.id} failed: {e.detail}")
+        fail_upload_job(db, job.id, str(e.detail))
+    except Exception as e:
+        logger.error(f"Upload job {job.id} failed: {e}")
+        print(traceback.format_exc())
+        db.rollback()
+        fail_upload_job(db, job.id, str(e))
+    finally:
+        db.close()
+
+    if job.payload_path and os.path.exists(job.payload_path):
+        os.remove(job.payload_path)
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_next_upload_job(db)
+        except Exception as e:
+            logger.error(f"Error claiming upload job: {e}")
+            job = None
+        finally:
+            db.close()
+
+        if job is None:
+            _wake_event.wait(UPLOAD_JOB_POLL_SECONDS)
+            _wake_event.clear()
+            continue
+
+        _run_job(job)
+
+
+def start_upload_workers():
+    """Requeue jobs abandoned by a previous process and start the worker threads"""
+    if _workers:
+        logger.warning("Upload workers already running")
+        return
+
+    db = SessionLocal()
+    try:
+        requeued = requeue_stale_upload_jobs(db, timedelta(minutes=UPLOAD_JOB_STALE_MINUTES))
+        if requeued:
+            logger.info(f"Requeued {requeued} stale upload jobs")
+    finally:
+        db.close()
+
+    _stop_event.clear()
+    for i in range(UPLOAD_JOB_WORKERS):
+        worker = threading.Thread(target=_worker_loop, name=f"upload-job-worker-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+    logger.info(f"Started {UPLOAD_JOB_WORKERS} upload job workers")
+
+
+def stop_upload_workers():
+    """Stop the worker threads; a job in progress finishes before its thread exits"""
+    _stop_event.set()
+    _wake_event.set()
+    _workers.clear()
+    logger.info("Upload job workers stopped")
@@ -0,0 +1,34 @@
+"""
+Import smoke test: every module of the models package must load and map.
+
+Run from the backend directory: python -m pytest tests
+"""
+
+import importlib
+import os
+import pkgutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("sqlalchemy")
+
+import models  # noqa: E402
+
+MODEL_MODULES = sorted(module.name for module in pkgutil.iter_modules(models.__path__)
+                       if " " not in module.name)  # skip stray copies ("users copy.py")
+
+
+@pytest.mark.parametrize("name", MODEL_MODULES)
+def test_model_module_imports(name):
+    importlib.import_module(f"models.{name}")
+
+
+def test_mappers_configure():
+    from sqlalchemy.orm import configure_mappers
+
+    for name in MODEL_MODULES:
+        importlib.import_module(f"models.{name}")
+    configure_mappers()
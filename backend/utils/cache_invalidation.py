@@ -0,0 +1,61 @@
+"""
+Invalidate in-process caches when rows of given models are committed.
+
+SQLAlchemy session hooks collect the model classes a session touches, both
+through the ORM (add / attribute changes / delete, seen at flush) and
+through ORM bulk statements (query.update() / query.delete()). After the
+commit, every callback registered for one of those models runs. Raw SQL
+(text()) is not seen; caches relying on this keep a TTL as well.
+"""
+
+import logging
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_callbacks = []  # (model classes, callback)
+
+
+def invalidate_on_commit(models, callback):
+    """Call `callback()` after each commit that wrote rows of any of `models`"""
+    _callbacks.append((tuple(models), callback))
+
+
+def _touched(session) -> set:
+    return session.info.setdefault("touched_models", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    touched = _touched(session)
+    for instance in chain(session.new, session.dirty, session.deleted):
+        touched.add(type(instance))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        touched = _touched(orm_execute_state.session)
+        for mapper in orm_execute_state.all_mappers:
+            touched.add(mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_callbacks(session):
+    touched = session.info.pop("touched_models", None)
+    if not touched:
+        return
+    for models, callback in _callbacks:
+        if any(issubclass(model, models) for model in touched):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Cache invalidation callback {callback.__name__} failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back(session, previous_transaction):
+    session.info.pop("touched_models", None)
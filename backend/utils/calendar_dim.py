@@ -0,0 +1,81 @@
+"""
+Calendar dimension helpers.
+
+Every dashboard used to redo its own week / quarter / last-year arithmetic and
+re-parse `Date` strings on every request. The attributes of a day are now
+computed once here: at ingest they are written to the calendar_dim table and
+to the real DATE columns (`Calendar_Date`) of the fact tables, and the filter
+endpoints use the same functions to turn request dates into query windows.
+
+Weeks run Monday to Sunday (ISO weeks), matching the `Week` columns derived
+from Sent_Date.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import pandas as pd
+
+# Same weekday one year back
+LY_OFFSET_DAYS = 364
+
+# Default look-back of the week-based dashboards (13 weeks)
+TRAILING_WINDOW_DAYS = 91
+
+
+def to_date(value):
+    """Convert a date string / datetime / Timestamp to a date (None for blanks)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    parsed = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(parsed) else parsed.date()
+
+
+@lru_cache(maxsize=8192)
+def calendar_attributes(day):
+    """All calendar_dim attributes of a single date, as a dict."""
+    iso_year, iso_week, iso_weekday = day.isocalendar()
+    quarter = (day.month - 1) // 3 + 1
+    week_start = day - timedelta(days=iso_weekday - 1)
+    return {
+        "date": day,
+        "day_name": calendar.day_name[day.weekday()],
+        "week": iso_week,
+        "week_year": iso_year,
+        "week_start": week_start,
+        "week_end": week_start + timedelta(days=6),
+        "month": day.month,
+        "month_name": calendar.month_name[day.month],
+        "quarter": quarter,
+        "year": day.year,
+        "ly_date": day - timedelta(days=LY_OFFSET_DAYS),
+        "week_label": f"Week {iso_week} {iso_year}",
+        "month_label": f"{calendar.month_name[day.month]} {day.year}",
+        "quarter_label": f"Q{quarter} {day.year}",
+    }
+
+
+def week_end(value):
+    """Sunday of the week containing value."""
+    return calendar_attributes(to_date(value))["week_end"]
+
+
+def trailing_week_window(end_date, days=TRAILING_WINDOW_DAYS):
+    """
+    Window used by the week-based dashboards: from `days` before the end of the
+    week that follows end_date, to the end of that week.
+
+    Returns:
+        (start, end) as pandas Timestamps.
+    """
+    end = week_end(to_date(end_date) + timedelta(days=1))
+    start = end - timedelta(days=days)
+    return pd.Timestamp(start), pd.Timestamp(end)
+
@@ -0,0 +1,239 @@
+"""
+Parallel execution of independent dashboard table builders.
+
+The dashboard processors (financials, pmix, sales split) each run a handful of
+table builders that only read the same input DataFrame(s). This module hands
+those builders to a bounded process pool so a single request can use more
+than one core.
+
+Input frames are published once per request into a shared memory segment
+using pickle protocol 5: numeric column blocks are stored out-of-band and the
+workers map them read-only straight from the segment instead of receiving a
+pickled copy per builder. Only object (string) columns travel in the small
+pickle header.
+
+Configuration (environment variables):
+    DASHBOARD_POOL_WORKERS       number of worker processes, 0 disables the pool
+    DASHBOARD_POOL_MIN_ROWS      frames smaller than this run inline
+    DASHBOARD_POOL_START_METHOD  multiprocessing start method (default: spawn)
+"""
+
+import os
+import gc
+import atexit
+import pickle
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_POOL_WORKERS = int(os.getenv("DASHBOARD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+DASHBOARD_POOL_MIN_ROWS = int(os.getenv("DASHBOARD_POOL_MIN_ROWS", "5000"))
+DASHBOARD_POOL_START_METHOD = os.getenv("DASHBOARD_POOL_START_METHOD", "spawn")
+
+# How many shared frames a worker keeps mapped at once
+_WORKER_FRAME_CACHE_SIZE = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Worker-side cache: shared memory name -> (SharedMemory, DataFrame)
+_attached_frames = {}
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame published in shared memory."""
+
+    def __init__(self, name, header_size, spans):
+        self.name = name
+        self.header_size = header_size
+        self.spans = spans
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=DASHBOARD_POOL_WORKERS,
+                mp_context=get_context(DASHBOARD_POOL_START_METHOD),
+            )
+            logger.info(f"Dashboard pool started with {DASHBOARD_POOL_WORKERS} workers")
+        return _pool
+
+
+def shutdown_dashboard_pool():
+    """Stop the dashboard worker processes (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            logger.info("Dashboard pool stopped")
+
+
+atexit.register(shutdown_dashboard_pool)
+
+
+def _share_frame(df):
+    """Publish a DataFrame into a new shared memory segment.
+
+    Returns:
+        Tuple of (SharedMemory, SharedFrame handle). The caller owns the segment
+        and must close and unlink it once every builder has finished.
+    """
+    buffers = []
+    header = pickle.dumps(df, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    total_size = len(header) + sum(raw.nbytes for raw in raw_buffers)
+    shm = shared_memory.SharedMemory(create=True, size=max(total_size, 1))
+
+    shm.buf[:len(header)] = header
+    offset = len(header)
+    spans = []
+    for raw in raw_buffers:
+        end = offset + raw.nbytes
+        shm.buf[offset:end] = raw
+        spans.append((offset, end))
+        offset = end
+
+    return shm, SharedFrame(shm.name, len(header), spans)
+
+
+def _release_attached_frames():
+    """Drop every mapped frame in this worker before its segments are closed."""
+    while _attached_frames:
+        _, (shm, df) = _attached_frames.popitem()
+        del df
+        gc.collect()
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _attach_frame(handle):
+    """Map a shared DataFrame inside a worker process (read-only, cached)."""
+    cached = _attached_frames.get(handle.name)
+    if cached is not None:
+        return cached[1]
+
+    if not _attached_frames:
+        atexit.register(_release_attached_frames)
+
+    shm = shared_memory.SharedMemory(name=handle.name)
+    view = shm.buf.toreadonly()
+    df = pickle.loads(
+        view[:handle.header_size],
+        buffers=[view[start:end] for start, end in handle.spans],
+    )
+
+    # Keep only the most recent frames mapped in this worker
+    while len(_attached_frames) >= _WORKER_FRAME_CACHE_SIZE:
+        old_name = next(iter(_attached_frames))
+        old_shm, old_df = _attached_frames.pop(old_name)
+        del old_df
+        try:
+            old_shm.close()
+        except BufferError:
+            # A builder result still references the old buffers; the mapping
+            # is released when those objects are garbage collected.
+            pass
+
+    _attached_frames[handle.name] = (shm, df)
+    return df
+
+
+def _resolve(value):
+    return _attach_frame(value) if isinstance(value, SharedFrame) else value
+
+
+def _run_builder(func, args, kwargs):
+    """Worker entry point: swap shared frame handles for DataFrames and build."""
+    args = [_resolve(arg) for arg in args]
+    kwargs = {key: _resolve(value) for key, value in kwargs.items()}
+    return func(*args, **kwargs)
+
+
+def run_dashboard_builders(builders):
+    """
+    Run independent dashboard table builders, in parallel when worthwhile.
+
+    Args:
+        builders: Dict of name -> (function, args tuple, kwargs dict). Functions
+            must be importable module-level callables that do not modify their
+            DataFrame arguments in place.
+
+    Returns:
+        Dict of name -> builder result, in the same order as `builders`.
+    """
+    results = dict(iter_dashboard_builders(builders))
+    return {name: results[name] for name in builders}
+
+
+def iter_dashboard_builders(builders):
+    """
+    Like run_dashboard_builders, but yields (name, result) pairs as soon as
+    each builder finishes. Inline runs yield in the order of `builders`.
+    Closing the generator early cancels the builders that have not started.
+    """
+    frames = {}
+    for func, args, kwargs in builders.values():
+        for value in list(args) + list(kwargs.values()):
+            if isinstance(value, pd.DataFrame):
+                frames[id(value)] = value
+
+    total_rows = sum(len(df) for df in frames.values())
+    if DASHBOARD_POOL_WORKERS <= 0 or len(builders) < 2 or total_rows < DASHBOARD_POOL_MIN_ROWS:
+        for name, (func, args, kwargs) in builders.items():
+            yield name, func(*args, **kwargs)
+        return
+
+    segments = []
+    futures = {}
+    done = set()
+    try:
+        handles = {}
+        for frame_id, df in frames.items():
+            shm, handle = _share_frame(df)
+            segments.append(shm)
+            handles[frame_id] = handle
+
+        def _to_handle(value):
+            return handles[id(value)] if isinstance(value, pd.DataFrame) else value
+
+        pool = _get_pool()
+        futures = {
+            pool.submit(
+                _run_builder,
+                func,
+                tuple(_to_handle(arg) for arg in args),
+                {key: _to_handle(value) for key, value in kwargs.items()},
+            ): name
+            for name, (func, args, kwargs) in builders.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            result = future.result()
+            done.add(name)
+            yield name, result
+
+    except BrokenProcessPool as e:
+        logger.error(f"Dashboard pool broken, running builders inline: {e}")
+        shutdown_dashboard_pool()
+        for name, (func, args, kwargs) in builders.items():
+            if name not in done:
+                yield name, func(*args, **kwargs)
+
+    finally:
+        for future in futures:
+            future.cancel()
+        for shm in segments:
+            shm.close()
+            shm.unlink()
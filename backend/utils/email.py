@@ -14,10 +14,16 @@ from datetime import time
 from crud.mails import create_mail_record_simple
 from database import get_db
 from crud import storeorders as storeorders_crud
+from utils.production_cache import get_production_matrix
 from models.locations import Store
 from collections import defaultdict
 
 from database import SessionLocal
+from tasks.email_outbox import queue_email, queue_emails
+from utils.report_writer import write_production_xlsx
+from starlette.concurrency import run_in_threadpool
+import io
+from time import perf_counter
 import pandas as pd
 import os
 from datetime import datetime
@@ -259,14 +265,8 @@ async def send_account_email(email: str, username: str, password: str):
     XcelBot Team
     """
     
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email],
-        body=html_body,  # Set HTML as main body
-        subtype="html"   # Ensure HTML subtype
-    )
-    
-    await fm.send_message(message)
+    # Delivered by the email outbox workers over pooled SMTP connections
+    await run_in_threadpool(queue_email, subject, [email], html_body, kind="account")
     
     
 
@@ -525,14 +525,8 @@ async def send_order_confirmation_email(email: str, username: str, order_id: int
     KPI360.ai Team
     """
     
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email],
-        body=html_body,
-        subtype="html"
-    )
-    
-    await fm.send_message(message)
+    # Delivered by the email outbox workers over pooled SMTP connections
+    await run_in_threadpool(queue_email, subject, [email], html_body, kind="order_confirmation")
 
     
 
@@ -601,60 +595,16 @@ def get_consolidated_production(company_id: int, db: Session):
         # Get current date for filtering
         current_date = datetime.today().date()
         
-        # Get store orders filtered by current date (prioritizing updated_at over created_at)
-        storeorders = storeorders_crud.get_storeorders_by_company_current_date(db, company_id)
-        
-        # Alternative approach if you prefer to do filtering in this function:
-        # all_storeorders = storeorders_crud.get_storeorders_by_company(db, company_id, skip=0, limit=1000)
-        # storeorders = []
-        # for order in all_storeorders:
-        #     order_date = order.updated_at.date() if order.updated_at else order.created_at.date()
-        #     if order_date == current_date:
-        #         storeorders.append(order)
+        # Item quantities per location for today's orders, shared by all recipients of the company
+        production = get_production_matrix(db, company_id, current_date)
         
-        if not storeorders:
+        if not production["data"]:
             return {"message": f"No store orders found for this company for {current_date}", "data": []}
-        
-        # Get all unique locations
-        location_ids = list(set(order.location_id for order in storeorders if order.location_id))
-        locations = db.query(Store).filter(Store.id.in_(location_ids)).all()
-        location_lookup = {loc.id: loc.name for loc in locations}
-
-        # Build item-location-quantity matrix
-        item_data = defaultdict(lambda: defaultdict(int))  # item_data[item_name][location_name] = quantity
-        item_units = {}  # item_data[item_name] = unit
-
-        for order in storeorders:
-            location_name = location_lookup.get(order.location_id, f"Location {order.location_id}")
-            if not order.items_ordered or "items" not in order.items_ordered:
-                continue
-
-            for item in order.items_ordered["items"]:
-                name = item.get("name")
-                quantity = item.get("quantity", 0)
-                unit = item.get("unit", "")
-                if name:  # Only process if name exists
-                    item_data[name][location_name] += quantity
-                    item_units[name] = unit
-
-        # Format final table rows
-        all_location_names = sorted(location_lookup.values())
-        table_rows = []
-        for item_name, location_qtys in item_data.items():
-            row = {"Item": item_name}
-            total_required = 0
-            for loc in all_location_names:
-                qty = location_qtys.get(loc, 0)
-                row[loc] = qty
-                total_required += qty
-            row["Total Required"] = total_required
-            row["Unit"] = item_units.get(item_name, "")
-            table_rows.append(row)
 
         return {
             "message": f"Consolidated production table generated successfully for {current_date}",
-            "columns": ["Item"] + all_location_names + ["Total Required", "Unit"],
-            "data": table_rows
+            "columns": production["columns"],
+            "data": production["data"]
         }
 
     except Exception as e:
@@ -1124,460 +1074,420 @@ def get_consolidated_production(company_id: int, db: Session):
         
         
 
-def send_actual_email(to: str, name: str, company_id: int = None):
-    db = SessionLocal()
+# ============================================================================
+# Scheduled consolidated production report
+# ============================================================================
+
+PRODUCTION_REPORT_SUBJECT = "Consolidated Production Requirements"
+XLSX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# Custom location ordering function
+def reorder_production_columns(data):
+    """Reorder the data columns according to the specified location priority"""
+    if not data or 'data' not in data or not data['data']:
+        return data
+
+    # Define the priority order (case-insensitive matching)
+    priority_locations = [
+        # Priority 1: Midtown East variations
+        ["midtown east", "Midtown East"],
+        # Priority 2: Lenox Hill variations  
+        ["lenox hill", "Lenox Hill", "lenox hills", "Lenox Hills"],
+        # Priority 3: Hell's Kitchen variations
+        ["hells kitchen", "Hells Kitchen", "hell's kitchen", "Hell's Kitchen"],
+        # Priority 4: Union Square variations
+        ["union square", "Union Square", "Union square"],
+        # Priority 5: Flatiron variations
+        ["flatiron", "Flatiron", "FLATIRON"],
+        # Priority 6: Williamsburg variations
+        ["williamsburg", "Williamsburg"]
+    ]
+
+    # Get original columns
+    original_columns = data.get('columns', [])
+    if not original_columns:
+        return data
+
+    # Separate fixed columns (Item, Total Required, Unit) from location columns
+    fixed_start = ["Item"]
+    fixed_end = ["Total Required", "Unit"]
+
+    # Find location columns (everything except fixed columns)
+    location_columns = []
+    for col in original_columns:
+        if col not in fixed_start + fixed_end:
+            location_columns.append(col)
+
+    # Function to find matching priority group for a location
+    def get_priority_group(location_name):
+        location_lower = location_name.lower().strip()
+        for i, priority_group in enumerate(priority_locations):
+            for variant in priority_group:
+                if variant.lower().strip() == location_lower:
+                    return i
+        return len(priority_locations)  # Return high number for non-priority locations
+
+    # Sort locations by priority
+    sorted_locations = sorted(location_columns, key=lambda x: (get_priority_group(x), x.lower()))
+
+    # Create new column order
+    new_columns = fixed_start + sorted_locations + fixed_end
+
+    # Reorder data rows to match new column order
+    reordered_data = []
+    for row in data['data']:
+        new_row = {}
+        for col in new_columns:
+            new_row[col] = row.get(col, "")
+        reordered_data.append(new_row)
+
+    return {
+        "message": data.get('message', ''),
+        "columns": new_columns,
+        "data": reordered_data
+    }
+
+
+# Generate Excel file
+def build_production_excel(data):
+    """XLSX attachment of the production table, as bytes (None when there is no data)"""
     try:
-        # company_id = 1
-        print("---------------------------------------------")
-        print("Sending email to:", to, "for user:", name, "with company ID:", company_id)
-        print("---------------------------------------------")
-        
-        data = get_consolidated_production(company_id, db)
-        
-        # Custom location ordering function
-        def reorder_data_columns(data):
-            """Reorder the data columns according to the specified location priority"""
-            if not data or 'data' not in data or not data['data']:
-                return data
-            
-            # Define the priority order (case-insensitive matching)
-            priority_locations = [
-                # Priority 1: Midtown East variations
-                ["midtown east", "Midtown East"],
-                # Priority 2: Lenox Hill variations  
-                ["lenox hill", "Lenox Hill", "lenox hills", "Lenox Hills"],
-                # Priority 3: Hell's Kitchen variations
-                ["hells kitchen", "Hells Kitchen", "hell's kitchen", "Hell's Kitchen"],
-                # Priority 4: Union Square variations
-                ["union square", "Union Square", "Union square"],
-                # Priority 5: Flatiron variations
-                ["flatiron", "Flatiron", "FLATIRON"],
-                # Priority 6: Williamsburg variations
-                ["williamsburg", "Williamsburg"]
-            ]
-            
-            # Get original columns
-            original_columns = data.get('columns', [])
-            if not original_columns:
-                return data
-            
-            # Separate fixed columns (Item, Total Required, Unit) from location columns
-            fixed_start = ["Item"]
-            fixed_end = ["Total Required", "Unit"]
-            
-            # Find location columns (everything except fixed columns)
-            location_columns = []
-            for col in original_columns:
-                if col not in fixed_start + fixed_end:
-                    location_columns.append(col)
-            
-            # Function to find matching priority group for a location
-            def get_priority_group(location_name):
-                location_lower = location_name.lower().strip()
-                for i, priority_group in enumerate(priority_locations):
-                    for variant in priority_group:
-                        if variant.lower().strip() == location_lower:
-                            return i
-                return len(priority_locations)  # Return high number for non-priority locations
-            
-            # Sort locations by priority
-            sorted_locations = sorted(location_columns, key=lambda x: (get_priority_group(x), x.lower()))
-            
-            # Create new column order
-            new_columns = fixed_start + sorted_locations + fixed_end
-            
-            # Reorder data rows to match new column order
-            reordered_data = []
-            for row in data['data']:
-                new_row = {}
-                for col in new_columns:
-                    new_row[col] = row.get(col, "")
-                reordered_data.append(new_row)
-            
-            return {
-                "message": data.get('message', ''),
-                "columns": new_columns,
-                "data": reordered_data
-            }
-        
-        # Reorder the data according to custom location priority
-        data = reorder_data_columns(data)
-        
-        print("This is the data which I want to print:", data)
+        return write_production_xlsx(data)
+    except Exception as e:
+        print(f"Error creating Excel file: {e}")
+        return None
 
-        # Generate timestamp for file names
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Create downloads directory if it doesn't exist
-        downloads_dir = "downloads"
-        if not os.path.exists(downloads_dir):
-            os.makedirs(downloads_dir)
 
-        # Generate Excel file
-        def create_excel_file(data, filename):
-            if not data or 'data' not in data or not data['data']:
-                return None
-            
-            try:
-                # Convert data to DataFrame - now with reordered columns
-                df = pd.DataFrame(data['data'])
-                # Ensure column order matches our custom order
-                if 'columns' in data:
-                    df = df[data['columns']]
-                
-                # Create Excel file with formatting
-                excel_path = os.path.join(downloads_dir, filename)
-                with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='Production Requirements', index=False)
-                    
-                    # Get workbook and worksheet objects
-                    workbook = writer.book
-                    worksheet = writer.sheets['Production Requirements']
-                    
-                    # Apply formatting
-                    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-                    
-                    # Header formatting
-                    header_font = Font(bold=True, color="000000")
-                    header_fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
-                    total_fill = PatternFill(start_color="E8F5E8", end_color="E8F5E8", fill_type="solid")
-                    highlight_fill = PatternFill(start_color="FFF3CD", end_color="FFF3CD", fill_type="solid")
-                    
-                    # Border style
-                    thin_border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-                    
-                    # Format headers
-                    for col_num, column in enumerate(df.columns, 1):
-                        cell = worksheet.cell(row=1, column=col_num)
-                        cell.font = header_font
-                        cell.fill = header_fill
-                        cell.alignment = Alignment(horizontal="center", vertical="center")
-                        cell.border = thin_border
-                        
-                        # Special formatting for total columns
-                        if 'total' in column.lower() or 'required' in column.lower():
-                            cell.fill = total_fill
-                    
-                    # Format data cells
-                    for row_num in range(2, len(df) + 2):
-                        for col_num, column in enumerate(df.columns, 1):
-                            cell = worksheet.cell(row=row_num, column=col_num)
-                            cell.border = thin_border
-                            cell.alignment = Alignment(horizontal="center", vertical="center")
-                            
-                            # Highlight cells with values > 0 (except total columns)
-                            if ('total' not in column.lower() and 'required' not in column.lower() 
-                                and isinstance(cell.value, (int, float)) and cell.value > 0):
-                                cell.fill = highlight_fill
-                            elif 'total' in column.lower() or 'required' in column.lower():
-                                cell.fill = total_fill
-                                cell.font = Font(bold=True)
-                    
-                    # Auto-adjust column widths
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                return excel_path
-            except Exception as e:
-                print(f"Error creating Excel file: {e}")
-                return None
+# Generate PDF file
+def build_production_pdf(data):
+    """PDF attachment of the production table, as bytes (None when there is no data)"""
+    if not data or 'data' not in data or not data['data']:
+        return None
 
-        # Generate PDF file
-        def create_pdf_file(data, filename):
-            if not data or 'data' not in data or not data['data']:
-                return None
-            
-            try:
-                pdf_path = os.path.join(downloads_dir, filename)
-                
-                # Create PDF document
-                doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-                elements = []
-                
-                # Get styles
-                styles = getSampleStyleSheet()
-                title_style = ParagraphStyle(
-                    'CustomTitle',
-                    parent=styles['Heading1'],
-                    fontSize=16,
-                    spaceAfter=30,
-                    alignment=1  # Center alignment
-                )
-                
-                # Add title
-                title = Paragraph("Consolidated Production Requirements", title_style)
-                elements.append(title)
-                elements.append(Spacer(1, 12))
-                
-                # Add subtitle
-                subtitle = Paragraph("", styles['Normal'])
-                elements.append(subtitle)
-                elements.append(Spacer(1, 20))
-                
-                # Prepare table data - now with custom column order
-                columns = data.get('columns', list(data['data'][0].keys()) if data['data'] else [])
-                table_data = [columns]  # Header row
-                
-                # Add data rows
-                for item in data['data']:
-                    row = [str(item.get(col, "")) for col in columns]
-                    table_data.append(row)
-                
-                # Create table
-                table = Table(table_data)
-                
-                # Define table style
-                table_style = [
-                    # Header row styling
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    
-                    # Data rows styling
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ]
-                
-                # Highlight total columns and positive values
-                for col_idx, col in enumerate(columns):
-                    if 'total' in col.lower() or 'required' in col.lower():
-                        # Green background for total columns
-                        table_style.append(('BACKGROUND', (col_idx, 0), (col_idx, -1), colors.lightgreen))
-                        table_style.append(('FONTNAME', (col_idx, 1), (col_idx, -1), 'Helvetica-Bold'))
-                
-                # Apply alternating row colors
-                for row_idx in range(1, len(table_data)):
-                    if row_idx % 2 == 0:
-                        table_style.append(('BACKGROUND', (0, row_idx), (-1, row_idx), colors.beige))
-                
-                table.setStyle(TableStyle(table_style))
-                elements.append(table)
-                
-                # Add footer
-                elements.append(Spacer(1, 30))
-                footer_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>KPI360.ai Team"
-                footer = Paragraph(footer_text, styles['Normal'])
-                elements.append(footer)
-                
-                # Build PDF
-                doc.build(elements)
-                return pdf_path
-            except Exception as e:
-                print(f"Error creating PDF file: {e}")
-                return None
+    try:
+        buffer = io.BytesIO()
+
+        # Create PDF document
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        elements = []
+
+        # Get styles
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        )
 
-        # Generate HTML table from the data - DYNAMIC VERSION with custom ordering
-        def generate_production_table(data):
-            if not data or 'data' not in data or not data['data']:
-                return "<p>No production data available.</p>"
-            
-            # Get columns dynamically from the reordered data
-            columns = data.get('columns', [])
-            if not columns and data['data']:
-                # If columns not provided, extract from first row
-                columns = list(data['data'][0].keys())
-            
-            if not columns:
-                return "<p>No columns found in data.</p>"
-            
-            # Start building the table
-            table_html = """
-            <table style="border-collapse: collapse; width: 100%; margin: 20px 0;">
-                <thead>
-                    <tr style="background-color: #f8f9fa;">
-            """
-            
-            # Generate header row dynamically
-            for col in columns:
-                # Special styling for specific column types
-                if 'total' in col.lower() or 'required' in col.lower() or 'sum' in col.lower():
-                    header_style = "border: 1px solid #ddd; padding: 12px; text-align: center; font-weight: bold; background-color: #e8f5e8;"
+        # Add title
+        title = Paragraph("Consolidated Production Requirements", title_style)
+        elements.append(title)
+        elements.append(Spacer(1, 12))
+
+        # Add subtitle
+        subtitle = Paragraph("", styles['Normal'])
+        elements.append(subtitle)
+        elements.append(Spacer(1, 20))
+
+        # Prepare table data - now with custom column order
+        columns = data.get('columns', list(data['data'][0].keys()) if data['data'] else [])
+        table_data = [columns]  # Header row
+
+        # Add data rows
+        for item in data['data']:
+            row = [str(item.get(col, "")) for col in columns]
+            table_data.append(row)
+
+        # Create table
+        table = Table(table_data)
+
+        # Define table style
+        table_style = [
+            # Header row styling
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+            # Data rows styling
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]
+
+        # Highlight total columns and positive values
+        for col_idx, col in enumerate(columns):
+            if 'total' in col.lower() or 'required' in col.lower():
+                # Green background for total columns
+                table_style.append(('BACKGROUND', (col_idx, 0), (col_idx, -1), colors.lightgreen))
+                table_style.append(('FONTNAME', (col_idx, 1), (col_idx, -1), 'Helvetica-Bold'))
+
+        # Apply alternating row colors
+        for row_idx in range(1, len(table_data)):
+            if row_idx % 2 == 0:
+                table_style.append(('BACKGROUND', (0, row_idx), (-1, row_idx), colors.beige))
+
+        table.setStyle(TableStyle(table_style))
+        elements.append(table)
+
+        # Add footer
+        elements.append(Spacer(1, 30))
+        footer_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>KPI360.ai Team"
+        footer = Paragraph(footer_text, styles['Normal'])
+        elements.append(footer)
+
+        # Build PDF
+        doc.build(elements)
+        return buffer.getvalue()
+    except Exception as e:
+        print(f"Error creating PDF file: {e}")
+        return None
+
+
+# Generate HTML table from the data - DYNAMIC VERSION with custom ordering
+def build_production_table_html(data):
+    if not data or 'data' not in data or not data['data']:
+        return "<p>No production data available.</p>"
+
+    # Get columns dynamically from the reordered data
+    columns = data.get('columns', [])
+    if not columns and data['data']:
+        # If columns not provided, extract from first row
+        columns = list(data['data'][0].keys())
+
+    if not columns:
+        return "<p>No columns found in data.</p>"
+
+    # Start building the table
+    table_html = """
+    <table style="border-collapse: collapse; width: 100%; margin: 20px 0;">
+        <thead>
+            <tr style="background-color: #f8f9fa;">
+    """
+
+    # Generate header row dynamically
+    for col in columns:
+        # Special styling for specific column types
+        if 'total' in col.lower() or 'required' in col.lower() or 'sum' in col.lower():
+            header_style = "border: 1px solid #ddd; padding: 12px; text-align: center; font-weight: bold; background-color: #e8f5e8;"
+        else:
+            header_style = "border: 1px solid #ddd; padding: 12px; text-align: center; font-weight: bold;"
+
+        table_html += f'<th style="{header_style}">{col}</th>'
+
+    table_html += """
+            </tr>
+        </thead>
+        <tbody>
+    """
+
+    # Generate data rows dynamically
+    for row_index, item in enumerate(data['data']):
+        # Alternate row colors for better readability
+        row_bg = "#f9f9f9" if row_index % 2 == 0 else "#ffffff"
+
+        table_html += f'<tr style="background-color: {row_bg};">'
+
+        for col_index, col in enumerate(columns):
+            cell_value = item.get(col, "")
+
+            # Smart styling based on column type and content
+            if 'total' in col.lower() or 'required' in col.lower() or 'sum' in col.lower():
+                # Highlight total/required columns in green
+                cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center; background-color: #e8f5e8; font-weight: bold;"
+            elif col_index == 0:  # First column (usually item name)
+                # Check if any store column has a value for this row to highlight the item
+                has_store_value = any(
+                    isinstance(item.get(c, 0), (int, float)) and item.get(c, 0) > 0 
+                    for c in columns[1:-2] if c not in ["Item", "Total Required", "Unit"]
+                )
+                if has_store_value:
+                    cell_style = "border: 1px solid #ddd; padding: 12px; text-align: left; background-color: #fff3cd;"
                 else:
-                    header_style = "border: 1px solid #ddd; padding: 12px; text-align: center; font-weight: bold;"
-                
-                table_html += f'<th style="{header_style}">{col}</th>'
-            
-            table_html += """
-                    </tr>
-                </thead>
-                <tbody>
-            """
-            
-            # Generate data rows dynamically
-            for row_index, item in enumerate(data['data']):
-                # Alternate row colors for better readability
-                row_bg = "#f9f9f9" if row_index % 2 == 0 else "#ffffff"
-                
-                table_html += f'<tr style="background-color: {row_bg};">'
-                
-                for col_index, col in enumerate(columns):
-                    cell_value = item.get(col, "")
-                    
-                    # Smart styling based on column type and content
-                    if 'total' in col.lower() or 'required' in col.lower() or 'sum' in col.lower():
-                        # Highlight total/required columns in green
-                        cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center; background-color: #e8f5e8; font-weight: bold;"
-                    elif col_index == 0:  # First column (usually item name)
-                        # Check if any store column has a value for this row to highlight the item
-                        has_store_value = any(
-                            isinstance(item.get(c, 0), (int, float)) and item.get(c, 0) > 0 
-                            for c in columns[1:-2] if c not in ["Item", "Total Required", "Unit"]
-                        )
-                        if has_store_value:
-                            cell_style = "border: 1px solid #ddd; padding: 12px; text-align: left; background-color: #fff3cd;"
-                        else:
-                            cell_style = "border: 1px solid #ddd; padding: 12px; text-align: left;"
-                    elif isinstance(cell_value, (int, float)) and cell_value > 0:
-                        # Highlight cells with positive values (like store quantities)
-                        cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center; background-color: #fff3cd;"
-                    elif col.lower() in ['unit', 'units', 'type', 'category']:
-                        # Unit/type columns - center aligned, no highlighting
-                        cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center;"
-                    else:
-                        # Default styling
-                        cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center;"
-                    
-                    table_html += f'<td style="{cell_style}">{cell_value}</td>'
-                
-                table_html += "</tr>"
-            
-            table_html += """
-                </tbody>
-            </table>
-            """
-            
-            return table_html
+                    cell_style = "border: 1px solid #ddd; padding: 12px; text-align: left;"
+            elif isinstance(cell_value, (int, float)) and cell_value > 0:
+                # Highlight cells with positive values (like store quantities)
+                cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center; background-color: #fff3cd;"
+            elif col.lower() in ['unit', 'units', 'type', 'category']:
+                # Unit/type columns - center aligned, no highlighting
+                cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center;"
+            else:
+                # Default styling
+                cell_style = "border: 1px solid #ddd; padding: 12px; text-align: center;"
+
+            table_html += f'<td style="{cell_style}">{cell_value}</td>'
+
+        table_html += "</tr>"
+
+    table_html += """
+        </tbody>
+    </table>
+    """
 
-        # Generate files
-        excel_filename = f"production_requirements_{timestamp}.xlsx"
-        pdf_filename = f"production_requirements_{timestamp}.pdf"
-        
-        excel_path = create_excel_file(data, excel_filename)
-        pdf_path = create_pdf_file(data, pdf_filename)
-        
-        production_table = generate_production_table(data)
-        
-        # Files are attached to email, no download buttons needed in UI
-        
-        subject = "Consolidated Production Requirements"
-        html_body = f"""
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 1200px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background-color: #f8f9fa;
-                    padding: 20px;
-                    border-radius: 5px;
-                    margin-bottom: 20px;
-                    text-align: center;
-                }}
-                .footer {{
-                    margin-top: 30px;
-                    padding-top: 20px;
-                    border-top: 1px solid #ddd;
-                }}
+    return table_html
+
+
+def build_production_email_html(name: str, production_table: str):
+    """HTML body of the consolidated production email for one recipient"""
+    return f"""
+    <html>
+    <head>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                max-width: 1200px;
+                margin: 0 auto;
+                padding: 20px;
+            }}
+            .header {{
+                background-color: #f8f9fa;
+                padding: 20px;
+                border-radius: 5px;
+                margin-bottom: 20px;
+                text-align: center;
+            }}
+            .footer {{
+                margin-top: 30px;
+                padding-top: 20px;
+                border-top: 1px solid #ddd;
+            }}
+            .table-container {{
+                overflow-x: auto;
+            }}
+            @media screen and (max-width: 600px) {{
                 .table-container {{
-                    overflow-x: auto;
+                    font-size: 12px;
                 }}
-                @media screen and (max-width: 600px) {{
-                    .table-container {{
-                        font-size: 12px;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h2>Consolidated Production Requirements</h2>
-            </div>
-            
-            <h3>Hello {name},</h3>
-            <p>Please find below the consolidated production requirements for all stores. Excel and PDF versions are attached to this email for your convenience.</p>
-            
-            <div class="table-container">
-                {production_table}
-            </div>
-            
-            <div class="footer">
-                <p>This report shows the total quantities needed for production across all stores.</p>
-                <p><strong>Legend:</strong></p>
-                <ul>
-                    <li>🟡 <strong>Yellow highlighted cells:</strong> Items required by specific stores</li>
-                    <li>🟢 <strong>Green highlighted columns:</strong> Total/Required quantities</li>
-                    <li>📊 <strong>Alternating row colors:</strong> For better readability</li>
-                </ul>
-                <p>This report automatically adapts to your data structure with prioritized location ordering.</p>
-                
-                <p>Regards,<br><strong>KPI360.ai Team</strong></p>
-            </div>
-        </body>
-        </html>
-        """
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h2>Consolidated Production Requirements</h2>
+        </div>
 
-        # Create attachments list for your MessageSchema
-        attachments = []
-        
-        # Add Excel attachment
-        if excel_path and os.path.exists(excel_path):
-            attachments.append(excel_path)
-        
-        # Add PDF attachment  
-        if pdf_path and os.path.exists(pdf_path):
-            attachments.append(pdf_path)
-
-        # Use your original MessageSchema with attachments
-        message = MessageSchema(
-            subject=subject,
-            recipients=[to],
-            body=html_body,
-            subtype="html",
-            attachments=attachments if attachments else None  # Add attachments if they exist
-        )
+        <h3>Hello {name},</h3>
+        <p>Please find below the consolidated production requirements for all stores. Excel and PDF versions are attached to this email for your convenience.</p>
 
-        async def send():
-            await fm.send_message(message)
+        <div class="table-container">
+            {production_table}
+        </div>
 
-        asyncio.run(send())
-        print(f"Production requirements email with downloads sent successfully to {to}")
-        
-        # Clean up files after sending
-        if excel_path and os.path.exists(excel_path):
-            os.remove(excel_path)
-        if pdf_path and os.path.exists(pdf_path):
-            os.remove(pdf_path)
-        
+        <div class="footer">
+            <p>This report shows the total quantities needed for production across all stores.</p>
+            <p><strong>Legend:</strong></p>
+            <ul>
+                <li>🟡 <strong>Yellow highlighted cells:</strong> Items required by specific stores</li>
+                <li>🟢 <strong>Green highlighted columns:</strong> Total/Required quantities</li>
+                <li>📊 <strong>Alternating row colors:</strong> For better readability</li>
+            </ul>
+            <p>This report automatically adapts to your data structure with prioritized location ordering.</p>
+
+            <p>Regards,<br><strong>KPI360.ai Team</strong></p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def render_production_report(company_id: int, db: Session):
+    """
+    Production data of a company with its HTML table and XLSX / PDF attachments,
+    rendered once in memory so the same report can go to every recipient.
+    """
+    data = get_consolidated_production(company_id, db)
+
+    # Reorder the data according to custom location priority
+    data = reorder_production_columns(data)
+
+    # Generate timestamp for file names
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    attachments = []
+    excel_content = build_production_excel(data)
+    if excel_content:
+        attachments.append((f"production_requirements_{timestamp}.xlsx", excel_content, XLSX_MIME_TYPE))
+    pdf_content = build_production_pdf(data)
+    if pdf_content:
+        attachments.append((f"production_requirements_{timestamp}.pdf", pdf_content, "application/pdf"))
+
+    return {
+        "data": data,
+        "production_table": build_production_table_html(data),
+        "attachments": attachments,
+    }
+
+
+def send_production_reports(company_id: int, recipients: List[tuple]):
+    """
+    Render the production report of a company once and queue it for every
+    (email, name) recipient; the outbox workers deliver them over pooled SMTP
+    connections.
+
+    Returns:
+        dict with the recipient / queued / failed counts and the render and queue timings.
+    """
+    stats = {
+        "company_id": company_id,
+        "recipients": len(recipients),
+        "queued": 0,
+        "failed": 0,
+        "render_seconds": 0.0,
+        "queue_seconds": 0.0,
+    }
+    if not recipients:
+        return stats
+
+    db = SessionLocal()
+    started = perf_counter()
+    try:
+        report = render_production_report(company_id, db)
     except Exception as e:
-        print(f"Failed to send production requirements email to {to}: {e}")
+        print(f"Failed to render production report for company {company_id}: {e}")
+        stats["failed"] = len(recipients)
+        return stats
     finally:
+        stats["render_seconds"] = round(perf_counter() - started, 3)
         db.close()
 
+    started = perf_counter()
+    try:
+        messages = [
+            {
+                "recipients": [to],
+                "subject": PRODUCTION_REPORT_SUBJECT,
+                "html_body": build_production_email_html(name, report["production_table"]),
+            }
+            for to, name in recipients
+        ]
+        # The attachments are stored once for the whole batch
+        queue_emails(messages, attachments=report["attachments"], kind="production_report")
+        stats["queued"] = len(messages)
+        print(f"Production requirements emails queued for company {company_id}: {[to for to, _ in recipients]}")
+    except Exception as e:
+        stats["failed"] = len(recipients)
+        print(f"Failed to queue production requirements emails for company {company_id}: {e}")
+    finally:
+        stats["queue_seconds"] = round(perf_counter() - started, 3)
+
+    return stats
+
+
+def send_actual_email(to: str, name: str, company_id: int = None):
+    """Send the consolidated production report to a single recipient"""
+    print("---------------------------------------------")
+    print("Sending email to:", to, "for user:", name, "with company ID:", company_id)
+    print("---------------------------------------------")
+    return send_production_reports(company_id, [(to, name)])
+
         
 # def send_production(to: Union[str, List[str]], name: str, company_id: int = None, is_update: bool = False, is_email_update: bool = False, recent_order_id: int = None):
 #     """
@@ -2329,131 +2239,10 @@ def send_production(to: Union[str, List[str]], name: str, company_id: int = None
         if not os.path.exists(downloads_dir):
             os.makedirs(downloads_dir)
 
-        # Generate Excel file
-        def create_excel_file(data, filename):
-            if not data or 'data' not in data or not data['data']:
-                return None
-            
+        # Generate Excel file (in memory, with the recent / current order highlighting)
+        def create_excel_file(data):
             try:
-                # Use sorted columns for DataFrame creation
-                columns = data.get('columns', list(data['data'][0].keys()) if data['data'] else [])
-                
-                # Create DataFrame with ordered columns
-                df_data = []
-                for item in data['data']:
-                    ordered_row = {col: item.get(col, "") for col in columns}
-                    df_data.append(ordered_row)
-                
-                df = pd.DataFrame(df_data, columns=columns)
-                
-                # Create Excel file with formatting
-                excel_path = os.path.join(downloads_dir, filename)
-                with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='Production Requirements', index=False)
-                    
-                    # Get workbook and worksheet objects
-                    workbook = writer.book
-                    worksheet = writer.sheets['Production Requirements']
-                    
-                    # Apply formatting
-                    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-                    
-                    # Header formatting
-                    header_font = Font(bold=True, color="000000")
-                    header_fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
-                    total_fill = PatternFill(start_color="E8F5E8", end_color="E8F5E8", fill_type="solid")
-                    highlight_fill = PatternFill(start_color="FFF3CD", end_color="FFF3CD", fill_type="solid")
-                    recent_order_fill = PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")  # Light red for recent orders
-                    current_order_fill = PatternFill(start_color="FF9999", end_color="FF9999", fill_type="solid")  # Darker red for current order
-                    
-                    # Border style
-                    thin_border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-                    
-                    # Get item name column index
-                    item_name_col = None
-                    for idx, col in enumerate(df.columns):
-                        if 'item' in col.lower() and ('name' in col.lower() or col.lower() == 'item'):
-                            item_name_col = idx + 1  # Excel is 1-indexed
-                            break
-                    
-                    # Format headers
-                    for col_num, column in enumerate(df.columns, 1):
-                        cell = worksheet.cell(row=1, column=col_num)
-                        cell.font = header_font
-                        cell.fill = header_fill
-                        cell.alignment = Alignment(horizontal="center", vertical="center")
-                        cell.border = thin_border
-                        
-                        # Special formatting for total columns
-                        if 'total' in column.lower() or 'required' in column.lower():
-                            cell.fill = total_fill
-                    
-                    # Format data cells
-                    for row_num in range(2, len(df) + 2):
-                        # Check if this item is a recent order or current order
-                        is_recent_item = False
-                        is_current_order_item = False
-                        if item_name_col and (recent_order_items or current_order_items):
-                            item_name = worksheet.cell(row=row_num, column=item_name_col).value
-                            item_name_str = str(item_name)
-                            is_current_order_item = item_name_str in current_order_items
-                            # Recent items include ALL items ordered after global time (including current order)
-                            is_recent_item = item_name_str in recent_order_items
-                        
-                        for col_num, column in enumerate(df.columns, 1):
-                            cell = worksheet.cell(row=row_num, column=col_num)
-                            cell.border = thin_border
-                            cell.alignment = Alignment(horizontal="center", vertical="center")
-                            
-                            # Apply base effects first: 1) Recent orders (red), 2) Totals (green), 3) Positive values (yellow)
-                            if is_recent_item:
-                                cell.fill = recent_order_fill
-                                cell.font = Font(bold=True, color="CC0000")  # Red bold text
-                            elif 'total' in column.lower() or 'required' in column.lower():
-                                cell.fill = total_fill
-                                cell.font = Font(bold=True)
-                            elif ('total' not in column.lower() and 'required' not in column.lower() 
-                                and isinstance(cell.value, (int, float)) and cell.value > 0):
-                                cell.fill = highlight_fill
-                            
-                            # Final layer: Apply bold border and underline for current order items (keep existing formatting)
-                            if is_current_order_item:
-                                # Keep existing font but add underline
-                                current_font = cell.font
-                                cell.font = Font(
-                                    bold=current_font.bold,
-                                    color=current_font.color,
-                                    italic=False,  # No italic
-                                    underline='single'
-                                )
-                                # Add medium border for current order items
-                                medium_border = Border(
-                                    left=Side(style='medium'),
-                                    right=Side(style='medium'),
-                                    top=Side(style='medium'),
-                                    bottom=Side(style='medium')
-                                )
-                                cell.border = medium_border
-                    
-                    # Auto-adjust column widths
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                return excel_path
+                return write_production_xlsx(data, recent_order_items, current_order_items)
             except Exception as e:
                 print(f"Error creating Excel file: {e}")
                 return None
@@ -2667,7 +2456,7 @@ def send_production(to: Union[str, List[str]], name: str, company_id: int = None
         excel_filename = f"production_requirements_{timestamp}.xlsx"
         pdf_filename = f"production_requirements_{timestamp}.pdf"
         
-        excel_path = create_excel_file(data, excel_filename)
+        excel_content = create_excel_file(data)
         pdf_path = create_pdf_file(data, pdf_filename)
         
         production_table = generate_production_table(data)
@@ -2762,54 +2551,23 @@ def send_production(to: Union[str, List[str]], name: str, company_id: int = None
         </html>
         """
 
-        # Create attachments list for your MessageSchema
+        # Create attachments list (filename, content, mime type) for the outbox
         attachments = []
         
         # Add Excel attachment
-        if excel_path and os.path.exists(excel_path):
-            attachments.append(excel_path)
+        if excel_content:
+            attachments.append((excel_filename, excel_content, XLSX_MIME_TYPE))
         
         # Add PDF attachment  
         if pdf_path and os.path.exists(pdf_path):
-            attachments.append(pdf_path)
-
-        # Use your original MessageSchema with attachments
-        message = MessageSchema(
-            subject=subject,
-            recipients=recipient_list,  # Now supports multiple recipients
-            body=html_body,
-            subtype="html",
-            attachments=attachments if attachments else None  # Add attachments if they exist
-        )
+            with open(pdf_path, "rb") as f:
+                attachments.append((os.path.basename(pdf_path), f.read(), "application/pdf"))
 
-        async def send():
-            try:
-                await fm.send_message(message)
-                print(f"Email sent successfully to {recipient_list}")
-            except Exception as e:
-                print(f"Error sending email: {e}")
-                raise e
-
-        try:
-            asyncio.run(send())
-            print(f"Production requirements email {'(update)' if is_update else ''} {'(with recent orders)' if is_email_update else ''} with downloads sent successfully to {recipient_list}")
-        except Exception as e:
-            print(f"Failed to send email via asyncio: {e}")
-            # Try alternative approach if asyncio.run fails
-            try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(send())
-                loop.close()
-                print(f"Email sent successfully using alternative method to {recipient_list}")
-            except Exception as e2:
-                print(f"Alternative email send method also failed: {e2}")
-                raise e2
+        # Queue the email; the outbox workers deliver it over pooled SMTP connections
+        queue_email(subject, recipient_list, html_body, attachments=attachments, kind="production_update")
+        print(f"Production requirements email {'(update)' if is_update else ''} {'(with recent orders)' if is_email_update else ''} queued for {recipient_list}")
         
         # Clean up files after sending
-        if excel_path and os.path.exists(excel_path):
-            os.remove(excel_path)
         if pdf_path and os.path.exists(pdf_path):
             os.remove(pdf_path)
         
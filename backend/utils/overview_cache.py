@@ -0,0 +1,71 @@
+"""
+Per-user snapshots of the company overview (routers/company_overview.py).
+
+A snapshot is dropped when it expires (COMPANY_OVERVIEW_CACHE_SECONDS), and
+all snapshots are dropped after any commit that writes users, companies,
+locations, their assignments or permissions (see utils/cache_invalidation).
+Other worker processes see such changes once their snapshots expire.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from models.companies import Company
+from models.company_locations import CompanyLocation
+from models.locations import Store
+from models.permissions import Permission
+from models.user_company import UserCompany
+from models.user_company_companylocation import UserCompanyCompanyLocation
+from models.users import User
+from utils.cache_invalidation import invalidate_on_commit
+
+COMPANY_OVERVIEW_CACHE_SECONDS = int(os.getenv("COMPANY_OVERVIEW_CACHE_SECONDS", "60"))
+MAX_ENTRIES = 512
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # key -> (expires at, companies)
+_generation = 0  # bumped on invalidation so a snapshot built meanwhile is not stored
+
+
+def current_generation() -> int:
+    return _generation
+
+
+def get_overview(key):
+    """Cached companies for key, or None"""
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires_at, companies = entry
+        if expires_at < time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return companies
+
+
+def put_overview(key, companies, generation: int):
+    """Store a snapshot built when the generation was `generation`"""
+    with _lock:
+        if generation != _generation:
+            return
+        _cache[key] = (time.monotonic() + COMPANY_OVERVIEW_CACHE_SECONDS, companies)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def invalidate_company_overview():
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+invalidate_on_commit(
+    (User, Company, Store, CompanyLocation, UserCompany, UserCompanyCompanyLocation, Permission),
+    invalidate_company_overview,
+)
@@ -0,0 +1,183 @@
+"""
+Keyset pagination and column projection for the list endpoints.
+
+A page is read with `WHERE (sort_key, id) > (last sort_key, last id) ORDER BY
+sort_key, id LIMIT n`, so every page costs the same index range scan however
+deep it is (OFFSET reads and discards every skipped row). The position is
+handed to the client as an opaque cursor in the X-Next-Cursor response header;
+the body stays the list of rows.
+
+Rows whose sort key is NULL come after all the others, ordered by id. They are
+read in a second query (`sort_key IS NULL ORDER BY id`) rather than with a
+NULLS LAST expression, which would stop the database from using the index.
+
+`fields=id,company_id,created_at` selects only those columns, so list views do
+not load the JSON documents (items_ordered, file_data, ...) of every row.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+
+class PaginationError(ValueError):
+    """Invalid cursor, sort key or field list (a client error)"""
+
+
+def _column(model, name: str):
+    column = model.__table__.columns.get(name)
+    if column is None:
+        raise PaginationError(f"Unknown field: {name}")
+    return getattr(model, column.key), column
+
+
+def parse_fields(model, fields: Optional[str], required: Iterable[str] = ("id",)) -> Optional[List[str]]:
+    """
+    Column names of a `fields=` parameter ("id,company_id,created_at") in request
+    order, plus the `required` ones; None when the parameter is not given.
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    for name in names:
+        _column(model, name)
+    return list(dict.fromkeys([*required, *names]))
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(sort: str, descending: bool, value, row_id: int) -> str:
+    payload = json.dumps({"s": sort, "d": descending, "v": _encode_value(value), "i": row_id},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool, column) -> Tuple[object, int]:
+    """(sort value, id) of the last row of the previous page"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, cursor_descending = payload["s"], payload["d"]
+        value, row_id = _decode_value(column, payload["v"]), int(payload["i"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise PaginationError("Invalid cursor")
+    if cursor_sort != sort or cursor_descending != descending:
+        raise PaginationError("The cursor belongs to a listing with another sort order")
+    return value, row_id
+
+
+def keyset_page(query, sort: str = "id", cursor: Optional[str] = None, limit: int = 100,
+                descending: bool = False, fields: Optional[Sequence[str]] = None,
+                sort_keys: Iterable[str] = ("id",)) -> Tuple[list, Optional[str]]:
+    """
+    One page of an unordered single-entity query (`db.query(Model).filter(...)`).
+
+    Args:
+        sort: Column to order by, one of `sort_keys`; ties are ordered by id.
+        cursor: Cursor returned with the previous page, None for the first page.
+        fields: Columns to select (see parse_fields); None loads the mapped objects.
+
+    Returns:
+        (rows, cursor of the next page or None on the last page). Rows are mapped
+        objects, or Row tuples of the selected fields.
+    """
+    if sort not in sort_keys:
+        raise PaginationError(f"Cannot sort by {sort}; use one of {', '.join(sort_keys)}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    model = query.column_descriptions[0]["entity"]
+    sort_attr, sort_column = _column(model, sort)
+    id_attr = model.id
+    nullable = sort != "id" and sort_column.nullable
+
+    after = decode_cursor(cursor, sort, descending, sort_column) if cursor else None
+    if fields is not None:
+        query = query.with_entities(*[_column(model, name)[0] for name in dict.fromkeys(["id", sort, *fields])])
+
+    def ordered(q, *attrs):
+        return q.order_by(*[attr.desc() if descending else attr.asc() for attr in attrs])
+
+    def beyond(attr, value):
+        return attr < value if descending else attr > value
+
+    rows = []
+    # Rows with a sort value
+    if after is None or after[0] is not None:
+        q = query.filter(sort_attr.isnot(None)) if nullable else query
+        if after is not None:
+            value, row_id = after
+            if sort == "id":
+                q = q.filter(beyond(id_attr, row_id))
+            else:
+                q = q.filter(or_(beyond(sort_attr, value), and_(sort_attr == value, beyond(id_attr, row_id))))
+        q = ordered(q, sort_attr) if sort == "id" else ordered(q, sort_attr, id_attr)
+        rows = q.limit(limit + 1).all()
+
+    # Then the rows without one
+    if nullable and len(rows) <= limit:
+        q = query.filter(sort_attr.is_(None))
+        if after is not None and after[0] is None:
+            q = q.filter(beyond(id_attr, after[1]))
+        rows += ordered(q, id_attr).limit(limit + 1 - len(rows)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, descending, getattr(last, sort_column.key), last.id)
+
+
+def projected_response(rows, next_cursor: Optional[str]) -> JSONResponse:
+    """JSON response of the Row tuples (or dicts) selected with `fields`, with the next page's cursor"""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    items = [row if isinstance(row, dict) else dict(row._mapping) for row in rows]
+    return JSONResponse(content=jsonable_encoder(items), headers=headers)
+
+
+def paginate(response: Response, query, sort: str = "id", cursor: Optional[str] = None,
+             limit: int = 100, order: str = "asc", fields: Optional[str] = None,
+             sort_keys: Iterable[str] = ("id",)):
+    """
+    keyset_page for a list route: the mapped objects (validated by the route's
+    response_model), or a JSONResponse of the requested fields. The next page's
+    cursor is set in the X-Next-Cursor header; a bad parameter is a 400.
+    """
+    try:
+        model = query.column_descriptions[0]["entity"]
+        columns = parse_fields(model, fields)
+        rows, next_cursor = keyset_page(query, sort, cursor, limit, order == "desc", columns, sort_keys)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if columns is not None:
+        return projected_response(rows, next_cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
@@ -0,0 +1,100 @@
+"""
+Password hashing for sign-in, sign-up and password changes.
+
+bcrypt is deliberately CPU-heavy. When every store manager signs in at
+opening time, running it directly in the request threads lets the hashing
+burst take every core and slows unrelated endpoints down. Hashes and
+verifications here run on a small dedicated thread pool instead
+(PASSWORD_HASH_WORKERS), so at most that many bcrypt computations run at
+once. Async handlers await them (hash_password_async, verify_password_async)
+without holding a request thread; sync callers wait for the result.
+
+The cost factor is BCRYPT_ROUNDS. When it changes, existing hashes keep
+verifying, and verify_password returns a new hash at the current cost so
+the caller can store it (rehash on login).
+
+Configuration (environment variables):
+    BCRYPT_ROUNDS           bcrypt cost factor (log2 of the iterations)
+    PASSWORD_HASH_WORKERS   concurrent bcrypt computations per process
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.hash import bcrypt
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+
+_hasher = bcrypt.using(rounds=BCRYPT_ROUNDS)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+            logger.info(f"Password hashing pool started with {PASSWORD_HASH_WORKERS} threads "
+                        f"(bcrypt rounds {BCRYPT_ROUNDS})")
+        return _executor
+
+
+def shutdown_password_hashing():
+    """Stop the hashing threads (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _verify(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    try:
+        valid = _hasher.verify(password, password_hash)
+    except (ValueError, TypeError):
+        # Not a bcrypt hash (or empty): never valid
+        return False, None
+    if valid and _hasher.needs_update(password_hash):
+        return True, _hasher.hash(password)
+    return valid, None
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of password at the configured cost, computed on the hashing pool"""
+    return _get_executor().submit(_hasher.hash, password).result()
+
+
+def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check password against a stored hash on the hashing pool.
+
+    Returns:
+        (valid, new_hash): new_hash is set when the password is valid but the
+        stored hash uses another cost factor; store it in place of the old one.
+    """
+    return _get_executor().submit(_verify, password, password_hash).result()
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password for async handlers: awaits the hashing pool instead of blocking"""
+    return await asyncio.wrap_future(_get_executor().submit(_hasher.hash, password))
+
+
+async def verify_password_async(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """verify_password for async handlers: awaits the hashing pool instead of blocking"""
+    return await asyncio.wrap_future(_get_executor().submit(_verify, password, password_hash))
+
+
+def pool_stats() -> dict:
+    return {"workers": PASSWORD_HASH_WORKERS, "bcrypt_rounds": BCRYPT_ROUNDS}
@@ -0,0 +1,72 @@
+"""
+Cache of authenticated principals for dependencies.auth.get_current_user.
+
+Entries are keyed by the token's (subject, iat), so a new sign-in never
+reuses an old entry, and live for PRINCIPAL_CACHE_SECONDS. crud.users drops
+a user's entries when it updates, (de)activates or deletes the user, and any
+commit that writes permissions clears the cache. Other worker processes see
+such changes within the TTL.
+"""
+
+import os
+import threading
+
+from cachetools import TTLCache
+
+from models.permissions import Permission
+from utils.cache_invalidation import invalidate_on_commit
+
+PRINCIPAL_CACHE_SECONDS = int(os.getenv("PRINCIPAL_CACHE_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+
+PERMISSION_FLAGS = ["upload_excel", "d1", "d2", "d3", "d4", "d5", "d6", "d7"]
+
+_lock = threading.Lock()
+_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_SECONDS)
+
+
+class Principal:
+    """
+    The authenticated user as seen by the routes: the User columns they read,
+    plus the permission flags of the user's company. Not attached to a session.
+    """
+
+    def __init__(self, user, permission=None):
+        self.id = user.id
+        self.email = user.email
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+        self.role = user.role
+        self.company_id = user.company_id
+        self.isActive = user.isActive
+        self.permissions = {
+            flag: bool(getattr(permission, flag, False)) for flag in PERMISSION_FLAGS
+        }
+
+    def __repr__(self):
+        return f"Principal(id={self.id}, email={self.email!r}, role={self.role}, company_id={self.company_id})"
+
+
+def get_principal(key):
+    with _lock:
+        return _cache.get(key)
+
+
+def put_principal(key, principal: Principal):
+    with _lock:
+        _cache[key] = principal
+
+
+def invalidate_principal(user_id: int):
+    """Drop the cached principals of a user"""
+    with _lock:
+        for key in [key for key, principal in _cache.items() if principal.id == user_id]:
+            _cache.pop(key, None)
+
+
+def clear_principals():
+    with _lock:
+        _cache.clear()
+
+
+invalidate_on_commit((Permission,), clear_principals)
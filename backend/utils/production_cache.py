@@ -0,0 +1,167 @@
+"""
+Consolidated-production cache.
+
+The item x location production matrix of a company for one business day is
+built once and shared by the scheduled emails, the order notification emails
+and the consolidated production endpoint, instead of being recomputed for every
+recipient.
+
+Entries are keyed by (company_id, business_date) and remember the orders
+version of each location column (see crud.storeorder_lines.get_location_versions).
+Every read compares those versions with one grouped query and recomputes only
+the columns whose orders changed; /orderitems and /orderupdate do the same right
+after they commit, so readers usually find the entry already current. Writes
+made by another process are picked up by the version check.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from crud import storeorder_lines as storeorder_lines_crud
+from models.locations import Store
+
+logger = logging.getLogger(__name__)
+
+# Company-days kept in memory (least recently used are dropped first)
+MAX_ENTRIES = 256
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def _to_business_date(value):
+    if value is None:
+        return datetime.today().date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _location_names(db: Session, location_ids):
+    if not location_ids:
+        return {}
+    locations = db.query(Store).filter(Store.id.in_(list(location_ids))).all()
+    names = {loc.id: loc.name for loc in locations}
+    return {location_id: names.get(location_id, f"Location {location_id}") for location_id in location_ids}
+
+
+def _sync_entry(db: Session, company_id: int, business_date: date, cached: dict = None,
+                written_locations=()) -> dict:
+    """
+    Return an entry matching the current orders, recomputing only the stale location
+    columns. written_locations are recomputed whatever their versions say.
+    """
+    versions = storeorder_lines_crud.get_location_versions(db, company_id, None, business_date, business_date)
+
+    if cached is None:
+        stale = set(versions)
+        quantities, units, locations = {}, {}, {}
+    else:
+        stale = {
+            location_id for location_id in set(versions) | set(cached["versions"])
+            if versions.get(location_id) != cached["versions"].get(location_id)
+        } | set(written_locations)
+        if not stale:
+            return cached
+        # Copy the untouched columns; the cached entry may be in use by a reader
+        quantities = {}
+        for name, per_location in cached["quantities"].items():
+            others = {loc: qty for loc, qty in per_location.items() if loc not in stale}
+            if others:
+                quantities[name] = others
+        units = dict(cached["units"])
+        locations = {loc: name for loc, name in cached["locations"].items() if loc not in stale}
+
+    if stale:
+        item_rows = storeorder_lines_crud.get_item_location_quantities(
+            db, company_id, None if cached is None else list(stale), business_date, business_date
+        )
+        for name, location_id, quantity, unit in item_rows:
+            if not name:  # Only process if name exists
+                continue
+            per_location = quantities.setdefault(name, {})
+            per_location[location_id] = per_location.get(location_id, 0) + (quantity or 0)
+            units[name] = unit or ""
+        locations.update(_location_names(db, {row[1] for row in item_rows if row[1]}))
+
+    entry = {
+        "versions": versions,
+        "quantities": quantities,  # item -> {location_id: quantity}
+        "units": units,
+        "locations": locations,
+    }
+    key = (company_id, business_date)
+    with _lock:
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return entry
+
+
+def _render(entry: dict) -> dict:
+    """Columns / rows of the consolidated production table (fresh objects on every call)"""
+    location_names = sorted(set(entry["locations"].values()))
+    table_rows = []
+    for item_name, per_location in entry["quantities"].items():
+        row = {"Item": item_name}
+        by_name = {}
+        for location_id, quantity in per_location.items():
+            location_name = entry["locations"].get(location_id, f"Location {location_id}")
+            by_name[location_name] = by_name.get(location_name, 0) + quantity
+
+        total_required = 0
+        for location_name in location_names:
+            quantity = by_name.get(location_name, 0)
+            row[location_name] = quantity
+            total_required += quantity
+        row["Total Required"] = total_required
+        row["Unit"] = entry["units"].get(item_name, "")
+        table_rows.append(row)
+
+    return {
+        "columns": ["Item"] + location_names + ["Total Required", "Unit"],
+        "data": table_rows,
+    }
+
+
+def get_production_matrix(db: Session, company_id: int, business_date=None) -> dict:
+    """
+    Consolidated production table of a company for one day (default today):
+    {"columns": [...], "data": [...]}; "data" is empty when nothing was ordered.
+    """
+    business_date = _to_business_date(business_date)
+    with _lock:
+        cached = _entries.get((company_id, business_date))
+    return _render(_sync_entry(db, company_id, business_date, cached))
+
+
+def record_order_write(db: Session, order, previous_date=None):
+    """
+    Bring the cached days of an order up to date after it was created or updated
+    (and committed). The order's location column is recomputed on each cached day
+    even if its version looks unchanged. previous_date is the order's effective
+    date before an update, so the day it moved away from is refreshed too. Days
+    that are not cached are built on first read.
+    """
+    days = {_to_business_date(order.effective_date or order.updated_at or order.created_at)}
+    if previous_date is not None:
+        days.add(_to_business_date(previous_date))
+
+    for day in days:
+        key = (order.company_id, day)
+        with _lock:
+            cached = _entries.get(key)
+        if cached is None:
+            continue
+        try:
+            _sync_entry(db, order.company_id, day, cached, written_locations={order.location_id})
+        except Exception as e:
+            # Readers re-check the versions, so a stale entry is harmless
+            logger.error(f"Error refreshing production cache for company {order.company_id}: {e}")
@@ -0,0 +1,175 @@
+"""
+Query-plan check of the filter routers.
+
+Each entry of FILTER_QUERY_SHAPES rebuilds the query a filter router runs
+(company, date range, IN lists) with sample values from the database. The
+check runs EXPLAIN on each of them and flags the ones that read a fact table
+without an index:
+
+    python -m utils.query_plans [--company-id N] [--allow-planner-choice]
+
+On PostgreSQL sequential scans are disabled for the EXPLAIN (unless
+--allow-planner-choice), so a Seq Scan in the plan means no index can serve
+the query, whatever the table size. On SQLite a "SCAN <table>" step without
+an index is flagged. The exit status is 1 when a shape is flagged, so the
+check can run after applying migrations.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.sales_pmix import SalesPMix
+from models.budget import Budget
+from models.financials_company_wide import FinancialsCompanyWide
+
+
+def _sample(db: Session, column, company_id: int, count: int = 2) -> list:
+    """A few distinct values of `column` for the company, as a router would receive them"""
+    model = column.class_
+    rows = db.query(column).filter(model.company_id == company_id, column.isnot(None)).distinct().limit(count).all()
+    return [value for value, in rows] or ["sample"]
+
+
+def _date_range(days: int = 90):
+    end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return end - timedelta(days=days), end + timedelta(days=1)
+
+
+def _sales_split_query(db: Session, company_id: int):
+    start, end = _date_range()
+    return db.query(SalesPMix).filter(
+        SalesPMix.company_id == company_id,
+        SalesPMix.Sent_Date >= start,
+        SalesPMix.Sent_Date < end,
+        SalesPMix.Location.in_(_sample(db, SalesPMix.Location, company_id)),
+        SalesPMix.Category.in_(_sample(db, SalesPMix.Category, company_id))
+    )
+
+
+def _pmix_query(db: Session, company_id: int):
+    start, end = _date_range()
+    return db.query(SalesPMix).filter(
+        SalesPMix.company_id == company_id,
+        SalesPMix.Sent_Date >= start,
+        SalesPMix.Sent_Date < end,
+        SalesPMix.Location.in_(_sample(db, SalesPMix.Location, company_id)),
+        SalesPMix.Server.in_(_sample(db, SalesPMix.Server, company_id)),
+        SalesPMix.Category.in_(_sample(db, SalesPMix.Category, company_id))
+    )
+
+
+def _financials_query(db: Session, company_id: int):
+    start, end = _date_range()
+    return db.query(FinancialsCompanyWide).filter(
+        FinancialsCompanyWide.company_id == company_id,
+        FinancialsCompanyWide.Calendar_Date >= start.date(),
+        FinancialsCompanyWide.Calendar_Date < end.date(),
+        FinancialsCompanyWide.Store.in_(_sample(db, FinancialsCompanyWide.Store, company_id))
+    )
+
+
+def _budget_query(db: Session, company_id: int):
+    return db.query(Budget).filter(
+        Budget.company_id == company_id,
+        Budget.Year == datetime.now().year,
+        Budget.Store.in_(_sample(db, Budget.Store, company_id))
+    )
+
+
+# Router -> query shape it runs (keep in step with the routers' filters)
+FILTER_QUERY_SHAPES: Dict[str, Callable[[Session, int], object]] = {
+    "sales_split_filter: sales_pmix": _sales_split_query,
+    "pmix_filter: sales_pmix": _pmix_query,
+    "financials_filter: financials_company_wide": _financials_query,
+    "financials_filter: budget": _budget_query,
+    "companywide_filter: financials_company_wide": _financials_query,
+}
+
+
+def explain(db: Session, query, allow_planner_choice: bool = False) -> List[str]:
+    """The plan of a query, one line per step"""
+    connection = db.connection()
+    dialect = connection.dialect
+    compiled = query.statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if dialect.name == "postgresql":
+        if not allow_planner_choice:
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        lines = []
+
+        def walk(node, depth=0):
+            target = node.get("Relation Name", "")
+            index = node.get("Index Name")
+            lines.append("  " * depth + f"{node['Node Type']} {target}" + (f" using {index}" if index else ""))
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"])
+        return lines
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Plan steps reading a whole table"""
+    flagged = []
+    for step in plan:
+        text = step.strip()
+        if text.startswith("Seq Scan"):
+            flagged.append(text)
+        elif text.startswith("SCAN ") and "USING" not in text:
+            flagged.append(text)
+    return flagged
+
+
+def check_filter_queries(db: Session, company_id: int, allow_planner_choice: bool = False) -> List[dict]:
+    results = []
+    for name, build in FILTER_QUERY_SHAPES.items():
+        plan = explain(db, build(db, company_id), allow_planner_choice)
+        db.rollback()  # ends the transaction of SET LOCAL
+        results.append({"shape": name, "plan": plan, "full_scans": full_scans(plan)})
+    return results
+
+
+def _default_company_id(db: Session) -> Optional[int]:
+    row = db.query(SalesPMix.company_id).first() or db.query(FinancialsCompanyWide.company_id).first()
+    return row[0] if row else None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN the filter routers' queries and flag full table scans")
+    parser.add_argument("--company-id", type=int, help="Company to build the queries for (default: one with data)")
+    parser.add_argument("--allow-planner-choice", action="store_true",
+                        help="PostgreSQL: keep sequential scans enabled and report the plan actually chosen")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        company_id = args.company_id or _default_company_id(db) or 1
+        flagged = 0
+        for result in check_filter_queries(db, company_id, args.allow_planner_choice):
+            status = "FULL SCAN" if result["full_scans"] else "ok"
+            flagged += bool(result["full_scans"])
+            print(f"[{status}] {result['shape']}")
+            for step in result["plan"]:
+                print(f"    {step}")
+        print(f"{flagged} of {len(FILTER_QUERY_SHAPES)} query shapes read a table without an index")
+        return 1 if flagged else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+In-process sliding-window rate limiter (used to throttle sign-in attempts).
+
+Each limiter counts events per key (an account, a client IP, ...) over the
+last `window_seconds`. Counts are per worker process, so with several
+workers the effective limit is up to `limit` times the number of workers.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class RateLimiter:
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100_000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._events = {}  # key -> deque of event times (monotonic)
+        self._lock = threading.Lock()
+
+    def _prune(self, events: deque, now: float):
+        while events and now - events[0] >= self.window_seconds:
+            events.popleft()
+
+    def retry_after(self, key) -> Optional[float]:
+        """Seconds until key may try again, or None when it is under the limit"""
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return None
+            self._prune(events, now)
+            if len(events) < self.limit:
+                return None
+            return self.window_seconds - (now - events[0])
+
+    def hit(self, key):
+        """Record one event for key"""
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                if len(self._events) >= self.max_keys:
+                    self._evict(now)
+                events = self._events[key] = deque()
+            self._prune(events, now)
+            events.append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+
+    def _evict(self, now: float):
+        """Drop keys without recent events; if none, the oldest half"""
+        for key in [key for key, events in self._events.items()
+                    if not events or now - events[-1] >= self.window_seconds]:
+            del self._events[key]
+        if len(self._events) >= self.max_keys:
+            for key in sorted(self._events, key=lambda k: self._events[k][-1])[:len(self._events) // 2]:
+                del self._events[key]
@@ -0,0 +1,158 @@
+"""
+XLSX writer for the production-requirements emails.
+
+The table is streamed into a write-only openpyxl workbook: every cell is
+written once with one of a few named styles registered on the workbook, and
+column widths come from the DataFrame's string lengths. Previously the table
+was written through pd.ExcelWriter, every cell was then restyled with freshly
+built Font / PatternFill / Border objects, and every column was scanned again
+for its width.
+"""
+
+import io
+import numbers
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+SHEET_NAME = "Production Requirements"
+MAX_COLUMN_WIDTH = 50
+
+HEADER_FILL = "F8F9FA"
+TOTAL_FILL = "E8F5E8"
+POSITIVE_FILL = "FFF3CD"  # quantities ordered by a store
+RECENT_FILL = "FFE6E6"  # items ordered after the global time
+RECENT_FONT_COLOR = "CC0000"
+
+
+def _is_total_column(column) -> bool:
+    column = str(column).lower()
+    return "total" in column or "required" in column
+
+
+def _named_styles():
+    """
+    Styles of the sheet. Each cell style has a "_current" variant (underlined,
+    medium border) for the items of the order that triggered the email.
+    """
+    center = Alignment(horizontal="center", vertical="center")
+    thin = Side(style="thin")
+    medium = Side(style="medium")
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    medium_border = Border(left=medium, right=medium, top=medium, bottom=medium)
+
+    def fill(color):
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    def style(name, bold=False, color=None, underline=None, fill_color=None, border=thin_border):
+        named = NamedStyle(name=name)
+        named.font = Font(name="Calibri", size=11, bold=bold, color=color, underline=underline)
+        named.alignment = center
+        named.border = border
+        if fill_color is not None:
+            named.fill = fill(fill_color)
+        return named
+
+    cell_styles = {
+        # name: (bold, font color, fill)
+        "cell": (False, None, None),
+        "cell_positive": (False, None, POSITIVE_FILL),
+        "cell_total": (True, None, TOTAL_FILL),
+        "cell_recent": (True, RECENT_FONT_COLOR, RECENT_FILL),
+    }
+
+    styles = [
+        style("header", bold=True, color="000000", fill_color=HEADER_FILL),
+        style("header_total", bold=True, color="000000", fill_color=TOTAL_FILL),
+    ]
+    for name, (bold, color, fill_color) in cell_styles.items():
+        styles.append(style(name, bold, color, fill_color=fill_color))
+        styles.append(style(f"{name}_current", bold, color, underline="single",
+                            fill_color=fill_color, border=medium_border))
+    return styles
+
+
+def column_widths(df: pd.DataFrame) -> list:
+    """Width of each column: longest value or header + 2, capped at MAX_COLUMN_WIDTH"""
+    if df.empty:
+        value_lengths = [0] * len(df.columns)
+    else:
+        value_lengths = [
+            int(df.iloc[:, i].astype(str).str.len().max()) for i in range(len(df.columns))
+        ]
+    return [
+        min(max(value_length, len(str(column))) + 2, MAX_COLUMN_WIDTH)
+        for value_length, column in zip(value_lengths, df.columns)
+    ]
+
+
+def _item_column_index(columns):
+    for idx, column in enumerate(columns):
+        column = str(column).lower()
+        if "item" in column and ("name" in column or column == "item"):
+            return idx
+    return None
+
+
+def _cell(worksheet, value, style):
+    cell = WriteOnlyCell(worksheet, value=value)
+    cell.style = style
+    return cell
+
+
+def write_production_xlsx(data, recent_items=None, current_items=None):
+    """
+    XLSX bytes of a production table ({"columns", "data"}); None when there is no data.
+
+    Args:
+        recent_items: Item names ordered after the global time (red rows).
+        current_items: Item names of the order that triggered the email (underlined, medium border).
+    """
+    if not data or not data.get("data"):
+        return None
+
+    recent_items = recent_items or set()
+    current_items = current_items or set()
+    columns = data.get("columns") or list(data["data"][0].keys())
+    df = pd.DataFrame(data["data"]).reindex(columns=columns, fill_value="")
+
+    workbook = Workbook(write_only=True)
+    for named_style in _named_styles():
+        workbook.add_named_style(named_style)
+    worksheet = workbook.create_sheet(SHEET_NAME)
+
+    # Column widths must be set before the first row is streamed
+    for idx, width in enumerate(column_widths(df), 1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = width
+
+    total_columns = [_is_total_column(column) for column in columns]
+    worksheet.append([
+        _cell(worksheet, column, "header_total" if is_total else "header")
+        for column, is_total in zip(columns, total_columns)
+    ])
+
+    item_idx = _item_column_index(columns)
+    for values in df.itertuples(index=False, name=None):
+        item_name = str(values[item_idx]) if item_idx is not None else None
+        is_recent = item_name in recent_items
+        suffix = "_current" if item_name in current_items else ""
+
+        row = []
+        for value, is_total in zip(values, total_columns):
+            if is_recent:
+                style = "cell_recent"
+            elif is_total:
+                style = "cell_total"
+            elif isinstance(value, numbers.Number) and not isinstance(value, bool) and value > 0:
+                style = "cell_positive"
+            else:
+                style = "cell"
+            row.append(_cell(worksheet, value, style + suffix))
+        worksheet.append(row)
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
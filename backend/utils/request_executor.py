@@ -0,0 +1,100 @@
+"""
+Runs the blocking part of heavy request handlers off the asyncio event loop.
+
+Upload and dashboard filter endpoints do seconds of SQLAlchemy and pandas
+work. Running that directly inside an `async def` handler blocks the event
+loop, so every other request on the worker (including /api/health) waits.
+Handlers pass their blocking section to `run_blocking`, which runs it on a
+dedicated thread pool and limits how many heavy requests a single company can
+have in flight at once, so one busy company cannot starve the others.
+
+The pandas table builders themselves are further spread over processes by
+utils.dashboard_executor.
+
+Configuration (environment variables):
+    REQUEST_EXECUTOR_WORKERS   threads available for heavy request sections
+    COMPANY_CONCURRENCY_LIMIT  heavy requests one company may run at once
+"""
+
+import os
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+REQUEST_EXECUTOR_WORKERS = int(os.getenv("REQUEST_EXECUTOR_WORKERS", "8"))
+COMPANY_CONCURRENCY_LIMIT = int(os.getenv("COMPANY_CONCURRENCY_LIMIT", "2"))
+
+_executor = None
+
+# str(company_id) -> [asyncio.Semaphore, requests holding or waiting for it].
+# Only companies with requests in flight have an entry.
+_company_limiters = {}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=REQUEST_EXECUTOR_WORKERS,
+            thread_name_prefix="request-executor",
+        )
+        logger.info(f"Request executor started with {REQUEST_EXECUTOR_WORKERS} threads")
+    return _executor
+
+
+def _limiter_key(company_id):
+    """Request models accept the company id as int or str: 5 and "5" share a limiter"""
+    return None if company_id is None else str(company_id).strip()
+
+
+def _acquire_limiter_entry(key):
+    entry = _company_limiters.get(key)
+    if entry is None:
+        entry = [asyncio.Semaphore(COMPANY_CONCURRENCY_LIMIT), 0]
+        _company_limiters[key] = entry
+    entry[1] += 1
+    return entry
+
+
+def _release_limiter_entry(key, entry):
+    entry[1] -= 1
+    if entry[1] == 0 and _company_limiters.get(key) is entry:
+        del _company_limiters[key]
+
+
+def shutdown_request_executor():
+    """Stop the request executor threads (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("Request executor stopped")
+
+
+async def run_blocking(company_id, func, *args, **kwargs):
+    """
+    Run a blocking function on the request executor.
+
+    Args:
+        company_id: Company the work belongs to, used for the concurrency limit.
+            None shares a single limiter.
+        func: Blocking callable (DB queries, pandas processing, ...)
+        *args, **kwargs: Passed to func
+
+    Returns:
+        Whatever func returns. Exceptions (including HTTPException) propagate
+        to the caller unchanged.
+    """
+    key = _limiter_key(company_id)
+    entry = _acquire_limiter_entry(key)
+    try:
+        async with entry[0]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                _get_executor(), functools.partial(func, *args, **kwargs)
+            )
+    finally:
+        _release_limiter_entry(key, entry)
@@ -0,0 +1,182 @@
+"""
+SMTP transport and connection pool used by the email outbox (tasks/email_outbox.py).
+
+fastapi_mail opens, authenticates and closes a connection for every message.
+Here authenticated connections are kept open and reused: a pool hands out at
+most `size` connections at a time, checks idle ones with NOOP before reuse, and
+replaces connections that failed.
+
+The transport is pluggable. By default it is built from the fastapi_mail
+settings (models/email_config.conf); setting MAIL_DEBUG_SERVER=host:port sends
+everything, unauthenticated and without TLS, to a local debugging SMTP server
+(e.g. `python -m aiosmtpd -n -l localhost:1025`) instead.
+"""
+
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
+
+from models.email_config import conf
+
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "30"))  # seconds
+SMTP_KEEPALIVE_SECONDS = int(os.getenv("SMTP_KEEPALIVE_SECONDS", "60"))  # idle time before a NOOP check
+
+
+def _secret(value):
+    return value.get_secret_value() if hasattr(value, "get_secret_value") else value
+
+
+class SmtpTransport:
+    """Opens authenticated SMTP connections"""
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None,
+                 starttls: bool = False, use_ssl: bool = False, validate_certs: bool = True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.validate_certs = validate_certs
+
+    def _ssl_context(self):
+        if self.validate_certs:
+            return ssl.create_default_context()
+        return ssl._create_unverified_context()
+
+    def connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=SMTP_TIMEOUT, context=self._ssl_context())
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.starttls and not self.use_ssl:
+                server.starttls(context=self._ssl_context())
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def __repr__(self):
+        return f"SmtpTransport({self.host}:{self.port})"
+
+
+def transport_from_config() -> SmtpTransport:
+    """Transport for MAIL_DEBUG_SERVER if set, else for the fastapi_mail settings"""
+    debug_server = os.getenv("MAIL_DEBUG_SERVER")
+    if debug_server:
+        host, _, port = debug_server.partition(":")
+        return SmtpTransport(host or "localhost", int(port or 1025))
+
+    return SmtpTransport(
+        conf.MAIL_SERVER,
+        conf.MAIL_PORT,
+        username=conf.MAIL_USERNAME if conf.USE_CREDENTIALS else None,
+        password=_secret(conf.MAIL_PASSWORD) if conf.USE_CREDENTIALS else None,
+        starttls=conf.MAIL_STARTTLS,
+        use_ssl=conf.MAIL_SSL_TLS,
+        validate_certs=conf.VALIDATE_CERTS,
+    )
+
+
+def _close(server):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+class SmtpPool:
+    """At most `size` connections of a transport, reused while they stay healthy"""
+
+    def __init__(self, transport, size: int):
+        self.transport = transport
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()  # (connection, last used)
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """A live connection; blocks while all `size` connections are in use"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    server, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if time.monotonic() - last_used < SMTP_KEEPALIVE_SECONDS:
+                    return server
+                try:
+                    if server.noop()[0] == 250:
+                        return server
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._discard(server)
+
+            server = self.transport.connect()
+            with self._lock:
+                self._open += 1
+            return server
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, server, broken: bool = False):
+        """Give a connection back; broken ones are closed instead of reused"""
+        try:
+            if broken:
+                self._discard(server)
+            else:
+                self._idle.put((server, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _discard(self, server):
+        _close(server)
+        with self._lock:
+            self._open -= 1
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(server)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "open": self._open, "idle": self._idle.qsize()}
+
+
+def build_message(subject: str, recipients, html_body: str, attachments=None) -> EmailMessage:
+    """
+    HTML email with in-memory attachments.
+
+    Args:
+        recipients: An address or a list of addresses.
+        attachments: List of (filename, content bytes, mime type) tuples.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr((conf.MAIL_FROM_NAME or "", str(conf.MAIL_FROM)))
+    message["To"] = ", ".join(recipients)
+    message.set_content("This email contains HTML content.")
+    message.add_alternative(html_body, subtype="html")
+
+    for filename, content, mime_type in attachments or []:
+        maintype, subtype = mime_type.split("/", 1)
+        message.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+    return message